@@ -0,0 +1,411 @@
+"""
+Replay benchmark for the AI learning and context pipeline
+Replays a synthetic guild through learn_from_message, build_smart_context, get_user_info_for_ai and the reply splitter
+
+Runs headless: fake messages, members and channels, no Discord connection and no Gemini calls.
+Reports per-stage latency percentiles, allocations per call and memory retained, and can compare against a saved run.
+
+Usage: python benchmark_ai_pipeline.py [--users 3000] [--channels 200] [--messages 20000] [--seed 0]
+                                       [--save results.json] [--baseline results.json] [--tolerance 0.25]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The memory system keeps its files under data/ relative to the working directory,
+# so the benchmark runs in a scratch directory and never touches the bot's real data
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRATCH_DIR = tempfile.mkdtemp(prefix="izumi_bench_")
+sys.path.insert(0, REPO_DIR)
+os.chdir(SCRATCH_DIR)
+
+from bot import MinimalBot
+from cogs.ai.context_builder import ContextBuilder
+from cogs.ai.lexicon import LEXICON_CATEGORIES
+from cogs.ai.response_splitter import preprocess_for_splitting, split_naturally
+from cogs.ai.unified_memory import UnifiedMemorySystem
+from utils.config import STORAGE_FILE
+from utils.storage import SQLiteStore
+
+# Force UTF-8 encoding for output
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+STAGES = ('learn', 'context', 'user_info', 'split', 'save')
+SAVE_EVERY = 1000  # messages between auto-saves, roughly what the save task sees on a busy server
+
+FILLER = ("the a just i you it was so that this what like really know about think said there when then "
+          "again today later maybe because ok yes no lol lmao haha tbh ngl fr same wait true").split()
+EMOJIS = ['😀', '😂', '🥺', '😭', '🔥', '✨', '💀', '👀', ':kekw:', ':pepega:', ':catjam:']
+SYLLABLES = ['ka', 'mi', 'ro', 'to', 'su', 'na', 'ri', 'ko', 'yu', 'ha', 'shi', 'ra', 'ne', 'zu', 'ki', 'lo']
+
+
+# ==================== FAKE DISCORD OBJECTS ====================
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, display_name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.display_name = display_name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, me: FakeUser):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.me = me
+        self.members = {}
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild):
+        self.id = channel_id
+        self.name = f"channel-{channel_id}"
+        self.guild = guild
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, size: int, content_type: str):
+        self.filename = filename
+        self.size = size
+        self.content_type = content_type
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, author: FakeUser, channel: FakeChannel, content: str,
+                 created_at: datetime, mentions: list, attachments: list):
+        self.id = message_id
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.created_at = created_at
+        self.mentions = mentions
+        self.attachments = attachments
+
+
+class ReplayBot:
+    """The parts of MinimalBot the memory system and context builder call, minus the gateway"""
+
+    format_memories_for_ai = MinimalBot.format_memories_for_ai
+    get_additional_user_data = MinimalBot.get_additional_user_data
+    format_izumi_self_for_ai = MinimalBot.format_izumi_self_for_ai
+    get_shared_context = MinimalBot.get_shared_context
+    search_users_by_name = MinimalBot.search_users_by_name
+    get_user_memories = MinimalBot.get_user_memories
+
+    def __init__(self, store_path: str, guilds: dict, user: FakeUser):
+        self.store = SQLiteStore(store_path)
+        self.user = user
+        self.guilds_by_id = guilds
+        self.xp_data = {}
+        self.warnings = {}
+        self.izumi_memories = {}
+        self.unified_memory = UnifiedMemorySystem(self)
+        self._ai_cog = SimpleNamespace(learning_engine=self.unified_memory)
+
+    def get_guild(self, guild_id: int):
+        return self.guilds_by_id.get(guild_id)
+
+    def get_cog(self, name: str):
+        return self._ai_cog if name == 'IzumiAI' else None
+
+
+# ==================== SYNTHETIC CORPUS ====================
+
+def make_name(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3)))
+
+
+def make_content(rnd: random.Random, vocabulary: list, mentioned: list, names: list) -> str:
+    words = [rnd.choice(vocabulary) if rnd.random() < 0.2 else rnd.choice(FILLER)
+             for _ in range(max(1, int(rnd.expovariate(1 / 12))))]
+    if rnd.random() < 0.25:
+        words.insert(rnd.randrange(len(words) + 1), rnd.choice(EMOJIS))
+    if rnd.random() < 0.05:
+        words = rnd.choice(["my name is", "i love", "i hate", "who is", "do you know"]).split() + [rnd.choice(names)] + words
+    for user in mentioned:
+        words.insert(rnd.randrange(len(words) + 1), user.mention)
+    content = ' '.join(words)
+    return content[0].upper() + content[1:] + rnd.choice(['', '.', '!', '?', '!!'])
+
+
+def make_reply(rnd: random.Random, vocabulary: list) -> str:
+    """Something shaped like a Gemini reply: a few sentences, sometimes on separate lines"""
+    sentences = []
+    for _ in range(rnd.randint(1, 8)):
+        words = [rnd.choice(vocabulary) if rnd.random() < 0.2 else rnd.choice(FILLER)
+                 for _ in range(rnd.randint(3, 25))]
+        if rnd.random() < 0.3:
+            words.insert(rnd.randrange(len(words)), ',')
+        sentence = ' '.join(words).replace(' ,', ',')
+        sentences.append(sentence[0].upper() + sentence[1:] + rnd.choice(['.', '!', '?', ' ' + rnd.choice(EMOJIS)]))
+    separator = '\n' if rnd.random() < 0.4 else ' '
+    return separator.join(sentences)
+
+
+def build_corpus(args):
+    """Guilds, channels and members, plus a time-ordered message stream with a few very active users"""
+    rnd = random.Random(args.seed)
+    vocabulary = [word for words in LEXICON_CATEGORIES.values() for word in words]
+    bot_user = FakeUser(1, "izumi", "Izumi", bot=True)
+
+    guilds = {}
+    for index in range(args.guilds):
+        guild = FakeGuild(10_000 + index, bot_user)
+        guilds[guild.id] = guild
+    guild_list = list(guilds.values())
+    channels = [FakeChannel(100_000 + index, guild_list[index % len(guild_list)]) for index in range(args.channels)]
+
+    users = []
+    for index in range(args.users):
+        name = make_name(rnd)
+        user = FakeUser(1_000_000 + index, name, name.capitalize() if rnd.random() < 0.7 else f"{name}_{index}")
+        users.append(user)
+        for guild in rnd.sample(guild_list, min(len(guild_list), rnd.randint(1, 2))):
+            guild.members[user.id] = user
+    names = [user.name for user in users]
+    members_by_guild = {guild.id: list(guild.members.values()) for guild in guild_list}
+
+    start = time.time() - 30 * 86400
+    step = 30 * 86400 / max(1, args.messages)
+    messages = []
+    for index in range(args.messages):
+        channel = rnd.choice(channels)
+        members = members_by_guild[channel.guild.id]
+        # Pareto-ish activity: a handful of regulars send most of the messages
+        author = members[min(len(members) - 1, int(rnd.paretovariate(1.2)) - 1)] if rnd.random() < 0.6 else rnd.choice(members)
+        mentioned = [user for user in rnd.sample(members, min(len(members), rnd.randint(1, 3))) if user is not author] \
+            if rnd.random() < 0.15 else []
+        if rnd.random() < 0.03:
+            mentioned.append(bot_user)
+        attachments = [FakeAttachment(f"image{index}.png", rnd.randint(10_000, 5_000_000), "image/png")] \
+            if rnd.random() < 0.1 else []
+        messages.append(FakeMessage(
+            5_000_000 + index, author, channel, make_content(rnd, vocabulary, mentioned, names),
+            datetime.fromtimestamp(start + index * step, timezone.utc), mentioned, attachments
+        ))
+
+    replies = [make_reply(rnd, vocabulary) for _ in range(max(100, args.messages // 10))]
+    return guilds, bot_user, messages, replies
+
+
+# ==================== MEASUREMENT ====================
+
+class Stage:
+    def __init__(self, name: str):
+        self.name = name
+        self.durations = []      # seconds per call
+        self.peaks = []          # bytes allocated at the peak of each call (allocation pass only)
+        self.retained = 0        # bytes still allocated after the stage's calls (allocation pass only)
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.durations)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def summary(self) -> dict:
+        return {
+            'calls': len(self.durations),
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': max(self.durations, default=0) * 1000,
+            'alloc_kib_per_call': sum(self.peaks) / len(self.peaks) / 1024 if self.peaks else 0.0,
+            'retained_kib': self.retained / 1024,
+        }
+
+
+class Recorder:
+    """Times each call; with `trace_allocations` also records per-call peak allocation and retained memory"""
+
+    def __init__(self, trace_allocations: bool):
+        self.trace = trace_allocations
+        self.stages = {name: Stage(name) for name in STAGES}
+
+    def _before(self):
+        if self.trace:
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def _after(self, stage: Stage, started: float, base: int):
+        stage.durations.append(time.perf_counter() - started)
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            stage.peaks.append(peak - base)
+            stage.retained += current - base
+
+    def call(self, name: str, func, *args):
+        stage = self.stages[name]
+        base = self._before()
+        started = time.perf_counter()
+        result = func(*args)
+        self._after(stage, started, base)
+        return result
+
+    async def acall(self, name: str, func, *args):
+        stage = self.stages[name]
+        base = self._before()
+        started = time.perf_counter()
+        result = await func(*args)
+        self._after(stage, started, base)
+        return result
+
+
+async def replay(guilds: dict, bot_user: FakeUser, messages: list, replies: list, args,
+                 trace_allocations: bool) -> tuple:
+    """Feed the corpus through a fresh memory system the way the cog does, returns (recorder, bot)"""
+    store_path = os.path.join(tempfile.mkdtemp(prefix="store_", dir=os.getcwd()), os.path.basename(STORAGE_FILE))
+    bot = ReplayBot(store_path, guilds, bot_user)
+    memory = bot.unified_memory
+    builder = ContextBuilder(bot, memory)
+    recorder = Recorder(trace_allocations)
+    rnd = random.Random(args.seed + 1)
+
+    for index, message in enumerate(messages, 1):
+        await recorder.acall('learn', memory.learn_from_message, message)
+
+        # mentions of Izumi get a reply: context for the prompt, then the reply is split into messages
+        if (message.mentions and message.mentions[-1] is bot_user) or rnd.random() < args.reply_rate:
+            recorder.call('context', builder.build_smart_context,
+                          message.author.id, message.guild.id, message.content, message.channel.id)
+            recorder.call('user_info', memory.get_user_info_for_ai, message.author.id, message.guild.id)
+            recorder.call('split', lambda reply: split_naturally(preprocess_for_splitting(reply)), rnd.choice(replies))
+
+        if index % SAVE_EVERY == 0:
+            await recorder.acall('save', memory.auto_save)
+
+    return recorder, bot
+
+
+# ==================== REPORT ====================
+
+def print_report(results: dict, extra: dict):
+    print(f"{'Stage':<10} {'calls':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'KiB/call':>9} {'retained KiB':>13}")
+    for name in STAGES:
+        row = results[name]
+        print(f"{name:<10} {row['calls']:>7} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+              f"{row['max_ms']:>9.2f} {row['alloc_kib_per_call']:>9.1f} {row['retained_kib']:>13.0f}")
+    print()
+    for key, value in extra.items():
+        print(f"{key}: {value}")
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> int:
+    """Print p50/p95 changes against a saved run, returns the number of regressions past `tolerance`"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['stages']
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    for name in STAGES:
+        if name not in baseline:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            before, after = baseline[name][metric], results[name][metric]
+            if before <= 0:
+                continue
+            change = after / before - 1
+            flag = ""
+            if change > tolerance:
+                flag = "  ❌ regression"
+                regressions += 1
+            print(f"  {name:<10} {metric:<7} {before:9.3f} -> {after:9.3f} ms ({change:+.0%}){flag}")
+    return regressions
+
+
+async def main(args) -> int:
+    print(f"Building corpus: {args.users:,} users, {args.channels:,} channels, {args.messages:,} messages (seed {args.seed})")
+    guilds, bot_user, messages, replies = build_corpus(args)
+
+    # the pipeline's own log lines (trust changes, migrations) would drown the report
+    with open(os.devnull, 'w', encoding='utf-8') as sink, contextlib.redirect_stdout(sink):
+        # timing pass without tracemalloc, it slows allocation-heavy code down unevenly
+        recorder, bot = await replay(guilds, bot_user, messages, replies, args, trace_allocations=False)
+        users = bot.unified_memory.memory_data['users']
+        store_info = users.info()
+
+        # allocation pass over a prefix of the same corpus, on a fresh memory system
+        alloc_messages = messages[:args.alloc_messages]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        traced, traced_bot = await replay(guilds, bot_user, alloc_messages, replies, args, trace_allocations=True)
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+    bot.store.close()
+    traced_bot.store.close()
+
+    results = {}
+    for name in STAGES:
+        row = recorder.stages[name].summary()
+        allocations = traced.stages[name].summary()
+        row['alloc_kib_per_call'] = allocations['alloc_kib_per_call']
+        row['retained_kib'] = allocations['retained_kib']
+        results[name] = row
+
+    extra = {
+        'Profiles stored': len(users),
+        'Profiles resident': store_info.get('resident', '?'),
+        f'Memory growth over {len(alloc_messages):,} messages': f"{growth / 1024 / 1024:.1f} MiB "
+                                                                  f"({growth / max(1, len(traced_bot.unified_memory.memory_data['users'])) / 1024:.1f} KiB per profile)",
+    }
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        extra['Peak RSS'] = f"{max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024):.0f} MiB"
+
+    print()
+    print_report(results, extra)
+
+    if args.save:
+        with open(os.path.join(REPO_DIR, args.save) if not os.path.isabs(args.save) else args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'stages': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+
+    if args.baseline:
+        baseline = args.baseline if os.path.isabs(args.baseline) else os.path.join(REPO_DIR, args.baseline)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--channels', type=int, default=200)
+    parser.add_argument('--guilds', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--alloc-messages', type=int, default=5000, help="messages replayed under tracemalloc")
+    parser.add_argument('--reply-rate', type=float, default=0.05, help="share of messages (besides mentions) answered")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="write the results as json (baseline for later runs)")
+    parser.add_argument('--baseline', help="compare against a saved run, exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p50/p95 slowdown before it counts")
+    try:
+        exit_code = asyncio.run(main(parser.parse_args()))
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+    sys.exit(exit_code)
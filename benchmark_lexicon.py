@@ -0,0 +1,123 @@
+"""
+Micro-benchmark for the learning lexicon
+Compares per-message keyword/emoji analysis before (one scan per word list) and after (cogs/ai/lexicon.py)
+
+Usage: python benchmark_lexicon.py [messages.txt]   (one message per line, synthetic chat if omitted)
+"""
+import random
+import re
+import sys
+import time
+
+from cogs.ai.lexicon import LEXICON, LEXICON_CATEGORIES
+
+# Force UTF-8 encoding for output
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def legacy_analyze(content):
+    """What the learning passes did per message before the lexicon: every pass lowercases and scans on its own"""
+    counts = {}
+
+    # _update_dynamic_trust_level
+    content_lower = content.lower()
+    positive_words = ['thanks', 'thank you', 'appreciate', 'love', 'great', 'awesome',
+                      'good', 'nice', 'please', 'sorry', 'help', 'wonderful', 'amazing']
+    negative_words = ['hate', 'stupid', 'dumb', 'shut up', 'annoying', 'bad', 'terrible',
+                      'awful', 'suck', 'worst', 'fuck', 'shit', 'damn']
+    counts['trust_positive'] = sum(1 for word in positive_words if word in content_lower)
+    counts['trust_negative'] = sum(1 for word in negative_words if word in content_lower)
+
+    # learn_vocabulary_advanced
+    content_lower = content.lower()
+    words = re.findall(r'\b\w+\b', content_lower)
+    emojis = re.findall(r'[😀-🿿]|:[a-zA-Z0-9_+-]+:', content)
+
+    # learn_sentiment_patterns
+    content_lower = content.lower()
+    positive_words = ['great', 'awesome', 'love', 'amazing', 'good', 'nice', 'cool', 'best', 'happy', 'excited', 'thank', 'thanks']
+    negative_words = ['bad', 'hate', 'worst', 'awful', 'terrible', 'annoying', 'frustrated', 'angry', 'sad', 'disappointed']
+    humor_words = ['lol', 'lmao', 'haha', 'funny', 'joke', 'meme']
+    counts['positive'] = sum(1 for word in positive_words if word in content_lower)
+    counts['negative'] = sum(1 for word in negative_words if word in content_lower)
+    counts['humor'] = sum(1 for word in humor_words if word in content_lower)
+    unicode_emojis = len(re.findall(r'[😀-🿿]', content))
+
+    # learn_communication_style
+    content_lower = content.lower()
+    formal_indicators = ['please', 'thank you', 'could you', 'would you', 'excuse me']
+    informal_indicators = ['yo', 'hey', 'sup', 'gonna', 'wanna', 'yeah', 'nah']
+    counts['formal'] = sum(1 for indicator in formal_indicators if indicator in content_lower)
+    counts['informal'] = sum(1 for indicator in informal_indicators if indicator in content_lower)
+    token_count = len(content.split())
+    emoji_count = len(re.findall(r'[😀-🿿]|:[a-zA-Z0-9_+-]+:', content))
+    greetings = ['hello', 'hi', 'hey', 'yo', 'sup', 'good morning', 'good evening']
+    greeting_hits = [greeting for greeting in greetings if greeting in content_lower]
+    counts['greeting'] = len(greeting_hits)
+
+    # learn_topic_interests
+    content_lower = content.lower()
+    for category, keywords in (
+        ('gaming_interests', ['osu', 'rhythm', 'fps', 'moba', 'mmo', 'indie', 'game', 'gaming']),
+        ('tech_interests', ['programming', 'coding', 'python', 'javascript', 'ai', 'tech', 'software']),
+        ('entertainment_interests', ['anime', 'manga', 'movie', 'music', 'show', 'series']),
+    ):
+        counts[category] = sum(1 for keyword in keywords if keyword in content_lower)
+
+    # learn_server_culture_advanced
+    content_lower = content.lower()
+    tokens = content_lower.split()
+
+    return counts, words, emojis, unicode_emojis, emoji_count, token_count, greeting_hits, tokens
+
+
+def lexicon_analyze(content):
+    features = LEXICON.analyze(content)
+    return (features.counts, features.words, features.emojis, features.unicode_emoji_count,
+            len(features.emojis), len(features.tokens), features.matched('greeting'), features.tokens)
+
+
+def synthetic_messages(count):
+    rnd = random.Random(0)
+    vocabulary = [word for words in LEXICON_CATEGORIES.values() for word in words]
+    filler = ("the a just i you it was so that this what like really know about think said there "
+              "when then again today later maybe because ok yes no 😀 😂 :kekw: lmfao?! WAIT").split()
+    messages = []
+    for _ in range(count):
+        length = rnd.randint(1, 30)
+        words = [rnd.choice(vocabulary) if rnd.random() < 0.15 else rnd.choice(filler) for _ in range(length)]
+        messages.append(" ".join(words))
+    return messages
+
+
+def bench(func, messages, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for content in messages:
+            func(content)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            messages = [line.rstrip('\n') for line in f if line.strip()]
+    else:
+        messages = synthetic_messages(20000)
+
+    mismatches = 0
+    for content in messages:
+        if legacy_analyze(content) != lexicon_analyze(content):
+            mismatches += 1
+
+    before = bench(legacy_analyze, messages)
+    after = bench(lexicon_analyze, messages)
+
+    print(f"Messages: {len(messages):,} (avg {sum(map(len, messages)) / len(messages):.0f} chars)")
+    print(f"Before (per-pass scans): {before:.1f} µs/message")
+    print(f"After  (compiled lexicon): {after:.1f} µs/message")
+    print(f"Speedup: {before / after:.2f}x")
+    print(f"Result mismatches: {mismatches}")
@@ -61,6 +61,9 @@ from datetime import datetime, timezone
 from dotenv import load_dotenv
 from utils.helpers import *
 from utils.config import *
+from utils.storage import SQLiteStore, StoreDict, migrate_json_files
+from utils.persistence import PersistenceScheduler
+from utils.http_client import http_client
 
 class ChannelRestrictedException(commands.CheckFailure):
     """exception raised when a command is used in a restricted channel"""
@@ -77,12 +80,15 @@ class MinimalBot(commands.Bot):
         super().__init__(command_prefix=commands.when_mentioned_or(COMMAND_PREFIX), intents=intents, help_command=None)
 
         # data storage - all the stuff izumi remembers
-        self.xp_data = load_json(XP_DATA_FILE)
-        self.birthdays = load_json(BIRTHDAYS_FILE)
-        self.warnings = load_json(WARNINGS_FILE)
-        self.birthday_notifications = load_json(BIRTHDAY_NOTIFICATIONS_FILE)
-        self.level_roles = load_json(LEVEL_ROLES_FILE)
-        self.reminders = load_json(REMINDERS_FILE)
+        # every section is a dict facade over the embedded store, old json files get migrated once
+        self.store = SQLiteStore(STORAGE_FILE)
+        migrate_json_files(self.store, STORAGE_SECTIONS, load_func=load_json)
+        self.xp_data = StoreDict(self.store, "xp_data", tracked=True)
+        self.birthdays = StoreDict(self.store, "birthdays")
+        self.warnings = StoreDict(self.store, "warnings")
+        self.birthday_notifications = StoreDict(self.store, "birthday_notifications")
+        self.level_roles = StoreDict(self.store, "level_roles")
+        self.reminders = StoreDict(self.store, "reminders")
         
         # initialize unified memory system - this is where izumi learns about people
         from cogs.ai.unified_memory import UnifiedMemorySystem
@@ -92,21 +98,27 @@ class MinimalBot(commands.Bot):
         self.izumi_memories = {}  # will be handled by unified_memory
         self.izumi_self = {}      # will be handled by unified_memory
         
-        try:
-            self.osu_gacha_data = load_json('data/osu_gacha.json')
-        except FileNotFoundError:
-            self.osu_gacha_data = {}
+        self.osu_gacha_data = StoreDict(self.store, "osu_gacha_data", tracked=True)
         self.active_trades = {}
 
-        try:
-            self.reaction_roles = load_json('data/reaction_roles.json')
-        except FileNotFoundError:
-            self.reaction_roles = {}
+        self.reaction_roles = StoreDict(self.store, "reaction_roles")
+        self.auto_roles = StoreDict(self.store, "auto_roles")
 
-        try:
-            self.auto_roles = load_json('data/auto_roles.json')
-        except FileNotFoundError:
-            self.auto_roles = {}
+        # persistence scheduler - saves are coalesced and written on a worker thread
+        self.persistence = PersistenceScheduler()
+        for section in STORAGE_SECTIONS:
+            self.persistence.register_store(section, getattr(self, section))
+        self.persistence.register_json(
+            "unified_memory",
+            self.unified_memory.unified_data_file,
+            self.unified_memory.snapshot_unified_data,
+            dirty_func=lambda: self.unified_memory.pending_saves
+        )
+        # ai user profiles are store records of their own, written back as they change
+        self.persistence.register_store(PROFILE_STORE_CONFIG["namespace"], self.unified_memory.memory_data['users'])
+
+        # shared http pool - osu! api, avatars and beatmap backgrounds all reuse its connections
+        self.http_client = http_client
 
         try:
             self.allowed_channels = load_json('data/allowed_channels.json')
@@ -115,7 +127,6 @@ class MinimalBot(commands.Bot):
 
         # initialize attributes needed for background tasks
         self.last_birthday_check = None
-        self.pending_saves = False
         self.last_save_time = 0
         
         # track last responses to prevent consecutive duplicates
@@ -306,9 +317,20 @@ class MinimalBot(commands.Bot):
         """Load essential data files"""
         pass
 
+    @property
+    def pending_saves(self):
+        """true while any data section has changes that aren't on disk yet"""
+        return self.persistence.has_dirty()
+
+    @pending_saves.setter
+    def pending_saves(self, value):
+        # cogs flip this after mutating data - coalesce those flips into one flush
+        if value:
+            self.persistence.request_flush()
+
     @tasks.loop(minutes=1)
     async def save_data_task(self):
-        """background task to save data"""
+        """background task to save data - safety net for changes nobody flagged"""
         if self.pending_saves and time.time() - self.last_save_time > 10:
             await self.save_immediately()
 
@@ -768,22 +790,18 @@ class MinimalBot(commands.Bot):
 
     async def save_immediately(self):
         """Force immediate save for critical operations"""
-        save_json(XP_DATA_FILE, self.xp_data)
-        save_json(BIRTHDAYS_FILE, self.birthdays)
-        save_json(WARNINGS_FILE, self.warnings)
-        save_json(BIRTHDAY_NOTIFICATIONS_FILE, self.birthday_notifications)
-        save_json(LEVEL_ROLES_FILE, self.level_roles)
-        save_json(REMINDERS_FILE, self.reminders)
-        save_json('data/osu_gacha.json', self.osu_gacha_data)
-        save_json('data/reaction_roles.json', self.reaction_roles)
-        save_json('data/auto_roles.json', self.auto_roles)
-        
-        # Save unified memory system
-        self.unified_memory.save_unified_data()
-        
-        self.pending_saves = False
+        # only dirty sections are snapshotted, the disk writes happen off the event loop
+        await self.persistence.flush()
         self.last_save_time = time.time()
-    
+
+    async def close(self):
+        """flush queued learning, then close pooled http connections and render workers before discord shuts down"""
+        await self.unified_memory.learning_queue.stop()
+        await self.http_client.close()
+        if hasattr(self, 'gacha_system'):
+            self.gacha_system.render_service.shutdown()
+        await super().close()
+
     # ==================== LEGACY COMPATIBILITY METHODS ====================
     
     def get_user_memories(self, user_id: int) -> dict:
@@ -808,7 +826,7 @@ class MinimalBot(commands.Bot):
     
     def search_users_by_name(self, name: str, guild_id: int = None) -> str:
         """Search for users by name and return formatted information for AI"""
-        matches = self.unified_memory.search_users_by_name(name)
+        matches = self.unified_memory.search_users_by_name(name, guild_id)
         
         if not matches:
             return f"I don't have any information about someone named '{name}'"
@@ -1012,18 +1030,12 @@ async def shutdown_save():
 def sync_save():
     """synchronous fallback save"""
     try:
-        if 'bot' in globals() and hasattr(bot, 'xp_data'):
-            save_json(XP_DATA_FILE, bot.xp_data)
-            save_json(BIRTHDAYS_FILE, bot.birthdays)
-            save_json(WARNINGS_FILE, bot.warnings)
-            save_json(BIRTHDAY_NOTIFICATIONS_FILE, bot.birthday_notifications)
-            save_json(LEVEL_ROLES_FILE, bot.level_roles)
-            save_json(REMINDERS_FILE, bot.reminders)
-            save_json(IZUMI_MEMORIES_FILE, bot.izumi_memories)
-            save_json(IZUMI_SELF_FILE, bot.izumi_self)
-            save_json('data/osu_gacha.json', bot.osu_gacha_data)
-            save_json('data/reaction_roles.json', bot.reaction_roles)
-            save_json('data/auto_roles.json', bot.auto_roles)
+        if 'bot' in globals() and hasattr(bot, 'persistence'):
+            # apply learning still queued in micro-batches, close() isn't reached from here
+            if hasattr(bot, 'unified_memory'):
+                bot.unified_memory.learning_queue.drain_sync()
+            # wait for queued background writes, then flush anything still dirty
+            bot.persistence.shutdown()
             print('✅ synchronous save completed.')
         else:
             print('⚠️ bot data not available for sync save.')
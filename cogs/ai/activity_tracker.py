@@ -0,0 +1,144 @@
+"""
+Channel Activity Tracker for Izumi AI
+Per-channel ring buffer of recent messages with sliding-window aggregates for conversation detection
+"""
+
+from collections import Counter, deque
+from itertools import islice
+from typing import Dict, List, Tuple
+
+# Conversation energy keywords, matched as substrings of the lowercased message
+SERIOUS_KEYWORDS = ('problem', 'issue', 'worried', 'stressed', 'help', 'difficult', 'serious', 'important')
+PLAYFUL_KEYWORDS = ('lol', 'haha', 'funny', 'joke', 'lmao', '😂', '🤣', 'fun', 'awesome', 'cool')
+TENSION_KEYWORDS = ('disagree', 'wrong', 'actually', 'but', 'however', 'no way', "that's not")
+ENERGY_KEYWORDS = SERIOUS_KEYWORDS + PLAYFUL_KEYWORDS + TENSION_KEYWORDS
+ENERGY_WINDOW = 10  # energy reads the last 10 messages
+
+
+def energy_keywords(text: str) -> frozenset:
+    """Energy keywords present in a lowercased message"""
+    return frozenset(keyword for keyword in ENERGY_KEYWORDS if keyword in text)
+
+
+def classify_energy(present) -> Dict:
+    """Energy/tone recommendation from the set (or counter) of keywords seen in the last messages"""
+    if any(keyword in present for keyword in SERIOUS_KEYWORDS):
+        return {
+            "energy": "low",
+            "tone": "serious",
+            "recommendation": "be thoughtful and supportive"
+        }
+
+    if sum(1 for keyword in PLAYFUL_KEYWORDS if keyword in present) >= 3:
+        return {
+            "energy": "high",
+            "tone": "playful",
+            "recommendation": "be energetic and join the fun"
+        }
+
+    if sum(1 for keyword in TENSION_KEYWORDS if keyword in present) >= 2:
+        return {
+            "energy": "medium",
+            "tone": "tense",
+            "recommendation": "stay neutral or try to lighten mood"
+        }
+
+    return {
+        "energy": "medium",
+        "tone": "casual",
+        "recommendation": "normal conversation"
+    }
+
+
+class ChannelActivity:
+    """
+    Recent messages of one channel and the aggregates conversation detection reads.
+
+    `messages` is a bounded deque; `_start` marks the first message inside the
+    current time window, and the speaker counter covers exactly the messages
+    from there on. Each new message and each window query only moves that
+    boundary over the messages that crossed it, so checks are amortized O(1)
+    instead of refiltering the whole buffer. Energy keywords are counted over
+    the last ENERGY_WINDOW messages the same way.
+    """
+
+    def __init__(self, maxlen: int):
+        self.messages = deque(maxlen=maxlen)
+        self._start = 0                     # index of the first message inside the time window
+        self.speakers = Counter()           # human user id -> messages inside the window
+        self.window_count = 0               # human messages inside the window
+        self._energy_ring = deque(maxlen=ENERGY_WINDOW)
+        self.energy_counts = Counter()      # keyword -> recent messages containing it
+        self.humans_since_bot = None        # human messages since Izumi last spoke here (None = not yet)
+        self.last_bot_message = 0.0
+        self.last_message = 0.0
+
+    def _enter(self, message: Dict):
+        if not message.get('is_bot', False):
+            self.speakers[message.get('user_id')] += 1
+            self.window_count += 1
+
+    def _leave(self, message: Dict):
+        if not message.get('is_bot', False):
+            user_id = message.get('user_id')
+            self.speakers[user_id] -= 1
+            if self.speakers[user_id] <= 0:
+                del self.speakers[user_id]
+            self.window_count -= 1
+
+    def add(self, message: Dict):
+        if len(self.messages) == self.messages.maxlen:
+            # the append below pushes the oldest message out
+            if self._start == 0:
+                self._leave(self.messages[0])
+            else:
+                self._start -= 1
+        self.messages.append(message)
+        self._enter(message)
+        self.last_message = max(self.last_message, message.get('timestamp', 0))
+
+        if len(self._energy_ring) == ENERGY_WINDOW:
+            self.energy_counts.subtract(self._energy_ring[0])
+            self.energy_counts += Counter()  # drop keywords that reached zero
+        keywords = energy_keywords(message.get('content', '').lower())
+        self._energy_ring.append(keywords)
+        self.energy_counts.update(keywords)
+
+        if self.humans_since_bot is not None and not message.get('is_bot', False):
+            self.humans_since_bot += 1
+
+    def note_bot_message(self, timestamp: float):
+        self.humans_since_bot = 0
+        self.last_bot_message = timestamp
+
+    def window(self, cutoff: float) -> Tuple[int, int]:
+        """(human messages, distinct speakers) newer than `cutoff`"""
+        messages = self.messages
+        # slide forward past messages that aged out, or back if a larger window is asked for
+        while self._start < len(messages) and messages[self._start].get('timestamp', 0) <= cutoff:
+            self._leave(messages[self._start])
+            self._start += 1
+        while self._start > 0 and messages[self._start - 1].get('timestamp', 0) > cutoff:
+            self._start -= 1
+            self._enter(messages[self._start])
+        return self.window_count, len(self.speakers)
+
+    def window_messages(self) -> List[Dict]:
+        """Human messages inside the window as of the last `window()` call"""
+        return [message for message in islice(self.messages, self._start, None)
+                if not message.get('is_bot', False)]
+
+    def bot_spoke_within(self, messages: int) -> bool:
+        """Whether Izumi's last message is among the last `messages` messages here"""
+        return self.humans_since_bot is not None and self.humans_since_bot < messages
+
+    def energy(self) -> Dict:
+        return classify_energy(self.energy_counts)
+
+    def clear(self):
+        self.messages.clear()
+        self._start = 0
+        self.speakers.clear()
+        self.window_count = 0
+        self._energy_ring.clear()
+        self.energy_counts.clear()
@@ -8,6 +8,9 @@ import re
 import time
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timezone
+from utils.bounded_cache import BoundedCache
+from utils.config import CONTEXT_CACHE_CONFIG
+from .session_manager import TOKEN_ESTIMATOR
 
 class ContextBuilder:
     """Builds intelligent context for AI responses while managing token limits"""
@@ -17,6 +20,24 @@ class ContextBuilder:
         self.unified_memory = unified_memory
         self.max_context_tokens = 8000   # More conservative limit to prevent token buildup issues
         
+        # (user_id_str, section, version, *extra) -> rendered fragment; superseded versions age out via LRU/TTL
+        self.section_cache = BoundedCache(
+            "context_sections",
+            max_items=CONTEXT_CACHE_CONFIG["max_items"],
+            ttl=CONTEXT_CACHE_CONFIG["ttl"],
+        )
+    
+    def _cached_section(self, user_id: int, section: str, render, *extra):
+        """Return a rendered profile section, re-rendering only when its version has moved on"""
+        user_id_str = str(user_id)
+        version = self.unified_memory.get_section_version(user_id_str, section)
+        key = (user_id_str, section, version) + extra
+        fragment = self.section_cache.get(key)
+        if fragment is None:
+            fragment = render()
+            self.section_cache.set(key, fragment)
+        return fragment
+        
     def build_smart_context(self, user_id: int, guild_id: int, current_message: str, channel_id: int = None) -> str:
         """Build comprehensive context while staying within token limits"""
         context_parts = []
@@ -35,7 +56,7 @@ class ContextBuilder:
         estimated_tokens += self._estimate_tokens(user_context)
         
         # Priority 2.3: Izumi's current mood and personality state (HIGH PRIORITY)
-        personality_context = self._get_personality_context(user_id, current_message)
+        personality_context = self._get_personality_context(user_id, current_message, channel_id)
         context_parts.append(personality_context)
         estimated_tokens += self._estimate_tokens(personality_context)
         
@@ -70,7 +91,14 @@ class ContextBuilder:
     
     def _get_essential_user_context(self, user_id: int, guild_id: int) -> str:
         """Get core user context that should always be included"""
-        memories_context = self.bot.format_memories_for_ai(user_id, None, guild_id)
+        # the discord display name is read live, so it's part of the key rather than the version
+        guild = self.bot.get_guild(guild_id) if guild_id else None
+        member = guild.get_member(user_id) if guild else None
+        memories_context = self._cached_section(
+            user_id, 'memories',
+            lambda: self.bot.format_memories_for_ai(user_id, None, guild_id),
+            guild_id, member.display_name if member else None,
+        )
         shared_context = self.bot.get_shared_context(user_id, guild_id)
         additional_data = self.bot.get_additional_user_data(user_id, guild_id)
         self_memories = self.bot.format_izumi_self_for_ai()
@@ -119,6 +147,9 @@ class ContextBuilder:
     
     def _get_vocabulary_context(self, user_id: int, current_message: str) -> str:
         """Get user's vocabulary and speech patterns from unified memory"""
+        return self._cached_section(user_id, 'vocabulary', lambda: self._render_vocabulary_context(user_id))
+    
+    def _render_vocabulary_context(self, user_id: int) -> str:
         user_id_str = str(user_id)
         memory_data = self.unified_memory.memory_data
         
@@ -164,24 +195,13 @@ class ContextBuilder:
     
     def _get_smart_relationship_context(self, user_id: int, guild_id: int, current_message: str) -> str:
         """Get relationship context relevant to current message"""
-        user_id_str = str(user_id)
-        memory_data = self.unified_memory.memory_data
-        
-        if user_id_str not in memory_data.get('users', {}):
-            return ""
-        
-        user_data = memory_data['users'][user_id_str]
-        relations = user_data.get('learning_data', {}).get('relationship_networks', {})
-        
-        if not relations:
-            return ""
+        # only the ranking is cached, member names are resolved per guild on every call
+        top_mentions = self._cached_section(user_id, 'relationships', lambda: self._top_mentions(user_id))
         
         context_parts = []
         
         # Most mentioned users
-        mention_freq = relations.get('mention_frequency', {})
-        if mention_freq:
-            top_mentions = sorted(mention_freq.items(), key=lambda x: x[1], reverse=True)[:3]
+        if top_mentions:
             mention_users = []
             for mentioned_id_str, count in top_mentions:
                 try:
@@ -199,8 +219,22 @@ class ContextBuilder:
             return f"👥 SOCIAL PATTERNS: {' | '.join(context_parts)}"
         return ""
     
+    def _top_mentions(self, user_id: int) -> List[Tuple[str, int]]:
+        user_id_str = str(user_id)
+        memory_data = self.unified_memory.memory_data
+        
+        if user_id_str not in memory_data.get('users', {}):
+            return []
+        
+        relations = memory_data['users'][user_id_str].get('learning_data', {}).get('relationship_networks', {})
+        mention_freq = relations.get('mention_frequency', {})
+        return sorted(mention_freq.items(), key=lambda x: x[1], reverse=True)[:3]
+    
     def _get_communication_style_context(self, user_id: int) -> str:
         """Get communication style insights from unified memory"""
+        return self._cached_section(user_id, 'communication_style', lambda: self._render_communication_style_context(user_id))
+    
+    def _render_communication_style_context(self, user_id: int) -> str:
         user_id_str = str(user_id)
         memory_data = self.unified_memory.memory_data
         
@@ -264,7 +298,7 @@ class ContextBuilder:
         
         return ""
     
-    def _get_personality_context(self, user_id: int, current_message: str) -> str:
+    def _get_personality_context(self, user_id: int, current_message: str, channel_id: int = None) -> str:
         """Get Izumi's current mood, personality state, and behavioral context"""
         from datetime import datetime, timezone
         utc_time = datetime.now(timezone.utc)
@@ -295,17 +329,11 @@ class ContextBuilder:
         if emotional_followups:
             context_parts.append(f"Emotional follow-up: {emotional_followups[0]}")
         
-        # Get conversation energy analysis if we have recent messages
-        if hasattr(self.unified_memory, 'recent_messages') and self.unified_memory.recent_messages:
-            channel_messages = []
-            for channel_msgs in self.unified_memory.recent_messages.values():
-                channel_messages.extend(channel_msgs[-5:])  # Last 5 from each channel
-            
-            if channel_messages:
-                energy_analysis = self.unified_memory.analyze_conversation_energy(channel_messages)
-                energy_rec = energy_analysis.get('recommendation', '')
-                if energy_rec and energy_rec != 'normal conversation':
-                    context_parts.append(f"Conversation energy: {energy_rec}")
+        # Get conversation energy of this channel (kept incrementally as messages arrive)
+        energy_analysis = self.unified_memory.get_conversation_energy(channel_id)
+        energy_rec = energy_analysis.get('recommendation', '')
+        if energy_rec and energy_rec not in ('normal conversation', 'normal'):
+            context_parts.append(f"Conversation energy: {energy_rec}")
         
         # Check for server events to celebrate
         server_events = self.unified_memory.check_server_events(0)  # Guild ID not needed for general checks
@@ -323,5 +351,5 @@ class ContextBuilder:
         return "🎭 IZUMI'S CURRENT STATE: feeling normal and ready to chat"
     
     def _estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (approximately 4 characters per token)"""
-        return len(text) // 4
+        """Token estimate, calibrated against Gemini's reported counts"""
+        return TOKEN_ESTIMATOR.estimate(text)
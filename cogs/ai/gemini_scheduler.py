@@ -0,0 +1,278 @@
+"""
+Gemini Scheduler for Izumi AI
+Routes Gemini calls by priority through a bounded number of slots, with per-model quotas and circuit breakers
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from utils.config import GEMINI_SCHEDULER_CONFIG
+
+# Lower runs first
+PRIORITY_MENTION = 0        # someone talked to Izumi directly
+PRIORITY_CONVERSATION = 1   # joining an ongoing conversation
+PRIORITY_BACKGROUND = 2     # proactive messages, session summaries
+
+_QUOTA_ID_PATTERN = re.compile(r'quota_id:\s*"([^"]+)"')
+_QUOTA_VALUE_PATTERN = re.compile(r'quota_value:\s*(\d+)')
+_RETRY_DELAY_PATTERN = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)|retry in ([\d.]+)s', re.IGNORECASE)
+
+
+class NoModelAvailable(Exception):
+    """Every model is rate limited or broken for longer than the caller is willing to wait"""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    text = str(error)
+    return "429" in text or "quota" in text.lower() or "resource exhausted" in text.lower()
+
+
+def parse_rate_limit(error: Exception) -> Dict:
+    """Pull the quota kind, limit and retry delay out of a 429 error message when Google includes them"""
+    text = str(error)
+    quota_id = _QUOTA_ID_PATTERN.search(text)
+    quota_value = _QUOTA_VALUE_PATTERN.search(text)
+    retry = _RETRY_DELAY_PATTERN.search(text)
+
+    quota_id = quota_id.group(1) if quota_id else ""
+    if "PerDay" in quota_id or "per day" in text.lower():
+        kind = "day"
+    elif "PerMinute" in quota_id or "per minute" in text.lower():
+        kind = "minute"
+    else:
+        kind = "unknown"
+
+    retry_after = None
+    if retry:
+        retry_after = float(retry.group(1) or retry.group(2))
+    return {
+        "kind": kind,
+        "limit": int(quota_value.group(1)) if quota_value else None,
+        "retry_after": retry_after,
+    }
+
+
+def next_quota_reset(now: float = None) -> float:
+    """Unix time of the next daily quota reset - the coming midnight in the quota timezone, so DST moves it"""
+    zone = ZoneInfo(GEMINI_SCHEDULER_CONFIG["daily_reset_timezone"])
+    current = datetime.fromtimestamp(now if now is not None else time.time(), zone)
+    return datetime.combine(current.date() + timedelta(days=1), datetime.min.time(), zone).timestamp()
+
+
+class ModelState:
+    """Quota and health bookkeeping for one model"""
+
+    def __init__(self, name: str):
+        self.name = name
+        # learned from 429s, unknown until the first one
+        self.rpm_limit: Optional[int] = None
+        self.rpd_limit: Optional[int] = None
+        self.tokens = 0.0
+        self.refilled_at = time.time()
+        self.day_requests = 0
+        self.day_resets_at = next_quota_reset()
+        self.recent = deque()           # send times over the last minute
+        # circuit breaker
+        self.open_until = 0.0
+        self.failures = 0
+        self.stats = {'requests': 0, 'successes': 0, 'rate_limited': 0, 'errors': 0}
+
+    def _refill(self, now: float):
+        if now >= self.day_resets_at:
+            self.day_requests = 0
+            self.day_resets_at = next_quota_reset(now)
+        if self.rpm_limit:
+            self.tokens = min(float(self.rpm_limit), self.tokens + (now - self.refilled_at) * self.rpm_limit / 60)
+        self.refilled_at = now
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until a request may be sent to this model (0 = now)"""
+        self._refill(now)
+        wait = max(0.0, self.open_until - now)
+        if self.rpd_limit is not None and self.day_requests >= self.rpd_limit:
+            wait = max(wait, self.day_resets_at - now)
+        if self.rpm_limit and self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) * 60 / self.rpm_limit)
+        return wait
+
+    def take(self, now: float):
+        self._refill(now)
+        if self.rpm_limit:
+            self.tokens -= 1
+        self.day_requests += 1
+        self.recent.append(now)
+        while self.recent and self.recent[0] < now - 60:
+            self.recent.popleft()
+        self.stats['requests'] += 1
+
+    def on_success(self):
+        self.failures = 0
+        self.stats['successes'] += 1
+
+    def on_rate_limit(self, info: Dict, now: float):
+        self.stats['rate_limited'] += 1
+        if info["kind"] == "day":
+            # the request that hit the limit didn't count, so what we sent before it is the quota
+            self.rpd_limit = info["limit"] or max(1, self.day_requests - 1)
+            self.open_until = self.day_resets_at
+        else:
+            if info["kind"] == "minute":
+                self.rpm_limit = info["limit"] or max(1, len(self.recent) - 1)
+            self.tokens = 0.0
+            self.open_until = now + (info["retry_after"] or GEMINI_SCHEDULER_CONFIG["rate_limit_cooldown"])
+
+    def on_error(self, now: float):
+        self.stats['errors'] += 1
+        self.failures += 1
+        threshold = GEMINI_SCHEDULER_CONFIG["breaker_threshold"]
+        if self.failures >= threshold:
+            # half-open after the cooldown: one request decides, another failure doubles the wait
+            cooldown = GEMINI_SCHEDULER_CONFIG["breaker_cooldown"] * 2 ** (self.failures - threshold)
+            self.open_until = now + min(cooldown, GEMINI_SCHEDULER_CONFIG["breaker_max_cooldown"])
+
+    def info(self, now: float) -> Dict:
+        return dict(
+            self.stats,
+            rpm_limit=self.rpm_limit,
+            rpd_limit=self.rpd_limit,
+            day_requests=self.day_requests,
+            ready_in=round(self.ready_in(now)),
+        )
+
+
+class GeminiScheduler:
+    """
+    Priority-ordered, concurrency-bounded access to the Gemini model hierarchy.
+
+    Callers hand over a coroutine factory taking a model name. Models whose
+    breaker is open, or whose learned per-minute bucket or per-day quota is
+    spent, are skipped without a round trip; a 429 teaches the model's limits
+    and the call moves down the hierarchy. When nothing is ready the call
+    waits for the earliest model, up to a per-priority limit.
+    """
+
+    def __init__(self, models: List[str], max_concurrency: int = None):
+        self.models = list(models)
+        self.states = {name: ModelState(name) for name in self.models}
+        self.max_concurrency = max_concurrency or GEMINI_SCHEDULER_CONFIG["max_concurrency"]
+        self.max_wait = GEMINI_SCHEDULER_CONFIG["max_wait"]
+
+        self._active = 0
+        self._waiters = []              # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.stats = {'queued': 0, 'max_queue': 0, 'unavailable': 0}
+
+    # ==================== SLOTS ====================
+
+    async def _acquire(self, priority: int):
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.stats['queued'] += 1
+        self.stats['max_queue'] = max(self.stats['max_queue'], len(self._waiters))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just as we were cancelled
+                self._release()
+            else:
+                self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self):
+        # hand the slot straight to the most urgent waiter that is still waiting
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    # ==================== DISPATCH ====================
+
+    def _pick(self, order: List[str], tried: set, now: float) -> Optional[str]:
+        for name in order:
+            if name in tried:
+                continue
+            if self.states[name].ready_in(now) == 0:
+                return name
+        return None
+
+    def _earliest(self, order: List[str], tried: set, now: float) -> Optional[float]:
+        waits = [self.states[name].ready_in(now) for name in order if name not in tried]
+        return min(waits) if waits else None
+
+    async def run(self, call: Callable[[str], Awaitable], priority: int = PRIORITY_MENTION,
+                  fatal: Callable[[Exception], bool] = None, prefer: Optional[str] = None):
+        """
+        Run `call(model_name)` on the best available model (`prefer` is tried first).
+
+        Exceptions for which `fatal` returns True are raised straight away;
+        anything else moves on to the next model. Raises NoModelAvailable when
+        no model could take the request, or the last error if all of them failed.
+        """
+        order = self.models
+        if prefer in self.states:
+            order = [prefer] + [name for name in self.models if name != prefer]
+
+        await self._acquire(priority)
+        try:
+            tried = set()
+            last_error = None
+            deadline = time.time() + self.max_wait[priority]
+            while True:
+                now = time.time()
+                name = self._pick(order, tried, now)
+                if name is None:
+                    wait = self._earliest(order, tried, now)
+                    if wait is None or now + wait > deadline:
+                        if last_error is not None:
+                            raise last_error
+                        self.stats['unavailable'] += 1
+                        raise NoModelAvailable("all Gemini models are rate limited or unavailable")
+                    await asyncio.sleep(wait)
+                    continue
+
+                state = self.states[name]
+                tried.add(name)
+                state.take(now)
+                try:
+                    result = await call(name)
+                except Exception as e:
+                    if fatal is not None and fatal(e):
+                        state.on_success()
+                        raise
+                    last_error = e
+                    if is_rate_limit_error(e):
+                        info = parse_rate_limit(e)
+                        state.on_rate_limit(info, time.time())
+                        print(f"⚠️ Rate limit on {name} ({info['kind']}), falling back...")
+                    else:
+                        state.on_error(time.time())
+                        print(f"Error with {name}: {e}")
+                    continue
+                state.on_success()
+                return result
+        finally:
+            self._release()
+
+    def info(self) -> Dict:
+        """Counters for admin/debug output"""
+        now = time.time()
+        return dict(
+            self.stats,
+            active=self._active,
+            waiting=len(self._waiters),
+            models={name: state.info(now) for name, state in self.states.items()},
+        )
@@ -0,0 +1,82 @@
+"""
+Heavy Hitters for Izumi AI
+Space-Saving top-k counters kept in the plain dicts stored in the memory file
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary (Metwally et al.) over a {item: count} dict.
+
+    The dict stays the stored form, so readers keep sorting it as before;
+    overestimation bounds live in a sibling `errors` dict holding only the
+    nonzero entries. When a new item arrives at capacity it takes over the
+    smallest counter and inherits its count as error, so a rising word keeps
+    climbing instead of being evicted on its next update. A lazy min-heap
+    finds that counter, which with capacities of a few dozen keeps every
+    update effectively constant time. Any item seen more than total/capacity
+    times is guaranteed to be present.
+    """
+
+    def __init__(self, counts: Dict[str, int], errors: Dict[str, int], capacity: int):
+        self.counts = counts
+        self.errors = errors
+        self.capacity = capacity
+        for item in list(errors):
+            if item not in counts:
+                del errors[item]
+        if len(counts) > capacity:
+            # dicts saved before the sketch could be over capacity
+            self.trim(capacity)
+        else:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self) -> str:
+        # entries go stale whenever a counter grows, skip until one matches
+        while self._heap:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item
+        self._rebuild()
+        return self._pop_min()
+
+    def add(self, item: str, count: int = 1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+        else:
+            victim = self._pop_min()
+            floor = counts.pop(victim)
+            self.errors.pop(victim, None)
+            counts[item] = floor + count
+            self.errors[item] = floor
+
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._rebuild()
+
+    def trim(self, keep: int):
+        """Shrink to the `keep` largest counters"""
+        if len(self.counts) > keep:
+            top = heapq.nlargest(keep, self.counts.items(), key=lambda entry: entry[1])
+            kept = {item for item, _ in top}
+            for item in [item for item in self.counts if item not in kept]:
+                del self.counts[item]
+                self.errors.pop(item, None)
+        self._rebuild()
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda entry: entry[1])
+
+    def guaranteed(self, item: str) -> int:
+        """Lower bound on the true count of `item`"""
+        return self.counts.get(item, 0) - self.errors.get(item, 0)
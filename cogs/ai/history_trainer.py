@@ -0,0 +1,171 @@
+"""
+History Trainer for Izumi AI
+Learns from channel history in bulk: channels fetched concurrently, learned in batches, resumable per channel
+"""
+
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from utils.config import HISTORY_TRAINING_CONFIG
+from .learning_queue import MessageSnapshot
+
+# Messages starting with these are commands or pings rather than conversation
+SKIP_PREFIXES = ('!', '/', '?', '<', '>', '$', '%', '&', '*', '+', '=', '~', '`', '@everyone', '@here')
+CHECKPOINT_PREFIX = "history_checkpoint:"
+
+
+def is_trainable(message) -> bool:
+    """Whether a historical message is worth learning from"""
+    if message.author.bot or not message.guild:
+        return False
+    content = message.content.strip()
+    # Skip commands, very short messages and bare URLs
+    if len(content) < 3 or content.startswith(SKIP_PREFIXES):
+        return False
+    return not content.startswith(('http://', 'https://'))
+
+
+class HistoryTrainer:
+    """
+    Bulk learning from channel history.
+
+    One fetcher per channel (at most `fetch_concurrency` at a time) pages
+    through the history and puts snapshots on a bounded queue, and a single
+    learner drains it through learn_from_batch. Each channel has a checkpoint
+    in the store's meta table holding the span of message ids learned so far:
+    a rerun first picks up what's newer than that span, then continues
+    backwards from its oldest message until the limit or the start of the
+    channel. Checkpoints are saved right after the profiles they account for,
+    so an interrupted run repeats at most the last few batches.
+    """
+
+    def __init__(self, memory, store, bot_user=None):
+        self.memory = memory
+        self.store = store
+        self.bot_user = bot_user
+        self.config = HISTORY_TRAINING_CONFIG
+        self.stats = {'channels': 0, 'channels_fetched': 0, 'fetched': 0, 'learned': 0, 'errors': 0}
+        self._checkpoints: Dict[int, Dict] = {}     # channel id -> {'newest', 'oldest', 'complete'}
+        self._dirty = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # ==================== CHECKPOINTS ====================
+
+    def checkpoint(self, channel_id: int) -> Dict:
+        if channel_id not in self._checkpoints:
+            raw = self.store.get_meta(f"{CHECKPOINT_PREFIX}{channel_id}")
+            self._checkpoints[channel_id] = json.loads(raw) if raw else {}
+        return self._checkpoints[channel_id]
+
+    def _advance(self, channel_id: int, message_id: Optional[int]):
+        checkpoint = self.checkpoint(channel_id)
+        if message_id is None:
+            checkpoint['complete'] = True   # the backfill reached the start of the channel
+        else:
+            checkpoint['newest'] = max(checkpoint.get('newest', message_id), message_id)
+            checkpoint['oldest'] = min(checkpoint.get('oldest', message_id), message_id)
+        self._dirty.add(channel_id)
+
+    async def _commit(self):
+        """Save the learned profiles, then the checkpoints that account for them"""
+        await self.memory.auto_save()
+        for channel_id in self._dirty:
+            self.store.set_meta(f"{CHECKPOINT_PREFIX}{channel_id}", json.dumps(self._checkpoints[channel_id]))
+        self._dirty.clear()
+
+    # ==================== FETCHING ====================
+
+    async def _put(self, queue: asyncio.Queue, channel_id: int, message):
+        self.stats['fetched'] += 1
+        # skipped messages go through the queue too, the checkpoint only moves once everything before them is learned
+        snapshot = MessageSnapshot.from_message(message, self.bot_user) if is_trainable(message) else None
+        await queue.put((channel_id, message.id, snapshot))
+
+    async def _fetch_channel(self, channel, limit: int, queue: asyncio.Queue):
+        async with self._slots:
+            checkpoint = self.checkpoint(channel.id)
+            fetched = 0
+            try:
+                if checkpoint.get('newest'):
+                    # messages since the last run, oldest first so the checkpoint can follow them
+                    async for message in channel.history(limit=limit, after=discord.Object(id=checkpoint['newest']),
+                                                         oldest_first=True):
+                        await self._put(queue, channel.id, message)
+                        fetched += 1
+
+                if not checkpoint.get('complete') and fetched < limit:
+                    before = discord.Object(id=checkpoint['oldest']) if checkpoint.get('oldest') else None
+                    backfilled = 0
+                    async for message in channel.history(limit=limit - fetched, before=before):
+                        await self._put(queue, channel.id, message)
+                        backfilled += 1
+                    if backfilled < limit - fetched:
+                        await queue.put((channel.id, None, None))
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️ Error fetching history of #{channel.name}: {e}")
+            self.stats['channels_fetched'] += 1
+
+    # ==================== LEARNING ====================
+
+    async def _apply(self, items: List):
+        # oldest first, like they were sent
+        snapshots = sorted((snapshot for _, _, snapshot in items if snapshot is not None),
+                           key=lambda snapshot: snapshot.created_at)
+        if snapshots:
+            try:
+                await self.memory.learn_from_batch(snapshots)
+                self.stats['learned'] += len(snapshots)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️ Learning from {len(snapshots)} historical messages failed: {e}")
+        for channel_id, message_id, _ in items:
+            self._advance(channel_id, message_id)
+
+    async def _learn(self, queue: asyncio.Queue, on_progress: Optional[Callable[[Dict], Awaitable]]):
+        batches = 0
+        last_status = time.monotonic()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.config["batch_size"] and batch[-1] is not None:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            finished = batch[-1] is None
+            await self._apply([item for item in batch if item is not None])
+
+            batches += 1
+            if finished or batches % self.config["checkpoint_batches"] == 0:
+                await self._commit()
+            if on_progress and (finished or time.monotonic() - last_status >= self.config["status_interval"]):
+                await on_progress(self.stats)
+                last_status = time.monotonic()
+            if finished:
+                return
+
+    async def run(self, channels: List, limit: int,
+                  on_progress: Optional[Callable[[Dict], Awaitable]] = None) -> Dict:
+        """Learn from up to `limit` unseen messages per channel, returns the stats"""
+        queue = asyncio.Queue(maxsize=self.config["queue_size"])
+        self._slots = asyncio.Semaphore(self.config["fetch_concurrency"])
+        self.stats['channels'] = len(channels)
+
+        learner = asyncio.create_task(self._learn(queue, on_progress))
+        fetching = asyncio.gather(*(self._fetch_channel(channel, limit, queue) for channel in channels))
+        try:
+            await asyncio.wait([fetching, learner], return_when=asyncio.FIRST_COMPLETED)
+            if learner.done():
+                learner.result()    # the learner only stops early on an error, raise it
+            await queue.put(None)
+            await learner
+        finally:
+            fetching.cancel()
+            learner.cancel()
+            # wait for them to wind down so a cancelled run doesn't leave unretrieved exceptions behind
+            await asyncio.gather(fetching, learner, return_exceptions=True)
+        return self.stats
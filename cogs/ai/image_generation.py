@@ -15,10 +15,10 @@ from discord.ext import commands
 from discord import app_commands
 import google.generativeai as genai
 import os
-import aiohttp
 import io
 from PIL import Image
 from utils.helpers import load_json, save_json
+from utils.http_client import http_client
 import time
 
 class ImageGenerationCog(commands.Cog, name="ImageGen"):
@@ -104,11 +104,9 @@ class ImageGenerationCog(commands.Cog, name="ImageGen"):
     
     async def download_image(self, url: str) -> Image.Image:
         """Download an image from URL and return PIL Image"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    return Image.open(io.BytesIO(image_data))
+        response = await http_client.get(url)
+        if response.status == 200:
+            return Image.open(io.BytesIO(response.body))
         return None
     
     async def generate_image(self, prompt: str, reference_image: Image.Image = None) -> bytes:
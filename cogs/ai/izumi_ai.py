@@ -11,24 +11,43 @@ import os
 import time
 import asyncio
 import random
-import aiohttp
 import re
-import subprocess
 import tempfile
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 
 from .learning_engine import LearningEngine
 from .context_builder import ContextBuilder
+from .session_manager import SessionManager
+from .media_analyzer import MediaAnalyzer, MediaTooLarge, run_process
+from .media_cache import MediaCache, url_key, youtube_key, youtube_duration_key
+from .response_splitter import IncrementalSplitter, preprocess_for_splitting, split_naturally
+from .gemini_scheduler import (
+    GeminiScheduler,
+    NoModelAvailable,
+    PRIORITY_MENTION,
+    PRIORITY_CONVERSATION,
+    PRIORITY_BACKGROUND
+)
 from utils.helpers import save_json, load_json
 from utils.config import (
     YOUTUBE_ANALYSIS_ENABLED,
     YOUTUBE_DOWNLOAD_MODE,
     YOUTUBE_MAX_SIZE_MB,
     YOUTUBE_MAX_DURATION_SECONDS,
-    YOUTUBE_TEMP_DIR
+    YOUTUBE_TEMP_DIR,
+    GEMINI_SESSION_CONFIG,
+    GEMINI_MODEL_HIERARCHY,
+    RESPONSE_STREAMING_CONFIG
 )
 
+def _chunk_text(chunk) -> str:
+    """Text of one streamed chunk, empty for chunks that only carry metadata"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
 class IzumiAI(commands.Cog):
     """Main AI chat system with advanced learning capabilities"""
     
@@ -40,8 +59,18 @@ class IzumiAI(commands.Cog):
         
         # Initialize Gemini AI
         self.gemini_model = None
+        self._gemini_models = {}  # {(model_name, with_persona): GenerativeModel} - built once, reused on fallback
+        # Every chat call goes through here: priority order, bounded concurrency, learned quotas
+        self.gemini_scheduler = GeminiScheduler(GEMINI_MODEL_HIERARCHY)
+        # Reposted media reuses the stored description instead of another model call
+        self.media_cache = MediaCache('data/media_analysis_cache.json',
+                                      on_change=lambda: self.bot.persistence.mark_dirty("media_cache"))
+        self.bot.persistence.register_json("media_cache", 'data/media_analysis_cache.json', self.media_cache.snapshot)
+        # Attachment/YouTube analysis: streamed downloads, worker threads, bounded jobs with deadlines
+        self.media_analyzer = MediaAnalyzer(self.gemini_scheduler, self._get_model, self.bot.http_client, self.media_cache)
         self.gemini_chat_sessions = {}  # {channel_id: session_data} - Shared per channel
-        self.chat_history_limit = 100  # Messages per channel - reduced to prevent token buildup
+        # Token ledger, verbatim window and rolling summary for those sessions
+        self.session_manager = SessionManager(self._summarize_session_history)
         
         # Track Izumi's conversation participation
         self.participation_tracker = {}  # {channel_id: {"last_participation": timestamp, "is_active": bool}}
@@ -52,6 +81,8 @@ class IzumiAI(commands.Cog):
         # API optimization features - Load persistent data
         self.response_cache = {}  # Simple response caching
         self.api_usage_data = self._load_api_usage_data()
+        # Usage counters are saved by the bot's persistence scheduler, coalesced instead of once per call
+        self.bot.persistence.register_json("api_usage", 'data/api_usage_data.json', self._api_usage_snapshot)
         self.daily_api_calls = self.api_usage_data.get('daily_api_calls', 0)
         self.daily_quick_responses = self.api_usage_data.get('daily_quick_responses', 0)
         self.last_cache_clear = self.api_usage_data.get('last_cache_clear', time.time())
@@ -213,25 +244,30 @@ class IzumiAI(commands.Cog):
                 'historical_data': []
             }
     
+    def _api_usage_snapshot(self) -> dict:
+        """Fold the live counters into the persistent usage data and return a copy to write"""
+        import datetime
+        
+        # Update the data structure
+        self.api_usage_data.update({
+            'date': datetime.datetime.now().strftime('%Y-%m-%d'),
+            'daily_api_calls': self.daily_api_calls,
+            'daily_quick_responses': self.daily_quick_responses,
+            'last_cache_clear': self.last_cache_clear,
+            'api_call_log': self.api_call_log,
+            'total_api_calls': self.api_usage_data.get('total_api_calls', 0) + (self.daily_api_calls - self.api_usage_data.get('daily_api_calls', 0)),
+            'total_quick_responses': self.api_usage_data.get('total_quick_responses', 0) + (self.daily_quick_responses - self.api_usage_data.get('daily_quick_responses', 0))
+        })
+        
+        snapshot = dict(self.api_usage_data)
+        snapshot['api_call_log'] = list(self.api_call_log)
+        snapshot['historical_data'] = list(self.api_usage_data.get('historical_data', []))
+        return snapshot
+    
     def _save_api_usage_data(self):
-        """Save persistent API usage data to file"""
+        """Mark API usage data for saving (written by the persistence scheduler in batches)"""
         try:
-            from utils.helpers import save_json
-            import datetime
-            
-            # Update the data structure
-            self.api_usage_data.update({
-                'date': datetime.datetime.now().strftime('%Y-%m-%d'),
-                'daily_api_calls': self.daily_api_calls,
-                'daily_quick_responses': self.daily_quick_responses,
-                'last_cache_clear': self.last_cache_clear,
-                'api_call_log': self.api_call_log,
-                'total_api_calls': self.api_usage_data.get('total_api_calls', 0) + (self.daily_api_calls - self.api_usage_data.get('daily_api_calls', 0)),
-                'total_quick_responses': self.api_usage_data.get('total_quick_responses', 0) + (self.daily_quick_responses - self.api_usage_data.get('daily_quick_responses', 0))
-            })
-            
-            save_json('data/api_usage_data.json', self.api_usage_data)
-            
+            self.bot.persistence.mark_dirty("api_usage")
         except Exception as e:
             print(f"⚠️ Error saving API usage data: {e}")
 
@@ -283,25 +319,10 @@ class IzumiAI(commands.Cog):
             {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
         ]
         
-        # Model hierarchy (best → fallback)
-        MODEL_HIERARCHY = [
-            "gemini-2.5-flash",
-            "gemini-2.5-flash-lite", 
-            "gemini-2.5-pro",
-            "gemini-2.0-flash",
-            "gemini-2.0-flash-lite",
-            "gemini-1.5-flash",
-            "gemini-1.5-flash-8b",
-        ]
-        
-        # Try to initialize model
-        for model_name in MODEL_HIERARCHY:
+        # Try to initialize model (hierarchy is best → fallback)
+        for model_name in GEMINI_MODEL_HIERARCHY:
             try:
-                self.gemini_model = genai.GenerativeModel(
-                    model_name=model_name,
-                    safety_settings=self.safety_settings,
-                    system_instruction=self.bot.system_prompt
-                )
+                self.gemini_model = self._get_model(model_name)
                 print(f"Gemini AI model initialized with: {model_name}")
                 break
             except Exception as e:
@@ -310,14 +331,34 @@ class IzumiAI(commands.Cog):
         if not self.gemini_model:
             print("⚠️ No Gemini models available.")
     
+    def _get_model(self, model_name: str, with_persona: bool = True):
+        """Cached GenerativeModel for a model name (with Izumi's system prompt unless with_persona is False)"""
+        key = (model_name, with_persona)
+        if key not in self._gemini_models:
+            if with_persona:
+                self._gemini_models[key] = genai.GenerativeModel(
+                    model_name=model_name,
+                    safety_settings=self.safety_settings,
+                    system_instruction=self.bot.system_prompt
+                )
+            else:
+                self._gemini_models[key] = genai.GenerativeModel(
+                    model_name=model_name,
+                    safety_settings=self.safety_settings
+                )
+        return self._gemini_models[key]
+    
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Handle all messages for learning and AI responses"""
+        if message.author == self.bot.user and message.guild:
+            # feeds the "izumi spoke recently" check of conversation detection
+            self.learning_engine.note_bot_message(message.channel.id, message.created_at.timestamp())
         if message.author.bot or not message.guild:
             return
         
-        # ALWAYS learn from messages (even when not mentioned)
-        await self.learning_engine.learn_from_message(message)
+        # ALWAYS learn from messages (even when not mentioned) - queued so replies never wait on it
+        self.learning_engine.enqueue_message(message)
         
         # Check for image generation request when mentioned
         if self.bot.user in message.mentions:
@@ -514,7 +555,8 @@ class IzumiAI(commands.Cog):
                     channel_id=message.channel.id,
                     prompt=context,
                     original_message="[joining conversation]",
-                    username=message.author.display_name
+                    username=message.author.display_name,
+                    priority=PRIORITY_CONVERSATION
                 )
                 
                 if response_text and len(response_text.strip()) > 0:
@@ -663,7 +705,8 @@ class IzumiAI(commands.Cog):
                 channel_id=message.channel.id,
                 prompt=conversation_prompt,
                 original_message=message.content,
-                username=message.author.display_name
+                username=message.author.display_name,
+                priority=PRIORITY_CONVERSATION
             )
             
             if response_text and len(response_text.strip()) > 0:
@@ -779,16 +822,7 @@ class IzumiAI(commands.Cog):
     
     async def _check_ytdlp_installed(self) -> bool:
         """Check if yt-dlp is installed"""
-        try:
-            result = subprocess.run(
-                ['yt-dlp', '--version'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+        return await self.media_analyzer.ytdlp_available()
     
     async def _download_youtube_media(self, url: str, mode: str = "audio") -> Optional[tuple]:
         """
@@ -851,23 +885,13 @@ class IzumiAI(commands.Cog):
             print(f"🎬 Downloading YouTube {mode} from: {url}")
             
             # Run yt-dlp with timeout
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=300  # 5 minute timeout
-                )
+                returncode, stdout, stderr = await run_process(cmd, timeout=300)  # 5 minute timeout
             except asyncio.TimeoutError:
-                process.kill()
                 print(f"❌ YouTube download timeout for {url}")
                 return None
             
-            if process.returncode != 0:
+            if returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
                 print(f"❌ yt-dlp error: {error_msg}")
                 return None
@@ -892,14 +916,8 @@ class IzumiAI(commands.Cog):
                 url
             ]
             
-            duration_process = await asyncio.create_subprocess_exec(
-                *duration_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            duration_stdout, _ = await duration_process.communicate()
             try:
+                _, duration_stdout, _ = await run_process(duration_cmd, timeout=10)
                 duration = int(duration_stdout.decode().strip())
             except:
                 duration = 0
@@ -928,9 +946,8 @@ Examples of the vibe:
 
 Make it natural and casual, don't copy these exactly."""
 
-            # Quick generation with minimal context
-            response = self.gemini_model.generate_content(prompt)
-            waiting_message = response.text.strip()
+            # Quick generation with minimal context, skipped rather than queued if models are busy
+            waiting_message = await self.media_analyzer.generate(prompt, PRIORITY_CONVERSATION)
             
             # Clean up any quotes or formatting
             waiting_message = waiting_message.strip('"\'')
@@ -948,8 +965,51 @@ Make it natural and casual, don't copy these exactly."""
         if not YOUTUBE_ANALYSIS_ENABLED:
             return None
         
+        # One question-independent analysis per video and mode is cached, questions are answered on top of it
+        video_id = url.rsplit('v=', 1)[-1]
+        cache_key = youtube_key(video_id, YOUTUBE_DOWNLOAD_MODE)
+        analysis = self.media_cache.get(cache_key)
+        if analysis is not None:
+            print(f"🗂️ YouTube analysis served from cache: {video_id}")
+        else:
+            analysis, notice = await self._analyze_youtube_media(url, video_id, user_message, channel)
+            if analysis is None:
+                return notice
+            self.media_cache.put(cache_key, analysis)
+        
+        # Answer the user's question from the analysis - a text-only call, no yt-dlp or upload
+        lowered = user_message.lower()
+        if not any(keyword in lowered for keyword in ['summarize', 'summary', 'about', 'what is']):
+            if 'timestamp' in lowered or ':' in user_message:
+                task = "answer their question about the specific timestamp or moment they mentioned"
+            else:
+                task = "provide relevant information to answer their question"
+            prompt = (f"User asked: '{user_message}'\n\nHere is an analysis of the video/audio they linked:\n{analysis}\n\n"
+                      f"Using this analysis, {task}.")
+            try:
+                analysis = await self.media_analyzer.generate(prompt)
+            except Exception as e:
+                print(f"⚠️ Couldn't answer the question about {video_id}, using the plain analysis: {e}")
+        
+        duration = int(self.media_cache.get(youtube_duration_key(video_id)) or 0)
+        duration_str = f"{duration // 60}:{duration % 60:02d}" if duration > 0 else "unknown"
+        media_type = "Audio" if YOUTUBE_DOWNLOAD_MODE == "audio" else "Video"
+        return f"[YouTube {media_type} ({duration_str}): {analysis}]"
+    
+    async def _analyze_youtube_media(self, url: str, video_id: str, user_message: str,
+                                     channel) -> Tuple[Optional[str], Optional[str]]:
+        """Download and analyze a video, returns (analysis, None) or (None, notice why there is none)"""
+        prompt = ("Provide a comprehensive summary of this video/audio. Include the main topics, key points, "
+                  "and overall message, and note the timestamps of notable moments.")
+        
         try:
             # First, check video duration BEFORE downloading
+            video_duration = self.media_cache.get(youtube_duration_key(video_id))
+            if video_duration is not None and int(video_duration) > YOUTUBE_MAX_DURATION_SECONDS:
+                minutes = int(video_duration) // 60
+                max_minutes = YOUTUBE_MAX_DURATION_SECONDS // 60
+                return None, f"[YouTube video is {minutes} minutes long - exceeds {max_minutes} minute limit for analysis]"
+            
             duration_cmd = [
                 'yt-dlp',
                 '--print', 'duration',
@@ -959,24 +1019,17 @@ Make it natural and casual, don't copy these exactly."""
             ]
             
             try:
-                duration_process = await asyncio.create_subprocess_exec(
-                    *duration_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                
-                duration_stdout, _ = await asyncio.wait_for(
-                    duration_process.communicate(),
-                    timeout=10
-                )
-                
-                video_duration = int(duration_stdout.decode().strip())
+                if video_duration is None:
+                    _, duration_stdout, _ = await run_process(duration_cmd, timeout=10)
+                    video_duration = int(duration_stdout.decode().strip())
+                    self.media_cache.put(youtube_duration_key(video_id), str(video_duration))
+                video_duration = int(video_duration)
                 
                 # Check if video exceeds duration limit
                 if video_duration > YOUTUBE_MAX_DURATION_SECONDS:
                     minutes = video_duration // 60
                     max_minutes = YOUTUBE_MAX_DURATION_SECONDS // 60
-                    return f"[YouTube video is {minutes} minutes long - exceeds {max_minutes} minute limit for analysis]"
+                    return None, f"[YouTube video is {minutes} minutes long - exceeds {max_minutes} minute limit for analysis]"
                 
             except Exception as e:
                 print(f"⚠️ Could not check video duration: {e}")
@@ -990,45 +1043,19 @@ Make it natural and casual, don't copy these exactly."""
             result = await self._download_youtube_media(url, mode=YOUTUBE_DOWNLOAD_MODE)
             
             if not result:
-                return f"[YouTube video linked but couldn't download: {url}]"
+                return None, f"[YouTube video linked but couldn't download: {url}]"
             
             file_path, mime_type, duration = result
+            if duration > 0:
+                self.media_cache.put(youtube_duration_key(video_id), str(duration))
             
             try:
-                # Read the downloaded file
-                with open(file_path, 'rb') as f:
-                    media_data = f.read()
-                
-                # Prepare media part for Gemini
-                media_part = {
-                    "mime_type": mime_type,
-                    "data": media_data
-                }
-                
-                # Build prompt based on user's question
-                if any(keyword in user_message.lower() for keyword in ['summarize', 'summary', 'about', 'what is']):
-                    prompt = "Provide a comprehensive summary of this video/audio. Include the main topics, key points, and overall message."
-                elif 'timestamp' in user_message.lower() or ':' in user_message:
-                    # User asking about specific timestamp
-                    prompt = f"User asked: '{user_message}'\n\nAnalyze this video/audio and answer their question about the specific timestamp or moment they mentioned."
-                else:
-                    prompt = f"User asked: '{user_message}'\n\nAnalyze this video/audio and provide relevant information to answer their question."
-                
                 print(f"🤖 Analyzing YouTube content with Gemini...")
                 
-                # Send to Gemini for analysis
-                response = self.gemini_model.generate_content([prompt, media_part])
-                analysis = response.text.strip()
-                
-                # Format the response
-                duration_str = f"{duration // 60}:{duration % 60:02d}" if duration > 0 else "unknown"
-                media_type = "Audio" if YOUTUBE_DOWNLOAD_MODE == "audio" else "Video"
-                
-                result_text = f"[YouTube {media_type} ({duration_str}): {analysis}]"
-                
+                # Send to Gemini for analysis (large files go through the File API)
+                analysis = await self.media_analyzer.analyze_file(file_path, mime_type, prompt)
                 print(f"✅ YouTube analysis complete: {analysis[:100]}...")
-                
-                return result_text
+                return analysis, None
                 
             finally:
                 # Clean up downloaded file
@@ -1041,7 +1068,7 @@ Make it natural and casual, don't copy these exactly."""
         
         except Exception as e:
             print(f"❌ Error analyzing YouTube URL: {e}")
-            return f"[YouTube video linked but analysis failed: {url}]"
+            return None, f"[YouTube video linked but analysis failed: {url}]"
     
     async def _analyze_media_in_message(self, message: discord.Message) -> str:
         """Analyze images, videos, audio, documents, and YouTube URLs in a message"""
@@ -1060,125 +1087,59 @@ Make it natural and casual, don't copy these exactly."""
         for attachment in message.attachments:
             filename_lower = attachment.filename.lower()
             
+            # IMAGE FILES
+            if any(filename_lower.endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp']):
+                kind, label, emoji = "image", "Image", "🖼️"
+                mime_type = attachment.content_type or "image/jpeg"
+                prompt = "Describe what you see in this image in a brief, natural way. Focus on the main subject, actions, mood, and any text visible."
+            
+            # VIDEO FILES
+            elif any(filename_lower.endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv']):
+                kind, label, emoji = "video", "Video", "🎥"
+                mime_type = attachment.content_type or "video/mp4"
+                prompt = "Summarize this video briefly. What's happening? What's the main subject or action? What's the mood or message?"
+            
+            # AUDIO FILES
+            elif any(filename_lower.endswith(ext) for ext in ['.mp3', '.wav', '.ogg', '.m4a', '.flac', '.aac']):
+                kind, label, emoji = "audio", "Audio", "🎵"
+                mime_type = attachment.content_type or "audio/mpeg"
+                prompt = "Transcribe and/or summarize this audio. What's being said? What's the tone or mood?"
+            
+            # DOCUMENT FILES
+            elif any(filename_lower.endswith(ext) for ext in ['.pdf', '.txt', '.doc', '.docx', '.md']):
+                kind, label, emoji = "document", "Document", "📄"
+                mime_type = attachment.content_type or "application/pdf"
+                prompt = "Summarize this document briefly. What are the main points or topics?"
+            
+            else:
+                continue
+            
+            # Skip the download entirely when Discord already tells us it's too big
+            if attachment.size > self.media_analyzer.max_bytes(kind):
+                media_descriptions.append(f"[{label}: {attachment.filename} (too large to analyze)]")
+                continue
+            
             try:
-                # Download the file
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(attachment.url) as resp:
-                        if resp.status != 200:
-                            continue
-                        
-                        file_data = await resp.read()
-                        
-                        # IMAGE FILES
-                        if any(filename_lower.endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp']):
-                            try:
-                                media_part = {
-                                    "mime_type": attachment.content_type or "image/jpeg",
-                                    "data": file_data
-                                }
-                                
-                                prompt = "Describe what you see in this image in a brief, natural way. Focus on the main subject, actions, mood, and any text visible."
-                                response = self.gemini_model.generate_content([prompt, media_part])
-                                description = response.text.strip()
-                                
-                                media_descriptions.append(f"[Image: {description}]")
-                                print(f"🖼️ Analyzed image: {description[:100]}...")
-                                
-                            except Exception as e:
-                                print(f"Error analyzing image: {e}")
-                                media_descriptions.append(f"[Image attached: {attachment.filename}]")
-                        
-                        # VIDEO FILES
-                        elif any(filename_lower.endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv']):
-                            try:
-                                # Check file size (Discord max 25MB for normal users, 500MB for nitro)
-                                if attachment.size > 100 * 1024 * 1024:  # 100MB limit for processing
-                                    media_descriptions.append(f"[Video: {attachment.filename} (too large to analyze)]")
-                                    continue
-                                
-                                media_part = {
-                                    "mime_type": attachment.content_type or "video/mp4",
-                                    "data": file_data
-                                }
-                                
-                                prompt = "Summarize this video briefly. What's happening? What's the main subject or action? What's the mood or message?"
-                                response = self.gemini_model.generate_content([prompt, media_part])
-                                description = response.text.strip()
-                                
-                                media_descriptions.append(f"[Video: {description}]")
-                                print(f"🎥 Analyzed video: {description[:100]}...")
-                                
-                            except Exception as e:
-                                print(f"Error analyzing video: {e}")
-                                media_descriptions.append(f"[Video attached: {attachment.filename}]")
-                        
-                        # AUDIO FILES
-                        elif any(filename_lower.endswith(ext) for ext in ['.mp3', '.wav', '.ogg', '.m4a', '.flac', '.aac']):
-                            try:
-                                if attachment.size > 50 * 1024 * 1024:  # 50MB limit
-                                    media_descriptions.append(f"[Audio: {attachment.filename} (too large to analyze)]")
-                                    continue
-                                
-                                media_part = {
-                                    "mime_type": attachment.content_type or "audio/mpeg",
-                                    "data": file_data
-                                }
-                                
-                                prompt = "Transcribe and/or summarize this audio. What's being said? What's the tone or mood?"
-                                response = self.gemini_model.generate_content([prompt, media_part])
-                                description = response.text.strip()
-                                
-                                media_descriptions.append(f"[Audio: {description}]")
-                                print(f"🎵 Analyzed audio: {description[:100]}...")
-                                
-                            except Exception as e:
-                                print(f"Error analyzing audio: {e}")
-                                media_descriptions.append(f"[Audio attached: {attachment.filename}]")
-                        
-                        # DOCUMENT FILES
-                        elif any(filename_lower.endswith(ext) for ext in ['.pdf', '.txt', '.doc', '.docx', '.md']):
-                            try:
-                                if attachment.size > 20 * 1024 * 1024:  # 20MB limit
-                                    media_descriptions.append(f"[Document: {attachment.filename} (too large to analyze)]")
-                                    continue
-                                
-                                # For text files, decode and send as text
-                                if filename_lower.endswith('.txt') or filename_lower.endswith('.md'):
-                                    try:
-                                        text_content = file_data.decode('utf-8')[:10000]  # Limit to 10k chars
-                                        prompt = f"Summarize this document briefly:\n\n{text_content}"
-                                        response = self.gemini_model.generate_content(prompt)
-                                        description = response.text.strip()
-                                    except:
-                                        # Fallback to binary if decode fails
-                                        media_part = {
-                                            "mime_type": "text/plain",
-                                            "data": file_data
-                                        }
-                                        prompt = "Summarize this document briefly. What are the main points or topics?"
-                                        response = self.gemini_model.generate_content([prompt, media_part])
-                                        description = response.text.strip()
-                                else:
-                                    # PDF or other documents
-                                    media_part = {
-                                        "mime_type": attachment.content_type or "application/pdf",
-                                        "data": file_data
-                                    }
-                                    
-                                    prompt = "Summarize this document briefly. What are the main points or topics?"
-                                    response = self.gemini_model.generate_content([prompt, media_part])
-                                    description = response.text.strip()
-                                
-                                media_descriptions.append(f"[Document ({attachment.filename}): {description}]")
-                                print(f"� Analyzed document: {description[:100]}...")
-                                
-                            except Exception as e:
-                                print(f"Error analyzing document: {e}")
-                                media_descriptions.append(f"[Document attached: {attachment.filename}]")
-                        
+                # Text files are sent as text, falling back to binary if they don't decode
+                description = await self.media_analyzer.analyze_url(
+                    attachment.url, prompt, kind, mime_type=mime_type,
+                    as_text=filename_lower.endswith(('.txt', '.md'))
+                )
+                
+                if kind == "document":
+                    media_descriptions.append(f"[Document ({attachment.filename}): {description}]")
+                else:
+                    media_descriptions.append(f"[{label}: {description}]")
+                print(f"{emoji} Analyzed {kind}: {description[:100]}...")
+                
+            except MediaTooLarge:
+                media_descriptions.append(f"[{label}: {attachment.filename} (too large to analyze)]")
+            except asyncio.TimeoutError:
+                print(f"⏱️ Timed out analyzing {kind} {attachment.filename}")
+                media_descriptions.append(f"[{label} attached: {attachment.filename}]")
             except Exception as e:
-                print(f"Error downloading/processing attachment {attachment.filename}: {e}")
-                media_descriptions.append(f"[File attached: {attachment.filename}]")
+                print(f"Error analyzing {kind} {attachment.filename}: {e}")
+                media_descriptions.append(f"[{label} attached: {attachment.filename}]")
         
         # Check embeds for images/videos (e.g., tenor GIFs, YouTube embeds, imgur links)
         for embed in message.embeds:
@@ -1187,34 +1148,19 @@ Make it natural and casual, don't copy these exactly."""
                 
                 if image_url:
                     try:
-                        async with aiohttp.ClientSession() as session:
-                            async with session.get(image_url) as resp:
-                                if resp.status == 200:
-                                    image_data = await resp.read()
-                                    
-                                    try:
-                                        media_part = {
-                                            "mime_type": resp.content_type or "image/jpeg",
-                                            "data": image_data
-                                        }
-                                        
-                                        prompt = "Describe what you see in this image/GIF in a brief, natural way. If it's a GIF or meme, describe the action, mood, or joke."
-                                        response = self.gemini_model.generate_content([prompt, media_part])
-                                        description = response.text.strip()
-                                        
-                                        media_descriptions.append(f"[Image/GIF: {description}]")
-                                        print(f"🖼️ Analyzed embed image: {description[:100]}...")
-                                        
-                                    except Exception as e:
-                                        print(f"Error analyzing embed image: {e}")
-                                        if embed.title or embed.description:
-                                            media_descriptions.append(f"[Image: {embed.title or embed.description[:100]}]")
-                                        else:
-                                            media_descriptions.append("[Image/GIF attached]")
+                        prompt = "Describe what you see in this image/GIF in a brief, natural way. If it's a GIF or meme, describe the action, mood, or joke."
+                        description = await self.media_analyzer.analyze_url(image_url, prompt, "image", default_mime="image/jpeg",
+                                                                            cache_alias=url_key(image_url))
+                        
+                        media_descriptions.append(f"[Image/GIF: {description}]")
+                        print(f"🖼️ Analyzed embed image: {description[:100]}...")
                     
                     except Exception as e:
-                        print(f"Error downloading embed image: {e}")
-                        media_descriptions.append("[Image/GIF in message]")
+                        print(f"Error analyzing embed image: {e}")
+                        if embed.title or embed.description:
+                            media_descriptions.append(f"[Image: {embed.title or embed.description[:100]}]")
+                        else:
+                            media_descriptions.append("[Image/GIF attached]")
             
             # Handle YouTube video embeds
             elif embed.type == 'video' and embed.url:
@@ -1334,6 +1280,15 @@ Make it natural and casual, don't copy these exactly."""
             else:
                 full_prompt = f"{context}{lyrics_context}\n\nUser message: {processed_prompt}"
             
+            if RESPONSE_STREAMING_CONFIG["enabled"]:
+                # Parts go out as soon as they're final, typing overlaps the rest of the generation
+                await self._send_streamed_response(message, full_prompt, processed_prompt)
+                self.participation_tracker[message.channel.id] = {
+                    "last_participation": time.time(),
+                    "is_active": True
+                }
+                return
+            
             # Generate response with fallback system
             response_text = await self._generate_response_with_fallback(
                 user_id=message.author.id,
@@ -1382,6 +1337,43 @@ Make it natural and casual, don't copy these exactly."""
             print(f"Error in AI response: {e}")
             await message.reply("sorry, having technical issues rn", mention_author=False)
 
+    async def _send_streamed_response(self, message: discord.Message, prompt: str, original_message: str):
+        """Stream the reply and send each part once it's final, with typing delays overlapping the generation"""
+        parts = asyncio.Queue()
+        
+        async def send_parts() -> int:
+            sent = 0
+            last_sent = 0.0
+            while (part := await parts.get()) is not None:
+                if sent:
+                    # the usual pause between messages, minus the time spent waiting for this part
+                    await asyncio.sleep(max(0.0, random.uniform(2.0, 3.0) - (time.time() - last_sent)))
+                print(f"🔧 Sending part {sent + 1}: {part[:30]}...")
+                await self._type_with_delay(message.channel, part)
+                if sent == 0:
+                    await message.reply(part, mention_author=False)
+                else:
+                    await message.channel.send(part)
+                sent += 1
+                last_sent = time.time()
+            return sent
+        
+        sender = asyncio.create_task(send_parts())
+        try:
+            response_text = await self._generate_response_with_fallback(
+                user_id=message.author.id,
+                channel_id=message.channel.id,
+                prompt=prompt,
+                original_message=original_message,
+                username=message.author.display_name,
+                stream_to=parts.put_nowait
+            )
+        finally:
+            parts.put_nowait(None)
+        
+        if not await sender:
+            await message.reply(response_text or "sorry, having technical issues rn", mention_author=False)
+
     async def _collect_recent_user_messages(self, original_message: discord.Message) -> list:
         """Collect recent conversation context from all users within 30 seconds"""
         messages = []
@@ -1444,172 +1436,14 @@ Make it natural and casual, don't copy these exactly."""
 
     def _preprocess_response_for_splitting(self, response: str) -> str:
         """Preprocess response to handle newlines and prepare for message splitting"""
-        if not response:
-            return response
-        
-        # If the response contains newlines, it might be intended as separate messages
-        # Replace newlines with a special marker that our splitting function can handle
-        
-        # First, clean up any double newlines or excessive whitespace
-        import re
-        response = re.sub(r'\n\s*\n', '\n', response)  # Remove double newlines
-        response = re.sub(r'\n\s+', '\n', response)    # Remove whitespace after newlines
-        
-        # If there are newlines, split on them and treat each line as a separate message intention
-        if '\n' in response:
-            lines = [line.strip() for line in response.split('\n') if line.strip()]
-            if len(lines) > 1:
-                # Join with a special separator that our splitting function will recognize
-                return ' |SPLIT| '.join(lines)
-        
-        return response
+        return preprocess_for_splitting(response)
 
     def _split_response_naturally(self, response: str) -> list:
         """Split response at natural speech boundaries - complete sentences and natural pauses"""
-        import re
-        
-        # Debug logging
         print(f"🔧 Splitting response (length: {len(response)}): {response[:100]}...")
-        
-        # First check if the response contains our special split marker (from newlines)
-        if '|SPLIT|' in response:
-            pre_split_parts = [part.strip() for part in response.split('|SPLIT|') if part.strip()]
-            print(f"🔧 Found {len(pre_split_parts)} pre-split parts from newlines")
-            
-            # Each newline-separated part should be its own message
-            final_parts = []
-            for part in pre_split_parts:
-                # Only split further if the part is extremely long (over 150 chars)
-                if len(part) > 150:
-                    sub_parts = self._split_long_text_at_sentences(part)
-                    final_parts.extend(sub_parts)
-                else:
-                    final_parts.append(part)
-            return final_parts
-        
-        # For regular responses, split at sentence boundaries
-        return self._split_long_text_at_sentences(response)
-    
-    def _split_long_text_at_sentences(self, text: str) -> list:
-        """Split text at natural sentence boundaries and speech pauses"""
-        import re
-        
-        text = text.strip()
-        if not text:
-            return []
-        
-        # Keep short messages intact (under 100 characters)
-        if len(text) <= 100:
-            print(f"🔧 Keeping short message intact")
-            return [text]
-        
-        parts = []
-        
-        # Primary split points (complete sentences)
-        # Split on sentence endings followed by space/start of new sentence
-        sentence_pattern = r'([.!?]+)\s+(?=[A-Z]|[a-z])'
-        sentences = re.split(sentence_pattern, text)
-        
-        # Recombine sentences with their punctuation
-        current_part = ""
-        for i in range(0, len(sentences), 2):
-            sentence = sentences[i]
-            punctuation = sentences[i + 1] if i + 1 < len(sentences) else ""
-            
-            full_sentence = sentence + punctuation
-            
-            # If adding this sentence would make the part too long, save current part
-            if current_part and len(current_part + " " + full_sentence) > 120:
-                if current_part.strip():
-                    parts.append(current_part.strip())
-                current_part = full_sentence
-            else:
-                # Add to current part
-                if current_part:
-                    current_part += " " + full_sentence
-                else:
-                    current_part = full_sentence
-        
-        # Add any remaining text
-        if current_part.strip():
-            parts.append(current_part.strip())
-        
-        # If we didn't get good sentence splits (like one very long sentence), 
-        # fall back to natural pause points
-        if len(parts) == 1 and len(parts[0]) > 120:
-            parts = self._split_at_natural_pauses(parts[0])
-        
-        # Clean up and validate
-        parts = [part.strip() for part in parts if part.strip()]
-        
-        print(f"🔧 Split into {len(parts)} natural parts at sentence boundaries")
-        part_lengths = [len(part) for part in parts]
-        print(f"🔧 Part lengths: {part_lengths}")
-        
-        return parts if parts else [text]
-    
-    def _split_at_natural_pauses(self, text: str) -> list:
-        """Split at natural speech pauses when sentence splitting fails"""
-        
-        # Natural pause points in order of preference
-        pause_points = [
-            r',\s+(?=and\s)',     # ", and"
-            r',\s+(?=but\s)',     # ", but" 
-            r',\s+(?=so\s)',      # ", so"
-            r',\s+(?=or\s)',      # ", or"
-            r',\s+(?=because\s)', # ", because"
-            r',\s+(?=while\s)',   # ", while"
-            r',\s+(?=when\s)',    # ", when"
-            r',\s+(?=if\s)',      # ", if"
-            r',\s+(?=since\s)',   # ", since"
-            r';\s+',              # semicolons
-            r':\s+',              # colons
-            r'\s+--\s+',          # em dashes
-            r'\s+-\s+',           # regular dashes with spaces
-            r',\s+',              # any comma with space
-        ]
-        
-        parts = []
-        remaining = text.strip()
-        
-        while remaining and len(remaining) > 100:
-            best_split = None
-            best_position = 0
-            
-            # Find the best pause point around the middle of remaining text
-            target_position = len(remaining) // 2
-            
-            for pattern in pause_points:
-                import re
-                matches = list(re.finditer(pattern, remaining))
-                
-                for match in matches:
-                    position = match.end()
-                    # Prefer splits closer to the middle, but not too early or late
-                    if 50 <= position <= len(remaining) - 30:
-                        distance_from_target = abs(position - target_position)
-                        if best_split is None or distance_from_target < abs(best_position - target_position):
-                            best_split = pattern
-                            best_position = position
-                
-                # If we found a good split with this pattern, use it
-                if best_split:
-                    break
-            
-            if best_split:
-                part = remaining[:best_position].strip()
-                if part:
-                    parts.append(part)
-                remaining = remaining[best_position:].strip()
-            else:
-                # No good pause point found, just break
-                break
-        
-        # Add any remaining text
-        if remaining.strip():
-            parts.append(remaining.strip())
-        
-        return parts if parts else [text]
+        parts = split_naturally(response)
+        print(f"🔧 Part lengths: {[len(part) for part in parts]}")
+        return parts
 
     async def _send_response_parts(self, message: discord.Message, response_parts: list, typing_delay: bool = True):
         """Send multiple response parts with human-like delays"""
@@ -1733,8 +1567,13 @@ Make it natural and casual, don't copy these exactly."""
                 # Normal steady typing
                 await asyncio.sleep(delay)
     
-    async def _generate_response_with_fallback(self, user_id: int, channel_id: int, prompt: str, original_message: str, username: str = None) -> Optional[str]:
-        """Generate response with model fallback and error handling using shared channel context"""
+    async def _generate_response_with_fallback(self, user_id: int, channel_id: int, prompt: str, original_message: str,
+                                               username: str = None, priority: int = PRIORITY_MENTION,
+                                               stream_to: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Generate response with model fallback and error handling using shared channel context.
+        With `stream_to` the reply is streamed and every message part is passed to it as soon as it's final.
+        """
         
         # Track API usage
         self.daily_api_calls += 1
@@ -1799,66 +1638,87 @@ Make it natural and casual, don't copy these exactly."""
         else:
             user_aware_prompt = f"[User ID: {user_id}] {enhanced_prompt}"
         
-        MODEL_HIERARCHY = [
-            "gemini-2.5-flash",
-            "gemini-2.5-flash-lite",
-            "gemini-2.5-pro", 
-            "gemini-2.0-flash",
-            "gemini-2.0-flash-lite",
-            "gemini-1.5-flash",
-            "gemini-1.5-flash-8b",
-        ]
+        splitter = IncrementalSplitter() if stream_to else None
         
-        for i, model_name in enumerate(MODEL_HIERARCHY):
-            try:
-                # Switch model if needed
-                if session_data["model_index"] != i:
-                    model = genai.GenerativeModel(
-                        model_name=model_name,
-                        safety_settings=self.safety_settings,
-                        system_instruction=self.bot.system_prompt
-                    )
-                    history = session_data["chat"].history if session_data["chat"] else []
-                    session_data["chat"] = model.start_chat(history=history)
-                    session_data["model_index"] = i
-                
-                chat = session_data["chat"]
+        def deliver(parts: list, clean: bool = True):
+            for part in parts:
+                part = self._clean_response_output(part) if clean else part
+                if part:
+                    stream_to(part)
+        
+        async def send_with(model_name: str):
+            # Switch model if needed (model objects are cached, the history carries over)
+            model_index = GEMINI_MODEL_HIERARCHY.index(model_name)
+            if session_data["model_index"] != model_index:
+                history = session_data["chat"].history if session_data["chat"] else []
+                session_data["chat"] = self._get_model(model_name).start_chat(history=history)
+                session_data["model_index"] = model_index
+            
+            chat = session_data["chat"]
+            if splitter is None:
                 response = await chat.send_message_async(user_aware_prompt)
-                raw_response = response.text
-                
-                # Clean response to prevent context leakage
-                cleaned_response = self._clean_response_output(raw_response)
-                
-                # Apply personality quirks and enhancements
-                context_type = self._determine_context_type(original_message, cleaned_response)
-                enhanced_response = self._apply_personality_quirks(cleaned_response, mood_data, context_type)
-                
-                return enhanced_response
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                if "PROHIBITED_CONTENT" in error_str:
-                    return "Filtered."
-                elif "429" in error_str or "quota" in error_str.lower():
-                    print(f"⚠️ Rate limit on {model_name}, falling back...")
-                    continue  # Try next model
-                else:
-                    print(f"Error with {model_name}: {e}")
-                    continue
+                response.text  # raises for blocked/empty candidates, which should fall back like any other error
+                return chat, response
+            
+            response = await chat.send_message_async(user_aware_prompt, stream=True)
+            try:
+                async for chunk in response:
+                    deliver(splitter.feed(_chunk_text(chunk)))
+                response.text
+            except Exception:
+                # drop the half-received exchange, the chat history can't be built from a broken stream
+                chat.rewind()
+                raise
+            return chat, response
+        
+        def fatal(e: Exception) -> bool:
+            # once parts are in the channel another model can't start the reply over
+            return "PROHIBITED_CONTENT" in str(e) or bool(splitter and splitter.emitted)
         
-        # All models failed
-        return None
+        try:
+            # the chat the exchange lands on - a compaction or summary can swap the session's chat meanwhile
+            epoch = session_data["epoch"]
+            sent_chat, response = await self.gemini_scheduler.run(send_with, priority, fatal=fatal)
+        except NoModelAvailable as e:
+            print(f"⚠️ No Gemini model available: {e}")
+            return None
+        except Exception as e:
+            if splitter and splitter.emitted:
+                print(f"⚠️ Response stream broke off after {splitter.emitted} parts: {e}")
+                deliver(splitter.split_tail(self._clean_response_output(splitter.finish())))
+                return None
+            if "PROHIBITED_CONTENT" in str(e):
+                return "Filtered."
+            # All models failed
+            print(f"All Gemini models failed: {e}")
+            return None
+        
+        raw_response = response.text
+        
+        # Only the user's words stay in history, the context block is rebuilt next time anyway
+        slim_prompt = f"[User: {username}] {original_message}" if username else f"[User ID: {user_id}] {original_message}"
+        self.session_manager.record_turn(session_data, response, slim_prompt, chat=sent_chat, epoch=epoch)
+        self.session_manager.compact(session_data, channel_id)
+        
+        # Clean response to prevent context leakage
+        cleaned_response = self._clean_response_output(raw_response)
+        
+        # Apply personality quirks and enhancements
+        context_type = self._determine_context_type(original_message, cleaned_response)
+        if splitter is None:
+            return self._apply_personality_quirks(cleaned_response, mood_data, context_type)
+        
+        # Streamed: whatever is still unsent goes through the same cleanup, quirks and splitting.
+        # Parts already sent can't get a quirk put in front of them.
+        tail = self._clean_response_output(splitter.finish())
+        tail = self._apply_personality_quirks(tail, mood_data, context_type, allow_prefix=not splitter.emitted)
+        deliver(splitter.split_tail(tail), clean=False)
+        return cleaned_response
     
     def _get_or_create_session(self, channel_id: int) -> Dict:
         """Get or create chat session for channel (shared by all users)"""
         if channel_id not in self.gemini_chat_sessions:
-            self.gemini_chat_sessions[channel_id] = {
-                "chat": None,
-                "model_index": 0,
-                "message_count": 0,
-                "created_at": time.time()
-            }
+            self.gemini_chat_sessions[channel_id] = self.session_manager.new_session()
         
         session = self.gemini_chat_sessions[channel_id]
         
@@ -1869,29 +1729,15 @@ Make it natural and casual, don't copy these exactly."""
             except Exception as e:
                 print(f"Failed to create chat session: {e}")
         
-        # Limit chat history - more aggressive trimming to prevent token buildup
         session["message_count"] += 1
         
-        # First, check if we need to trim based on estimated token count (most important check)
-        if self._trim_session_if_needed(session, channel_id):
-            return session  # Session was reset, return early
+        # Keep history inside the token budget - old turns go to the summary instead of being wiped
+        self._trim_session_if_needed(session, channel_id)
         
-        # Check if we need to trim the conversation history based on message count
-        if session["message_count"] > self.chat_history_limit:
-            # Reset session to limit context length
+        # If session has been active for too long, reset to prevent memory buildup
+        if session.get("created_at", 0) < time.time() - (2 * 60 * 60):  # 2 hours
             try:
-                session["chat"] = self.gemini_model.start_chat()
-                session["message_count"] = 1
-                print(f"Reset chat session for channel {channel_id} (hit message limit of {self.chat_history_limit})")
-            except Exception as e:
-                print(f"Failed to reset chat session: {e}")
-        
-        # Additional check: if session has been active for too long, also reset to prevent memory buildup
-        elif session.get("created_at", 0) < time.time() - (2 * 60 * 60):  # 2 hours
-            try:
-                session["chat"] = self.gemini_model.start_chat()
-                session["message_count"] = 1
-                session["created_at"] = time.time()
+                self.session_manager.reset(session, self.gemini_model.start_chat())
                 print(f"Reset chat session for channel {channel_id} (session too old - preventing memory buildup)")
             except Exception as e:
                 print(f"Failed to reset aged chat session: {e}")
@@ -1899,40 +1745,40 @@ Make it natural and casual, don't copy these exactly."""
         return session
     
     def _estimate_session_tokens(self, session_data: Dict) -> int:
-        """Estimate total tokens in the current chat session"""
-        if not session_data.get("chat") or not hasattr(session_data["chat"], 'history'):
-            return 0
-        
-        total_tokens = 0
+        """Tokens in the current chat session (incremental ledger, calibrated estimates)"""
+        return self.session_manager.total_tokens(session_data)
+    
+    def _trim_session_if_needed(self, session_data: Dict, channel_id: int) -> bool:
+        """Fold turns older than the verbatim window into the session summary once over budget"""
         try:
-            for content in session_data["chat"].history:
-                if hasattr(content, 'parts'):
-                    for part in content.parts:
-                        if hasattr(part, 'text'):
-                            # Rough estimation: ~4 characters per token
-                            total_tokens += len(part.text) // 4
+            return self.session_manager.compact(session_data, channel_id)
         except Exception as e:
-            print(f"Error estimating session tokens: {e}")
-            return 0
-        
-        return total_tokens
+            print(f"Failed to compact session for channel {channel_id}: {e}")
+            return False
     
-    def _trim_session_if_needed(self, session_data: Dict, channel_id: int) -> bool:
-        """Check if session needs trimming based on estimated token count and trim if needed"""
-        estimated_tokens = self._estimate_session_tokens(session_data)
-        
-        # If we're approaching token limits (conservatively set at 10,000 tokens), reset the session
-        if estimated_tokens > 10000:
-            try:
-                session_data["chat"] = self.gemini_model.start_chat()
-                session_data["message_count"] = 1
-                session_data["created_at"] = time.time()
-                print(f"Reset chat session for channel {channel_id} (estimated {estimated_tokens} tokens - preventing context overflow)")
-                return True
-            except Exception as e:
-                print(f"Failed to reset session during token trimming: {e}")
+    async def _summarize_session_history(self, previous_summary: str, transcript: str) -> Optional[str]:
+        """Condense cut chat turns (plus the previous summary) into a short memory block"""
+        prompt = (
+            "You keep notes for Izumi, a Discord chat bot, about a channel conversation she is part of.\n"
+            "Merge the existing notes and the new transcript into at most 8 short bullet points. "
+            "Keep who said what, facts people shared, ongoing topics, plans, promises and running jokes. "
+            "Drop greetings and filler. Reply with the bullet points only.\n\n"
+            f"Existing notes:\n{previous_summary or '(none)'}\n\n"
+            f"New transcript:\n{transcript}"
+        )
+        async def summarize_with(model_name: str):
+            response = await self._get_model(model_name, with_persona=False).generate_content_async(
+                prompt,
+                generation_config={"max_output_tokens": GEMINI_SESSION_CONFIG["summary_max_tokens"]}
+            )
+            return response.text
         
-        return False
+        self.daily_api_calls += 1
+        self._save_api_usage_data()
+        return await self.gemini_scheduler.run(
+            summarize_with, PRIORITY_BACKGROUND,
+            prefer=GEMINI_SESSION_CONFIG["summary_model"]
+        )
     
     def _clean_response_output(self, response: str) -> str:
         """Clean AI response to prevent context/debug information from leaking through"""
@@ -2034,8 +1880,9 @@ Make it natural and casual, don't copy these exactly."""
         enhanced_prompt = f"{prompt}\n\nPERSONALITY CONTEXT: {' | '.join(enhancement_parts)}"
         return enhanced_prompt
     
-    def _apply_personality_quirks(self, response_text: str, mood_data: dict, context_type: str = "general") -> str:
-        """Apply personality quirks and speech patterns to the response"""
+    def _apply_personality_quirks(self, response_text: str, mood_data: dict, context_type: str = "general",
+                                  allow_prefix: bool = True) -> str:
+        """Apply personality quirks and speech patterns to the response (`allow_prefix=False` for the tail of a streamed reply)"""
         if not response_text:
             return response_text
         
@@ -2048,18 +1895,18 @@ Make it natural and casual, don't copy these exactly."""
             
             if quirk_content and quirk_type:
                 # Apply quirk based on type
-                if quirk_type == "thinking":
+                if quirk_type == "thinking" and allow_prefix:
                     response_text = f"{quirk_content} {response_text}"
                 elif quirk_type == "enthusiasm":
                     response_text = f"{response_text} {quirk_content}"
-                elif quirk_type == "agreement":
+                elif quirk_type == "agreement" and allow_prefix:
                     response_text = f"{quirk_content} {response_text}"
                 elif quirk_type == "favorite_phrase":
                     # Only add favorite phrases if the response doesn't already express strong emotion
                     response_emotion_words = ["amazing", "awesome", "cool", "great", "love", "hate", "terrible", "awful", "annoying"]
                     if not any(word in response_text.lower() for word in response_emotion_words):
                         # Sometimes add to end, sometimes replace simple acknowledgments
-                        if len(response_text.split()) <= 3:
+                        if len(response_text.split()) <= 3 and allow_prefix:
                             response_text = quirk_content
                         else:
                             response_text = f"{response_text} {quirk_content}"
@@ -2161,6 +2008,25 @@ Make it natural and casual, don't copy these exactly."""
         
         return "general"
     
+    def _format_scheduler_status(self) -> str:
+        """One line per model with its learned limits and whether it's being skipped"""
+        info = self.gemini_scheduler.info()
+        lines = [f"**{info['active']}** running | **{info['waiting']}** waiting | **{info['unavailable']}** turned away"]
+        for name, model in info['models'].items():
+            if not model['requests'] and not model['ready_in']:
+                continue
+            limits = f"{model['rpm_limit'] or '?'}/min, {model['day_requests']}/{model['rpd_limit'] or '?'} today"
+            status = f"⏸️ {model['ready_in']}s" if model['ready_in'] else "✅"
+            lines.append(f"{status} `{name}`: {model['successes']}/{model['requests']} ok, "
+                         f"{model['rate_limited']} 429s | {limits}")
+        media = self.media_analyzer.info()
+        cache = self.media_cache.info()
+        lines.append(f"🎞️ Media jobs: {media['running']} running, {media['jobs']} total, "
+                     f"{media['timeouts']} timed out, {media['uploads']} via File API")
+        lines.append(f"🗂️ Media cache: {cache['entries']} entries, {cache['hit_rate']}% hit rate, "
+                     f"{media['cache_hits']} analyses reused")
+        return "\n".join(lines)
+    
     @commands.command(name='api_usage')
     @commands.has_permissions(administrator=True)
     async def api_usage(self, ctx):
@@ -2251,6 +2117,13 @@ Make it natural and casual, don't copy these exactly."""
             inline=True
         )
         
+        # Scheduler / per-model quota state
+        embed.add_field(
+            name="🚦 Gemini Scheduler",
+            value=self._format_scheduler_status(),
+            inline=False
+        )
+        
         embed.set_footer(text="Use this to monitor API usage and optimization effectiveness")
         await ctx.send(embed=embed)
 
@@ -2259,8 +2132,7 @@ Make it natural and casual, don't copy these exactly."""
     async def ai_stats(self, ctx):
         """Show AI learning statistics"""
         # Get learning data from unified memory structure
-        memory_data = self.learning_engine.memory_data
-        users_data = memory_data.get('users', {})
+        coverage = self.learning_engine.get_learning_coverage()
         
         embed = discord.Embed(
             title="🤖 AI Learning Statistics",
@@ -2268,16 +2140,13 @@ Make it natural and casual, don't copy these exactly."""
         )
         
         # General stats - count users with various data types
-        vocab_users = sum(1 for user_data in users_data.values() 
-                         if user_data.get('learning_data', {}).get('vocabulary_trends'))
-        sentiment_users = sum(1 for user_data in users_data.values() 
-                             if user_data.get('learning_data', {}).get('sentiment_patterns'))
-        relationship_users = sum(1 for user_data in users_data.values() 
-                                if user_data.get('learning_data', {}).get('relationship_networks'))
+        vocab_users = coverage['vocabulary_trends']
+        sentiment_users = coverage['sentiment_patterns']
+        relationship_users = coverage['relationship_networks']
         
         embed.add_field(
             name="📊 Learning Coverage",
-            value=f"👥 Total Users: {len(users_data)}\n"
+            value=f"👥 Total Users: {coverage['users']}\n"
                   f"📝 Vocabulary Tracking: {vocab_users}\n"
                   f"😊 Sentiment Analysis: {sentiment_users}\n"
                   f"🤝 Relationship Networks: {relationship_users}",
@@ -2300,6 +2169,14 @@ Make it natural and casual, don't copy these exactly."""
         
         embed.add_field(name="Active in last hour", value=recent_activity, inline=True)
         
+        queue = self.learning_engine.learning_queue.info()
+        embed.add_field(
+            name="📥 Learning Queue",
+            value=f"Depth: {queue['depth']} | Processed: {queue['processed']:,} in {queue['batches']:,} batches\n"
+                  f"Sampled out: {queue['sampled_out']:,} | Dropped: {queue['dropped']:,} | Errors: {queue['errors']}",
+            inline=False
+        )
+        
         await ctx.send(embed=embed)
     
     @app_commands.command(name="ai_stats", description="Show AI learning statistics (Admin only)")
@@ -2307,8 +2184,7 @@ Make it natural and casual, don't copy these exactly."""
     async def slash_ai_stats(self, interaction: discord.Interaction):
         """Show AI learning statistics (slash command version)"""
         # Get learning data from unified memory structure
-        memory_data = self.learning_engine.memory_data
-        users_data = memory_data.get('users', {})
+        coverage = self.learning_engine.get_learning_coverage()
         
         embed = discord.Embed(
             title="🤖 AI Learning Statistics",
@@ -2316,16 +2192,13 @@ Make it natural and casual, don't copy these exactly."""
         )
         
         # General stats - count users with various data types
-        vocab_users = sum(1 for user_data in users_data.values() 
-                         if user_data.get('learning_data', {}).get('vocabulary_trends'))
-        sentiment_users = sum(1 for user_data in users_data.values() 
-                             if user_data.get('learning_data', {}).get('sentiment_patterns'))
-        relationship_users = sum(1 for user_data in users_data.values() 
-                                if user_data.get('learning_data', {}).get('relationship_networks'))
+        vocab_users = coverage['vocabulary_trends']
+        sentiment_users = coverage['sentiment_patterns']
+        relationship_users = coverage['relationship_networks']
         
         embed.add_field(
             name="📊 Learning Coverage",
-            value=f"👥 Total Users: {len(users_data)}\n"
+            value=f"👥 Total Users: {coverage['users']}\n"
                   f"📝 Vocabulary Tracking: {vocab_users}\n"
                   f"😊 Sentiment Analysis: {sentiment_users}\n"
                   f"🤝 Relationship Networks: {relationship_users}",
@@ -2345,6 +2218,14 @@ Make it natural and casual, don't copy these exactly."""
         
         embed.add_field(name="Active in last hour", value=recent_activity, inline=True)
         
+        queue = self.learning_engine.learning_queue.info()
+        embed.add_field(
+            name="📥 Learning Queue",
+            value=f"Depth: {queue['depth']} | Processed: {queue['processed']:,} in {queue['batches']:,} batches\n"
+                  f"Sampled out: {queue['sampled_out']:,} | Dropped: {queue['dropped']:,} | Errors: {queue['errors']}",
+            inline=False
+        )
+        
         await interaction.response.send_message(embed=embed)
     
     @commands.command(name='ai_context')
@@ -2499,6 +2380,13 @@ Make it natural and casual, don't copy these exactly."""
             inline=True
         )
         
+        # Scheduler / per-model quota state
+        embed.add_field(
+            name="🚦 Gemini Scheduler",
+            value=self._format_scheduler_status(),
+            inline=False
+        )
+        
         embed.set_footer(text="Use this to monitor API usage and optimization effectiveness")
         await interaction.response.send_message(embed=embed)
 
@@ -2511,8 +2399,7 @@ Make it natural and casual, don't copy these exactly."""
             return
         
         # Get learning data from unified memory structure
-        memory_data = self.learning_engine.memory_data
-        users_data = memory_data.get('users', {})
+        coverage = self.learning_engine.get_learning_coverage()
         
         embed = discord.Embed(
             title="🤖 AI Learning Statistics",
@@ -2520,16 +2407,13 @@ Make it natural and casual, don't copy these exactly."""
         )
         
         # General stats - count users with various data types
-        vocab_users = sum(1 for user_data in users_data.values() 
-                         if user_data.get('learning_data', {}).get('vocabulary_trends'))
-        sentiment_users = sum(1 for user_data in users_data.values() 
-                             if user_data.get('learning_data', {}).get('sentiment_patterns'))
-        relationship_users = sum(1 for user_data in users_data.values() 
-                                if user_data.get('learning_data', {}).get('relationship_networks'))
+        vocab_users = coverage['vocabulary_trends']
+        sentiment_users = coverage['sentiment_patterns']
+        relationship_users = coverage['relationship_networks']
         
         embed.add_field(
             name="📊 Learning Coverage",
-            value=f"**{len(users_data)}** total users tracked\n"
+            value=f"**{coverage['users']}** total users tracked\n"
                   f"**{vocab_users}** users with vocabulary data\n"
                   f"**{sentiment_users}** users with sentiment data\n"
                   f"**{relationship_users}** users with relationship data",
@@ -2537,7 +2421,7 @@ Make it natural and casual, don't copy these exactly."""
         )
         
         # Memory stats
-        total_memories = memory_data.get('daily_memories', {})
+        total_memories = self.learning_engine.memory_data.get('daily_memories', {})
         recent_memories = len([m for m in total_memories.values() if m.get('timestamp', 0) > time.time() - 604800])  # Last week
         
         embed.add_field(
@@ -2595,11 +2479,13 @@ Make it natural and casual, don't copy these exactly."""
         
         # Session details
         total_messages = sum(session.get("message_count", 0) for session in self.gemini_chat_sessions.values())
+        session_info = self.session_manager.info()
         embed.add_field(
             name="📊 Session Statistics",
             value=f"**{total_messages}** total messages across all sessions\n"
-                  f"**{self.chat_history_limit}** message limit per session\n"
-                  f"**10,000** token limit per session",
+                  f"**{GEMINI_SESSION_CONFIG['keep_turns']}** turns kept verbatim, older ones summarized\n"
+                  f"**{GEMINI_SESSION_CONFIG['summarize_at']:,}** / **{GEMINI_SESSION_CONFIG['max_tokens']:,}** summary / hard token limit\n"
+                  f"**{session_info['summaries']}** summaries | **{session_info['chars_per_token']}** chars/token",
             inline=True
         )
         
@@ -2610,7 +2496,9 @@ Make it natural and casual, don't copy these exactly."""
             embed.add_field(
                 name="🔍 Current Channel",
                 value=f"**{channel_session.get('message_count', 0)}** messages\n"
-                      f"**~{estimated_tokens}** estimated tokens\n"
+                      f"**~{estimated_tokens}** history tokens"
+                      f"{' (+ summary)' if channel_session.get('summary') else ''}\n"
+                      f"**{channel_session.get('last_prompt_tokens', 0)}** tokens in last prompt\n"
                       f"**{time.time() - channel_session.get('created_at', time.time()):.0f}s** session age",
                 inline=True
             )
@@ -2622,11 +2510,13 @@ Make it natural and casual, don't copy these exactly."""
             )
         
         # Context system
+        section_cache = self.context_builder.section_cache.info()
         embed.add_field(
             name="📝 Context System",
             value=f"**{self.context_builder.max_context_tokens}** max context tokens\n"
                   f"**50** recent messages per channel\n"
-                  f"**2 hours** max session age",
+                  f"**2 hours** max session age\n"
+                  f"**{section_cache['hit_rate']}%** section cache hits ({section_cache['entries']} cached)",
             inline=True
         )
         
@@ -2634,7 +2524,8 @@ Make it natural and casual, don't copy these exactly."""
         embed.add_field(
             name="🔧 Memory Management",
             value="**Automatic cleanup:** Every 6 hours\n"
-                  "**Session reset:** Token/age limits\n"
+                  "**Session compaction:** Old turns summarized at the token budget\n"
+                  "**Session reset:** Age limit\n"
                   "**Data trimming:** Continuous",
             inline=True
         )
@@ -2655,16 +2546,10 @@ Make it natural and casual, don't copy these exactly."""
         # Reset chat session if it exists
         if channel_id in self.gemini_chat_sessions:
             try:
-                self.gemini_chat_sessions[channel_id] = {
-                    "chat": self.gemini_model.start_chat(),
-                    "model_index": 0,
-                    "message_count": 0,
-                    "created_at": time.time()
-                }
+                self.gemini_chat_sessions[channel_id] = self.session_manager.new_session(self.gemini_model.start_chat())
                 
                 # Also clear recent messages from unified memory
-                if hasattr(self.learning_engine, 'recent_messages') and channel_id in self.learning_engine.recent_messages:
-                    self.learning_engine.recent_messages[channel_id].clear()
+                self.learning_engine.reset_channel_activity(channel_id)
                 
                 await interaction.response.send_message("✅ **AI context reset successfully!**\n"
                                                        "The conversation history for this channel has been cleared.", 
@@ -2719,7 +2604,7 @@ Make it natural and casual, don't copy these exactly."""
         embed.add_field(
             name="💬 Active Sessions",
             value=f"**{active_sessions}** active chat sessions\n"
-                  f"**{self.chat_history_limit}** message history limit per channel",
+                  f"**{GEMINI_SESSION_CONFIG['keep_turns']}** turns kept verbatim per channel, older ones summarized",
             inline=True
         )
         
@@ -2779,30 +2664,15 @@ Make it natural and casual, don't copy these exactly."""
         sessions_cleaned = 0
         
         for channel_id, session in list(self.gemini_chat_sessions.items()):
-            reset_needed = False
-            reason = ""
-            
-            # Check token usage
-            estimated_tokens = self._estimate_session_tokens(session)
-            if estimated_tokens > 8000:  # Conservative limit
-                reset_needed = True
-                reason = f"high token usage ({estimated_tokens})"
-            
-            # Check message count
-            elif session.get("message_count", 0) > 75:  # 75% of limit
-                reset_needed = True
-                reason = f"high message count ({session.get('message_count', 0)})"
+            # Token usage is handled by compaction (old turns summarized), not by a reset
+            if self._trim_session_if_needed(session, channel_id):
+                sessions_cleaned += 1
             
             # Check session age
-            elif current_time - session.get('created_at', current_time) > (90 * 60):  # 1.5 hours
-                reset_needed = True
+            if current_time - session.get('created_at', current_time) > (90 * 60):  # 1.5 hours
                 reason = f"session age ({(current_time - session.get('created_at', current_time)) // 60:.0f} minutes)"
-            
-            if reset_needed:
                 try:
-                    session["chat"] = self.gemini_model.start_chat()
-                    session["message_count"] = 1
-                    session["created_at"] = current_time
+                    self.session_manager.reset(session, self.gemini_model.start_chat())
                     sessions_cleaned += 1
                     print(f"🔄 Proactively reset session for channel {channel_id} (reason: {reason})")
                 except Exception as e:
@@ -2817,6 +2687,9 @@ Make it natural and casual, don't copy these exactly."""
         current_time = time.time()
         cutoff_time = current_time - (30 * 24 * 60 * 60)  # 30 days
         
+        # Drop media analyses past their TTL
+        self.media_cache.expire()
+        
         # Clean up old chat sessions
         sessions_to_remove = []
         for user_id, session in self.gemini_chat_sessions.items():
@@ -2826,9 +2699,10 @@ Make it natural and casual, don't copy these exactly."""
         for user_id in sessions_to_remove:
             del self.gemini_chat_sessions[user_id]
         
-        # Clean up learning data for inactive users in unified memory
+        # Clean up learning data for inactive users in unified memory - only loaded profiles,
+        # the ones on disk don't cost memory and get evicted as they are
         if 'users' in memory_data:
-            for user_id_str in list(memory_data['users'].keys()):
+            for user_id_str in memory_data['users'].resident_keys():
                 try:
                     user_id = int(user_id_str)
                     user_data = memory_data['users'][user_id_str]
@@ -2842,12 +2716,12 @@ Make it natural and casual, don't copy these exactly."""
                             vocab = learning_data['vocabulary']
                             # Keep only top items
                             if len(vocab.get('word_frequency', {})) > 30:
-                                sorted_words = sorted(vocab['word_frequency'].items(), key=lambda x: x[1], reverse=True)
-                                vocab['word_frequency'] = dict(sorted_words[:30])
+                                self.learning_engine.get_top_k_sketch(user_id_str, vocab, 'word_frequency').trim(30)
                             
                             vocab['message_lengths'] = vocab.get('message_lengths', [])[-50:]
                             vocab['question_patterns'] = vocab.get('question_patterns', [])[-10:]
                             vocab['exclamation_patterns'] = vocab.get('exclamation_patterns', [])[-10:]
+                            self.learning_engine.bump_section_version(user_id_str, 'vocabulary')
                 except:
                     continue
     
@@ -2855,6 +2729,7 @@ Make it natural and casual, don't copy these exactly."""
         """Clean shutdown"""
         self.save_learning_data_task.cancel()
         self.cleanup_learning_data_task.cancel()
+        self.media_analyzer.close()
         
         # Save data before shutdown
         try:
@@ -0,0 +1,178 @@
+"""
+Learning Queue for Izumi AI
+Buffers message snapshots and feeds them to the unified memory in micro-batches off the reply path
+"""
+
+import asyncio
+import random
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.config import LEARNING_QUEUE_CONFIG
+
+
+class MessageSnapshot:
+    """The parts of a discord.Message learning needs, so the message object isn't kept alive in the queue"""
+
+    __slots__ = ('author_id', 'author_name', 'display_name', 'guild_id', 'channel_id', 'content',
+                 'created_at', 'mention_ids', 'mentions_bot', 'attachment_count', 'features')
+
+    def __init__(self, author_id: int, author_name: str, display_name: str, guild_id: int, channel_id: int,
+                 content: str, created_at: datetime, mention_ids: Tuple[int, ...] = (),
+                 mentions_bot: bool = False, attachment_count: int = 0):
+        self.author_id = author_id
+        self.author_name = author_name
+        self.display_name = display_name
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.content = content
+        self.created_at = created_at
+        self.mention_ids = mention_ids            # mentioned humans other than the author
+        self.mentions_bot = mentions_bot
+        self.attachment_count = attachment_count
+        self.features = None                      # lexicon.MessageFeatures, filled in when learned from
+
+    @classmethod
+    def from_message(cls, message, bot_user=None) -> 'MessageSnapshot':
+        return cls(
+            author_id=message.author.id,
+            author_name=message.author.name,
+            display_name=message.author.display_name,
+            guild_id=message.guild.id,
+            channel_id=message.channel.id,
+            content=message.content,
+            created_at=message.created_at,
+            mention_ids=tuple(
+                user.id for user in message.mentions
+                if user.id != message.author.id and not user.bot
+            ),
+            mentions_bot=bot_user is not None and bot_user in message.mentions,
+            attachment_count=len(message.attachments),
+        )
+
+
+class LearningQueue:
+    """
+    Bounded queue drained by one background worker in micro-batches.
+
+    `submit` never waits: above `sample_watermark` only `sample_rate` of new
+    messages are kept, and once `max_size` is reached new messages are dropped,
+    so a flood costs some learning accuracy instead of reply latency.
+    """
+
+    def __init__(self, memory, max_size: int = None, batch_size: int = None, flush_interval: float = None,
+                 sample_watermark: int = None, sample_rate: float = None):
+        self.memory = memory
+        self.max_size = max_size or LEARNING_QUEUE_CONFIG["max_size"]
+        self.batch_size = batch_size or LEARNING_QUEUE_CONFIG["batch_size"]
+        self.flush_interval = flush_interval if flush_interval is not None else LEARNING_QUEUE_CONFIG["flush_interval"]
+        self.sample_watermark = sample_watermark or LEARNING_QUEUE_CONFIG["sample_watermark"]
+        self.sample_rate = sample_rate if sample_rate is not None else LEARNING_QUEUE_CONFIG["sample_rate"]
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._waiting: Optional[List[MessageSnapshot]] = None    # batch the worker holds while it fills up
+        self.stats = {'queued': 0, 'processed': 0, 'batches': 0, 'dropped': 0, 'sampled_out': 0, 'errors': 0}
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _ensure_worker(self):
+        # created lazily so the queue and task bind to the running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def submit(self, snapshot: MessageSnapshot) -> bool:
+        """Queue a snapshot for learning, returns False if it was shed"""
+        self._ensure_worker()
+        if self._queue.qsize() >= self.sample_watermark and random.random() >= self.sample_rate:
+            self.stats['sampled_out'] += 1
+            return False
+        try:
+            self._queue.put_nowait(snapshot)
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    def _take_batch(self, batch: List[MessageSnapshot]):
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def _process(self, batch: List[MessageSnapshot]):
+        try:
+            await self.memory.learn_from_batch(batch)
+            self.stats['processed'] += len(batch)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"⚠️ Learning batch of {len(batch)} messages failed: {e}")
+        self.stats['batches'] += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            self._waiting = batch
+            # give a quiet channel a moment to fill the batch, busy ones are drained immediately
+            if self._queue.qsize() < self.batch_size - 1 and self.flush_interval > 0:
+                await asyncio.sleep(self.flush_interval)
+            self._take_batch(batch)
+            self._waiting = None
+            await self._process(batch)
+
+    async def drain(self):
+        """Apply everything still queued (used on shutdown)"""
+        if self._queue is None:
+            return
+        while not self._queue.empty():
+            batch = []
+            self._take_batch(batch)
+            await self._process(batch)
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        waiting, self._waiting = self._waiting, None
+        if waiting:
+            await self._process(waiting)
+        await self.drain()
+
+    def drain_sync(self):
+        """
+        Apply everything still queued without the bot's event loop (signal handler shutdown).
+
+        The loop is suspended under the handler, so the batches run on a private
+        loop in a helper thread while the handler waits for it. A batch the
+        worker was already applying stays as far as it got.
+        """
+        waiting, self._waiting = self._waiting, None
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if not waiting and (self._queue is None or self._queue.empty()):
+            return
+
+        async def apply():
+            if waiting:
+                await self._process(waiting)
+            await self.drain()
+
+        helper = threading.Thread(target=asyncio.run, args=(apply(),), name="learning-drain")
+        helper.start()
+        helper.join()
+
+    def info(self) -> Dict:
+        """Counters for admin/debug output"""
+        return dict(self.stats, depth=self.depth)
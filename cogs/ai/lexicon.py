@@ -0,0 +1,120 @@
+"""
+Lexicon Matcher for Izumi AI
+Every keyword list the learning passes use, compiled once into a single trie regex and matched in one scan
+"""
+
+import re
+from typing import Dict, FrozenSet, List
+
+# Keyword lists used by the learning passes. Matching is substring based
+# (same as the old `word in content_lower` checks), so "thanks" also hits "thank".
+LEXICON_CATEGORIES = {
+    # sentiment
+    'positive': ['great', 'awesome', 'love', 'amazing', 'good', 'nice', 'cool', 'best', 'happy', 'excited', 'thank', 'thanks'],
+    'negative': ['bad', 'hate', 'worst', 'awful', 'terrible', 'annoying', 'frustrated', 'angry', 'sad', 'disappointed'],
+    'humor': ['lol', 'lmao', 'haha', 'funny', 'joke', 'meme'],
+    # communication style
+    'formal': ['please', 'thank you', 'could you', 'would you', 'excuse me'],
+    'informal': ['yo', 'hey', 'sup', 'gonna', 'wanna', 'yeah', 'nah'],
+    'greeting': ['hello', 'hi', 'hey', 'yo', 'sup', 'good morning', 'good evening'],
+    # topic interests
+    'gaming_interests': ['osu', 'rhythm', 'fps', 'moba', 'mmo', 'indie', 'game', 'gaming'],
+    'tech_interests': ['programming', 'coding', 'python', 'javascript', 'ai', 'tech', 'software'],
+    'entertainment_interests': ['anime', 'manga', 'movie', 'music', 'show', 'series'],
+    # dynamic trust level
+    'trust_positive': ['thanks', 'thank you', 'appreciate', 'love', 'great', 'awesome',
+                       'good', 'nice', 'please', 'sorry', 'help', 'wonderful', 'amazing'],
+    'trust_negative': ['hate', 'stupid', 'dumb', 'shut up', 'annoying', 'bad', 'terrible',
+                       'awful', 'suck', 'worst', 'fuck', 'shit', 'damn'],
+}
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+EMOJI_PATTERN = re.compile(r'[😀-🿿]|:[a-zA-Z0-9_+-]+:')
+
+
+def _trie_pattern(keywords) -> str:
+    """Regex for a keyword trie; optional groups are greedy so the longest keyword at a position wins"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class MessageFeatures:
+    """Everything the learning passes read from one message, computed once"""
+
+    __slots__ = ('content_lower', 'tokens', 'words', 'emojis', 'unicode_emoji_count', 'keywords', 'counts', '_lexicon')
+
+    def __init__(self, lexicon: 'Lexicon', content: str):
+        self._lexicon = lexicon
+        self.content_lower = content.lower()
+        self.tokens = self.content_lower.split()
+        self.words = WORD_PATTERN.findall(self.content_lower)
+        self.emojis = EMOJI_PATTERN.findall(content)
+        # custom :emoji: names are always longer than one char
+        self.unicode_emoji_count = sum(1 for emoji in self.emojis if len(emoji) == 1)
+        self.keywords = lexicon.match(self.content_lower)
+        self.counts = lexicon.count(self.keywords)
+
+    def matched(self, category: str) -> List[str]:
+        """Keywords of a category present in the message, in list order"""
+        if not self.keywords:
+            return []
+        return [keyword for keyword in self._lexicon.categories[category] if keyword in self.keywords]
+
+
+class Lexicon:
+    """
+    All category keyword lists merged into one trie regex.
+
+    A zero-width lookahead is tried at every position, so overlapping keywords
+    are found in a single scan. At each position only the longest keyword is
+    reported; the shorter ones it starts with are added from a precomputed
+    prefix table, which keeps the old substring semantics exactly.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = categories
+        keywords = sorted({keyword for words in categories.values() for keyword in words})
+        self._pattern = re.compile('(?=(' + _trie_pattern(keywords) + '))')
+        self._prefixes = {
+            longest: frozenset(keyword for keyword in keywords if longest.startswith(keyword))
+            for longest in keywords
+        }
+        self._keyword_categories = {
+            keyword: tuple(name for name, words in categories.items() if keyword in words)
+            for keyword in keywords
+        }
+
+    def match(self, content_lower: str) -> FrozenSet[str]:
+        """Every keyword occurring anywhere in the (already lowercased) text"""
+        found = self._pattern.findall(content_lower)
+        if not found:
+            return frozenset()
+        return frozenset().union(*[self._prefixes[longest] for longest in set(found)])
+
+    def count(self, keywords: FrozenSet[str]) -> Dict[str, int]:
+        """Distinct keyword hits per category"""
+        counts = dict.fromkeys(self.categories, 0)
+        for keyword in keywords:
+            for name in self._keyword_categories[keyword]:
+                counts[name] += 1
+        return counts
+
+    def analyze(self, content: str) -> MessageFeatures:
+        return MessageFeatures(self, content)
+
+
+# Built once at import - every learning pass shares it
+LEXICON = Lexicon(LEXICON_CATEGORIES)
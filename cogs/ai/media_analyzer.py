@@ -0,0 +1,261 @@
+"""
+Media Analyzer for Izumi AI
+Downloads and describes attachments, embeds and YouTube media without blocking the event loop
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from utils.config import MEDIA_ANALYSIS_CONFIG
+from utils.http_client import HttpClient
+from .gemini_scheduler import GeminiScheduler, PRIORITY_MENTION
+from .media_cache import MediaCache, content_key
+
+
+class MediaTooLarge(Exception):
+    """The download passed the size limit for its kind of media"""
+
+
+async def run_process(cmd: List[str], timeout: float) -> Tuple[int, bytes, bytes]:
+    """Run a command without blocking the loop, killing it if it outlives `timeout`"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout, stderr
+
+
+def _read_text(path: str, max_chars: int) -> Optional[str]:
+    """First `max_chars` characters of a utf-8 file, None if it isn't utf-8"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read(max_chars)
+    except UnicodeDecodeError:
+        return None
+
+
+def _remove(path: str):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"⚠️ Failed to clean up {path}: {e}")
+
+
+class MediaAnalyzer:
+    """
+    Media analysis jobs for Izumi, kept off the event loop.
+
+    Downloads go through the bot's shared HTTP pool, are streamed to temp
+    files and stop as soon as they pass the size limit. File reads and Gemini File API uploads run on a small
+    dedicated thread pool, model calls use the async client through the
+    Gemini scheduler, and yt-dlp runs as an async subprocess. A semaphore
+    bounds how many jobs run at once and every job has a deadline, so one
+    big video can't hold up the rest of the bot.
+    """
+
+    def __init__(self, scheduler: GeminiScheduler, get_model: Callable[[str], object], http: HttpClient,
+                 cache: Optional[MediaCache] = None):
+        self.scheduler = scheduler
+        self.http = http
+        self.get_model = get_model            # model name -> GenerativeModel
+        self.cache = cache
+        self.config = MEDIA_ANALYSIS_CONFIG
+        self.slots = asyncio.Semaphore(self.config["max_concurrency"])
+        self.executor = ThreadPoolExecutor(max_workers=self.config["executor_workers"],
+                                           thread_name_prefix="izumi-media")
+        self._ytdlp_available = False
+        self._running = 0
+        self.stats = {'jobs': 0, 'cache_hits': 0, 'timeouts': 0, 'too_large': 0, 'uploads': 0, 'bytes_downloaded': 0}
+
+    # ==================== HELPERS ====================
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _run_job(self, job: Callable):
+        """Run `job()` in a slot, with the per-job deadline covering the wait for the slot too"""
+        async def in_slot():
+            async with self.slots:
+                self.stats['jobs'] += 1
+                self._running += 1
+                try:
+                    return await job()
+                finally:
+                    self._running -= 1
+
+        try:
+            return await asyncio.wait_for(in_slot(), timeout=self.config["job_timeout"])
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+
+    async def ytdlp_available(self) -> bool:
+        """Check if yt-dlp is installed (a positive answer is remembered)"""
+        if not self._ytdlp_available:
+            try:
+                returncode, _, _ = await run_process(['yt-dlp', '--version'], timeout=5)
+                self._ytdlp_available = returncode == 0
+            except (asyncio.TimeoutError, FileNotFoundError):
+                return False
+        return self._ytdlp_available
+
+    # ==================== DOWNLOAD ====================
+
+    async def _download(self, url: str, max_bytes: int) -> Tuple[str, Optional[str], str]:
+        """Stream `url` into a temp file, returns (path, content type, SHA-256 of the bytes)"""
+        fd, path = tempfile.mkstemp(prefix="izumi_media_")
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async with self.http.stream(url, timeout=self.config["download_timeout"]) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"HTTP {resp.status}")
+                    if resp.content_length and resp.content_length > max_bytes:
+                        raise MediaTooLarge(f"{resp.content_length} bytes")
+                    received = 0
+                    async for chunk in resp.content.iter_chunked(self.config["chunk_size"]):
+                        received += len(chunk)
+                        if received > max_bytes:
+                            raise MediaTooLarge(f"over {max_bytes} bytes")
+                        # hashing and writing one chunk are quick enough to stay on the loop
+                        digest.update(chunk)
+                        f.write(chunk)
+                    content_type = resp.content_type
+            self.stats['bytes_downloaded'] += received
+            return path, content_type, digest.hexdigest()
+        except BaseException as e:
+            if isinstance(e, MediaTooLarge):
+                self.stats['too_large'] += 1
+            _remove(path)
+            raise
+
+    # ==================== GEMINI ====================
+
+    async def generate(self, contents, priority: int = PRIORITY_MENTION) -> str:
+        """Send `contents` to the best available model and return the reply text"""
+        async def call(model_name: str):
+            response = await asyncio.wait_for(
+                self.get_model(model_name).generate_content_async(contents),
+                timeout=self.config["call_timeout"]
+            )
+            return response.text.strip()
+
+        return await self.scheduler.run(call, priority)
+
+    async def _upload(self, path: str, mime_type: str):
+        """Upload a file too big for an inline request and wait until Gemini has processed it"""
+        uploaded = await self._run_blocking(genai.upload_file, path=path, mime_type=mime_type)
+        self.stats['uploads'] += 1
+        try:
+            while uploaded.state.name == "PROCESSING":
+                await asyncio.sleep(self.config["upload_poll_interval"])
+                uploaded = await self._run_blocking(genai.get_file, uploaded.name)
+            if uploaded.state.name != "ACTIVE":
+                raise RuntimeError(f"Gemini couldn't process the upload ({uploaded.state.name})")
+            return uploaded
+        except BaseException:
+            self._delete_upload(uploaded)
+            raise
+
+    def _delete_upload(self, uploaded):
+        # fire and forget, uploads also expire on their own
+        def delete():
+            try:
+                genai.delete_file(uploaded.name)
+            except Exception as e:
+                print(f"⚠️ Failed to delete uploaded file {uploaded.name}: {e}")
+        try:
+            self.executor.submit(delete)
+        except RuntimeError:
+            pass  # pool already shut down
+
+    async def _describe(self, path: str, mime_type: str, prompt: str, priority: int) -> str:
+        if os.path.getsize(path) <= self.config["inline_max_mb"] * 1024 * 1024:
+            data = await self._run_blocking(Path(path).read_bytes)
+            return await self.generate([prompt, {"mime_type": mime_type, "data": data}], priority)
+
+        uploaded = await self._upload(path, mime_type)
+        try:
+            return await self.generate([prompt, uploaded], priority)
+        finally:
+            self._delete_upload(uploaded)
+
+    # ==================== JOBS ====================
+
+    def max_bytes(self, kind: str) -> int:
+        return self.config["max_mb"][kind] * 1024 * 1024
+
+    async def analyze_url(self, url: str, prompt: str, kind: str, mime_type: Optional[str] = None,
+                          default_mime: str = "application/octet-stream", as_text: bool = False,
+                          priority: int = PRIORITY_MENTION, cache_alias: Optional[str] = None) -> str:
+        """
+        Download `url` and describe it. `mime_type` wins over the served content
+        type; with `as_text` a utf-8 file is sent as text after the prompt.
+        `cache_alias` (embed URL key) lets a repost skip the download, only
+        for sources that always serve the same bytes. Raises MediaTooLarge, asyncio.TimeoutError or the download/model error.
+        """
+        if self.cache is not None and cache_alias:
+            cached = self.cache.resolve(cache_alias, kind, prompt)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return cached
+
+        async def describe(path: str, content_type: Optional[str]) -> str:
+            if as_text:
+                text = await self._run_blocking(_read_text, path, self.config["text_chars"])
+                if text is not None:
+                    return await self.generate(f"{prompt}\n\n{text}", priority)
+                mime = "text/plain"
+            else:
+                mime = mime_type or content_type or default_mime
+            return await self._describe(path, mime, prompt, priority)
+
+        async def job():
+            path, content_type, digest = await self._download(url, self.max_bytes(kind))
+            try:
+                key = content_key(kind, digest, prompt)
+                description = self.cache.get(key) if self.cache is not None else None
+                if description is not None:
+                    # same bytes under a new name or URL: no model call
+                    self.stats['cache_hits'] += 1
+                else:
+                    description = await describe(path, content_type)
+                    if self.cache is not None:
+                        self.cache.put(key, description)
+                if self.cache is not None and cache_alias:
+                    self.cache.link(cache_alias, digest)
+                return description
+            finally:
+                _remove(path)
+
+        return await self._run_job(job)
+
+    async def analyze_file(self, path: str, mime_type: str, prompt: str,
+                           priority: int = PRIORITY_MENTION) -> str:
+        """Describe a file already on disk (the caller owns and removes it)"""
+        return await self._run_job(lambda: self._describe(path, mime_type, prompt, priority))
+
+    def close(self):
+        """Release the worker threads (the HTTP pool belongs to the bot)"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def info(self) -> Dict:
+        """Counters for admin/debug output"""
+        return dict(self.stats, running=self._running)
@@ -0,0 +1,104 @@
+"""
+Media Cache for Izumi AI
+Persistent cache of media analysis results, keyed by content hash, embed URL or YouTube video
+"""
+
+import hashlib
+from typing import Callable, Dict, Optional
+
+from utils.bounded_cache import BoundedCache
+from utils.config import MEDIA_CACHE_CONFIG
+from utils.helpers import load_json
+
+# 2: descriptions keyed per prompt, YouTube analyses per video and mode
+CACHE_VERSION = 2
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:16]
+
+
+def content_key(kind: str, digest: str, prompt: str) -> str:
+    """Key for a description of the file with this SHA-256 - attachments and embeds ask different things of one image"""
+    return f"sha:{kind}:{_prompt_hash(prompt)}:{digest}"
+
+
+def url_key(url: str) -> str:
+    """Embeds (tenor, imgur, ...) serve the same bytes from the same URL"""
+    return f"url:{url}"
+
+
+def youtube_duration_key(video_id: str) -> str:
+    return f"ytlen:{video_id}"
+
+
+def youtube_key(video_id: str, mode: str) -> str:
+    """The question-independent analysis of a video, questions are answered on top of it"""
+    return f"yt:{video_id}:{mode}"
+
+
+class MediaCache:
+    """
+    Analysis results that survive restarts.
+
+    Descriptions are stored under the SHA-256 of the file and the prompt
+    (`content_key`), so a reposted attachment costs a download but no model
+    call. Embed URLs are
+    aliases pointing at that hash and are answered before anything is
+    downloaded; attachments get none, since name, size and dimensions don't
+    prove two uploads hold the same bytes. YouTube analyses are keyed by
+    video id and download mode, and video lengths by id so the duration
+    check doesn't run yt-dlp again. Entries expire after `ttl` and
+    the least recently used are evicted past `max_items`.
+    """
+
+    def __init__(self, path: str, on_change: Optional[Callable[[], None]] = None):
+        self.path = path
+        self.on_change = on_change          # called after every write, e.g. to mark the section dirty
+        self.entries = BoundedCache("media_analysis", max_items=MEDIA_CACHE_CONFIG["max_items"],
+                                    ttl=MEDIA_CACHE_CONFIG["ttl"])
+        self._load()
+
+    def _load(self):
+        data = load_json(self.path)
+        if data.get("version") != CACHE_VERSION:
+            return
+        for key, value, stored_at in data.get("entries", []):
+            self.entries.set(key, value, stored_at=stored_at)
+        self.entries.expire()
+        if self.entries:
+            print(f"🗂️ Loaded {len(self.entries)} cached media analyses")
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    def put(self, key: str, description: str):
+        self.entries.set(key, description)
+        self._changed()
+
+    def resolve(self, alias: str, kind: str, prompt: str) -> Optional[str]:
+        """Description behind an embed URL, if the content is still cached"""
+        digest = self.entries.get(alias)
+        if digest is None:
+            return None
+        return self.entries.get(content_key(kind, digest, prompt))
+
+    def link(self, alias: str, digest: str):
+        self.entries.set(alias, digest)
+        self._changed()
+
+    def expire(self) -> int:
+        removed = self.entries.expire()
+        if removed:
+            self._changed()
+        return removed
+
+    def snapshot(self) -> Dict:
+        return {"version": CACHE_VERSION, "entries": [list(entry) for entry in self.entries.items()]}
+
+    def info(self) -> Dict:
+        return self.entries.info()
@@ -6,6 +6,7 @@ from utils.config import *
 import time
 import json
 import os
+from .history_trainer import HistoryTrainer
 
 # Load BOT_OWNER_ID from environment variable
 BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID", "0"))  # Default to 0 if not set
@@ -361,6 +362,8 @@ class MemoryManagement(commands.Cog):
             if user_id_str in self.bot.unified_memory.memory_data.get('users', {}):
                 # Clear user data from unified memory
                 del self.bot.unified_memory.memory_data['users'][user_id_str]
+                self.bot.unified_memory.name_index.remove(user_id_str)
+                self.bot.unified_memory.bump_section_version(user_id_str)
                 self.bot.unified_memory.pending_saves = True
                 self.bot.unified_memory.save_unified_data()
                 await ctx.send(f"✅ Cleared all memories about {user.display_name}")
@@ -396,11 +399,8 @@ class MemoryManagement(commands.Cog):
             all_users = self.bot.unified_memory.memory_data.get('users', {})
             total_users = len(all_users)
             
-            # Calculate trust levels
-            trust_levels = []
-            for user_data in all_users.values():
-                trust_level = user_data.get('social', {}).get('trust_level', 0)
-                trust_levels.append(trust_level)
+            # Calculate trust levels (read from the store, profiles aren't loaded)
+            trust_levels = list(all_users.select('social', 'trust_level').values())
         except Exception as e:
             total_users = 0
             trust_levels = []
@@ -415,6 +415,8 @@ class MemoryManagement(commands.Cog):
         )
         embed.add_field(name="Users with memories", value=str(total_users), inline=True)
         embed.add_field(name="Active chat sessions", value=str(active_chats), inline=True)
+        profiles = self.bot.unified_memory.memory_data['users'].info()
+        embed.add_field(name="Profiles in RAM", value=f"{profiles['resident']}/{profiles['keys']}", inline=True)
         
         if total_users > 0 and trust_levels:
             # Calculate trust level distribution
@@ -429,7 +431,9 @@ class MemoryManagement(commands.Cog):
         """Export all memories as JSON (admin only)"""
         try:
             # Get all memory data from unified system
-            all_data = self.bot.unified_memory.memory_data
+            memory_data = self.bot.unified_memory.memory_data
+            # profiles are streamed from the store into the export
+            all_data = dict(memory_data, users=dict(memory_data['users'].scan()))
             
             if not all_data or not all_data.get('users'):
                 await ctx.send("No memories to export!")
@@ -731,6 +735,7 @@ class MemoryManagement(commands.Cog):
                 
                 if cleaned:
                     cleaned_count += 1
+                    self.bot.unified_memory.bump_section_version(user_id_str, 'memories')
             
             except Exception as e:
                 print(f"Error cleaning user {user_id}: {e}")
@@ -1343,9 +1348,33 @@ class MemoryManagement(commands.Cog):
     # Removed memory_selfadd and memory_selfclear slash commands
     # Use prefix commands instead: !memory selfadd, !memory selfclear
     
+    async def _train_channels(self, unified_memory, channels: list, limit: int, status_msg=None) -> dict:
+        """Learn from the history of `channels` with the bulk trainer, editing `status_msg` as it goes"""
+        # checkpoints live in the same store as the profiles they describe
+        trainer = HistoryTrainer(unified_memory, unified_memory.memory_data['users'].store, self.bot.user)
+        
+        async def report(stats):
+            if status_msg:
+                try:
+                    await status_msg.edit(content=f"🧠 Training in progress...\n📊 Channels fetched: {stats['channels_fetched']}/{stats['channels']}\n📝 Messages fetched: {stats['fetched']}\n✅ Learned from: {stats['learned']} messages")
+                except:
+                    pass  # Message might be deleted
+        
+        return await trainer.run(channels, limit, on_progress=report)
+    
+    def _training_summary(self, title: str, stats: dict) -> str:
+        summary = f"✅ {title}\n📊 Channels: {stats['channels']}\n📝 New messages: {stats['fetched']}\n🧠 Learned from: {stats['learned']} messages\n💾 Data saved!"
+        if not stats['fetched']:
+            summary += "\n⏩ Nothing new since the last training run"
+        return summary
+    
+    def _readable_text_channels(self, guild: discord.Guild) -> list:
+        return [ch for ch in guild.channels
+                if isinstance(ch, discord.TextChannel) and ch.permissions_for(guild.me).read_message_history]
+    
     @commands.command(name='train')
     async def train_on_history(self, ctx, channel: discord.TextChannel = None, limit: int = 10000):
-        """Train Izumi on historical messages in a channel"""
+        """Train Izumi on historical messages in a channel (picks up where the last run stopped)"""
         # Only allow bot owner to run this
         if ctx.author.id != BOT_OWNER_ID:
             await ctx.send("❌ Only the bot owner can run training commands.")
@@ -1360,67 +1389,23 @@ class MemoryManagement(commands.Cog):
             await ctx.send("❌ AI learning system not available.")
             return
         
-        unified_memory = ai_cog.learning_engine  # This now references the unified memory system  # This is now the unified memory system
+        unified_memory = ai_cog.learning_engine  # This now references the unified memory system
         
         # Send initial message
         status_msg = await ctx.send(f"🧠 Starting training on {channel.mention}...\n📊 Limit: {limit} messages")
         
-        processed = 0
-        learned = 0
-        
         try:
-            # Get messages (Discord API limit is 100 per call)
-            async for message in channel.history(limit=limit, oldest_first=False):
-                # Skip bot messages
-                if message.author.bot:
-                    continue
-                
-                # Skip commands and prefixed messages
-                content = message.content.strip()
-                if not content:
-                    continue
-                
-                # Skip messages that start with common command prefixes
-                skip_prefixes = ['!', '/', '?', '<', '>', '$', '%', '&', '*', '+', '=', '~', '`', '@everyone', '@here']
-                if any(content.startswith(prefix) for prefix in skip_prefixes):
-                    continue
-                
-                # Skip messages that are just URLs
-                if content.startswith('http://') or content.startswith('https://'):
-                    continue
-                
-                # Skip very short messages (less than 3 characters)
-                if len(content) < 3:
-                    continue
-                
-                try:
-                    # Process the message through the unified memory system
-                    await unified_memory.learn_from_message(message)
-                    learned += 1
-                except Exception as e:
-                    print(f"Error learning from message {message.id}: {e}")
-                
-                processed += 1
-                
-                # Update status every 100 messages
-                if processed % 100 == 0:
-                    try:
-                        await status_msg.edit(content=f"🧠 Training in progress...\n📊 Processed: {processed}/{limit}\n✅ Learned from: {learned} messages")
-                    except:
-                        pass  # Message might be deleted
-            
-            # Save unified memory data
-            unified_memory.save_unified_data()
+            stats = await self._train_channels(unified_memory, [channel], limit, status_msg)
             
             # Final status
-            await status_msg.edit(content=f"✅ Training complete!\n📊 Processed: {processed} messages\n🧠 Learned from: {learned} messages\n💾 Data saved!")
+            await status_msg.edit(content=self._training_summary("Training complete!", stats))
             
         except Exception as e:
             await ctx.send(f"❌ Error during training: {e}")
 
     @commands.command(name='trainall')
     async def train_all_channels(self, ctx, limit_per_channel: int = 10000):
-        """Train Izumi on all channels in the server"""
+        """Train Izumi on all channels in the server (picks up where the last run stopped)"""
         # Only allow bot owner to run this
         if ctx.author.id != BOT_OWNER_ID:
             await ctx.send("❌ Only the bot owner can run training commands.")
@@ -1432,78 +1417,19 @@ class MemoryManagement(commands.Cog):
             await ctx.send("❌ AI learning system not available.")
             return
         
-        unified_memory = ai_cog.learning_engine  # This now references the unified memory system  # This is now the unified memory system
+        unified_memory = ai_cog.learning_engine  # This now references the unified memory system
         
-        # Get all text channels
-        text_channels = [ch for ch in ctx.guild.channels if isinstance(ch, discord.TextChannel)]
+        # Get all text channels the bot can read
+        text_channels = self._readable_text_channels(ctx.guild)
         
         # Send initial message
         status_msg = await ctx.send(f"🧠 Starting server-wide training...\n📊 Channels: {len(text_channels)}\n📝 Limit per channel: {limit_per_channel}")
         
-        total_processed = 0
-        total_learned = 0
-        channels_done = 0
-        
         try:
-            for channel in text_channels:
-                # Check if bot can read the channel
-                if not channel.permissions_for(ctx.guild.me).read_message_history:
-                    continue
-                
-                channel_processed = 0
-                channel_learned = 0
-                
-                try:
-                    async for message in channel.history(limit=limit_per_channel, oldest_first=False):
-                        # Skip bot messages
-                        if message.author.bot:
-                            continue
-                        
-                        # Skip commands and prefixed messages
-                        content = message.content.strip()
-                        if not content:
-                            continue
-                        
-                        # Skip messages that start with common command prefixes
-                        skip_prefixes = ['!', '/', '?', '<', '>', '$', '%', '&', '*', '+', '=', '~', '`', '@everyone', '@here']
-                        if any(content.startswith(prefix) for prefix in skip_prefixes):
-                            continue
-                        
-                        # Skip messages that are just URLs
-                        if content.startswith('http://') or content.startswith('https://'):
-                            continue
-                        
-                        # Skip very short messages (less than 3 characters)
-                        if len(content) < 3:
-                            continue
-                        
-                        try:
-                            # Process the message through the unified memory system
-                            await unified_memory.learn_from_message(message)
-                            channel_learned += 1
-                            total_learned += 1
-                        except Exception as e:
-                            print(f"Error learning from message {message.id}: {e}")
-                        
-                        channel_processed += 1
-                        total_processed += 1
-                
-                except Exception as e:
-                    print(f"Error processing channel {channel.name}: {e}")
-                
-                channels_done += 1
-                
-                # Update status every channel
-                try:
-                    await status_msg.edit(content=f"🧠 Training in progress...\n📊 Channels: {channels_done}/{len(text_channels)}\n📝 Current: #{channel.name}\n✅ Total learned: {total_learned} messages")
-                except:
-                    pass  # Message might be deleted
-            
-            # Save unified memory data
-            unified_memory.save_unified_data()
+            stats = await self._train_channels(unified_memory, text_channels, limit_per_channel, status_msg)
             
             # Final status
-            await status_msg.edit(content=f"✅ Server-wide training complete!\n📊 Channels processed: {channels_done}\n📝 Total messages: {total_processed}\n🧠 Learned from: {total_learned} messages\n💾 Data saved!")
+            await status_msg.edit(content=self._training_summary("Server-wide training complete!", stats))
             
         except Exception as e:
             await ctx.send(f"❌ Error during training: {e}")
@@ -1540,58 +1466,14 @@ class MemoryManagement(commands.Cog):
         except:
             status_msg = None
         
-        processed = 0
-        learned = 0
-        
         try:
-            # Get messages (Discord API limit is 100 per call)
-            async for message in channel.history(limit=limit, oldest_first=False):
-                # Skip bot messages
-                if message.author.bot:
-                    continue
-                
-                # Skip commands and prefixed messages
-                content = message.content.strip()
-                if not content:
-                    continue
-                
-                # Skip messages that start with common command prefixes
-                skip_prefixes = ['!', '/', '?', '<', '>', '$', '%', '&', '*', '+', '=', '~', '`', '@everyone', '@here']
-                if any(content.startswith(prefix) for prefix in skip_prefixes):
-                    continue
-                
-                # Skip messages that are just URLs
-                if content.startswith('http://') or content.startswith('https://'):
-                    continue
-                
-                # Skip very short messages (less than 3 characters)
-                if len(content) < 3:
-                    continue
-                
-                try:
-                    # Process the message through the unified memory system
-                    await unified_memory.learn_from_message(message)
-                    learned += 1
-                except Exception as e:
-                    print(f"Error learning from message {message.id}: {e}")
-                
-                processed += 1
-                
-                # Update status every 100 messages
-                if processed % 100 == 0 and status_msg:
-                    try:
-                        await status_msg.edit(content=f"🧠 Training in progress...\n📊 Processed: {processed}/{limit}\n✅ Learned from: {learned} messages")
-                    except:
-                        pass  # Message might be deleted
-            
-            # Save unified memory data
-            unified_memory.save_unified_data()
+            stats = await self._train_channels(unified_memory, [channel], limit, status_msg)
             
             # Final status
             if status_msg:
-                await status_msg.edit(content=f"✅ Training complete!\n📊 Processed: {processed} messages\n🧠 Learned from: {learned} messages\n💾 Data saved!")
+                await status_msg.edit(content=self._training_summary("Training complete!", stats))
             else:
-                await interaction.followup.send(f"✅ Training complete!\n📊 Processed: {processed} messages\n🧠 Learned from: {learned} messages\n💾 Data saved!")
+                await interaction.followup.send(self._training_summary("Training complete!", stats))
             
         except Exception as e:
             await interaction.followup.send(f"❌ Error during training: {e}")
@@ -1615,8 +1497,8 @@ class MemoryManagement(commands.Cog):
         
         unified_memory = ai_cog.learning_engine  # This now references the unified memory system
         
-        # Get all text channels
-        text_channels = [ch for ch in interaction.guild.channels if isinstance(ch, discord.TextChannel)]
+        # Get all text channels the bot can read
+        text_channels = self._readable_text_channels(interaction.guild)
         
         # Send initial response
         await interaction.response.send_message(f"🧠 Starting server-wide training...\n📊 Channels: {len(text_channels)}\n📝 Limit per channel: {limit_per_channel}", ephemeral=True)
@@ -1627,74 +1509,14 @@ class MemoryManagement(commands.Cog):
         except:
             status_msg = None
         
-        total_processed = 0
-        total_learned = 0
-        channels_done = 0
-        
         try:
-            for channel in text_channels:
-                # Check if bot can read the channel
-                if not channel.permissions_for(interaction.guild.me).read_message_history:
-                    continue
-                
-                channel_processed = 0
-                channel_learned = 0
-                
-                try:
-                    async for message in channel.history(limit=limit_per_channel, oldest_first=False):
-                        # Skip bot messages
-                        if message.author.bot:
-                            continue
-                        
-                        # Skip commands and prefixed messages
-                        content = message.content.strip()
-                        if not content:
-                            continue
-                        
-                        # Skip messages that start with common command prefixes
-                        skip_prefixes = ['!', '/', '?', '<', '>', '$', '%', '&', '*', '+', '=', '~', '`', '@everyone', '@here']
-                        if any(content.startswith(prefix) for prefix in skip_prefixes):
-                            continue
-                        
-                        # Skip messages that are just URLs
-                        if content.startswith('http://') or content.startswith('https://'):
-                            continue
-                        
-                        # Skip very short messages (less than 3 characters)
-                        if len(content) < 3:
-                            continue
-                        
-                        try:
-                            # Process the message through the unified memory system
-                            await unified_memory.learn_from_message(message)
-                            channel_learned += 1
-                            total_learned += 1
-                        except Exception as e:
-                            print(f"Error learning from message {message.id}: {e}")
-                        
-                        channel_processed += 1
-                        total_processed += 1
-                
-                except Exception as e:
-                    print(f"Error processing channel {channel.name}: {e}")
-                
-                channels_done += 1
-                
-                # Update status every channel
-                if status_msg:
-                    try:
-                        await status_msg.edit(content=f"🧠 Training in progress...\n📊 Channels: {channels_done}/{len(text_channels)}\n📝 Current: #{channel.name}\n✅ Total learned: {total_learned} messages")
-                    except:
-                        pass  # Message might be deleted
-            
-            # Save unified memory data
-            unified_memory.save_unified_data()
+            stats = await self._train_channels(unified_memory, text_channels, limit_per_channel, status_msg)
             
             # Final status
             if status_msg:
-                await status_msg.edit(content=f"✅ Server-wide training complete!\n📊 Channels processed: {channels_done}\n📝 Total messages: {total_processed}\n🧠 Learned from: {total_learned} messages\n💾 Data saved!")
+                await status_msg.edit(content=self._training_summary("Server-wide training complete!", stats))
             else:
-                await interaction.followup.send(f"✅ Server-wide training complete!\n📊 Channels processed: {channels_done}\n📝 Total messages: {total_processed}\n🧠 Learned from: {total_learned} messages\n💾 Data saved!")
+                await interaction.followup.send(self._training_summary("Server-wide training complete!", stats))
             
         except Exception as e:
             await interaction.followup.send(f"❌ Error during training: {e}")
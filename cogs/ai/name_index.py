@@ -0,0 +1,116 @@
+"""
+Name Index for Izumi AI
+In-memory trigram index over remembered users' names for person lookups
+"""
+
+from typing import Dict, List
+
+# basic_info fields that can identify a person, in the order matches are reported
+NAME_FIELDS = ('name', 'nickname', 'display_name', 'username')
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """
+    Maps lowercased names to user ids.
+
+    Queries of three or more characters intersect trigram posting sets, which
+    gives exactly the users whose names contain the query; shorter queries have
+    no trigram to look up and fall back to a substring scan of the name table.
+    Callers still verify hits against the live profile, so a stale entry can
+    only ever cause a miss.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, Dict[str, str]] = {}   # user id -> {field: lowercased name}
+        self._grams: Dict[str, set] = {}               # trigram -> {user id}
+        self._order: Dict[str, int] = {}               # user id -> insertion seq, keeps results in profile order
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _extract(basic_info: Dict) -> Dict[str, str]:
+        names = {}
+        for field in NAME_FIELDS:
+            value = basic_info.get(field)
+            if value and isinstance(value, str):
+                names[field] = value.lower()
+        return names
+
+    def update(self, user_id: str, basic_info: Dict):
+        """Re-index a user's name fields, touching only what changed"""
+        new = self._extract(basic_info)
+        old = self._names.get(user_id, {})
+        if new == old:
+            if user_id not in self._order:
+                self._order[user_id] = self._next_seq
+                self._next_seq += 1
+            return
+        self._unindex(user_id, old)
+
+        for name in set(new.values()):
+            for gram in _trigrams(name):
+                self._grams.setdefault(gram, set()).add(user_id)
+        self._names[user_id] = new
+        if user_id not in self._order:
+            self._order[user_id] = self._next_seq
+            self._next_seq += 1
+
+    def _unindex(self, user_id: str, names: Dict[str, str]):
+        for name in set(names.values()):
+            for gram in _trigrams(name):
+                users = self._grams.get(gram)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del self._grams[gram]
+
+    def remove(self, user_id: str):
+        self._unindex(user_id, self._names.pop(user_id, {}))
+        self._order.pop(user_id, None)
+
+    def rebuild(self, users: Dict[str, Dict]):
+        self.__init__()
+        for user_id, user_data in users.items():
+            names = self._extract(user_data.get('basic_info', {}))
+            self._names[user_id] = names
+            self._order[user_id] = self._next_seq
+            self._next_seq += 1
+            for name in set(names.values()):
+                for gram in _trigrams(name):
+                    self._grams.setdefault(gram, set()).add(user_id)
+
+    def search(self, query: str) -> List[str]:
+        """Ids of users with a name containing `query`, in profile order"""
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        if len(query) < 3:
+            # too short for a trigram; still only touches names, not whole profiles
+            found = {user_id for user_id, names in self._names.items()
+                     if any(query in name for name in names.values())}
+        else:
+            posting_sets = []
+            for gram in _trigrams(query):
+                users = self._grams.get(gram)
+                if not users:
+                    return []
+                posting_sets.append(users)
+            posting_sets.sort(key=len)
+            found = posting_sets[0]
+            for users in posting_sets[1:]:
+                # once the candidate set is small, checking the substring directly is cheaper
+                if len(found) <= 64:
+                    break
+                found = found & users
+            # shared trigrams aren't enough on their own ("abcab" vs "cabc"), confirm the substring
+            found = {user_id for user_id in found
+                     if any(query in name for name in self._names[user_id].values())}
+
+        return sorted(found, key=lambda user_id: self._order.get(user_id, 0))
@@ -0,0 +1,255 @@
+"""
+Response Splitter for Izumi AI
+Splits replies into chat-sized messages at sentence boundaries and natural pauses, also while they stream in
+"""
+
+import re
+from typing import List, Tuple
+
+# Sentence end followed by whitespace and the start of the next sentence
+SENTENCE_PATTERN = re.compile(r'([.!?]+)\s+(?=[A-Z]|[a-z])')
+SPLIT_MARKER = '|SPLIT|'
+# Leaked context blocks, matched like _clean_response_output does so a streamed block goes out as a unit or not at all
+INTERNAL_BLOCK = re.compile(r'\[INTERNAL CONTEXT.*?\[END.*?\]', re.DOTALL | re.IGNORECASE)
+INTERNAL_OPEN = re.compile(r'\[INTERNAL CONTEXT', re.IGNORECASE)
+SHORT_MESSAGE = 100         # single replies up to this long are sent as one message
+PART_LENGTH = 120           # sentences are grouped into parts up to about this long
+LONG_LINE = 150             # lines of a multi-line reply are only split past this length
+
+# Natural pause points in order of preference
+PAUSE_PATTERNS = [re.compile(pattern) for pattern in (
+    r',\s+(?=and\s)',     # ", and"
+    r',\s+(?=but\s)',     # ", but"
+    r',\s+(?=so\s)',      # ", so"
+    r',\s+(?=or\s)',      # ", or"
+    r',\s+(?=because\s)', # ", because"
+    r',\s+(?=while\s)',   # ", while"
+    r',\s+(?=when\s)',    # ", when"
+    r',\s+(?=if\s)',      # ", if"
+    r',\s+(?=since\s)',   # ", since"
+    r';\s+',              # semicolons
+    r':\s+',              # colons
+    r'\s+--\s+',          # em dashes
+    r'\s+-\s+',           # regular dashes with spaces
+    r',\s+',              # any comma with space
+)]
+
+
+def preprocess_for_splitting(response: str) -> str:
+    """Mark newlines as message boundaries - each line of a multi-line reply is meant as its own message"""
+    if not response:
+        return response
+
+    response = re.sub(r'\n\s*\n', '\n', response)  # Remove double newlines
+    response = re.sub(r'\n\s+', '\n', response)    # Remove whitespace after newlines
+
+    if '\n' in response:
+        lines = [line.strip() for line in response.split('\n') if line.strip()]
+        if len(lines) > 1:
+            return f' {SPLIT_MARKER} '.join(lines)
+
+    return response
+
+
+def split_naturally(response: str) -> List[str]:
+    """Split a preprocessed response at natural speech boundaries"""
+    if SPLIT_MARKER in response:
+        parts = []
+        for line in (part.strip() for part in response.split(SPLIT_MARKER)):
+            if line:
+                parts.extend(_split_line(line))
+        return parts
+    return split_long_text_at_sentences(response)
+
+
+def _split_line(line: str) -> List[str]:
+    # Only split a line of a multi-line reply further if it's extremely long
+    return split_long_text_at_sentences(line) if len(line) > LONG_LINE else [line]
+
+
+def _sentences(text: str, complete_only: bool = False) -> Tuple[List[str], List[int]]:
+    """Sentences with their punctuation and the offset each starts at"""
+    sentences, starts = [], []
+    start = 0
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentences.append(text[start:match.end(1)])
+        starts.append(start)
+        start = match.end()
+    if not complete_only:
+        sentences.append(text[start:])
+        starts.append(start)
+    return sentences, starts
+
+
+def _group_sentences(sentences: List[str]) -> List[Tuple[int, str]]:
+    """Greedily pack sentences into parts, returns (index of the part's first sentence, part)"""
+    groups = []
+    current, first = "", 0
+    for index, sentence in enumerate(sentences):
+        # If adding this sentence would make the part too long, save current part
+        if current and len(current + " " + sentence) > PART_LENGTH:
+            if current.strip():
+                groups.append((first, current.strip()))
+            current, first = sentence, index
+        elif current:
+            current += " " + sentence
+        else:
+            current, first = sentence, index
+    if current.strip():
+        groups.append((first, current.strip()))
+    return groups
+
+
+def split_long_text_at_sentences(text: str) -> List[str]:
+    """Split text at natural sentence boundaries and speech pauses"""
+    text = text.strip()
+    if not text:
+        return []
+
+    # Keep short messages intact
+    if len(text) <= SHORT_MESSAGE:
+        return [text]
+
+    parts = [part for _, part in _group_sentences(_sentences(text)[0])]
+
+    # One very long sentence - fall back to natural pause points
+    if len(parts) == 1 and len(parts[0]) > PART_LENGTH:
+        parts = split_at_natural_pauses(parts[0])
+
+    parts = [part.strip() for part in parts if part.strip()]
+    return parts if parts else [text]
+
+
+def split_at_natural_pauses(text: str) -> List[str]:
+    """Split at natural speech pauses when sentence splitting fails"""
+    parts = []
+    remaining = text.strip()
+
+    while remaining and len(remaining) > SHORT_MESSAGE:
+        best_position = None
+
+        # Find the best pause point around the middle of remaining text
+        target_position = len(remaining) // 2
+
+        for pattern in PAUSE_PATTERNS:
+            for match in pattern.finditer(remaining):
+                position = match.end()
+                # Prefer splits closer to the middle, but not too early or late
+                if 50 <= position <= len(remaining) - 30:
+                    if best_position is None or abs(position - target_position) < abs(best_position - target_position):
+                        best_position = position
+
+            # If we found a good split with this pattern, use it
+            if best_position is not None:
+                break
+
+        if best_position is None:
+            # No good pause point found, just break
+            break
+        part = remaining[:best_position].strip()
+        if part:
+            parts.append(part)
+        remaining = remaining[best_position:].strip()
+
+    if remaining.strip():
+        parts.append(remaining.strip())
+
+    return parts if parts else [text]
+
+
+class IncrementalSplitter:
+    """
+    Splits a reply while it is still being generated.
+
+    feed() takes streamed text and returns the parts that are final, i.e.
+    exactly what split_naturally() would produce for them once the whole
+    reply is known: a line of a multi-line reply once the next line has
+    started, or the leading sentence groups of a line longer than LONG_LINE
+    once the group after them has begun (greedy grouping never revisits a
+    closed group). Short replies therefore only split at the end, like
+    before. Text inside an unclosed [bracket] is held back so leaked
+    context markers can still be cleaned out as a whole, and so is
+    everything after an [INTERNAL CONTEXT ...] header until its [END ...]
+    arrives, when the block is dropped in one piece. split_tail()
+    splits whatever was left when the stream ended.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.multiline = False      # a second non-empty line has been seen
+        self.continuing = False     # part of the current line was already emitted
+        self.emitted = 0
+
+    def _stable_length(self) -> int:
+        """Length of the buffer before an unclosed '[' or an internal context block that hasn't ended yet"""
+        block = INTERNAL_OPEN.search(self.buffer)
+        limit = block.start() if block else len(self.buffer)
+        depth, opened_at = 0, None
+        for index, char in enumerate(self.buffer[:limit]):
+            if char == '[':
+                if depth == 0:
+                    opened_at = index
+                depth += 1
+            elif char == ']' and depth:
+                depth -= 1
+        return opened_at if depth else limit
+
+    def _line_parts(self, line: str) -> List[str]:
+        if self.continuing:
+            # the rest of a line whose first parts went out already: keep grouping, no fallbacks
+            return [part for _, part in _group_sentences(_sentences(line)[0])]
+        return _split_line(line)
+
+    def _take_sentences(self, region: str) -> List[str]:
+        line = region.lstrip()
+        if not self.continuing and len(line.strip()) <= LONG_LINE:
+            return []
+        sentences, starts = _sentences(line, complete_only=True)
+        groups = _group_sentences(sentences)
+        if len(groups) < 2:
+            return []
+        # the last group can still grow, everything before it is final
+        cut = len(region) - len(line) + starts[groups[-1][0]]
+        self.buffer = self.buffer[cut:]
+        self.continuing = True
+        return [part for _, part in groups[:-1]]
+
+    def feed(self, text: str) -> List[str]:
+        # complete blocks are cut out before any of their lines could be released on their own
+        self.buffer = INTERNAL_BLOCK.sub('', self.buffer + text)
+        parts = []
+        while True:
+            region = self.buffer[:self._stable_length()]
+            newline = region.find('\n')
+            if newline < 0:
+                parts.extend(self._take_sentences(region))
+                break
+
+            line = region[:newline].strip()
+            if line:
+                if not self.multiline:
+                    if not region[newline + 1:].strip():
+                        break   # a single line with a trailing newline is split by the single-line rules
+                    self.multiline = True
+                parts.extend(self._line_parts(line))
+                self.continuing = False
+            self.buffer = self.buffer[newline + 1:]
+
+        self.emitted += len(parts)
+        return parts
+
+    def finish(self) -> str:
+        """Text not handed out yet"""
+        tail, self.buffer = self.buffer, ""
+        return tail
+
+    def split_tail(self, tail: str) -> List[str]:
+        """Split the (cleaned) rest of the reply the way the whole reply would have been"""
+        if not self.emitted:
+            return split_naturally(preprocess_for_splitting(tail))
+        parts = []
+        for line in (line.strip() for line in tail.split('\n')):
+            if line:
+                parts.extend(self._line_parts(line))
+                self.continuing = False
+        return parts
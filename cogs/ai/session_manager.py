@@ -0,0 +1,289 @@
+"""
+Session Manager for Izumi AI
+Keeps per-channel Gemini chat sessions inside a token budget with a verbatim window and a rolling summary
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import google.generativeai as genai
+
+from utils.config import GEMINI_SESSION_CONFIG
+
+SUMMARY_HEADER = "[INTERNAL CONTEXT - EARLIER IN THIS CHANNEL]"
+SUMMARY_FOOTER = "[END EARLIER]"
+SUMMARY_ACK = "got it, i remember"
+
+
+class TokenEstimator:
+    """
+    Character-based token estimate, calibrated against the counts Gemini reports.
+
+    Starts at the old 4 chars/token guess and moves towards the observed ratio
+    with an exponential moving average, so there is no tokenizer round trip.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0, smoothing: float = 0.1):
+        self.chars_per_token = chars_per_token
+        self.smoothing = smoothing
+        self.samples = 0
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        return max(1, round(len(text) / self.chars_per_token))
+
+    def observe(self, text: str, tokens: int):
+        """Feed back a real token count for `text`"""
+        # tiny replies say more about rounding than about the ratio
+        if not text or not tokens or len(text) < 40:
+            return
+        sample = min(8.0, max(1.5, len(text) / tokens))
+        self.chars_per_token += (sample - self.chars_per_token) * self.smoothing
+        self.samples += 1
+
+
+# Shared by the session manager and the context builder
+TOKEN_ESTIMATOR = TokenEstimator()
+
+
+def content_text(content) -> str:
+    """Plain text of a chat history entry"""
+    parts = getattr(content, 'parts', None) or []
+    return "".join(getattr(part, 'text', '') or '' for part in parts)
+
+
+def _text_content(role: str, text: str):
+    return genai.protos.Content(role=role, parts=[genai.protos.Part(text=text)])
+
+
+class SessionManager:
+    """
+    Token bookkeeping and compaction for the shared channel chat sessions.
+
+    Each session dict carries a per-entry token ledger aligned with
+    `chat.history`, so totals only ever grow by the entries just added instead
+    of rescanning the history. Once a session passes `summarize_at` tokens (or
+    `summary_batch` entries pile up outside the window), the entries older than
+    the last `keep_turns` are cut and folded into a short summary by a
+    background task; the summary sits at the head of the history
+    as one user/model pair. Sent prompts are slimmed to the user's message
+    after the reply, since the context block is rebuilt for every request.
+    """
+
+    def __init__(self, summarizer: Callable[[str, str], Awaitable[Optional[str]]],
+                 estimator: TokenEstimator = TOKEN_ESTIMATOR):
+        self.summarizer = summarizer      # async (previous summary, transcript) -> new summary
+        self.estimator = estimator
+        self.summarize_at = GEMINI_SESSION_CONFIG["summarize_at"]
+        self.max_tokens = GEMINI_SESSION_CONFIG["max_tokens"]
+        self.keep_turns = GEMINI_SESSION_CONFIG["keep_turns"]
+        self.summary_batch = GEMINI_SESSION_CONFIG["summary_batch"]
+        self.turn_chars = GEMINI_SESSION_CONFIG["transcript_turn_chars"]
+        self.stats = {'compactions': 0, 'summaries': 0, 'summary_failures': 0, 'dropped_turns': 0}
+
+    # ==================== SESSION LIFECYCLE ====================
+
+    def new_session(self, chat=None) -> Dict:
+        session = {
+            "chat": chat,
+            "model_index": 0,
+            "message_count": 0,
+            "created_at": time.time(),
+        }
+        self._clear_ledger(session)
+        return session
+
+    def reset(self, session: Dict, chat):
+        """Start the session over with a fresh chat, dropping the summary as well"""
+        session["chat"] = chat
+        session["message_count"] = 1
+        session["created_at"] = time.time()
+        self._clear_ledger(session)
+
+    def _clear_ledger(self, session: Dict):
+        session["turn_tokens"] = []        # tokens per chat.history entry
+        session["history_tokens"] = 0
+        session["summary"] = ""
+        session["summary_entries"] = 0     # 2 while a summary pair heads the history
+        session["pending_transcript"] = []
+        # bumped on every reset so a summary finishing late can't land in a new conversation
+        session["epoch"] = session.get("epoch", 0) + 1
+        session["summary_task"] = None
+
+    # ==================== TOKEN ACCOUNTING ====================
+
+    def _history(self, session: Dict) -> List:
+        chat = session.get("chat")
+        if not chat or not hasattr(chat, 'history'):
+            return []
+        return chat.history
+
+    def total_tokens(self, session: Dict) -> int:
+        """Tokens currently held in the session history"""
+        try:
+            history = self._history(session)
+            ledger = session.setdefault("turn_tokens", [])
+            if len(ledger) != len(history):
+                added = len(history) - len(ledger)
+                if added > 0:
+                    new_tokens = [self.estimator.estimate(content_text(content)) for content in history[len(ledger):]]
+                    ledger.extend(new_tokens)
+                    session["history_tokens"] = session.get("history_tokens", 0) + sum(new_tokens)
+                else:
+                    ledger[:] = [self.estimator.estimate(content_text(content)) for content in history]
+                    session["history_tokens"] = sum(ledger)
+            return session.get("history_tokens", 0)
+        except Exception as e:
+            print(f"Error counting session tokens: {e}")
+            return 0
+
+    def record_turn(self, session: Dict, response, slim_prompt: Optional[str] = None,
+                    chat=None, epoch: Optional[int] = None):
+        """
+        Account for the exchange just appended by send_message, using Gemini's own counts where given.
+
+        `chat` and `epoch` are the chat the request went out on and the session
+        epoch at that time. A compaction or summary finishing while the request
+        was out replaces the chat, so the exchange is carried over to the
+        current one first; after a reset it is dropped.
+        """
+        if chat is not None and chat is not session.get("chat"):
+            if epoch is not None and epoch != session.get("epoch"):
+                return
+            if not self._carry_over(session, chat):
+                return
+
+        history = self._history(session)
+        if len(history) < 2:
+            return
+
+        if slim_prompt:
+            # the sent prompt carried the whole context block; keep only what was said
+            history[-2] = _text_content("user", slim_prompt)
+
+        self.total_tokens(session)
+        ledger = session["turn_tokens"]
+        if slim_prompt:
+            slim_tokens = self.estimator.estimate(slim_prompt)
+            session["history_tokens"] += slim_tokens - ledger[-2]
+            ledger[-2] = slim_tokens
+
+        usage = getattr(response, 'usage_metadata', None)
+        reply_tokens = getattr(usage, 'candidates_token_count', 0) if usage else 0
+        if reply_tokens:
+            reply_text = content_text(history[-1])
+            self.estimator.observe(reply_text, reply_tokens)
+            session["history_tokens"] += reply_tokens - ledger[-1]
+            ledger[-1] = reply_tokens
+        session["last_prompt_tokens"] = getattr(usage, 'prompt_token_count', 0) if usage else 0
+
+    def _carry_over(self, session: Dict, chat) -> bool:
+        """Append the last exchange of a replaced chat to the session's current one"""
+        sent = getattr(chat, 'history', None) or []
+        if len(sent) < 2 or not session.get("chat"):
+            return False
+        self.total_tokens(session)    # settle the ledger before the history grows
+        self._history(session).extend(sent[-2:])
+        return True
+
+    # ==================== COMPACTION ====================
+
+    def compact(self, session: Dict, channel_id: int) -> bool:
+        """Cut turns older than the verbatim window once over budget, returns True if anything was cut"""
+        total = self.total_tokens(session)
+        history = self._history(session)
+        head = session.get("summary_entries", 0)
+        # cheap turns are still summarized once enough pile up outside the window, a few at a time
+        if total <= self.summarize_at and len(history) - head <= self.keep_turns + self.summary_batch:
+            return False
+
+        history = list(history)
+        ledger = session["turn_tokens"]
+        count = len(history)
+        cut = max(0, count - head - self.keep_turns)
+
+        # a window of oversized turns can still exceed the hard cap on its own
+        while head + cut < count - 2 and sum(ledger[:head]) + sum(ledger[head + cut:]) > self.max_tokens:
+            cut += 1
+        # keep user/model pairs together, and always keep the latest exchange
+        if cut % 2:
+            cut = cut + 1 if head + cut + 1 <= count - 2 else cut - 1
+        if cut <= 0:
+            return False
+
+        dropped = history[head:head + cut]
+        session["pending_transcript"].extend(self._transcript_lines(dropped))
+        kept = history[:head] + history[head + cut:]
+        del ledger[head:head + cut]
+        session["history_tokens"] = sum(ledger)
+        session["chat"] = session["chat"].model.start_chat(history=kept)
+
+        self.stats['compactions'] += 1
+        self.stats['dropped_turns'] += cut
+        print(f"✂️ Compacted chat session for channel {channel_id}: {total} → {session['history_tokens']} tokens ({cut} entries to summary)")
+        self._schedule_summary(session, channel_id)
+        return True
+
+    def _transcript_lines(self, contents: List) -> List[str]:
+        lines = []
+        for content in contents:
+            speaker = "Izumi" if getattr(content, 'role', '') == "model" else "Chat"
+            text = " ".join(content_text(content).split())
+            if len(text) > self.turn_chars:
+                text = text[:self.turn_chars] + "..."
+            lines.append(f"{speaker}: {text}")
+        return lines
+
+    def _schedule_summary(self, session: Dict, channel_id: int):
+        task = session.get("summary_task")
+        if task is not None and not task.done():
+            # the running task picks up whatever was added to the transcript meanwhile
+            return
+        try:
+            session["summary_task"] = asyncio.get_running_loop().create_task(
+                self._summarize(session, channel_id, session["epoch"])
+            )
+        except RuntimeError:
+            # no loop (e.g. called from a sync context at shutdown), summary waits for the next compaction
+            pass
+
+    async def _summarize(self, session: Dict, channel_id: int, epoch: int):
+        while session.get("epoch") == epoch and session["pending_transcript"]:
+            lines = session["pending_transcript"]
+            session["pending_transcript"] = []
+            try:
+                summary = await self.summarizer(session["summary"], "\n".join(lines))
+            except Exception as e:
+                summary = None
+                print(f"⚠️ Session summary failed for channel {channel_id}: {e}")
+            if session.get("epoch") != epoch:
+                return
+            if not summary:
+                self.stats['summary_failures'] += 1
+                continue
+            self._install_summary(session, summary.strip())
+            self.stats['summaries'] += 1
+
+    def _install_summary(self, session: Dict, summary: str):
+        """Replace the summary pair at the head of the history"""
+        history = list(self._history(session))
+        ledger = session["turn_tokens"]
+        head = session.get("summary_entries", 0)
+
+        pair = [
+            _text_content("user", f"{SUMMARY_HEADER}\n{summary}\n{SUMMARY_FOOTER}"),
+            _text_content("model", SUMMARY_ACK),
+        ]
+        history[:head] = pair
+        ledger[:head] = [self.estimator.estimate(content_text(content)) for content in pair]
+        session["history_tokens"] = sum(ledger)
+        session["summary"] = summary
+        session["summary_entries"] = 2
+        session["chat"] = session["chat"].model.start_chat(history=history)
+
+    def info(self) -> Dict:
+        """Counters for admin/debug output"""
+        return dict(self.stats, chars_per_token=round(self.estimator.chars_per_token, 2),
+                    calibration_samples=self.estimator.samples)
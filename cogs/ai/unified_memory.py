@@ -6,12 +6,28 @@ Combines user memories, self-memories, and learning data into a single cohesive
 import time
 import re
 import json
+import asyncio
+import itertools
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict, Counter
 from typing import Dict, List, Optional, Tuple, Any
-from utils.helpers import save_json, load_json
-from utils.config import DATA_FOLDER
+from utils.helpers import save_json, load_json, deep_clean_data
+from utils.config import DATA_FOLDER, TOP_K_CONFIG, STORAGE_FILE, PROFILE_STORE_CONFIG
+from utils.bounded_cache import BoundedCache
+from utils.storage import SQLiteStore, LazyStoreDict, encode_record, strip_transient
 import os
+import shutil
+from .learning_queue import LearningQueue, MessageSnapshot
+from .lexicon import LEXICON, MessageFeatures
+from .name_index import NameIndex, NAME_FIELDS
+from .activity_tracker import ChannelActivity, classify_energy, energy_keywords
+from .heavy_hitters import SpaceSaving
+
+# Skipped when counting vocabulary
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+
+# Profile sections the context builder caches; each has a version bumped whenever it's mutated
+CONTEXT_SECTIONS = ('memories', 'vocabulary', 'relationships', 'communication_style')
 
 class UnifiedMemorySystem:
     """Unified memory system that handles all memory-related functionality"""
@@ -20,15 +36,32 @@ class UnifiedMemorySystem:
         self.bot = bot
         self.unified_data_file = os.path.join(DATA_FOLDER, "unified_memory.json")
         
-        # Load or migrate data
+        # Auto-save tracking
+        self.pending_saves = False
+        
+        # Load or migrate data - user profiles live in the store, one record each, loaded on use
         self.memory_data = self.load_or_migrate_data()
+        self.memory_data['users'] = self._open_profile_store(self.memory_data.get('users') or {})
+        
+        # Name lookups for person queries, kept in step with basic_info changes
+        self.name_index = NameIndex()
+        self.name_index.rebuild({user_id: {'basic_info': basic_info}
+                                 for user_id, basic_info in self.memory_data['users'].select('basic_info').items()})
+        
+        # Section versions for the context builder's fragment cache (in-memory only, a restart starts cold)
+        self.section_versions = {}  # {user_id_str: {section: version}}
+        self._version_counter = itertools.count(1)
+        
+        # Space-Saving indexes over the stored top-k dicts (vocabulary, server culture)
+        self._sketches = BoundedCache("top_k_sketches", max_items=TOP_K_CONFIG["cached_sketches"])
         
         # Recent message context storage
-        self.recent_messages = {}  # {channel_id: [recent_messages]}
+        self.recent_messages = {}  # {channel_id: deque of recent messages} - owned by channel_activity
+        self.channel_activity = {}  # {channel_id: ChannelActivity} - ring buffer + window aggregates
         self.context_message_limit = 50  # Last 50 messages for context
         
-        # Auto-save tracking
-        self.pending_saves = False
+        # Live messages are learned from in background micro-batches
+        self.learning_queue = LearningQueue(self)
         
     def load_or_migrate_data(self) -> Dict:
         """Load unified data or migrate from old files"""
@@ -48,6 +81,34 @@ class UnifiedMemorySystem:
         print("🔄 Migrating to unified memory system...")
         return self._migrate_old_data()
     
+    def _open_profile_store(self, legacy_users: Dict) -> LazyStoreDict:
+        """User profiles as one store record each; profiles still in unified_memory.json are moved over once"""
+        store = getattr(self.bot, 'store', None) or SQLiteStore(STORAGE_FILE)
+        namespace = PROFILE_STORE_CONFIG["namespace"]
+        marker = f"migrated:{namespace}"
+        
+        if not store.get_meta(marker):
+            if legacy_users:
+                if os.path.exists(self.unified_data_file):
+                    shutil.copyfile(self.unified_data_file, self.unified_data_file + ".pre-sharding")
+                store.upsert_many(namespace, [(user_id, encode_record(strip_transient(profile)))
+                                              for user_id, profile in legacy_users.items()])
+                print(f"📦 Moved {len(legacy_users)} user profiles into storage ({namespace})")
+                # rewrite unified_memory.json without them
+                self.pending_saves = True
+            store.set_meta(marker, self.unified_data_file)
+        
+        return LazyStoreDict(
+            store, namespace,
+            max_resident=PROFILE_STORE_CONFIG["max_resident"],
+            idle_seconds=PROFILE_STORE_CONFIG["idle_seconds"],
+            min_resident_seconds=PROFILE_STORE_CONFIG["min_resident_seconds"],
+            indexes={
+                'last_interaction': ('activity', 'last_interaction'),
+                'birthday': ('basic_info', 'birthday'),
+            }
+        )
+    
     def _validate_unified_structure(self, data: Dict) -> bool:
         """Validate that unified data has the correct structure"""
         required_keys = ['users', 'izumi_self', 'server_culture', 'system_info']
@@ -187,10 +248,10 @@ class UnifiedMemorySystem:
             }
         }
     
-    async def _update_dynamic_trust_level(self, user_id_str: str, content: str, timestamp):
+    async def _update_dynamic_trust_level(self, user_id_str: str, content: str, timestamp,
+                                          features: Optional[MessageFeatures] = None):
         """Update trust level dynamically based on user behavior patterns"""
-        import time
-        
+        features = features or LEXICON.analyze(content)
         user_data = self.memory_data['users'][user_id_str]
         current_trust = user_data['social']['trust_level']
         last_interaction = user_data['activity']['last_interaction']
@@ -221,17 +282,9 @@ class UnifiedMemorySystem:
         elif message_length <= 3:  # Very short message (like "ok", "lol")
             trust_change -= 0.1
         
-        # 3. SENTIMENT ANALYSIS - Positive messages increase trust
-        content_lower = content.lower()
-        
-        # Positive indicators
-        positive_words = ['thanks', 'thank you', 'appreciate', 'love', 'great', 'awesome', 
-                         'good', 'nice', 'please', 'sorry', 'help', 'wonderful', 'amazing']
-        negative_words = ['hate', 'stupid', 'dumb', 'shut up', 'annoying', 'bad', 'terrible',
-                         'awful', 'suck', 'worst', 'fuck', 'shit', 'damn']
-        
-        positive_count = sum(1 for word in positive_words if word in content_lower)
-        negative_count = sum(1 for word in negative_words if word in content_lower)
+        # 3. SENTIMENT ANALYSIS - Positive messages increase trust (lexicon trust_positive/trust_negative)
+        positive_count = features.counts['trust_positive']
+        negative_count = features.counts['trust_negative']
         
         if positive_count > negative_count:
             trust_change += 0.2 * positive_count
@@ -253,6 +306,7 @@ class UnifiedMemorySystem:
         # Only update if there's a meaningful change
         if abs(new_trust - current_trust) >= 0.1:
             user_data['social']['trust_level'] = round(new_trust * 10) / 10  # Round to 1 decimal
+            self.bump_section_version(user_id_str, 'memories')
             
             # Log significant trust changes for debugging
             if abs(trust_change) >= 0.5:
@@ -264,7 +318,18 @@ class UnifiedMemorySystem:
         current_time = int(time.time())
         decay_count = 0
         
-        for user_id_str, user_data in self.memory_data['users'].items():
+        users = self.memory_data['users']
+        # only users idle for 2+ weeks with some trust left can decay, found without loading everyone
+        trust_levels = users.select('social', 'trust_level')
+        candidates = [user_id_str for user_id_str, last_interaction in users.index['last_interaction'].items()
+                      if current_time - last_interaction > 14 * 86400 and trust_levels.get(user_id_str, 0) > 0]
+        
+        for checked, user_id_str in enumerate(candidates, 1):
+            if checked % 200 == 0:
+                await asyncio.sleep(0)
+            if user_id_str not in users:
+                continue
+            user_data = users[user_id_str]
             last_interaction = user_data['activity']['last_interaction']
             current_trust = user_data['social']['trust_level']
             
@@ -283,6 +348,7 @@ class UnifiedMemorySystem:
                 if trust_decay > 0:
                     new_trust = max(0, current_trust - trust_decay)
                     user_data['social']['trust_level'] = round(new_trust * 10) / 10
+                    self.bump_section_version(user_id_str, 'memories')
                     decay_count += 1
                     print(f"Decayed trust for inactive user {user_id_str}: {current_trust:.1f} → {new_trust:.1f} ({days_inactive:.0f} days inactive)")
         
@@ -290,6 +356,16 @@ class UnifiedMemorySystem:
             self.pending_saves = True
             print(f"Decayed trust levels for {decay_count} inactive users")
     
+    def bump_section_version(self, user_id_str: str, *sections: str):
+        """Mark profile sections as changed (all of them if none are given)"""
+        versions = self.section_versions.setdefault(user_id_str, {})
+        # versions come from one global counter, so a cleared and re-created profile never reuses an old one
+        for section in sections or CONTEXT_SECTIONS:
+            versions[section] = next(self._version_counter)
+    
+    def get_section_version(self, user_id_str: str, section: str) -> int:
+        return self.section_versions.get(user_id_str, {}).get(section, 0)
+    
     def is_conversation_participation_enabled(self, channel_id: int) -> bool:
         """Check if conversation participation is enabled for this channel"""
         channel_id_str = str(channel_id)
@@ -341,30 +417,22 @@ class UnifiedMemorySystem:
         if current_time - settings['last_participation'] < settings['cooldown']:
             return {"should_participate": False, "reason": "cooldown_active"}
         
-        # Get recent messages from this channel
-        recent_messages = []
-        if hasattr(self, 'recent_messages') and channel_id in self.recent_messages:
-            cutoff_time = current_time - settings['time_window']
-            recent_messages = [
-                msg for msg in self.recent_messages[channel_id]
-                if msg.get('timestamp', 0) > cutoff_time and not msg.get('is_bot', False)
-            ]
+        # Window aggregates are kept up to date as messages arrive, no rescan of the channel buffer
+        activity = self.channel_activity.get(channel_id)
+        if activity is None:
+            return {"should_participate": False, "reason": "not_enough_messages"}
+        message_count, user_count = activity.window(current_time - settings['time_window'])
         
         # Analyze conversation activity
-        if len(recent_messages) < settings['min_messages']:
+        if message_count < settings['min_messages']:
             return {"should_participate": False, "reason": "not_enough_messages"}
         
         # Count unique users
-        unique_users = set(msg.get('user_id') for msg in recent_messages)
-        if len(unique_users) < settings['min_users']:
+        if user_count < settings['min_users']:
             return {"should_participate": False, "reason": "not_enough_users"}
         
         # Check if Izumi recently participated
-        izumi_recent = any(
-            msg.get('user_id') == self.bot.user.id 
-            for msg in recent_messages[-3:]  # Last 3 messages
-        )
-        if izumi_recent:
+        if activity.bot_spoke_within(3):  # Last 3 messages
             return {"should_participate": False, "reason": "recently_participated"}
         
         # Determine if should participate based on chance
@@ -376,9 +444,9 @@ class UnifiedMemorySystem:
             
             return {
                 "should_participate": True,
-                "conversation_context": self._build_conversation_context(recent_messages),
-                "participants": list(unique_users),
-                "message_count": len(recent_messages)
+                "conversation_context": self._build_conversation_context(activity.window_messages()),
+                "participants": list(activity.speakers),
+                "message_count": message_count
             }
         
         return {"should_participate": False, "reason": "random_chance"}
@@ -484,12 +552,30 @@ class UnifiedMemorySystem:
     def save_unified_data(self, data: Dict = None):
         """Save unified memory data"""
         if data is None:
+            persistence = getattr(self.bot, 'persistence', None)
+            if persistence and 'unified_memory' in persistence.sections:
+                # Coalesced and written off the event loop by the persistence scheduler
+                self.pending_saves = True
+                persistence.mark_dirty('unified_memory')
+                return
             data = self.memory_data
         
+        users = data.get('users')
+        if isinstance(users, LazyStoreDict):
+            # profiles are store records, the json file keeps everything else
+            users.flush()
+            data = dict(data, users={})
+        
         data['system_info']['last_updated'] = int(time.time())
         save_json(self.unified_data_file, data)
         self.pending_saves = False
 
+    def snapshot_unified_data(self) -> Dict:
+        """Clean copy of memory_data (without user profiles, they're saved as store records) for the persistence scheduler to write"""
+        self.memory_data['system_info']['last_updated'] = int(time.time())
+        self.pending_saves = False
+        return deep_clean_data(dict(self.memory_data, users={}))
+
     # ==================== BIRTHDAY PING SYSTEM ====================
     
     async def send_random_birthday_ping(self, bot):
@@ -525,19 +611,16 @@ class UnifiedMemorySystem:
                         })
         
         # Also check unified memory (backup source)
-        for user_id_str, user_data in self.memory_data.get('users', {}).items():
-            basic_info = user_data.get('basic_info', {})
-            if basic_info.get('birthday'):
-                birthday_date = basic_info['birthday']
-                if birthday_date == current_date:
-                    # Add if not already found
-                    if not any(u['user_id'] == user_id_str for u in birthday_users):
-                        birthday_users.append({
-                            'user_id': user_id_str,
-                            'month': int(birthday_date.split('-')[0]),
-                            'day': int(birthday_date.split('-')[1]),
-                            'year': None
-                        })
+        for user_id_str, birthday_date in self.memory_data['users'].index['birthday'].items():
+            if birthday_date == current_date:
+                # Add if not already found
+                if not any(u['user_id'] == user_id_str for u in birthday_users):
+                    birthday_users.append({
+                        'user_id': user_id_str,
+                        'month': int(birthday_date.split('-')[0]),
+                        'day': int(birthday_date.split('-')[1]),
+                        'year': None
+                    })
         
         if not birthday_users:
             return None
@@ -642,7 +725,7 @@ class UnifiedMemorySystem:
         # Priority 1: Channel where user has been recently active
         if hasattr(self, 'recent_messages'):
             for channel_id, messages in self.recent_messages.items():
-                for msg in reversed(messages[-20:]):  # Recent messages
+                for msg in itertools.islice(reversed(messages), 20):  # Recent messages
                     if msg.get('user_id') == user_id:
                         channel = bot.get_channel(channel_id)
                         if channel:
@@ -743,6 +826,10 @@ class UnifiedMemorySystem:
                     user_data[section][field] = [user_data[section][field], value]
             else:
                 user_data[section][field] = value
+            
+            if section == 'basic_info' and field in NAME_FIELDS:
+                self.name_index.update(user_id_str, user_data['basic_info'])
+            self.bump_section_version(user_id_str, 'memories')
         
         # Update timestamp
         user_data['activity']['last_interaction'] = int(time.time())
@@ -775,6 +862,7 @@ class UnifiedMemorySystem:
         }
         strength = strength_map.get(relationship.lower(), 5)
         self.memory_data['users'][user1_str]['learning_data']['relationship_networks']['relationship_strength'][user2_str] = strength
+        self.bump_section_version(user1_str, 'memories', 'relationships')
         
         self.pending_saves = True
     
@@ -793,6 +881,7 @@ class UnifiedMemorySystem:
             
             self.memory_data['users'][user_str]['social']['shared_experiences'][other_str].append(experience)
             self.memory_data['users'][user_str]['activity']['last_interaction'] = int(time.time())
+            self.bump_section_version(user_str, 'memories')
         
         self.pending_saves = True
     
@@ -818,68 +907,102 @@ class UnifiedMemorySystem:
     # ==================== LEARNING SYSTEM METHODS ====================
     
     async def learn_from_message(self, message):
-        """Extract maximum information from a single message"""
+        """Extract maximum information from a single message (applied inline)"""
         if message.author.bot or not message.guild:
             return
-            
-        user_id = message.author.id
-        user_id_str = str(user_id)
-        guild_id = message.guild.id
-        content = message.content
-        timestamp = message.created_at
-        
-        # Ensure user exists in unified system
-        if user_id_str not in self.memory_data['users']:
-            self.memory_data['users'][user_id_str] = self._create_empty_user_profile()
-        
-        # Update basic Discord info (username/display name) for better recognition
-        basic_info = self.memory_data['users'][user_id_str]['basic_info']
-        if not basic_info.get('display_name') or basic_info.get('display_name') != message.author.display_name:
-            basic_info['display_name'] = message.author.display_name
-            basic_info['username'] = message.author.name
-            self.pending_saves = True
-        
-        # Update last interaction time
-        self.memory_data['users'][user_id_str]['activity']['last_interaction'] = int(timestamp.timestamp())
-        
-        # Dynamic trust level calculation
-        await self._update_dynamic_trust_level(user_id_str, content, timestamp)
-        
-        self.pending_saves = True
-        
-        user_data = self.memory_data['users'][user_id_str]['learning_data']
         
-        # Learn vocabulary and language patterns
-        await self.learn_vocabulary_advanced(user_id_str, content, timestamp, user_data)
+        snapshot = MessageSnapshot.from_message(message, getattr(self.bot, 'user', None))
+        await self.learn_from_batch([snapshot])
         
-        # Learn relationships and interactions
-        await self.learn_relationships_advanced(message, user_data)
-        
-        # Learn sentiment and emotional patterns
-        await self.learn_sentiment_patterns(user_id_str, content, timestamp, user_data)
-        
-        # Learn communication style and personality
-        await self.learn_communication_style(user_id_str, content, message, user_data)
-        
-        # Learn topic interests and preferences
-        await self.learn_topic_interests(user_id_str, content, message.channel.id, user_data)
-        
-        # Learn activity and temporal patterns
-        await self.learn_activity_patterns(user_id_str, guild_id, timestamp, user_data)
+        # Store recent messages for chat context
+        self._store_recent_snapshot(snapshot)
+    
+    def enqueue_message(self, message) -> bool:
+        """Record a live message for context now and queue the heavy learning passes for the background worker"""
+        if message.author.bot or not message.guild:
+            return False
+        
+        snapshot = MessageSnapshot.from_message(message, getattr(self.bot, 'user', None))
+        # Conversation detection reads recent messages right away, so this part can't wait for the queue
+        self._store_recent_snapshot(snapshot)
+        return self.learning_queue.submit(snapshot)
+    
+    async def learn_from_batch(self, snapshots: List[MessageSnapshot]):
+        """Apply a batch of messages, aggregating each user's counters so every profile is updated once"""
+        by_user = {}
+        by_guild = {}
+        for snapshot in snapshots:
+            # one lexicon scan per message, shared by every pass below
+            if snapshot.features is None:
+                snapshot.features = LEXICON.analyze(snapshot.content)
+            by_user.setdefault(snapshot.author_id, []).append(snapshot)
+            by_guild.setdefault(snapshot.guild_id, []).append(snapshot)
+        
+        for user_id, messages in by_user.items():
+            user_id_str = str(user_id)
+            
+            # Ensure user exists in unified system
+            if user_id_str not in self.memory_data['users']:
+                self.memory_data['users'][user_id_str] = self._create_empty_user_profile()
+            
+            # Update basic Discord info (username/display name) for better recognition
+            activity = self.memory_data['users'][user_id_str]['activity']
+            latest = max(messages, key=lambda snapshot: snapshot.created_at)
+            # history training replays old messages, those mustn't roll back the name or the last interaction
+            is_current = int(latest.created_at.timestamp()) >= activity.get('last_interaction', 0)
+            basic_info = self.memory_data['users'][user_id_str]['basic_info']
+            if is_current and (not basic_info.get('display_name') or basic_info.get('display_name') != latest.display_name):
+                basic_info['display_name'] = latest.display_name
+                basic_info['username'] = latest.author_name
+                self.name_index.update(user_id_str, basic_info)
+                self.bump_section_version(user_id_str, 'memories')
+            
+            for snapshot in messages:
+                # Update last interaction time
+                activity['last_interaction'] = max(activity.get('last_interaction', 0), int(snapshot.created_at.timestamp()))
+                
+                # Dynamic trust level calculation
+                await self._update_dynamic_trust_level(user_id_str, snapshot.content, snapshot.created_at, snapshot.features)
+            
+            user_data = self.memory_data['users'][user_id_str]['learning_data']
+            
+            # Learn vocabulary and language patterns
+            await self.learn_vocabulary_advanced(user_id_str, messages, user_data)
+            
+            # Learn relationships and interactions
+            await self.learn_relationships_advanced(messages, user_data)
+            
+            # Learn sentiment and emotional patterns
+            await self.learn_sentiment_patterns(user_id_str, messages, user_data)
+            
+            # Learn communication style and personality
+            await self.learn_communication_style(user_id_str, messages, user_data)
+            
+            # Learn topic interests and preferences
+            await self.learn_topic_interests(user_id_str, messages, user_data)
+            
+            # Learn activity and temporal patterns
+            await self.learn_activity_patterns(user_id_str, messages, user_data)
+            
+            # Update user memories with learned insights
+            await self.update_user_memories_from_learning(user_id_str)
+            
+            # Invalidate cached context for what this batch changed
+            self.bump_section_version(user_id_str, 'vocabulary', 'communication_style')
+            if any(snapshot.mention_ids for snapshot in messages):
+                self.bump_section_version(user_id_str, 'relationships')
+            
+            # let replies run between users of a big batch
+            if len(by_user) > 1:
+                await asyncio.sleep(0)
         
         # Learn server culture and dynamics
-        await self.learn_server_culture_advanced(guild_id, content, user_id_str, timestamp)
-        
-        # Update user memories with learned insights
-        await self.update_user_memories_from_learning(user_id_str)
-        
-        # Store recent messages for chat context (only non-bot messages)
-        if not message.author.bot:
-            await self.store_recent_message(message)
+        for guild_id, messages in by_guild.items():
+            await self.learn_server_culture_advanced(guild_id, messages)
         
         self.pending_saves = True
     
-    async def learn_vocabulary_advanced(self, user_id_str: str, content: str, timestamp: datetime, user_data: Dict):
+    async def learn_vocabulary_advanced(self, user_id_str: str, messages: List[MessageSnapshot], user_data: Dict):
         """Learn advanced vocabulary patterns"""
         if 'vocabulary' not in user_data:
             user_data['vocabulary'] = {}
@@ -908,38 +1031,43 @@ class UnifiedMemorySystem:
         if 'unique_expressions' not in vocab:
             vocab['unique_expressions'] = []
         
-        content_lower = content.lower()
-        
-        # Advanced word frequency with context
-        words = re.findall(r'\b\w+\b', content_lower)
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+        word_counts = Counter()
+        emoji_counts = Counter()
         
-        for word in words:
-            if len(word) > 2 and word not in stop_words:
-                vocab['word_frequency'][word] = vocab['word_frequency'].get(word, 0) + 1
-        
-        # Emoji analysis
-        emoji_pattern = r'[😀-🿿]|:[a-zA-Z0-9_+-]+:'
-        emojis = re.findall(emoji_pattern, content)
-        for emoji in emojis:
-            vocab['emoji_usage'][emoji] = vocab['emoji_usage'].get(emoji, 0) + 1
+        for snapshot in messages:
+            content = snapshot.content
+            features = snapshot.features
+            
+            # Advanced word frequency with context
+            for word in features.words:
+                if len(word) > 2 and word not in STOP_WORDS:
+                    word_counts[word] += 1
+            
+            # Emoji analysis
+            emoji_counts.update(features.emojis)
+            
+            # Message length tracking
+            vocab['message_lengths'].append(len(content))
+            
+            # Question and exclamation patterns
+            if '?' in content:
+                vocab['question_patterns'].append(content[:100])
+            if '!' in content:
+                vocab['exclamation_patterns'].append(content[:100])
+        
+        # Bounded top-k counters: a new word takes over the rarest slot instead of re-sorting the dict
+        words = self.get_top_k_sketch(user_id_str, vocab, 'word_frequency')
+        for word, count in word_counts.items():
+            words.add(word, count)
+        emojis = self.get_top_k_sketch(user_id_str, vocab, 'emoji_usage')
+        for emoji, count in emoji_counts.items():
+            emojis.add(emoji, count)
         
-        # Message length tracking
-        vocab['message_lengths'].append(len(content))
         vocab['message_lengths'] = vocab['message_lengths'][-100:]  # Keep recent
-        
-        # Question and exclamation patterns
-        if '?' in content:
-            vocab['question_patterns'].append(content[:100])
-            vocab['question_patterns'] = vocab['question_patterns'][-20:]
-        if '!' in content:
-            vocab['exclamation_patterns'].append(content[:100])
-            vocab['exclamation_patterns'] = vocab['exclamation_patterns'][-20:]
-        
-        # Keep data manageable
-        self._trim_vocabulary_data(vocab)
+        vocab['question_patterns'] = vocab['question_patterns'][-20:]
+        vocab['exclamation_patterns'] = vocab['exclamation_patterns'][-20:]
     
-    async def learn_relationships_advanced(self, message, user_data: Dict):
+    async def learn_relationships_advanced(self, messages: List[MessageSnapshot], user_data: Dict):
         """Learn complex relationship patterns"""
         if 'relationship_networks' not in user_data:
             user_data['relationship_networks'] = {}
@@ -958,21 +1086,25 @@ class UnifiedMemorySystem:
         if 'relationship_strength' not in relations:
             relations['relationship_strength'] = {}
         
-        # Mention analysis
-        for mentioned_user in message.mentions:
-            if mentioned_user.id != message.author.id and not mentioned_user.bot:
-                mentioned_id_str = str(mentioned_user.id)
-                relations['mention_frequency'][mentioned_id_str] = relations['mention_frequency'].get(mentioned_id_str, 0) + 1
-        
-        # Channel sharing analysis
-        channel_id_str = str(message.channel.id)
-        relations['shared_channels'][channel_id_str] = relations['shared_channels'].get(channel_id_str, 0) + 1
+        mentions = Counter()
+        channels = Counter()
+        hours = Counter()
+        for snapshot in messages:
+            # Mention analysis (snapshot already skips bots and self-mentions)
+            mentions.update(str(mentioned_id) for mentioned_id in snapshot.mention_ids)
+            
+            # Channel sharing analysis
+            channels[str(snapshot.channel_id)] += 1
+            
+            # Interaction timing
+            hours[str(snapshot.created_at.hour)] += 1
         
-        # Interaction timing
-        hour = message.created_at.hour
-        relations['interaction_times'][str(hour)] = relations['interaction_times'].get(str(hour), 0) + 1
+        for key, counts in (('mention_frequency', mentions), ('shared_channels', channels), ('interaction_times', hours)):
+            target = relations[key]
+            for item, count in counts.items():
+                target[item] = target.get(item, 0) + count
     
-    async def learn_sentiment_patterns(self, user_id_str: str, content: str, timestamp: datetime, user_data: Dict):
+    async def learn_sentiment_patterns(self, user_id_str: str, messages: List[MessageSnapshot], user_data: Dict):
         """Learn emotional patterns and sentiment"""
         if 'sentiment_patterns' not in user_data:
             user_data['sentiment_patterns'] = {}
@@ -991,42 +1123,40 @@ class UnifiedMemorySystem:
         if 'mood_patterns' not in sentiment:
             sentiment['mood_patterns'] = []
         
-        content_lower = content.lower()
-        
-        # Sentiment analysis
-        positive_words = ['great', 'awesome', 'love', 'amazing', 'good', 'nice', 'cool', 'best', 'happy', 'excited', 'thank', 'thanks']
-        negative_words = ['bad', 'hate', 'worst', 'awful', 'terrible', 'annoying', 'frustrated', 'angry', 'sad', 'disappointed']
-        humor_words = ['lol', 'lmao', 'haha', 'funny', 'joke', 'meme']
-        
-        positive_count = sum(1 for word in positive_words if word in content_lower)
-        negative_count = sum(1 for word in negative_words if word in content_lower)
-        humor_count = sum(1 for word in humor_words if word in content_lower)
-        
-        sentiment['positive_indicators'] += positive_count
-        sentiment['negative_indicators'] += negative_count
-        sentiment['humor_usage'] += humor_count
-        
-        # Excitement detection
-        excitement_score = 0
-        if content.isupper() and len(content) > 3:
-            excitement_score += 2
-        excitement_score += content.count('!') * 0.5
-        excitement_score += len(re.findall(r'[😀-🿿]', content)) * 0.3
+        for snapshot in messages:
+            content = snapshot.content
+            features = snapshot.features
+            
+            # Sentiment analysis (lexicon positive/negative/humor categories)
+            positive_count = features.counts['positive']
+            negative_count = features.counts['negative']
+            humor_count = features.counts['humor']
+            
+            sentiment['positive_indicators'] += positive_count
+            sentiment['negative_indicators'] += negative_count
+            sentiment['humor_usage'] += humor_count
+            
+            # Excitement detection
+            excitement_score = 0
+            if content.isupper() and len(content) > 3:
+                excitement_score += 2
+            excitement_score += content.count('!') * 0.5
+            excitement_score += features.unicode_emoji_count * 0.3
+            
+            sentiment['excitement_level'].append(excitement_score)
+            
+            # Mood tracking
+            sentiment['mood_patterns'].append({
+                'timestamp': int(snapshot.created_at.timestamp()),
+                'positive': positive_count,
+                'negative': negative_count,
+                'excitement': excitement_score
+            })
         
-        sentiment['excitement_level'].append(excitement_score)
         sentiment['excitement_level'] = sentiment['excitement_level'][-50:]  # Keep recent
-        
-        # Mood tracking
-        current_time = int(timestamp.timestamp())
-        sentiment['mood_patterns'].append({
-            'timestamp': current_time,
-            'positive': positive_count,
-            'negative': negative_count,
-            'excitement': excitement_score
-        })
         sentiment['mood_patterns'] = sentiment['mood_patterns'][-50:]  # Keep recent
     
-    async def learn_communication_style(self, user_id_str: str, content: str, message, user_data: Dict):
+    async def learn_communication_style(self, user_id_str: str, messages: List[MessageSnapshot], user_data: Dict):
         """Learn individual communication styles"""
         if 'communication_style' not in user_data:
             user_data['communication_style'] = {}
@@ -1045,37 +1175,31 @@ class UnifiedMemorySystem:
         if 'farewell_style' not in style:
             style['farewell_style'] = []
         
-        content_lower = content.lower()
-        
-        # Formality detection
-        formal_indicators = ['please', 'thank you', 'could you', 'would you', 'excuse me']
-        informal_indicators = ['yo', 'hey', 'sup', 'gonna', 'wanna', 'yeah', 'nah']
-        
-        formal_count = sum(1 for indicator in formal_indicators if indicator in content_lower)
-        informal_count = sum(1 for indicator in informal_indicators if indicator in content_lower)
-        
-        if formal_count > informal_count:
-            style['formality_level'] += 1
-        elif informal_count > formal_count:
-            style['formality_level'] -= 1
+        for snapshot in messages:
+            features = snapshot.features
+            
+            # Formality detection (lexicon formal/informal categories)
+            formal_count = features.counts['formal']
+            informal_count = features.counts['informal']
+            
+            if formal_count > informal_count:
+                style['formality_level'] += 1
+            elif informal_count > formal_count:
+                style['formality_level'] -= 1
+            
+            # Verbosity tracking
+            style['verbosity_preference'].append(len(features.tokens))
+            
+            # Emoji usage
+            style['emoji_frequency'] += len(features.emojis)
+            
+            # Greeting detection
+            style['greeting_style'].extend(features.matched('greeting'))
         
-        # Verbosity tracking
-        word_count = len(content.split())
-        style['verbosity_preference'].append(word_count)
         style['verbosity_preference'] = style['verbosity_preference'][-50:]  # Keep recent
-        
-        # Emoji usage
-        emoji_count = len(re.findall(r'[😀-🿿]|:[a-zA-Z0-9_+-]+:', content))
-        style['emoji_frequency'] += emoji_count
-        
-        # Greeting detection
-        greetings = ['hello', 'hi', 'hey', 'yo', 'sup', 'good morning', 'good evening']
-        for greeting in greetings:
-            if greeting in content_lower:
-                style['greeting_style'].append(greeting)
-                style['greeting_style'] = style['greeting_style'][-10:]  # Keep recent
+        style['greeting_style'] = style['greeting_style'][-10:]  # Keep recent
     
-    async def learn_topic_interests(self, user_id_str: str, content: str, channel_id: int, user_data: Dict):
+    async def learn_topic_interests(self, user_id_str: str, messages: List[MessageSnapshot], user_data: Dict):
         """Learn what topics users are interested in"""
         if 'topic_interests' not in user_data:
             user_data['topic_interests'] = {}
@@ -1092,31 +1216,27 @@ class UnifiedMemorySystem:
         if 'channel_preferences' not in interests:
             interests['channel_preferences'] = {}
         
-        content_lower = content.lower()
+        # Gaming / technology / entertainment interests come from the lexicon categories of the same name
+        topic_categories = ('gaming_interests', 'tech_interests', 'entertainment_interests')
+        counts = {category: Counter() for category in topic_categories}
+        channels = Counter()
         
-        # Gaming interest detection
-        gaming_keywords = ['osu', 'rhythm', 'fps', 'moba', 'mmo', 'indie', 'game', 'gaming']
-        for keyword in gaming_keywords:
-            if keyword in content_lower:
-                interests['gaming_interests'][keyword] = interests['gaming_interests'].get(keyword, 0) + 1
-        
-        # Technology interests
-        tech_keywords = ['programming', 'coding', 'python', 'javascript', 'ai', 'tech', 'software']
-        for keyword in tech_keywords:
-            if keyword in content_lower:
-                interests['tech_interests'][keyword] = interests['tech_interests'].get(keyword, 0) + 1
-        
-        # Entertainment interests
-        entertainment_keywords = ['anime', 'manga', 'movie', 'music', 'show', 'series']
-        for keyword in entertainment_keywords:
-            if keyword in content_lower:
-                interests['entertainment_interests'][keyword] = interests['entertainment_interests'].get(keyword, 0) + 1
+        for snapshot in messages:
+            features = snapshot.features
+            for category in topic_categories:
+                if features.counts[category]:
+                    counts[category].update(features.matched(category))
+            
+            # Channel preferences
+            channels[str(snapshot.channel_id)] += 1
         
-        # Channel preferences
-        channel_id_str = str(channel_id)
-        interests['channel_preferences'][channel_id_str] = interests['channel_preferences'].get(channel_id_str, 0) + 1
+        counts['channel_preferences'] = channels
+        for category, category_counts in counts.items():
+            target = interests[category]
+            for item, count in category_counts.items():
+                target[item] = target.get(item, 0) + count
     
-    async def learn_activity_patterns(self, user_id_str: str, guild_id: int, timestamp: datetime, user_data: Dict):
+    async def learn_activity_patterns(self, user_id_str: str, messages: List[MessageSnapshot], user_data: Dict):
         """Learn when and how often users are active"""
         if 'activity_patterns' not in user_data:
             user_data['activity_patterns'] = {}
@@ -1133,20 +1253,22 @@ class UnifiedMemorySystem:
         if 'message_frequency' not in activity:
             activity['message_frequency'] = []
         
-        # Record activity by hour, day, month
-        activity['hourly_activity'][timestamp.hour] += 1
-        activity['daily_activity'][timestamp.weekday()] += 1
-        activity['monthly_activity'][timestamp.month - 1] += 1
-        
-        # Track message frequency over time
-        current_time = int(timestamp.timestamp())
-        activity['message_frequency'].append(current_time)
+        for snapshot in messages:
+            timestamp = snapshot.created_at
+            
+            # Record activity by hour, day, month
+            activity['hourly_activity'][timestamp.hour] += 1
+            activity['daily_activity'][timestamp.weekday()] += 1
+            activity['monthly_activity'][timestamp.month - 1] += 1
+            
+            # Track message frequency over time
+            activity['message_frequency'].append(int(timestamp.timestamp()))
         
         # Keep only recent message timestamps (last 30 days)
-        thirty_days_ago = current_time - (30 * 24 * 60 * 60)
+        thirty_days_ago = max(activity['message_frequency']) - (30 * 24 * 60 * 60)
         activity['message_frequency'] = [ts for ts in activity['message_frequency'] if ts > thirty_days_ago]
     
-    async def learn_server_culture_advanced(self, guild_id: int, content: str, user_id_str: str, timestamp: datetime):
+    async def learn_server_culture_advanced(self, guild_id: int, messages: List[MessageSnapshot]):
         """Learn comprehensive server culture"""
         guild_id_str = str(guild_id)
         
@@ -1156,26 +1278,36 @@ class UnifiedMemorySystem:
             }
         
         culture = self.memory_data['server_culture'][guild_id_str]
-        content_lower = content.lower()
-        
-        # Track phrases that become popular
-        if len(content.split()) <= 6:  # Short phrases only
-            culture['common_phrases'][content_lower] = culture['common_phrases'].get(content_lower, 0) + 1
+        phrases = Counter()
+        topics = Counter()
         
-        # Simple topic extraction
-        words = content_lower.split()
-        for i in range(len(words) - 1):
-            phrase = f"{words[i]} {words[i+1]}"
-            if len(phrase) > 5:
-                culture['recurring_topics'][phrase] = culture['recurring_topics'].get(phrase, 0) + 1
-        
-        # Keep data manageable
-        self._trim_culture_data(culture)
+        for snapshot in messages:
+            content_lower = snapshot.features.content_lower
+            words = snapshot.features.tokens
+            
+            # Track phrases that become popular
+            if len(words) <= 6:  # Short phrases only
+                phrases[content_lower] += 1
+            
+            # Simple topic extraction
+            for i in range(len(words) - 1):
+                phrase = f"{words[i]} {words[i+1]}"
+                if len(phrase) > 5:
+                    topics[phrase] += 1
+        
+        scope = f"guild:{guild_id_str}"
+        common_phrases = self.get_top_k_sketch(scope, culture, 'common_phrases')
+        for phrase, count in phrases.items():
+            common_phrases.add(phrase, count)
+        recurring_topics = self.get_top_k_sketch(scope, culture, 'recurring_topics')
+        for phrase, count in topics.items():
+            recurring_topics.add(phrase, count)
     
     async def update_user_memories_from_learning(self, user_id_str: str):
         """Update user memories with learned insights"""
         user_data = self.memory_data['users'][user_id_str]
         learning_data = user_data['learning_data']
+        learned_before = (len(user_data['personality']['interests']), len(user_data['personality']['personality_notes']))
         
         # Update interests from learning
         if 'topic_interests' in learning_data:
@@ -1227,30 +1359,24 @@ class UnifiedMemorySystem:
                     personality_notes.append("generally positive and upbeat")
                 elif positive_ratio < 0.3 and "tends to be critical or negative" not in personality_notes:
                     personality_notes.append("tends to be critical or negative")
-    
-    def _trim_vocabulary_data(self, vocab: Dict):
-        """Keep vocabulary data manageable"""
-        # Trim word frequency to top 50
-        if len(vocab['word_frequency']) > 50:
-            sorted_words = sorted(vocab['word_frequency'].items(), key=lambda x: x[1], reverse=True)
-            vocab['word_frequency'] = dict(sorted_words[:50])
-        
-        # Trim emoji usage to top 20
-        if len(vocab['emoji_usage']) > 20:
-            sorted_emojis = sorted(vocab['emoji_usage'].items(), key=lambda x: x[1], reverse=True)
-            vocab['emoji_usage'] = dict(sorted_emojis[:20])
-    
-    def _trim_culture_data(self, culture: Dict):
-        """Keep server culture data manageable"""
-        # Keep top common phrases
-        if len(culture['common_phrases']) > 30:
-            sorted_phrases = sorted(culture['common_phrases'].items(), key=lambda x: x[1], reverse=True)
-            culture['common_phrases'] = dict(sorted_phrases[:30])
-        
-        # Keep top recurring topics
-        if len(culture['recurring_topics']) > 50:
-            sorted_topics = sorted(culture['recurring_topics'].items(), key=lambda x: x[1], reverse=True)
-            culture['recurring_topics'] = dict(sorted_topics[:50])
+        
+        if (len(user_data['personality']['interests']), len(user_data['personality']['personality_notes'])) != learned_before:
+            self.bump_section_version(user_id_str, 'memories')
+    
+    def get_top_k_sketch(self, scope: str, container: Dict, field: str) -> SpaceSaving:
+        """
+        Space-Saving view over `container[field]`, the {item: count} dict saved in the memory file.
+        Error bounds are saved next to it under container['sketch_errors'][field].
+        """
+        counts = container.setdefault(field, {})
+        errors = container.setdefault('sketch_errors', {}).setdefault(field, {})
+        key = (scope, field)
+        sketch = self._sketches.get(key)
+        # rebuild if the dicts were replaced (clears, migrations) since the index was made
+        if sketch is None or sketch.counts is not counts or sketch.errors is not errors:
+            sketch = SpaceSaving(counts, errors, TOP_K_CONFIG["capacity"][field])
+            self._sketches[key] = sketch
+        return sketch
     
     # ==================== CONTEXT METHODS ====================
     
@@ -1308,36 +1434,55 @@ class UnifiedMemorySystem:
     
     async def store_recent_message(self, message):
         """Store recent messages for chat context and conversation detection"""
-        channel_id = message.channel.id
-        
-        if not hasattr(self, 'recent_messages'):
-            self.recent_messages = {}
-        
-        if channel_id not in self.recent_messages:
-            self.recent_messages[channel_id] = []
+        self._store_recent_snapshot(MessageSnapshot.from_message(message, getattr(self.bot, 'user', None)))
+    
+    def _store_recent_snapshot(self, snapshot: MessageSnapshot):
+        channel_id = snapshot.channel_id
         
         # Create message data for context and conversation detection
         message_data = {
-            'user_id': message.author.id,
-            'display_name': message.author.display_name,
-            'content': message.content[:300],  # Limit content length
-            'timestamp': message.created_at.timestamp(),
-            'is_bot': message.author.bot,
-            'mentions_bot': hasattr(self.bot, 'user') and self.bot.user in message.mentions,
-            'has_attachments': len(message.attachments) > 0,
+            'user_id': snapshot.author_id,
+            'display_name': snapshot.display_name,
+            'content': snapshot.content[:300],  # Limit content length
+            'timestamp': snapshot.created_at.timestamp(),
+            'is_bot': False,  # snapshots are only taken of human messages
+            'mentions_bot': snapshot.mentions_bot,
+            'has_attachments': snapshot.attachment_count > 0,
             'channel_id': channel_id,
             # Legacy fields for backwards compatibility
-            'author_id': message.author.id,
-            'author_name': message.author.display_name
+            'author_id': snapshot.author_id,
+            'author_name': snapshot.display_name
         }
         
-        self.recent_messages[channel_id].append(message_data)
-        
-        # Keep only the most recent messages (50 per channel)
-        if len(self.recent_messages[channel_id]) > 50:
-            self.recent_messages[channel_id] = self.recent_messages[channel_id][-50:]
-        if len(self.recent_messages[channel_id]) > self.context_message_limit:
-            self.recent_messages[channel_id] = self.recent_messages[channel_id][-self.context_message_limit:]
+        # The ring buffer keeps only the most recent messages (50 per channel)
+        self._get_channel_activity(channel_id).add(message_data)
+    
+    def _get_channel_activity(self, channel_id: int) -> ChannelActivity:
+        activity = self.channel_activity.get(channel_id)
+        if activity is None:
+            activity = ChannelActivity(min(50, self.context_message_limit))
+            self.channel_activity[channel_id] = activity
+            self.recent_messages[channel_id] = activity.messages
+        return activity
+    
+    def note_bot_message(self, channel_id: int, timestamp: float = None):
+        """Record that Izumi spoke in a channel, for the recent-participation check"""
+        self._get_channel_activity(channel_id).note_bot_message(timestamp or time.time())
+    
+    def reset_channel_activity(self, channel_id: int):
+        """Forget a channel's recent messages along with their aggregates"""
+        activity = self.channel_activity.get(channel_id)
+        if activity is not None:
+            activity.clear()
+    
+    def get_conversation_energy(self, channel_id: int = None) -> dict:
+        """Energy of a channel's last messages (the most recently active channel if none is given)"""
+        if channel_id is None and self.channel_activity:
+            channel_id = max(self.channel_activity, key=lambda cid: self.channel_activity[cid].last_message)
+        activity = self.channel_activity.get(channel_id)
+        if activity is None or not activity.messages:
+            return {"energy": "neutral", "tone": "casual", "recommendation": "normal"}
+        return activity.energy()
     
     def get_recent_chat_context(self, channel_id: int, exclude_mentions: bool = True) -> str:
         """Get recent chat context for AI understanding"""
@@ -1392,37 +1537,53 @@ class UnifiedMemorySystem:
     # ==================== AUTO-SAVE ====================
     
     async def auto_save(self):
-        """Auto-save if there are pending changes"""
-        if self.pending_saves:
-            self.save_unified_data()
+        """Auto-save if there are pending changes, then unload profiles nobody used for a while"""
+        users = self.memory_data['users']
+        if self.pending_saves or users.is_dirty:
+            persistence = getattr(self.bot, 'persistence', None)
+            if persistence and 'unified_memory' in persistence.sections:
+                await persistence.flush(['unified_memory', PROFILE_STORE_CONFIG["namespace"]])
+            else:
+                self.save_unified_data()
             # print("💾 Auto-saved unified memory data")
+        users.evict()
     
-    def search_users_by_name(self, search_name: str) -> Dict:
-        """Search for users by name across all stored memories"""
+    def search_users_by_name(self, search_name: str, guild_id: int = None) -> Dict:
+        """Search for users by name across all stored memories (members of guild_id first when given)"""
         search_name_lower = search_name.lower().strip()
         matches = {}
+        users = self.memory_data.get('users', {})
         
-        for user_id_str, user_data in self.memory_data.get('users', {}).items():
-            # Check basic info for name matches
+        # The index narrows it down to users whose names contain the query
+        for user_id_str in self.name_index.search(search_name_lower):
+            user_data = users.get(user_id_str)
+            if user_data is None:
+                continue
             basic_info = user_data.get('basic_info', {})
             
             # Check various name fields
-            name_fields = ['name', 'nickname', 'display_name', 'username']
-            for field in name_fields:
+            for field in NAME_FIELDS:
                 stored_name = basic_info.get(field, '')
                 if stored_name and search_name_lower in stored_name.lower():
-                    if user_id_str not in matches:
-                        matches[user_id_str] = {
-                            'user_id': user_id_str,
-                            'matched_field': field,
-                            'matched_value': stored_name,
-                            'basic_info': basic_info,
-                            'personality': user_data.get('personality', {}),
-                            'social': user_data.get('social', {}),
-                            'last_interaction': user_data.get('activity', {}).get('last_interaction', 'Unknown')
-                        }
+                    matches[user_id_str] = {
+                        'user_id': user_id_str,
+                        'matched_field': field,
+                        'matched_value': stored_name,
+                        'basic_info': basic_info,
+                        'personality': user_data.get('personality', {}),
+                        'social': user_data.get('social', {}),
+                        'last_interaction': user_data.get('activity', {}).get('last_interaction', 'Unknown')
+                    }
                     break
         
+        # Prefer people from the server the question was asked in
+        if guild_id and len(matches) > 1:
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                in_guild = {uid: match for uid, match in matches.items() if guild.get_member(int(uid))}
+                if in_guild:
+                    return in_guild
+        
         return matches
     
     def get_user_info_for_ai(self, user_id: int, guild_id: int = None) -> str:
@@ -1657,13 +1818,22 @@ class UnifiedMemorySystem:
         current_time = time.time()
         cutoff_time = current_time - (2 * 3600)  # 2 hours ago
         
-        count = 0
-        for user_data in self.memory_data.get('users', {}).values():
-            last_interaction = user_data.get('activity', {}).get('last_interaction', 0)
-            if last_interaction > cutoff_time:
-                count += 1
-        
-        return count
+        last_seen = self.memory_data['users'].index['last_interaction']
+        return sum(1 for last_interaction in last_seen.values() if last_interaction > cutoff_time)
+    
+    def _recently_active_users(self, seconds: float) -> list:
+        """Ids of users who interacted within the last `seconds`, from the index"""
+        cutoff_time = time.time() - seconds
+        last_seen = self.memory_data['users'].index['last_interaction']
+        return [user_id for user_id, last_interaction in last_seen.items() if last_interaction > cutoff_time]
+    
+    def get_learning_coverage(self) -> Dict[str, int]:
+        """How many users have each kind of learning data, read from the store without loading profiles"""
+        users = self.memory_data['users']
+        coverage = {'users': len(users)}
+        for field in ('vocabulary_trends', 'sentiment_patterns', 'relationship_networks'):
+            coverage[field] = sum(1 for value in users.select('learning_data', field).values() if value)
+        return coverage
     
     def _get_daily_message_count(self) -> int:
         """Count messages Izumi has seen today"""
@@ -1816,45 +1986,9 @@ class UnifiedMemorySystem:
         if not recent_messages:
             return {"energy": "neutral", "tone": "casual", "recommendation": "normal"}
         
-        # Analyze message content and frequency
-        message_texts = [msg.get('content', '') for msg in recent_messages[-10:]]  # Last 10 messages
-        combined_text = ' '.join(message_texts).lower()
-        
-        # Check for serious/heavy topics
-        serious_keywords = ['problem', 'issue', 'worried', 'stressed', 'help', 'difficult', 'serious', 'important']
-        if any(keyword in combined_text for keyword in serious_keywords):
-            return {
-                "energy": "low",
-                "tone": "serious",
-                "recommendation": "be thoughtful and supportive"
-            }
-        
-        # Check for playful/fun energy
-        playful_keywords = ['lol', 'haha', 'funny', 'joke', 'lmao', '😂', '🤣', 'fun', 'awesome', 'cool']
-        playful_count = sum(1 for keyword in playful_keywords if keyword in combined_text)
-        
-        if playful_count >= 3:
-            return {
-                "energy": "high",
-                "tone": "playful",
-                "recommendation": "be energetic and join the fun"
-            }
-        
-        # Check for argument/tension
-        tension_keywords = ['disagree', 'wrong', 'actually', 'but', 'however', 'no way', "that's not"]
-        if sum(1 for keyword in tension_keywords if keyword in combined_text) >= 2:
-            return {
-                "energy": "medium",
-                "tone": "tense",
-                "recommendation": "stay neutral or try to lighten mood"
-            }
-        
-        # Default to casual
-        return {
-            "energy": "medium",
-            "tone": "casual",
-            "recommendation": "normal conversation"
-        }
+        # Analyze message content (live channels use get_conversation_energy, which keeps these counts incrementally)
+        message_texts = [msg.get('content', '') for msg in list(recent_messages)[-10:]]  # Last 10 messages
+        return classify_energy(energy_keywords(' '.join(message_texts).lower()))
     
     def get_personality_quirks(self) -> dict:
         """Get Izumi's personality quirks and habits for consistent behavior"""
@@ -1968,8 +2102,8 @@ class UnifiedMemorySystem:
             # Generate the appropriate message
             message_content = None
             if message_type == "emotional_followup":
-                # Get users we have emotional followups for
-                for user_id in self.memory_data.get('users', {}):
+                # Get users we have emotional followups for (only emotions from the last 3 days count)
+                for user_id in self._recently_active_users(72 * 3600):
                     followups = self.get_emotional_followups(int(user_id))
                     if followups:
                         user = bot.get_user(int(user_id))
@@ -2013,8 +2147,8 @@ class UnifiedMemorySystem:
         if last_unprompted and (now.timestamp() - last_unprompted) < 3600:  # 1 hour cooldown
             return False, None
             
-        # Check if there are emotional followups pending
-        for user_id in self.memory_data.get('users', {}):
+        # Check if there are emotional followups pending (only emotions from the last 3 days count)
+        for user_id in self._recently_active_users(72 * 3600):
             if self.get_emotional_followups(int(user_id)):
                 return True, "emotional_followup"
         
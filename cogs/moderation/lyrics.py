@@ -6,14 +6,155 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from difflib import SequenceMatcher
+from collections import Counter
 from utils.helpers import load_json, save_json
 import re
+import time
+
+# Lines are indexed by word trigrams (or the whole line when it's shorter), and by shorter runs for short messages
+SHINGLE_SIZE = 3
+# Only this many best-scoring candidate lines get the SequenceMatcher check
+MAX_CANDIDATES = 8
+
+class LyricsIndex:
+    """
+    Inverted word-shingle index over pre-normalized lyric lines.
+
+    A message can only match a line when one contains the other, so the two
+    share most of their shingles. Lines are ranked by how many of the shorter
+    side's shingles they share, then by length ratio, and only the best few are
+    handed back for fuzzy verification - a chat message's cost no longer grows
+    with the number of songs.
+    """
+
+    def __init__(self):
+        self._songs = {}        # song seq -> song dict (seq keeps database order)
+        self._song_seqs = {}    # id(song dict) -> song seq
+        self._song_lines = {}   # song seq -> [line id]
+        self._lines = {}        # line id -> (song seq, line index, normalized line, shingle count)
+        self._postings = {}     # shingle -> {line id}
+        self._short_postings = {}   # 1..SHINGLE_SIZE-1 word run -> {line id}, for messages shorter than a shingle
+        self._next_song = 0
+        self._next_line = 0
+
+    @staticmethod
+    def _line_shingles(words):
+        if len(words) < SHINGLE_SIZE:
+            return {tuple(words)} if words else set()
+        return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    @staticmethod
+    def _short_shingles(words):
+        return {tuple(words[i:i + size]) for size in range(1, SHINGLE_SIZE) for i in range(len(words) - size + 1)}
+
+    @staticmethod
+    def _post(postings, shingles, line_id):
+        for shingle in shingles:
+            postings.setdefault(shingle, set()).add(line_id)
+
+    @staticmethod
+    def _unpost(postings, shingles, line_id):
+        for shingle in shingles:
+            line_ids = postings.get(shingle)
+            if line_ids is not None:
+                line_ids.discard(line_id)
+                if not line_ids:
+                    del postings[shingle]
+
+    @staticmethod
+    def _query_shingles(words):
+        # shorter n-grams too, so lines under SHINGLE_SIZE words can still be found
+        shingles = set()
+        for size in range(1, SHINGLE_SIZE + 1):
+            shingles.update(tuple(words[i:i + size]) for i in range(len(words) - size + 1))
+        return shingles
+
+    def add_song(self, song, normalize):
+        seq = self._next_song
+        self._next_song += 1
+        self._songs[seq] = song
+        self._song_seqs[id(song)] = seq
+        line_ids = []
+        for line_index, line in enumerate(song.get('lyrics', [])):
+            normalized = normalize(line)
+            words = normalized.split()
+            shingles = self._line_shingles(words)
+            line_id = self._next_line
+            self._next_line += 1
+            self._lines[line_id] = (seq, line_index, normalized, len(shingles))
+            self._post(self._postings, shingles, line_id)
+            self._post(self._short_postings, self._short_shingles(words), line_id)
+            line_ids.append(line_id)
+        self._song_lines[seq] = line_ids
+
+    def remove_song(self, song):
+        seq = self._song_seqs.pop(id(song), None)
+        if seq is None:
+            return
+        del self._songs[seq]
+        for line_id in self._song_lines.pop(seq):
+            _, _, normalized, _ = self._lines.pop(line_id)
+            words = normalized.split()
+            self._unpost(self._postings, self._line_shingles(words), line_id)
+            self._unpost(self._short_postings, self._short_shingles(words), line_id)
+
+    def rebuild(self, songs, normalize):
+        self.__init__()
+        for song in songs:
+            self.add_song(song, normalize)
+
+    def candidates(self, normalized_message: str, limit: int = MAX_CANDIDATES):
+        """(song, line index, normalized line) for the lines sharing the most shingles, in database order"""
+        words = normalized_message.split()
+        query = self._query_shingles(words)
+        query_size = len(self._line_shingles(words))
+
+        shared = Counter()
+        for shingle in query:
+            postings = self._postings.get(shingle)
+            if postings:
+                shared.update(postings)
+        if len(words) < SHINGLE_SIZE:
+            # no trigram to share with longer lines - take the lines that contain the whole message as a run of words
+            for line_id in self._short_postings.get(tuple(words), ()):
+                shared[line_id] = max(shared[line_id], query_size)
+        if not shared:
+            return []
+
+        message_length = len(normalized_message)
+
+        def score(item):
+            line_id, count = item
+            seq, line_index, normalized, line_size = self._lines[line_id]
+            # a containment match shares every shingle of the shorter side, and then its fuzzy
+            # ratio only depends on the two lengths - so rank by coverage, then length ratio
+            coverage = count / max(1, min(line_size, query_size))
+            length_ratio = 2 * min(len(normalized), message_length) / (len(normalized) + message_length)
+            return (-coverage, -length_ratio, seq, line_index)
+
+        best = sorted(sorted(shared.items(), key=score)[:limit], key=lambda item: self._lines[item[0]][:2])
+        results = []
+        for line_id, _ in best:
+            seq, line_index, normalized, _ = self._lines[line_id]
+            results.append((self._songs[seq], line_index, normalized))
+        return results
+
+    def __len__(self):
+        return len(self._lines)
+
 
 class LyricsCog(commands.Cog, name="Lyrics"):
     def __init__(self, bot):
         self.bot = bot
         self.lyrics_database = self._load_lyrics()
         
+        # Normalized lines + shingle index, kept in sync by addsong/removesong
+        start = time.perf_counter()
+        self.lyrics_index = LyricsIndex()
+        self.lyrics_index.rebuild(self.lyrics_database.get('songs', []), self._normalize_text)
+        if self.lyrics_index:
+            print(f"🎵 Indexed {len(self.lyrics_index)} lyric lines in {(time.perf_counter() - start) * 1000:.0f}ms")
+        
     def _load_lyrics(self):
         """Load lyrics database"""
         try:
@@ -50,20 +191,16 @@ class LyricsCog(commands.Cog, name="Lyrics"):
         best_score = 0
         best_line_index = -1
         
-        for song in self.lyrics_database.get('songs', []):
-            lyrics = song.get('lyrics', [])
-            
-            for i, line in enumerate(lyrics):
-                normalized_line = self._normalize_text(line)
+        # Only the best shingle candidates are compared, not every line of every song
+        for song, i, normalized_line in self.lyrics_index.candidates(normalized_message):
+            # Check for exact match or high similarity
+            if normalized_message in normalized_line or normalized_line in normalized_message:
+                score = self._similarity_score(normalized_message, normalized_line)
                 
-                # Check for exact match or high similarity
-                if normalized_message in normalized_line or normalized_line in normalized_message:
-                    score = self._similarity_score(normalized_message, normalized_line)
-                    
-                    if score > best_score and score >= 0.7:  # At least 70% similarity
-                        best_score = score
-                        best_match = song
-                        best_line_index = i
+                if score > best_score and score >= 0.7:  # At least 70% similarity
+                    best_score = score
+                    best_match = song
+                    best_line_index = i
         
         if best_match and best_line_index >= 0:
             lyrics = best_match['lyrics']
@@ -116,6 +253,7 @@ class LyricsCog(commands.Cog, name="Lyrics"):
             self.lyrics_database['songs'] = []
         
         self.lyrics_database['songs'].append(new_song)
+        self.lyrics_index.add_song(new_song, self._normalize_text)
         self._save_lyrics()
         
         embed = discord.Embed(
@@ -174,6 +312,7 @@ class LyricsCog(commands.Cog, name="Lyrics"):
             self.lyrics_database['songs'] = []
         
         self.lyrics_database['songs'].append(new_song)
+        self.lyrics_index.add_song(new_song, self._normalize_text)
         self._save_lyrics()
         
         embed = discord.Embed(
@@ -224,6 +363,7 @@ class LyricsCog(commands.Cog, name="Lyrics"):
         # Remove the song
         index, removed_song = found_songs[0]
         self.lyrics_database['songs'].pop(index)
+        self.lyrics_index.remove_song(removed_song)
         self._save_lyrics()
         
         embed = discord.Embed(
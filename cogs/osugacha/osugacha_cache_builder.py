@@ -0,0 +1,179 @@
+"""
+Concurrent leaderboard cache builder
+Fetches ranking pages in parallel, checkpoints finished pages so a restart resumes, and merges top-page refreshes
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, List
+
+from utils.http_client import http_client
+from utils.storage import atomic_write_json
+
+from .osugacha_config import API_CONFIG
+
+RANKINGS_URL = 'https://osu.ppy.sh/api/v2/rankings/osu/performance'
+
+
+def parse_ranking_page(data: Dict) -> List[Dict]:
+    """Turn one rankings response into cache player entries"""
+    players = []
+    for user_data in data.get('ranking', []):
+        user_info = user_data.get('user', {})
+        players.append({
+            "user_id": str(user_info.get('id', 0)),
+            "username": user_info.get('username', 'Unknown'),
+            "rank": user_data.get('global_rank', 0),
+            "pp": round(float(user_data.get('pp', 0)), 2),
+            "accuracy": round(float(user_data.get('hit_accuracy', 0)), 2),
+            "play_count": int(user_data.get('play_count', 0)),
+            "country": user_info.get('country_code', 'XX'),
+            "level": round(float(user_data.get('level', {}).get('current', 0)), 2),
+            "profile_picture": user_info.get('avatar_url', f"https://a.ppy.sh/{user_info.get('id', 0)}")
+        })
+    return players
+
+
+def merge_top_pages(current: List[Dict], top_players: List[Dict]) -> List[Dict]:
+    """
+    Replace the top of the cache with freshly fetched players.
+
+    Everyone ranked below the refreshed block is kept; players that appear in
+    the fresh block are dropped from the old tail so nobody is listed twice.
+    """
+    if not top_players:
+        return list(current)
+    fresh_ids = {p['user_id'] for p in top_players}
+    cutoff = max(p.get('rank', 0) for p in top_players)
+    tail = [p for p in current if p.get('rank', 0) > cutoff and p['user_id'] not in fresh_ids]
+    return top_players + tail
+
+
+class LeaderboardCacheBuilder:
+    """Fetches ranking pages with bounded concurrency and an on-disk checkpoint"""
+
+    def __init__(self, checkpoint_file: str, concurrency: int = None, checkpoint_every: int = None):
+        self.checkpoint_file = checkpoint_file
+        self.concurrency = concurrency or API_CONFIG["build_concurrency"]
+        self.checkpoint_every = checkpoint_every or API_CONFIG["checkpoint_every_pages"]
+        self._checkpoint_lock = asyncio.Lock()
+
+    # ---- checkpoint ----
+
+    def load_checkpoint(self, total_pages: int):
+        """(pages, started) of an interrupted build of the same size, ({}, None) if there is none"""
+        try:
+            if not os.path.exists(self.checkpoint_file):
+                return {}, None
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+            started = checkpoint.get('started', 0)
+            if checkpoint.get('total_pages') != total_pages:
+                return {}, None
+            if time.time() - started > API_CONFIG["checkpoint_max_age"]:
+                return {}, None
+            pages = {int(page): players for page, players in checkpoint.get('pages', {}).items()}
+            return pages, started
+        except Exception as e:
+            print(f"⚠️ Failed to load leaderboard checkpoint: {e}")
+            return {}, None
+
+    def _write_checkpoint(self, total_pages: int, started: float, pages: Dict[int, List[Dict]]):
+        atomic_write_json(self.checkpoint_file, {
+            'total_pages': total_pages,
+            'started': started,
+            'pages': {str(page): players for page, players in pages.items()}
+        })
+
+    async def _save_checkpoint(self, total_pages: int, started: float, pages: Dict[int, List[Dict]]):
+        loop = asyncio.get_running_loop()
+        try:
+            # serialized so an older snapshot can never land after a newer one
+            async with self._checkpoint_lock:
+                await loop.run_in_executor(None, self._write_checkpoint, total_pages, started, dict(pages))
+        except Exception as e:
+            print(f"⚠️ Failed to save leaderboard checkpoint: {e}")
+
+    def clear_checkpoint(self):
+        try:
+            if os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+        except OSError as e:
+            print(f"⚠️ Failed to remove leaderboard checkpoint: {e}")
+
+    # ---- fetching ----
+
+    async def fetch_page(self, page: int) -> List[Dict]:
+        """One rankings page - pacing, 429 backoff and the bearer token come from the shared client"""
+        response = await http_client.get(RANKINGS_URL, auth=True, params={'page': page})
+        if response.status != 200:
+            raise Exception(f"API error on page {page}: {response.status}")
+        return parse_ranking_page(response.json())
+
+    async def fetch_pages(self, pages: Iterable[int], done: Dict[int, List[Dict]] = None,
+                          on_page=None) -> Dict[int, List[Dict]]:
+        """Fetch the given pages that aren't in `done`, bounded by the concurrency limit"""
+        done = done if done is not None else {}
+        todo = [page for page in pages if page not in done]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = []
+
+        async def worker(page):
+            async with semaphore:
+                for attempt in range(API_CONFIG["retry_attempts"]):
+                    try:
+                        done[page] = await self.fetch_page(page)
+                        break
+                    except Exception as e:
+                        if attempt == API_CONFIG["retry_attempts"] - 1:
+                            failures.append((page, e))
+                            return
+                        await asyncio.sleep(API_CONFIG["retry_delays"][attempt])
+            if on_page:
+                await on_page(page)
+
+        await asyncio.gather(*(worker(page) for page in todo))
+
+        if failures:
+            page, error = failures[0]
+            raise Exception(f"{len(failures)} page(s) failed, first was page {page}: {error}")
+        return done
+
+    async def build(self, total_pages: int) -> List[Dict]:
+        """
+        Fetch all ranking pages, resuming from the checkpoint when one exists.
+
+        Finished pages are checkpointed every `checkpoint_every` pages; on failure
+        the checkpoint is kept so the next attempt only fetches what's missing.
+        """
+        pages, started = self.load_checkpoint(total_pages)
+        if pages:
+            print(f"♻️ Resuming leaderboard build from checkpoint ({len(pages)}/{total_pages} pages done)")
+        else:
+            started = time.time()
+
+        progress = {'since_checkpoint': 0}
+
+        async def on_page(page):
+            progress['since_checkpoint'] += 1
+            if len(pages) % 10 == 0:
+                print(f"📊 Progress: {len(pages)}/{total_pages} pages")
+            if progress['since_checkpoint'] >= self.checkpoint_every:
+                progress['since_checkpoint'] = 0
+                await self._save_checkpoint(total_pages, started, pages)
+
+        try:
+            await self.fetch_pages(range(1, total_pages + 1), pages, on_page)
+        except Exception:
+            await self._save_checkpoint(total_pages, started, pages)
+            raise
+
+        self.clear_checkpoint()
+        return [player for page in sorted(pages) for player in pages[page]]
+
+    async def fetch_top(self, top_pages: int) -> List[Dict]:
+        """Fetch only the first `top_pages` pages (no checkpoint, it's a short run)"""
+        pages = await self.fetch_pages(range(1, top_pages + 1))
+        return [player for page in sorted(pages) for player in pages[page]]
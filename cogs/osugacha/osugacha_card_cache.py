@@ -0,0 +1,192 @@
+"""
+Rendered card cache
+Content-addressed PNG store on disk with size-bounded LRU eviction and an in-memory hot tier
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .osugacha_config import RENDER_CONFIG
+
+
+# Player fields drawn on the card (the rarity frame follows from rank, the avatar from the picture URL)
+CARD_FIELDS = ('user_id', 'username', 'rank', 'pp', 'accuracy', 'country', 'level', 'play_count', 'profile_picture')
+
+
+def card_cache_key(player_data: Dict, stars: int, mutation: Optional[str], card_price: int,
+                   flashback_year: Optional[str], template_version: int) -> str:
+    """Stable hash of everything that changes how a card looks - a leaderboard refresh changes the key"""
+    raw = json.dumps(
+        [[player_data.get(field) for field in CARD_FIELDS], stars, mutation, card_price, flashback_year,
+         template_version],
+        separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class RenderedCardCache:
+    """
+    Two-tier cache of rendered card PNGs.
+
+    The disk tier lives under `directory` (one file per key, sharded by the
+    first two hex chars) and is trimmed least-recently-used first once it
+    grows past `max_bytes`. The hot tier keeps the most recent PNGs in memory
+    up to `hot_max_bytes`. Disk reads and writes run in the default executor.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, hot_max_bytes: int = None):
+        self.directory = directory or RENDER_CONFIG["card_cache_dir"]
+        self.max_bytes = max_bytes or RENDER_CONFIG["card_cache_max_mb"] * 1024 * 1024
+        self.hot_max_bytes = hot_max_bytes or RENDER_CONFIG["card_cache_hot_mb"] * 1024 * 1024
+
+        self._disk = OrderedDict()   # key -> size, oldest first
+        self._disk_bytes = 0
+        self._hot = OrderedDict()    # key -> png bytes, oldest first
+        self._hot_bytes = 0
+        self.stats = {'hot_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def _load_index(self):
+        """Rebuild the LRU order from file mtimes (touched on every hit)"""
+        entries = []
+        try:
+            if not os.path.isdir(self.directory):
+                return
+            for shard in os.listdir(self.directory):
+                shard_dir = os.path.join(self.directory, shard)
+                if not os.path.isdir(shard_dir):
+                    continue
+                for name in os.listdir(shard_dir):
+                    if not name.endswith('.png'):
+                        continue
+                    stat = os.stat(os.path.join(shard_dir, name))
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        except OSError as e:
+            print(f"⚠️ Failed to index card cache: {e}")
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        if entries:
+            print(f"🗂️ Card cache: {len(self._disk)} cards ({self._disk_bytes / 1024 / 1024:.1f} MB) on disk")
+
+    # ---- hot tier ----
+
+    def _remember_hot(self, key: str, png: bytes):
+        if len(png) > self.hot_max_bytes:
+            return
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_bytes -= len(old)
+        self._hot[key] = png
+        self._hot_bytes += len(png)
+        while self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    # ---- disk tier ----
+
+    def _read_file(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            os.utime(path, (time.time(), time.time()))
+            return png
+        except OSError:
+            return None
+
+    def _write_file(self, key: str, png: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # writes run on executor threads, two of them can store the same card at once
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Cached PNG bytes for a key, or None"""
+        png = self._hot.get(key)
+        if png is not None:
+            self._hot.move_to_end(key)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.stats['hot_hits'] += 1
+            return png
+
+        if key in self._disk:
+            loop = asyncio.get_running_loop()
+            png = await loop.run_in_executor(None, self._read_file, key)
+            if png is not None:
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self._remember_hot(key, png)
+                self.stats['disk_hits'] += 1
+                return png
+            # file vanished underneath us
+            self._disk_bytes -= self._disk.pop(key, 0)
+
+        self.stats['misses'] += 1
+        return None
+
+    async def put(self, key: str, png: bytes):
+        """Store a rendered PNG, evicting the least recently used cards past the size limit"""
+        if not png:
+            return
+        self._remember_hot(key, png)
+
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = len(png)
+        self._disk_bytes += len(png)
+
+        evicted = []
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(old_key)
+            old_png = self._hot.pop(old_key, None)
+            if old_png is not None:
+                self._hot_bytes -= len(old_png)
+        self.stats['stores'] += 1
+        self.stats['evictions'] += len(evicted)
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write_file, key, png)
+            if evicted:
+                await loop.run_in_executor(None, self._remove_files, evicted)
+        except OSError as e:
+            print(f"⚠️ Failed to write card cache entry: {e}")
+            self._disk_bytes -= self._disk.pop(key, 0)
+
+    def info(self) -> Dict:
+        """Sizes and counters for admin/debug output"""
+        return dict(
+            self.stats,
+            disk_entries=len(self._disk),
+            disk_mb=round(self._disk_bytes / 1024 / 1024, 2),
+            hot_entries=len(self._hot),
+            hot_mb=round(self._hot_bytes / 1024 / 1024, 2),
+        )
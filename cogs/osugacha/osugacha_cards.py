@@ -5,6 +5,7 @@ from datetime import datetime
 import asyncio
 import math
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
 
 # Import all the configuration and system
@@ -308,7 +309,7 @@ class OsuGachaCardsCog(commands.Cog, name="Osu Gacha Cards"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -317,7 +318,7 @@ class OsuGachaCardsCog(commands.Cog, name="Osu Gacha Cards"):
                 "achievements": {},
                 "achievement_stats": {},
                 "favorites": []
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
         return self.bot.osu_gacha_data[user_id_str]
 
@@ -663,56 +664,16 @@ class OsuGachaCardsCog(commands.Cog, name="Osu Gacha Cards"):
     async def _create_showcase_collage(self, card_images):
         """Create a collage image from multiple card images"""
         try:
-            from PIL import Image
             import io
             
             if not card_images:
                 return None
             
-            # Convert BytesIO objects to PIL Images
-            pil_images = []
-            for img_bytes in card_images:
-                img_bytes.seek(0)
-                pil_img = Image.open(img_bytes).convert('RGBA')
-                pil_images.append(pil_img)
+            # Stitching runs in the render pool like the cards themselves
+            card_pngs = [img_bytes.getvalue() for img_bytes in card_images]
+            collage_png = await self.gacha_system.create_showcase_collage(card_pngs)
             
-            # Calculate collage dimensions
-            if len(pil_images) == 1:
-                # Single card - use as is
-                collage = pil_images[0]
-            elif len(pil_images) == 2:
-                # Two cards - side by side
-                card_width, card_height = pil_images[0].size
-                collage_width = card_width * 2 + 20  # 20px gap
-                collage_height = card_height + 20     # 10px padding top/bottom
-                
-                collage = Image.new('RGBA', (collage_width, collage_height), (0, 0, 0, 0))
-                collage.paste(pil_images[0], (10, 10))
-                collage.paste(pil_images[1], (card_width + 20, 10))
-            else:
-                # Three cards - triangle layout (1 top, 2 bottom)
-                card_width, card_height = pil_images[0].size
-                collage_width = card_width * 2 + 30   # 2 cards wide + gaps
-                collage_height = card_height * 2 + 30 # 2 cards tall + gaps
-                
-                collage = Image.new('RGBA', (collage_width, collage_height), (0, 0, 0, 0))
-                
-                # Top card (centered)
-                top_x = (collage_width - card_width) // 2
-                collage.paste(pil_images[0], (top_x, 10))
-                
-                # Bottom left card
-                collage.paste(pil_images[1], (10, card_height + 20))
-                
-                # Bottom right card
-                collage.paste(pil_images[2], (card_width + 20, card_height + 20))
-            
-            # Convert back to BytesIO
-            output = io.BytesIO()
-            collage.save(output, format='PNG', optimize=True)
-            output.seek(0)
-            
-            return output
+            return io.BytesIO(collage_png) if collage_png else None
             
         except Exception as e:
             print(f"Error creating showcase collage: {e}")
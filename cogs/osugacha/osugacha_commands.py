@@ -168,6 +168,12 @@ class OsuGachaCommandsCog(commands.Cog, name="Osu Gacha Commands"):
     async def osu_crates_prefix(self, ctx: commands.Context):
         await self.handlers.handle_crates_command(ctx)
 
+    @commands.command(name="osucachestats", aliases=["ocachestats", "ocache"])
+    @commands.has_permissions(administrator=True)
+    async def osu_cache_stats_prefix(self, ctx: commands.Context):
+        """Show hit/miss/eviction counters for the gacha caches and HTTP hosts (Admin only)"""
+        await self.handlers.handle_cache_stats_command(ctx)
+
     @commands.command(name="osupreview", aliases=["opreview", "preview"])
     async def osu_preview_prefix(self, ctx: commands.Context, *, search: str = None):
         if not search:
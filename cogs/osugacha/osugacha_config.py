@@ -634,14 +634,36 @@ API_CONFIG = {
     "token_buffer_seconds": 300,  # 5 minute buffer before token expiry
     "max_pages": 200,             # top 100k players (50 per page)
     "request_delay": 0.05,        # 20ms delay between api requests
+    "rate_limit": 20,             # osu! api requests per second through the shared http client
+    "rate_limit_burst": 20,
+    "build_concurrency": 8,       # ranking pages fetched in parallel during a cache build
+    "checkpoint_every_pages": 20, # save build progress to disk every N pages
+    "checkpoint_max_age": 21600,  # ignore build checkpoints older than 6 hours
+    "top_refresh_pages": 10,      # top pages (500 players) refreshed more often - those ranks churn most
+    "top_refresh_interval": 3600, # seconds between top page refreshes
     "max_rank_attempts": 10,  # max attempts to find valid player
     "retry_attempts": 3,          # number of retry attempts
     "retry_delays": [1, 2, 3]  # retry delays in seconds
 }
 
+# Card rendering - Pillow work runs in a process pool (see osugacha_renderer.py)
+RENDER_CONFIG = {
+    "max_workers": None,   # None = cpu count - 1, capped at 4
+    "max_queue": 16,       # render jobs admitted at once, extra callers wait
+    "card_cache_dir": 'data/card_cache',
+    "card_cache_max_mb": 256,  # rendered card PNGs kept on disk (LRU)
+    "card_cache_hot_mb": 32,   # most recent PNGs also kept in memory
+    "font_cache_items": 32,        # loaded fonts per renderer (name + size)
+    "background_cache_items": 50,  # generated card backgrounds per renderer
+    "background_cache_mb": 64,     # ...and their decoded pixel bytes
+    "profile_cache_items": 200,    # downloaded avatars kept in memory
+    "profile_cache_mb": 16,
+}
+
 # File paths
 FILE_PATHS = {
     "cache_file": 'data/osu_leaderboard_cache.json',
+    "cache_checkpoint_file": 'data/osu_leaderboard_checkpoint.json',
     "gacha_data": 'data/osu_gacha.json'
 }
 
@@ -4,6 +4,7 @@ from discord import app_commands
 import random
 import time
 from typing import Dict, Any, List
+from utils.tracked import track
 from .osugacha_system import OsuGachaSystem
 
 class OsuGachaEventCrates(commands.Cog):
@@ -17,14 +18,14 @@ class OsuGachaEventCrates(commands.Cog):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": 1000,
                 "cards": {},
                 "crates": {},
                 "event_crates": {},
                 "event_purchases": {},
                 "daily_reset": 0
-            }
+            })
         return self.bot.osu_gacha_data[user_id_str]
     
     def apply_event_effects(self, base_rarity_chances: Dict[str, float], event_item: Dict[str, Any]) -> Dict[str, float]:
@@ -6,6 +6,7 @@ import random
 import time
 import math
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
 
 # Import all the configuration
@@ -1693,7 +1694,7 @@ class OsuGachaGamblingCog(commands.Cog, name="Osu Gacha Gambling"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -1708,7 +1709,7 @@ class OsuGachaGamblingCog(commands.Cog, name="Osu Gacha Gambling"):
                     "bg_games_won": 0,
                     "bg_games_played": 0
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
 
         # Add confirmation setting to existing users who don't have it
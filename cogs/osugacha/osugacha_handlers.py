@@ -5,6 +5,7 @@ import random
 import asyncio
 from datetime import datetime, timezone, timedelta
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
 
 # Import all the configuration and system
@@ -29,7 +30,7 @@ class OsuGachaHandlers:
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -44,7 +45,7 @@ class OsuGachaHandlers:
                     "bg_games_won": 0,
                     "bg_games_played": 0
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
 
         # Add confirmation setting to existing users who don't have it
@@ -234,7 +235,7 @@ class OsuGachaHandlers:
                 # Create card
                 card_id = self.gacha_system.generate_card_id(final_player, rarity['stars'], mutation)
                 
-                card_data = {
+                card_data = track({
                     "player_data": final_player,
                     "stars": rarity['stars'],
                     "rarity_name": rarity['name'],
@@ -242,7 +243,7 @@ class OsuGachaHandlers:
                     "crate_type": resolved_crate,
                     "mutation": mutation,
                     "price": card_price
-                }
+                })
 
                 # Special handling for flashback cards
                 if mutation == "flashback":
@@ -1160,10 +1161,10 @@ class OsuGachaHandlers:
                 return
         
         # Validate amount - match backup limits
-        if amount < 100 or amount > 100000:
+        if amount < 100 or amount > 1000000:
             embed = discord.Embed(
                 title="❌ Invalid Amount",
-                description="Simulation amount must be between 100 and 100,000",
+                description="Simulation amount must be between 100 and 1,000,000",
                 color=discord.Color.red()
             )
             if interaction:
@@ -1188,7 +1189,7 @@ class OsuGachaHandlers:
             color=discord.Color.blue()
         )
         embed.add_field(name="Status", value="🚀 Running simulation...", inline=False)
-        embed.set_footer(text="This may take a moment for large simulations (10-30 seconds). Please wait...")
+        embed.set_footer(text="Large simulations take a second or two. Please wait...")
         
         progress_msg = None
         if hasattr(ctx, 'edit_original_response'):
@@ -1245,160 +1246,24 @@ class OsuGachaHandlers:
 
     async def _run_single_simulation(self, crate_type, amount, ctx, current_progress, total_progress):
         """Run simulation for a single crate type using cached data"""
-        crate_info = self.gacha_system.crate_config[crate_type]
-        
-        # Simulation data
-        values = []
-        ranks = []
-        mutations = {"none": 0}
-        stars_count = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 6: 0}
-        
-        # Special tracking
-        rank_1_count = 0
-        top_10_count = 0
-        top_50_count = 0
-        top_100_count = 0
-        
-        # Time-based progress updates (every 5 seconds)
-        start_time = time.time()
-        last_update_time = start_time
-        update_interval_seconds = 5.0
-        
+        from .osugacha_simulator import CrateSimulator
+
         # Ensure cache is built with notification
         await self.gacha_system.build_leaderboard_cache_with_retry(retries=3, ctx=ctx)
-        
-        for i in range(amount):
-            # Time-based progress updates (every 5 seconds)
-            current_time = time.time()
-            if current_time - last_update_time >= update_interval_seconds and i > 0:
-                progress_percent = ((current_progress + i) / total_progress) * 100
-                completion_percent = (i / amount) * 100
-                
-                # Calculate proper timing
-                elapsed_time = current_time - start_time
-                if i > 0:
-                    time_per_iteration = elapsed_time / i
-                    remaining_iterations = amount - i
-                    eta_seconds = time_per_iteration * remaining_iterations
-                    eta_text = f"ETA: {eta_seconds:.0f}s"
-                else:
-                    eta_text = "ETA: Calculating..."
-                
-                embed = discord.Embed(
-                    title="🎲 Gacha Simulation Running",
-                    description=f"Simulating {amount:,} {crate_info['name']} openings...",
-                    color=crate_info["color"]
-                )
-                embed.add_field(
-                    name="Progress", 
-                    value=f"**{i:,}/{amount:,}** ({completion_percent:.1f}%)\nOverall: {progress_percent:.1f}%",
-                    inline=False
-                )
-                embed.add_field(
-                    name="Current Stats",
-                    value=f"Avg Value: {sum(values)/len(values):,.0f} coins\nTop 10 Rate: {(top_10_count/i)*100:.3f}%\nBest Rank: #{min(ranks) if ranks else 'N/A'}",
-                    inline=False
-                )
-                embed.add_field(
-                    name="⏱️ Timing",
-                    value=f"Elapsed: {elapsed_time:.0f}s\n{eta_text}\nSpeed: {i/elapsed_time:.0f} sims/sec",
-                    inline=False
-                )
-                
-                try:
-                    if hasattr(ctx, 'edit_original_response'):
-                        await ctx.edit_original_response(embed=embed)
-                    else:
-                        # For prefix commands, don't spam with updates
-                        pass
-                except:
-                    pass  # Ignore rate limit errors on progress updates
-                
-                last_update_time = current_time
-            
-            # Simulate one crate opening using actual bot logic with REAL DATA
-            try:
-                # Use the same logic as real crate opening to select rank
-                crate_data = self.gacha_system.crate_config[crate_type]
-                rank_ranges = crate_data["rank_ranges"]
-                
-                # Create weighted list of rank ranges
-                weighted_ranges = []
-                for range_data in rank_ranges:
-                    weight = int(range_data["weight"] * 100)
-                    weighted_ranges.extend([range_data] * weight)
-                
-                # Select random range and rank
-                selected_range = random.choice(weighted_ranges)
-                rank = random.randint(selected_range["min"], selected_range["max"])
-                ranks.append(rank)
-                
-                # Track special ranks
-                if rank == 1:
-                    rank_1_count += 1
-                if rank <= 10:
-                    top_10_count += 1
-                if rank <= 50:
-                    top_50_count += 1
-                if rank <= 100:
-                    top_100_count += 1
-                
-                # Get rarity using actual algorithm
-                rarity = self.gacha_system.get_rarity_from_rank(rank)
-                stars_count[rarity['stars']] += 1
-                
-                # Roll mutation using actual algorithm
-                mutation = self.gacha_system.roll_mutation()
-                if mutation:
-                    mutations[mutation] = mutations.get(mutation, 0) + 1
-                else:
-                    mutations["none"] += 1
-                
-                # Get REAL player data from cache or create fallback
-                player_data = await self.gacha_system.get_player_by_rank(rank)
-                if not player_data:
-                    # Fallback player if not in cache (like backup)
-                    player_data = {
-                        'rank': rank,
-                        'pp': max(28000 - rank * 2, 1000),  # Same approximation as backup
-                        'username': f'Player{rank}',
-                        'accuracy': 99.0,
-                        'play_count': 50000,
-                        'country': 'US',
-                        'level': 100.0
-                    }
-                
-                # Calculate price using actual algorithm
-                card_price = self.gacha_system.calculate_card_price(player_data, rarity['stars'], mutation)
-                values.append(card_price)
-                
-            except Exception as e:
-                print(f"❌ Error in simulation iteration {i}: {type(e).__name__}: {str(e)}")
-                # Use fallback values like backup
-                ranks.append(5000)
-                values.append(1000)
-                stars_count[1] += 1
-                mutations["none"] += 1
-        
-        return {
-            'values': values,
-            'ranks': ranks,
-            'mutations': mutations,
-            'stars_count': stars_count,
-            'rank_1_count': rank_1_count,
-            'top_10_count': top_10_count,
-            'top_50_count': top_50_count,
-            'top_100_count': top_100_count,
-            'total_simulated': amount
-        }
+
+        # Whole batch is drawn with numpy in one go, run it off the event loop
+        simulator = CrateSimulator(self.gacha_system)
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        result = await loop.run_in_executor(None, simulator.simulate, crate_type, amount)
+        print(f"🎲 Simulated {amount:,} {crate_type} crates in {time.time() - start_time:.2f}s")
+        return result
 
     async def _show_single_result(self, ctx, crate_type, result, amount, progress_msg=None):
         """Show results for single crate simulation - edit the existing embed"""
         crate_info = self.gacha_system.crate_config[crate_type]
-        values = result['values']
-        
         # Calculate statistics
-        avg_value = sum(values) / len(values)
+        avg_value = result['avg_value']
         crate_cost = crate_info['price']
         profit = avg_value - crate_cost
         roi = (profit / crate_cost) * 100
@@ -1424,19 +1289,17 @@ class OsuGachaHandlers:
         )
         
         # Value stats
-        best_value = max(values)
-        worst_value = min(values)
-        median_value = sorted(values)[len(values)//2]
+        percentiles = result['value_percentiles']
         
         embed.add_field(
             name="📈 Value Statistics",
-            value=f"**Highest:** {best_value:,.0f} coins\n**Lowest:** {worst_value:,.0f} coins\n**Median:** {median_value:,.0f} coins\n**Best Rank:** #{min(result['ranks']):,}",
+            value=f"**Highest:** {result['max_value']:,.0f} coins\n**Lowest:** {result['min_value']:,.0f} coins\n**Median:** {result['median_value']:,.0f} coins\n**P10 / P90 / P99:** {percentiles[10]:,.0f} / {percentiles[90]:,.0f} / {percentiles[99]:,.0f}\n**Best Rank:** #{result['best_rank']:,}",
             inline=True
         )
         
         # Star distribution
         stars_text = ""
-        for stars in [5, 4, 3, 2, 1]:
+        for stars in [6, 5, 4, 3, 2, 1]:
             count = result['stars_count'][stars]
             percentage = (count / amount) * 100
             stars_text += f"{'★' * stars}: {count:,} ({percentage:.2f}%)\n"
@@ -1507,7 +1370,7 @@ class OsuGachaHandlers:
         
         for crate_type, result in results.items():
             crate_info = self.gacha_system.crate_config[crate_type]
-            avg_value = sum(result['values']) / len(result['values'])
+            avg_value = result['avg_value']
             profit = avg_value - crate_info['price']
             roi = (profit / crate_info['price']) * 100
             top_10_rate = (result['top_10_count'] / amount) * 100
@@ -1530,8 +1393,8 @@ class OsuGachaHandlers:
         )
         
         # Best crate analysis
-        best_roi_crate = max(results.items(), key=lambda x: ((sum(x[1]['values'])/len(x[1]['values'])) - self.gacha_system.crate_config[x[0]]['price']) / self.gacha_system.crate_config[x[0]]['price'])
-        best_value_crate = max(results.items(), key=lambda x: sum(x[1]['values'])/len(x[1]['values']))
+        best_roi_crate = max(results.items(), key=lambda x: (x[1]['avg_value'] - self.gacha_system.crate_config[x[0]]['price']) / self.gacha_system.crate_config[x[0]]['price'])
+        best_value_crate = max(results.items(), key=lambda x: x[1]['avg_value'])
         
         best_roi_name = self.gacha_system.crate_config[best_roi_crate[0]]['name']
         best_value_name = self.gacha_system.crate_config[best_value_crate[0]]['name']
@@ -2315,6 +2178,57 @@ class OsuGachaHandlers:
         else:
             await ctx_or_interaction.send(embed=embed)
 
+    async def handle_cache_stats_command(self, ctx):
+        """Admin view of cache sizes and hit/miss/eviction counters"""
+        stats = self.gacha_system.cache_stats()
+        embed = discord.Embed(title="🗂️ Gacha Cache Stats", color=discord.Color.blue())
+
+        avatars = stats['avatars']
+        embed.add_field(
+            name="Avatars",
+            value=f"{avatars['entries']} entries ({avatars['mb']} MB)\n"
+                  f"Hits: {avatars['hits']:,} / Misses: {avatars['misses']:,} ({avatars['hit_rate']}%)\n"
+                  f"Evictions: {avatars['evictions']:,} / Expired: {avatars['expirations']:,}",
+            inline=True
+        )
+
+        cards = stats['rendered_cards']
+        embed.add_field(
+            name="Rendered Cards",
+            value=f"Disk: {cards['disk_entries']} ({cards['disk_mb']} MB) / Hot: {cards['hot_entries']} ({cards['hot_mb']} MB)\n"
+                  f"Hot hits: {cards['hot_hits']:,} / Disk hits: {cards['disk_hits']:,} / Misses: {cards['misses']:,}\n"
+                  f"Evictions: {cards['evictions']:,}",
+            inline=False
+        )
+
+        workers = stats['render_workers']
+        if workers:
+            for name, label in (('fonts', 'Worker Fonts'), ('backgrounds', 'Worker Backgrounds')):
+                info = workers[name]
+                embed.add_field(
+                    name=label,
+                    value=f"{info['entries']} entries ({info['mb']} MB)\n"
+                          f"Hits: {info['hits']:,} / Misses: {info['misses']:,} ({info['hit_rate']}%)\n"
+                          f"Evictions: {info['evictions']:,}",
+                    inline=True
+                )
+        else:
+            embed.add_field(name="Render Workers", value="No cards rendered yet", inline=False)
+
+        # Shared HTTP pool (osu! API, avatars, backgrounds and the rest of the bot), busiest hosts first
+        hosts = sorted(stats['http'].items(), key=lambda item: item[1]['requests'], reverse=True)[:5]
+        embed.add_field(
+            name="HTTP Hosts",
+            value="\n".join(
+                f"`{host}`: {info['requests']:,} req / {info['errors']:,} err / {info['rate_limited']:,} 429 / "
+                f"{info['avg_latency_ms']} ms avg ({info['max_latency_ms']} max)"
+                for host, info in hosts
+            ) or "No requests yet",
+            inline=False
+        )
+
+        await ctx.send(embed=embed)
+
     async def handle_wipe_command(self, ctx, target, interaction=None):
         """Admin-only command to wipe a user's gacha data completely"""
         
@@ -2534,7 +2448,7 @@ class OsuGachaHandlers:
         card_id = self.gacha_system.generate_card_id(found_player, rarity_info["stars"], selected_mutation)
 
         # Create card data
-        card_data = {
+        card_data = track({
             "player_data": found_player,
             "stars": rarity_info["stars"],
             "rarity_name": rarity_info["name"],
@@ -2544,7 +2458,7 @@ class OsuGachaHandlers:
             "mutation": selected_mutation,
             "price": card_price,
             "favorite": False
-        }
+        })
 
         # Add flashback year to card data if it's a flashback card
         if selected_mutation == "flashback" and flashback_year:
@@ -4,14 +4,15 @@ from discord import app_commands
 import asyncio
 import time
 import random
-import aiohttp
 import io
 import os
 import json
 import difflib
 from PIL import Image, ImageFilter
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
+from utils.http_client import http_client
 
 # Import the configuration and system
 from .osugacha_config import *
@@ -614,34 +615,33 @@ class PartyBackgroundGuesserView(discord.ui.View):
         self.phase = 2
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.current_beatmap['background_url']) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        if self.game_ended:
-                            return
-                        
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((400, 300))
-                        
-                        img_bytes = io.BytesIO()
-                        image.save(img_bytes, format='PNG')
-                        img_bytes.seek(0)
-                        
-                        embed = self._create_game_embed()
-                        file = discord.File(img_bytes, filename="clear_bg.png")
-                        embed.set_image(url="attachment://clear_bg.png")
-                        
-                        if self.game_ended:
-                            return
+            response = await http_client.get(self.current_beatmap['background_url'])
+            if response.status == 200:
+                image_data = response.body
+                
+                if self.game_ended:
+                    return
+                
+                image = Image.open(io.BytesIO(image_data))
+                image = image.resize((400, 300))
+                
+                img_bytes = io.BytesIO()
+                image.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+                
+                embed = self._create_game_embed()
+                file = discord.File(img_bytes, filename="clear_bg.png")
+                embed.set_image(url="attachment://clear_bg.png")
+                
+                if self.game_ended:
+                    return
+                
+                try:
+                    # SEND NEW MESSAGE instead of editing
+                    self.original_message = await self.channel.send(embed=embed, file=file)
+                except Exception:
+                    pass
                         
-                        try:
-                            # SEND NEW MESSAGE instead of editing
-                            self.original_message = await self.channel.send(embed=embed, file=file)
-                        except Exception:
-                            pass
-                                
         except Exception:
             pass
             
@@ -867,7 +867,7 @@ class OsuPartyGamesCog(commands.Cog, name="Osu Party Games"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -882,7 +882,7 @@ class OsuPartyGamesCog(commands.Cog, name="Osu Party Games"):
                     "bg_games_won": 0,
                     "bg_games_played": 0
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
 
         # Add confirmation setting to existing users who don't have it
@@ -935,11 +935,6 @@ class OsuPartyGamesCog(commands.Cog, name="Osu Party Games"):
             return self.popular_beatmaps
         
         try:
-            token = await self.gacha_system.get_access_token()
-            if not token:
-                return []
-            
-            headers = {'Authorization': f'Bearer {token}'}
             beatmaps = []
             seen_beatmapsets = set()  # Track unique beatmapset IDs globally
             
@@ -1017,118 +1012,116 @@ class OsuPartyGamesCog(commands.Cog, name="Osu Party Games"):
                 {'sort': 'favourites_desc', 'q': 'pop', 's': 'approved', 'pages': 10},
             ]
             
-            async with aiohttp.ClientSession() as session:
-                url = 'https://osu.ppy.sh/api/v2/beatmapsets/search'
+            url = 'https://osu.ppy.sh/api/v2/beatmapsets/search'
+            
+            for i, config in enumerate(search_configs):
+                if len(beatmaps) >= 5000:
+                    break
                 
-                for i, config in enumerate(search_configs):
-                    if len(beatmaps) >= 5000:
-                        break
-                    
-                    search_desc = f"{config['sort']} q='{config['q']}' s={config['s']}"
-                    if 'g' in config:
-                        search_desc += f" genre={config['g']}"
-                    if 'l' in config:
-                        search_desc += f" lang={config['l']}"
-                        
-                    print(f"🔄 [{i+1}/{len(search_configs)}] Fetching: {search_desc}")
-                    
-                    params = {
-                        'q': config['q'],
-                        's': config['s'],
-                        'sort': config['sort'],
-                        'limit': 50
-                    }
-                    
-                    # Add optional parameters
-                    if 'g' in config:
-                        params['g'] = config['g']
-                    if 'l' in config:
-                        params['l'] = config['l']
+                search_desc = f"{config['sort']} q='{config['q']}' s={config['s']}"
+                if 'g' in config:
+                    search_desc += f" genre={config['g']}"
+                if 'l' in config:
+                    search_desc += f" lang={config['l']}"
                     
-                    maps_from_this_search = 0
-                    page = 0
-                    consecutive_empty_pages = 0
+                print(f"🔄 [{i+1}/{len(search_configs)}] Fetching: {search_desc}")
+                
+                params = {
+                    'q': config['q'],
+                    's': config['s'],
+                    'sort': config['sort'],
+                    'limit': 50
+                }
+                
+                # Add optional parameters
+                if 'g' in config:
+                    params['g'] = config['g']
+                if 'l' in config:
+                    params['l'] = config['l']
+                
+                maps_from_this_search = 0
+                page = 0
+                consecutive_empty_pages = 0
+                
+                while page < config['pages'] and len(beatmaps) < 5000:
+                    params['offset'] = page * 50
                     
-                    while page < config['pages'] and len(beatmaps) < 5000:
-                        params['offset'] = page * 50
-                        
-                        try:
-                            async with session.get(url, headers=headers, params=params) as response:
-                                if response.status == 200:
-                                    data = await response.json()
+                    try:
+                        # Bearer token, pacing and 429 backoff come from the shared client
+                        response = await http_client.get(url, auth=True, params=params)
+                        if response.status == 200:
+                            data = response.json()
+                            
+                            if not data.get('beatmapsets'):
+                                consecutive_empty_pages += 1
+                                if consecutive_empty_pages >= 3:  # Stop after 3 empty pages
+                                    break
+                                page += 1
+                                continue
+                            
+                            consecutive_empty_pages = 0
+                            page_found_new = False
+                            
+                            for beatmapset in data.get('beatmapsets', []):
+                                if beatmapset.get('beatmaps'):
+                                    beatmapset_id = beatmapset['id']
                                     
-                                    if not data.get('beatmapsets'):
-                                        consecutive_empty_pages += 1
-                                        if consecutive_empty_pages >= 3:  # Stop after 3 empty pages
-                                            break
-                                        page += 1
+                                    # Skip if we've already seen this beatmapset
+                                    if beatmapset_id in seen_beatmapsets:
                                         continue
                                     
-                                    consecutive_empty_pages = 0
-                                    page_found_new = False
+                                    seen_beatmapsets.add(beatmapset_id)
+                                    page_found_new = True
+                                    maps_from_this_search += 1
                                     
-                                    for beatmapset in data.get('beatmapsets', []):
-                                        if beatmapset.get('beatmaps'):
-                                            beatmapset_id = beatmapset['id']
-                                            
-                                            # Skip if we've already seen this beatmapset
-                                            if beatmapset_id in seen_beatmapsets:
-                                                continue
-                                            
-                                            seen_beatmapsets.add(beatmapset_id)
-                                            page_found_new = True
-                                            maps_from_this_search += 1
-                                            
-                                            # Get the hardest difficulty (highest star rating)
-                                            hardest_diff = max(beatmapset['beatmaps'], 
-                                                            key=lambda x: x.get('difficulty_rating', 0))
-                                            
-                                            # Skip maps with less than 1 million plays
-                                            playcount = hardest_diff.get('playcount', 0)
-                                            if playcount < 1000000:
-                                                continue
-                                            
-                                            beatmap = {
-                                                'id': hardest_diff['id'],
-                                                'beatmapset_id': beatmapset_id,
-                                                'title': beatmapset['title'],
-                                                'artist': beatmapset['artist'],
-                                                'creator': beatmapset['creator'],
-                                                'difficulty_rating': round(hardest_diff.get('difficulty_rating', 0), 2),
-                                                'playcount': hardest_diff.get('playcount', 0),
-                                                'background_url': f"https://assets.ppy.sh/beatmaps/{beatmapset_id}/covers/raw.jpg"
-                                            }
-                                            beatmaps.append(beatmap)
-                                            
-                                            # Stop if we've reached our target
-                                            if len(beatmaps) >= 5000:
-                                                break
+                                    # Get the hardest difficulty (highest star rating)
+                                    hardest_diff = max(beatmapset['beatmaps'], 
+                                                    key=lambda x: x.get('difficulty_rating', 0))
                                     
-                                    # If we didn't find any new maps on this page, skip ahead
-                                    if not page_found_new:
-                                        page += 5  # Skip ahead more aggressively
-                                    else:
-                                        page += 1
-                                
-                                elif response.status == 429:  # Rate limited
-                                    print("⚠️ Rate limited, waiting 5 seconds...")
-                                    await asyncio.sleep(5)
-                                    continue
-                                else:
-                                    print(f"❌ API error: {response.status}")
-                                    break
+                                    # Skip maps with less than 1 million plays
+                                    playcount = hardest_diff.get('playcount', 0)
+                                    if playcount < 1000000:
+                                        continue
                                     
-                        except Exception as e:
-                            print(f"⚠️ Error in search {i+1}: {e}")
-                            break
+                                    beatmap = {
+                                        'id': hardest_diff['id'],
+                                        'beatmapset_id': beatmapset_id,
+                                        'title': beatmapset['title'],
+                                        'artist': beatmapset['artist'],
+                                        'creator': beatmapset['creator'],
+                                        'difficulty_rating': round(hardest_diff.get('difficulty_rating', 0), 2),
+                                        'playcount': hardest_diff.get('playcount', 0),
+                                        'background_url': f"https://assets.ppy.sh/beatmaps/{beatmapset_id}/covers/raw.jpg"
+                                    }
+                                    beatmaps.append(beatmap)
+                                    
+                                    # Stop if we've reached our target
+                                    if len(beatmaps) >= 5000:
+                                        break
+                            
+                            # If we didn't find any new maps on this page, skip ahead
+                            if not page_found_new:
+                                page += 5  # Skip ahead more aggressively
+                            else:
+                                page += 1
                         
-                        await asyncio.sleep(0.1)  # Small delay between requests
-                    
-                    print(f"✅ Found {maps_from_this_search} unique maps from this search (total: {len(beatmaps)})")
-                    
-                    # Progress update every 10 searches
-                    if (i + 1) % 10 == 0:
-                        print(f"🎯 Progress: {len(beatmaps)}/5000 unique beatmapsets cached")
+                        elif response.status == 429:  # Rate limited
+                            print("⚠️ Rate limited, waiting 5 seconds...")
+                            await asyncio.sleep(5)
+                            continue
+                        else:
+                            print(f"❌ API error: {response.status}")
+                            break
+                            
+                    except Exception as e:
+                        print(f"⚠️ Error in search {i+1}: {e}")
+                        break
+                
+                print(f"✅ Found {maps_from_this_search} unique maps from this search (total: {len(beatmaps)})")
+                
+                # Progress update every 10 searches
+                if (i + 1) % 10 == 0:
+                    print(f"🎯 Progress: {len(beatmaps)}/5000 unique beatmapsets cached")
             
             self.popular_beatmaps = beatmaps
             self.beatmap_cache_time = time.time()
@@ -1145,20 +1138,19 @@ class OsuPartyGamesCog(commands.Cog, name="Osu Party Games"):
     async def create_blurred_background(self, background_url):
         """Create blurred background image"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(background_url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((400, 300))
-                        blurred = image.filter(ImageFilter.GaussianBlur(radius=8))
-                        
-                        img_bytes = io.BytesIO()
-                        blurred.save(img_bytes, format='PNG')
-                        img_bytes.seek(0)
-                        
-                        return img_bytes
+            response = await http_client.get(background_url)
+            if response.status == 200:
+                image_data = response.body
+                
+                image = Image.open(io.BytesIO(image_data))
+                image = image.resize((400, 300))
+                blurred = image.filter(ImageFilter.GaussianBlur(radius=8))
+                
+                img_bytes = io.BytesIO()
+                blurred.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+                
+                return img_bytes
         except Exception as e:
             print(f"Failed to create blurred background: {e}")
             return None
@@ -4,12 +4,13 @@ from discord import app_commands
 import asyncio
 import time
 import random
-import aiohttp
 import io
 import difflib
 from PIL import Image, ImageFilter
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
+from utils.http_client import http_client
 
 # Import the configuration and system
 from .osugacha_config import *
@@ -780,27 +781,25 @@ class BackgroundGuesserView(discord.ui.View):
         # Try to get the clear background image for the result
         image_success = False
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.current_beatmap['background_url']) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        # Process image
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((400, 300))
-                        
-                        img_bytes = io.BytesIO()
-                        image.save(img_bytes, format='PNG')
-                        img_bytes.seek(0)
-                        
-                        file = discord.File(img_bytes, filename="result_bg.png")
-                        embed.set_image(url="attachment://result_bg.png")
-                        image_success = True
-                        
-                        # Send result message with image
-                        result_message = await self.channel.send(embed=embed, file=file)
-                        
+            response = await http_client.get(self.current_beatmap['background_url'], timeout=5)
+            if response.status == 200:
+                image_data = response.body
+                
+                # Process image
+                image = Image.open(io.BytesIO(image_data))
+                image = image.resize((400, 300))
+                
+                img_bytes = io.BytesIO()
+                image.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+                
+                file = discord.File(img_bytes, filename="result_bg.png")
+                embed.set_image(url="attachment://result_bg.png")
+                image_success = True
+                
+                # Send result message with image
+                result_message = await self.channel.send(embed=embed, file=file)
+                
         except Exception:
             # Image failed, continue without it
             pass
@@ -901,36 +900,35 @@ class BackgroundGuesserView(discord.ui.View):
         self.phase = 2
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.current_beatmap['background_url']) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        if self.game_ended:
-                            return
-                        
-                        # Resize for Discord
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((400, 300))
-                        
-                        img_bytes = io.BytesIO()
-                        image.save(img_bytes, format='PNG')
-                        img_bytes.seek(0)
-                        
-                        embed = self._create_game_embed("🖼️ Clear Background - Phase 2")
-                        file = discord.File(img_bytes, filename="clear_bg.png")
-                        embed.set_image(url="attachment://clear_bg.png")
-                        
-                        if self.game_ended:
-                            return
+            response = await http_client.get(self.current_beatmap['background_url'])
+            if response.status == 200:
+                image_data = response.body
+                
+                if self.game_ended:
+                    return
+                
+                # Resize for Discord
+                image = Image.open(io.BytesIO(image_data))
+                image = image.resize((400, 300))
+                
+                img_bytes = io.BytesIO()
+                image.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+                
+                embed = self._create_game_embed("🖼️ Clear Background - Phase 2")
+                file = discord.File(img_bytes, filename="clear_bg.png")
+                embed.set_image(url="attachment://clear_bg.png")
+                
+                if self.game_ended:
+                    return
+                
+                # Update the original message
+                if self.original_message:
+                    try:
+                        await self.original_message.edit(embed=embed, attachments=[file])
+                    except Exception:
+                        self.game_ended = True
                         
-                        # Update the original message
-                        if self.original_message:
-                            try:
-                                await self.original_message.edit(embed=embed, attachments=[file])
-                            except Exception:
-                                self.game_ended = True
-                                
         except Exception:
             pass
 
@@ -1080,7 +1078,7 @@ class OsuPvPCog(commands.Cog, name="Osu PvP Games"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -1101,7 +1099,7 @@ class OsuPvPCog(commands.Cog, name="Osu PvP Games"):
                     "biggest_loss": 0,
                     "games_by_type": {}
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
         return self.bot.osu_gacha_data[user_id_str]
 
@@ -1116,54 +1114,47 @@ class OsuPvPCog(commands.Cog, name="Osu PvP Games"):
             return self.popular_beatmaps
         
         try:
-            token = await self.gacha_system.get_access_token()
-            if not token:
-                return []
-            
-            headers = {'Authorization': f'Bearer {token}'}
             beatmaps = []
             
             print("Caching popular beatmaps for Background Guesser...")
             
-            async with aiohttp.ClientSession() as session:
-                url = 'https://osu.ppy.sh/api/v2/beatmapsets/search'
-                params = {
-                    'q': '',
-                    's': 'ranked',
-                    'sort': 'plays_desc',
-                    'limit': 50
-                }
+            url = 'https://osu.ppy.sh/api/v2/beatmapsets/search'
+            params = {
+                'q': '',
+                's': 'ranked',
+                'sort': 'plays_desc',
+                'limit': 50
+            }
+            
+            # Get 1000 popular beatmaps
+            for page in range(20):
+                params['offset'] = page * 50
                 
-                # Get 1000 popular beatmaps
-                for page in range(20):
-                    params['offset'] = page * 50
-                    
-                    # Progress logging every 5 pages
-                    if page % 5 == 0 and page > 0:
-                        print(f"📊 Beatmap cache progress: {page * 50}/1000 beatmaps...")
+                # Progress logging every 5 pages
+                if page % 5 == 0 and page > 0:
+                    print(f"📊 Beatmap cache progress: {page * 50}/1000 beatmaps...")
+                
+                # Bearer token and pacing come from the shared client
+                response = await http_client.get(url, auth=True, params=params)
+                if response.status == 200:
+                    data = response.json()
                     
-                    async with session.get(url, headers=headers, params=params) as response:
-                        if response.status == 200:
-                            data = await response.json()
+                    for beatmapset in data.get('beatmapsets', []):
+                        if beatmapset.get('beatmaps'):
+                            main_diff = max(beatmapset['beatmaps'], 
+                                        key=lambda x: x.get('playcount', 0))
                             
-                            for beatmapset in data.get('beatmapsets', []):
-                                if beatmapset.get('beatmaps'):
-                                    main_diff = max(beatmapset['beatmaps'], 
-                                                key=lambda x: x.get('playcount', 0))
-                                    
-                                    beatmap = {
-                                        'id': main_diff['id'],
-                                        'beatmapset_id': beatmapset['id'],
-                                        'title': beatmapset['title'],
-                                        'artist': beatmapset['artist'],
-                                        'creator': beatmapset['creator'],
-                                        'difficulty_rating': round(main_diff.get('difficulty_rating', 0), 2),
-                                        'playcount': main_diff.get('playcount', 0),
-                                        'background_url': f"https://assets.ppy.sh/beatmaps/{beatmapset['id']}/covers/raw.jpg"
-                                    }
-                                    beatmaps.append(beatmap)
-                        
-                        await asyncio.sleep(0.1)
+                            beatmap = {
+                                'id': main_diff['id'],
+                                'beatmapset_id': beatmapset['id'],
+                                'title': beatmapset['title'],
+                                'artist': beatmapset['artist'],
+                                'creator': beatmapset['creator'],
+                                'difficulty_rating': round(main_diff.get('difficulty_rating', 0), 2),
+                                'playcount': main_diff.get('playcount', 0),
+                                'background_url': f"https://assets.ppy.sh/beatmaps/{beatmapset['id']}/covers/raw.jpg"
+                            }
+                            beatmaps.append(beatmap)
             
             self.popular_beatmaps = beatmaps
             self.beatmap_cache_time = time.time()
@@ -1178,20 +1169,19 @@ class OsuPvPCog(commands.Cog, name="Osu PvP Games"):
     async def create_blurred_background(self, background_url):
         """Create blurred background image"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(background_url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((400, 300))
-                        blurred = image.filter(ImageFilter.GaussianBlur(radius=8))
-                        
-                        img_bytes = io.BytesIO()
-                        blurred.save(img_bytes, format='PNG')
-                        img_bytes.seek(0)
-                        
-                        return img_bytes
+            response = await http_client.get(background_url)
+            if response.status == 200:
+                image_data = response.body
+                
+                image = Image.open(io.BytesIO(image_data))
+                image = image.resize((400, 300))
+                blurred = image.filter(ImageFilter.GaussianBlur(radius=8))
+                
+                img_bytes = io.BytesIO()
+                blurred.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+                
+                return img_bytes
         except Exception as e:
             print(f"❌ Failed to create blurred background: {e}")
             return None
@@ -0,0 +1,77 @@
+"""
+Rank-indexed leaderboard store and precompiled crate range tables
+Keeps per-roll player selection at O(log n) instead of rescanning the cache
+"""
+
+import random
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+
+class RankIndex:
+    """Leaderboard cache held as a rank-sorted array with bisect range slicing"""
+
+    def __init__(self, players: List[Dict] = None):
+        players = players or []
+        self.players = sorted(players, key=lambda p: p.get('rank', 0))
+        self.ranks = [p.get('rank', 0) for p in self.players]
+        self._by_rank = {p.get('rank', 0): p for p in self.players}
+        self._by_username = {p.get('username', '').lower(): p for p in self.players}
+
+    def __len__(self):
+        return len(self.players)
+
+    def range_bounds(self, min_rank: int, max_rank: int):
+        """Slice [lo, hi) of players whose rank is within [min_rank, max_rank]"""
+        return bisect_left(self.ranks, min_rank), bisect_right(self.ranks, max_rank)
+
+    def count_in_range(self, min_rank: int, max_rank: int) -> int:
+        lo, hi = self.range_bounds(min_rank, max_rank)
+        return hi - lo
+
+    def random_in_range(self, min_rank: int, max_rank: int, rng=random) -> Optional[Dict]:
+        """Uniformly pick a player within the rank range, None if the range is empty"""
+        lo, hi = self.range_bounds(min_rank, max_rank)
+        if lo >= hi:
+            return None
+        return self.players[lo + int(rng.random() * (hi - lo))]
+
+    def by_rank(self, rank: int) -> Optional[Dict]:
+        return self._by_rank.get(rank)
+
+    def by_username(self, username: str) -> Optional[Dict]:
+        return self._by_username.get(username.lower())
+
+
+class RangeTable:
+    """Cumulative-weight table for one crate's rank ranges, compiled once at load"""
+
+    def __init__(self, rank_ranges: List[Dict]):
+        self.ranges = []
+        self.cumulative = []
+        total = 0.0
+        for range_data in rank_ranges:
+            # Float weights like random.choices used - scaling to integers would drop the rarest (top rank) ranges
+            weight = float(range_data["weight"])
+            if weight <= 0:
+                continue
+            total += weight
+            self.ranges.append(range_data)
+            self.cumulative.append(total)
+        self.total = total
+
+    def __bool__(self):
+        return self.total > 0
+
+    def pick(self, rng=random) -> Dict:
+        """Pick a rank range with probability proportional to its weight"""
+        index = bisect_right(self.cumulative, rng.random() * self.total)
+        return self.ranges[min(index, len(self.ranges) - 1)]  # float rounding can land on the total
+
+
+def compile_range_tables(crate_config: Dict) -> Dict[str, RangeTable]:
+    """Precompile every crate's rank ranges"""
+    return {
+        crate_type: RangeTable(crate_info.get("rank_ranges", []))
+        for crate_type, crate_info in crate_config.items()
+    }
@@ -0,0 +1,1304 @@
+"""
+Card renderer and process-pool rendering service
+Pillow card compositing runs in worker processes so heavy mutation effects never block the event loop
+"""
+
+import asyncio
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageDraw, ImageFont, ImageEnhance
+
+from utils.bounded_cache import BoundedCache
+
+from .osugacha_config import MUTATIONS, RENDER_CONFIG
+
+PRESET_FULL = "full"
+PRESET_FAST = "fast"
+
+# Bump whenever card drawing changes so cached renders are not reused
+CARD_TEMPLATE_VERSION = 1
+
+
+class CardRenderer:
+    """Pillow drawing for cards - mixed into OsuGachaSystem and instantiated on its own in render workers"""
+
+    def __init__(self):
+        self.mutations = MUTATIONS
+        self._font_cache = BoundedCache("fonts", max_items=RENDER_CONFIG["font_cache_items"])
+        self._background_cache = BoundedCache(
+            "backgrounds", max_items=RENDER_CONFIG["background_cache_items"],
+            max_bytes=RENDER_CONFIG["background_cache_mb"] * 1024 * 1024
+        )
+
+    def _get_cached_font(self, font_name, size):
+        """Get cached font to avoid repeated loading with cross-platform support"""
+        cache_key = f"{font_name}_{size}"
+        font = self._font_cache.get(cache_key)
+        if font is None:
+            # Try multiple font options for cross-platform compatibility
+            font_options = []
+            
+            # Map Windows fonts to cross-platform alternatives
+            if font_name == "arialbd.ttf":  # Arial Bold
+                if os.name == 'nt':  # Windows
+                    font_options = [
+                        "arialbd.ttf",
+                        "arial-bold.ttf",
+                        "C:/Windows/Fonts/arialbd.ttf",
+                    ]
+                else:  # Linux/Unix
+                    font_options = [
+                        "DejaVuSans-Bold.ttf",
+                        "LiberationSans-Bold.ttf",
+                        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+                        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+                        "/System/Library/Fonts/Arial Bold.ttf",  # macOS
+                    ]
+            elif font_name == "arial.ttf":  # Arial Regular
+                if os.name == 'nt':  # Windows
+                    font_options = [
+                        "arial.ttf",
+                        "C:/Windows/Fonts/arial.ttf",
+                    ]
+                else:  # Linux/Unix
+                    font_options = [
+                        "DejaVuSans.ttf",
+                        "LiberationSans-Regular.ttf", 
+                        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+                        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+                        "/System/Library/Fonts/Arial.ttf",  # macOS
+                    ]
+            else:
+                font_options = [font_name]
+            
+            # Try each font option until one works
+            font_loaded = False
+            for font_option in font_options:
+                try:
+                    font = ImageFont.truetype(font_option, size)
+                    font_loaded = True
+                    break
+                except:
+                    continue
+            
+            # Fall back to default if no fonts work, but with a reasonable size
+            if not font_loaded:
+                try:
+                    # Try to get a default font that's closer to the requested size
+                    font = ImageFont.load_default().font_variant(size=size)
+                except:
+                    font = ImageFont.load_default()
+            self._font_cache[cache_key] = font
+                    
+        return font
+
+    def _get_fitted_font(self, text, font_name, max_size, max_width, min_size=12):
+        """Get a font that fits the text within the specified width"""
+        # Start with the maximum size and work down
+        for size in range(max_size, min_size - 1, -1):
+            font = self._get_cached_font(font_name, size)
+            # Get text bounding box
+            bbox = font.getbbox(text)
+            text_width = bbox[2] - bbox[0]
+            
+            if text_width <= max_width:
+                return font
+        
+        # If even minimum size doesn't fit, return minimum size font
+        return self._get_cached_font(font_name, min_size)
+
+    def render_card(self, spec):
+        """Render one card spec (see OsuGachaSystem.create_card_image) to PNG bytes"""
+        player_data = spec['player_data']
+        stars = spec['stars']
+        mutation = spec.get('mutation')
+        card_price = spec.get('card_price', 0)
+        flashback_year = spec.get('flashback_year')
+        # "fast" skips the blur/per-pixel effects - used when the render pool is saturated
+        fast = spec.get('preset') == PRESET_FAST
+        try:
+            # Card dimensions
+            width, height = 400, 600
+            
+            # Create base card
+            card = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+            
+            # Rarity is resolved by the caller so the worker doesn't need the game config
+            rarity = spec['rarity']
+            
+            border_color = f"#{rarity['color']:06x}"
+            # Use cached backgrounds when possible
+            bg_cache_key = f"{mutation or 'rarity'}_{width}_{height}_{rarity['color']}_{fast}"
+            if mutation and mutation in self.mutations:
+                border_color = self.mutations[mutation]["color"]
+            background = self._background_cache.get(bg_cache_key)
+            if background is None:
+                # Create background based on mutation or rarity
+                if mutation and mutation in self.mutations and not fast:
+                    background = self._create_mutation_background(width, height, mutation)
+                else:
+                    background = self._create_rarity_background(width, height, rarity['color'])
+                
+                # Cache the background (bounded LRU, evicts by pixel bytes)
+                self._background_cache[bg_cache_key] = background
+            
+            # Paste background
+            card.paste(background, (0, 0))
+            
+            # Enhanced border for mutations
+            if mutation and not fast:
+                border_width = 15
+                self._draw_mutation_border(card, mutation, border_width)
+            else:
+                border_width = 12
+                draw = ImageDraw.Draw(card)
+                draw.rectangle([0, 0, width-1, height-1], outline=border_color, width=border_width)
+            
+            # Continue with rest of card creation
+            draw = ImageDraw.Draw(card)
+            
+            # Profile picture bytes are downloaded by the caller
+            profile_img = self._prepare_profile_image(spec.get('profile_bytes'))
+            
+            if profile_img:
+                # Apply mutation effects to profile picture
+                if mutation and not fast:
+                    profile_img = self._apply_mutation_profile_effects(profile_img, mutation)
+                
+                # Paste profile picture
+                card.paste(profile_img, (130, 30), profile_img)
+            
+            # Use cached fonts
+            text_font = self._get_cached_font("arialbd.ttf", 20)
+            small_font = self._get_cached_font("arial.ttf", 16)
+            value_font = self._get_cached_font("arialbd.ttf", 22)
+            
+            # Player name with dynamic font sizing (no truncation)
+            name_text = player_data['username']
+            # Calculate max width for name (card width minus padding)
+            max_name_width = width - 40  # 20px padding on each side
+            title_font = self._get_fitted_font(name_text, "arialbd.ttf", 32, max_name_width, 16)
+            
+            self._draw_text_with_shadow(draw, (width//2, 190), name_text, title_font, 'white', 'black')
+            
+            # Custom stars with mutation effects
+            star_y = 225
+            self._draw_custom_stars(draw, width//2, star_y, stars, mutation)
+            
+            # Special handling for flashback cards
+            if mutation == "flashback":
+                # Add "ICON" text at top - with subtle shadow for visibility
+                icon_font = self._get_cached_font("arialbd.ttf", 24)
+                # Add subtle dark shadow for contrast
+                draw.text((width//2-1, 50-1), "ICON", font=icon_font, fill="black", anchor="mm")
+                draw.text((width//2, 50), "ICON", font=icon_font, fill="#FFD700", anchor="mm")
+                
+                # Use darker gold with subtle shadows for better visibility
+                text_color = "#B8860B"  # Darker gold for better contrast
+                shadow_color = "rgba(0,0,0,0.3)"  # Light shadow
+                
+                # Stats with subtle shadows
+                draw.text((width//2-1, 270-1), f"#{player_data['rank']:,}", font=text_font, fill="black", anchor="mm")
+                draw.text((width//2, 270), f"#{player_data['rank']:,}", font=text_font, fill=text_color, anchor="mm")
+                
+                draw.text((width//2-1, 305-1), f"{player_data['pp']:,} PP", font=text_font, fill="black", anchor="mm")
+                draw.text((width//2, 305), f"{player_data['pp']:,} PP", font=text_font, fill=text_color, anchor="mm")
+                
+                draw.text((width//2-1, 340-1), f"{player_data['accuracy']}% ACC", font=text_font, fill="black", anchor="mm")
+                draw.text((width//2, 340), f"{player_data['accuracy']}% ACC", font=text_font, fill=text_color, anchor="mm")
+                
+                # Country code with shadow
+                draw.text((width//2-1, 375-1), player_data['country'], font=small_font, fill="black", anchor="mm")
+                draw.text((width//2, 375), player_data['country'], font=small_font, fill=text_color, anchor="mm")
+                
+                # Level and plays with shadow
+                draw.text((width//2-1, 410-1), f"Level {player_data['level']} • {player_data['play_count']:,} plays", font=small_font, fill="black", anchor="mm")
+                draw.text((width//2, 410), f"Level {player_data['level']} • {player_data['play_count']:,} plays", font=small_font, fill=text_color, anchor="mm")
+                
+                # Mutation text with shadow
+                mutation_name = self.mutations[mutation]["name"]
+                mutation_text = f"{mutation_name}"
+                draw.text((width//2-1, 445-1), mutation_text, font=text_font, fill="black", anchor="mm")
+                draw.text((width//2, 445), mutation_text, font=text_font, fill="#DAA520", anchor="mm")  # Goldenrod for mutation
+                
+                # Price text with shadow
+                if card_price >= 1000000000:
+                    price_color = '#FF1493'
+                elif card_price >= 100000000:
+                    price_color = '#FF4500'
+                elif card_price >= 10000000:
+                    price_color = '#FFD700'
+                elif card_price >= 1000000:
+                    price_color = '#00FFFF'
+                else:
+                    price_color = '#00FF00'
+                
+                price_text = f"Value: {card_price:,} coins"
+                draw.text((width//2-1, 520-1), price_text, font=value_font, fill="black", anchor="mm")
+                draw.text((width//2, 520), price_text, font=value_font, fill=price_color, anchor="mm")
+                
+                # Year with shadow
+                if flashback_year:
+                    draw.text((width//2-1, 560-1), flashback_year, font=text_font, fill="black", anchor="mm")
+                    draw.text((width//2, 560), flashback_year, font=text_font, fill='#DAA520', anchor="mm")
+                
+                stars = 6  # Force 6 stars display
+            else:
+                # Stats with mutation coloring
+                text_color = self.mutations[mutation]["color"] if mutation else 'white'
+                
+                self._draw_text_with_shadow(draw, (width//2, 270), f"#{player_data['rank']:,}", text_font, text_color, 'black')
+                self._draw_text_with_shadow(draw, (width//2, 305), f"{player_data['pp']:,} PP", text_font, text_color, 'black')
+                self._draw_text_with_shadow(draw, (width//2, 340), f"{player_data['accuracy']}% ACC", text_font, text_color, 'black')
+                
+                # Country code
+                self._draw_text_with_shadow(draw, (width//2, 375), player_data['country'], small_font, text_color, 'black')
+                
+                # Level and plays
+                self._draw_text_with_shadow(draw, (width//2, 410), f"Level {player_data['level']} • {player_data['play_count']:,} plays", small_font, text_color, 'black')
+                
+                # Mutation text
+                if mutation:
+                    mutation_name = self.mutations[mutation]["name"]
+                    mutation_text = f"{mutation_name}"
+                    self._draw_text_with_shadow(draw, (width//2, 445), mutation_text, text_font, self.mutations[mutation]["color"], 'black')
+                
+                # Card value with tier-based colors
+                if mutation == "flashback":
+                    # Flashback cards have fixed color
+                    price_color = '#FFD700'
+                elif card_price >= 1000000000:
+                    price_color = '#FF1493'
+                elif card_price >= 100000000:
+                    price_color = '#FF4500'
+                elif card_price >= 10000000:
+                    price_color = '#FFD700'
+                elif card_price >= 1000000:
+                    price_color = '#00FFFF'
+                else:
+                    price_color = '#00FF00'
+                
+                price_text = f"Value: {card_price:,} coins"
+                self._draw_text_with_shadow(draw, (width//2, 520), price_text, value_font, price_color, 'black')
+                
+                # Rarity name
+                if flashback_year:
+                    self._draw_text_with_shadow(draw, (width//2, 560), flashback_year, text_font, '#FFD700', 'black')
+                else:
+                    self._draw_text_with_shadow(draw, (width//2, 560), rarity['name'], text_font, 'white', 'black')
+
+            # Player name - handle flashback separately
+            if mutation == "flashback":
+                # Darker gold with shadow for player name
+                draw.text((width//2-1, 190-1), name_text, font=title_font, fill="black", anchor="mm")
+                draw.text((width//2, 190), name_text, font=title_font, fill="#DAA520", anchor="mm")
+            else:
+                self._draw_text_with_shadow(draw, (width//2, 190), name_text, title_font, 'white', 'black')
+            
+            # Apply final mutation effects overlay
+            if mutation and not fast:
+                card = self._apply_mutation_overlay(card, mutation)
+            
+            img_buffer = BytesIO()
+            card.save(img_buffer, format='PNG', compress_level=1 if fast else 6)
+            return img_buffer.getvalue()
+            
+        except Exception as e:
+            print(f"Error creating card image: {e}")
+            return None
+
+    def _prepare_profile_image(self, profile_bytes):
+        """Decode avatar bytes into the 140px circular profile picture"""
+        if not profile_bytes:
+            return None
+        try:
+            profile_img = Image.open(BytesIO(profile_bytes)).convert('RGBA')
+            profile_img = profile_img.resize((140, 140))
+            
+            # Add profile picture with circular crop
+            mask = Image.new('L', (140, 140), 0)
+            mask_draw = ImageDraw.Draw(mask)
+            mask_draw.ellipse((0, 0, 140, 140), fill=255)
+            profile_img.putalpha(mask)
+            return profile_img
+        except Exception:
+            return None
+
+    def render_collage(self, card_pngs):
+        """Stitch up to three rendered cards into the showcase layout, returns PNG bytes"""
+        if not card_pngs:
+            return None
+        
+        pil_images = [Image.open(BytesIO(png)).convert('RGBA') for png in card_pngs]
+        
+        # Calculate collage dimensions
+        if len(pil_images) == 1:
+            # Single card - use as is
+            collage = pil_images[0]
+        elif len(pil_images) == 2:
+            # Two cards - side by side
+            card_width, card_height = pil_images[0].size
+            collage_width = card_width * 2 + 20  # 20px gap
+            collage_height = card_height + 20     # 10px padding top/bottom
+            
+            collage = Image.new('RGBA', (collage_width, collage_height), (0, 0, 0, 0))
+            collage.paste(pil_images[0], (10, 10))
+            collage.paste(pil_images[1], (card_width + 20, 10))
+        else:
+            # Three cards - triangle layout (1 top, 2 bottom)
+            card_width, card_height = pil_images[0].size
+            collage_width = card_width * 2 + 30   # 2 cards wide + gaps
+            collage_height = card_height * 2 + 30 # 2 cards tall + gaps
+            
+            collage = Image.new('RGBA', (collage_width, collage_height), (0, 0, 0, 0))
+            
+            # Top card (centered)
+            top_x = (collage_width - card_width) // 2
+            collage.paste(pil_images[0], (top_x, 10))
+            
+            # Bottom left card
+            collage.paste(pil_images[1], (10, card_height + 20))
+            
+            # Bottom right card
+            collage.paste(pil_images[2], (card_width + 20, card_height + 20))
+        
+        output = BytesIO()
+        collage.save(output, format='PNG', optimize=True)
+        return output.getvalue()
+
+
+    # ENHANCED MUTATION EFFECT METHODS - FULL IMPLEMENTATIONS
+    def _create_mutation_background(self, width, height, mutation):
+        """Create mutation-specific background with dramatic effects"""
+        effect = self.mutations[mutation]["effect"]
+        color = self.mutations[mutation]["color"]
+        
+        # Convert hex to RGB
+        hex_color = color.lstrip('#')
+        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        
+        if effect == "golden_glow":
+            return self._create_golden_glow_background(width, height, (r, g, b))
+        elif effect == "prismatic_refraction":
+            return self._create_prismatic_background(width, height, (r, g, b))  # Add color parameter
+        elif effect == "crystal_border":
+            return self._create_crystalline_background(width, height, (r, g, b))
+        elif effect == "shadow_aura":
+            return self._create_shadow_background(width, height, (r, g, b))
+        elif effect == "gold_flame":
+            return self._create_gold_flame_background(width, height)
+        elif effect == "rainbow_border":
+            return self._create_rainbow_border_background(width, height)
+        elif effect == "cosmic_swirl":
+            return self._create_cosmic_background(width, height, (r, g, b))
+        elif effect == "electric_pulse":
+            return self._create_electric_background(width, height, (r, g, b))
+        elif effect == "spectral_fade":
+            return self._create_spectral_background(width, height, (r, g, b))
+        elif effect == "immortal_flame":
+            return self._create_immortal_flame_background(width, height)
+        elif effect == "flashback_icon":
+            bg = self._create_flashback_background(width, height)
+            return self._add_golden_border(bg, width, height)
+        else:
+            return self._create_gradient_background(width, height, (r, g, b))
+
+    def _create_golden_glow_background(self, width, height, color):
+        """Enhanced golden shimmer effect - smooth and shiny"""
+        img = Image.new('RGBA', (width, height), (50, 45, 30, 255))  # Warm golden base
+        
+        # Create smooth golden waves
+        for y in range(height):
+            for x in range(width):
+                # Smooth sine wave pattern
+                wave1 = math.sin(x * 0.02) * 0.3 + 0.7
+                wave2 = math.sin(y * 0.015) * 0.2 + 0.8
+                wave3 = math.sin((x + y) * 0.01) * 0.1 + 0.9
+                
+                intensity = wave1 * wave2 * wave3
+                
+                # Golden gradient
+                r = int(255 * intensity)
+                g = int(215 * intensity * 0.9)
+                b = int(50 * intensity * 0.3)
+                alpha = int(120 * intensity)
+                
+                current = img.getpixel((x, y))
+                new_color = (
+                    min(255, current[0] + r),
+                    min(255, current[1] + g),
+                    min(255, current[2] + b),
+                    255
+                )
+                img.putpixel((x, y), new_color)
+        
+        return img
+
+    def _create_prismatic_background(self, width, height, color):
+        """Geometric prismatic refraction effect"""
+        img = Image.new('RGBA', (width, height), (20, 40, 40, 255))
+        
+        # Create geometric patterns
+        for i in range(30):
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            size = random.randint(20, 60)
+            
+            # Draw geometric shapes with the mutation color
+            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(overlay)
+            
+            # Triangle patterns using the mutation color
+            points = [
+                (x, y - size),
+                (x - size, y + size),
+                (x + size, y + size)
+            ]
+            draw.polygon(points, fill=(*color, 80))  # Use the color parameter
+            img = Image.alpha_composite(img, overlay)
+        
+        return img
+
+    def _create_crystalline_background(self, width, height, color):
+        """Crystal structure effect"""
+        img = Image.new('RGBA', (width, height), (10, 10, 30, 255))
+        
+        # Create crystal patterns
+        for i in range(50):
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            size = random.randint(10, 30)
+            
+            # Draw crystal shapes
+            points = []
+            for j in range(6):
+                angle = j * 60
+                px = x + size * math.cos(math.radians(angle))
+                py = y + size * math.sin(math.radians(angle))
+                points.append((px, py))
+            
+            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(overlay)
+            draw.polygon(points, fill=(*color, 50))
+            img = Image.alpha_composite(img, overlay)
+        
+        return img
+
+    def _create_shadow_background(self, width, height, color):
+        """Dark smoky shadow effect"""
+        img = Image.new('RGBA', (width, height), (15, 15, 15, 255))
+        
+        # Dark smoke patterns
+        for y in range(height):
+            for x in range(width):
+                # Smoky swirl effect
+                smoke = math.sin(x * 0.03 + y * 0.02) * math.cos(x * 0.02 - y * 0.03)
+                intensity = abs(smoke) * 0.4
+                
+                if intensity > 0.1:
+                    alpha = int(80 * intensity)
+                    current = img.getpixel((x, y))
+                    new_color = (
+                        min(255, current[0] + 47 * alpha // 255),
+                        min(255, current[1] + 47 * alpha // 255),
+                        min(255, current[2] + 47 * alpha // 255),
+                        255
+                    )
+                    img.putpixel((x, y), new_color)
+        
+        return img
+    
+
+    def _create_gold_flame_background(self, width, height):
+        """Enhanced golden shimmer effect with more detail - like the golden glow but richer"""
+        img = Image.new('RGBA', (width, height), (50, 45, 30, 255))  # Warm golden base
+        
+        center_x, center_y = width // 2, height // 2
+        
+        # Create detailed golden waves
+        for y in range(height):
+            for x in range(width):
+                # Distance from center for radial effects
+                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
+                normalized_distance = distance / (max(width, height) / 2)
+                
+                # Multiple layered sine wave patterns for complexity
+                wave1 = math.sin(x * 0.02) * 0.3 + 0.7
+                wave2 = math.sin(y * 0.015) * 0.2 + 0.8
+                wave3 = math.sin((x + y) * 0.01) * 0.1 + 0.9
+                wave4 = math.sin(x * 0.025 + y * 0.018) * 0.15 + 0.85
+                wave5 = math.sin((x - y) * 0.012) * 0.12 + 0.88
+                
+                # Radial golden glow from center
+                radial_glow = math.exp(-normalized_distance * 1.2) * 0.4 + 0.6
+                
+                # Diagonal shimmer patterns
+                diagonal1 = math.sin((x + y) * 0.008 + distance * 0.005) * 0.1 + 0.9
+                diagonal2 = math.sin((x - y) * 0.006) * 0.08 + 0.92
+                
+                # Combine all wave effects
+                combined_intensity = wave1 * wave2 * wave3 * wave4 * wave5 * radial_glow * diagonal1 * diagonal2
+                
+                # Add golden hotspots for extra shimmer
+                hotspot1 = math.sin(x * 0.04) * math.sin(y * 0.03) * 0.08 + 0.92
+                hotspot2 = math.sin(x * 0.05 + math.pi/4) * math.sin(y * 0.04 + math.pi/6) * 0.06 + 0.94
+                
+                # Final intensity calculation
+                intensity = combined_intensity * hotspot1 * hotspot2
+                
+                # Smooth fade from edges
+                edge_fade = 1.0 - (normalized_distance * 0.3)
+                intensity *= max(0.5, edge_fade)
+                
+                # Rich golden gradient with variation
+                r = int(255 * intensity * (0.95 + wave1 * 0.05))
+                g = int(215 * intensity * 0.9 * (0.9 + wave2 * 0.1))
+                b = int(50 * intensity * 0.3 * (0.8 + wave3 * 0.2))
+                
+                # Add warm copper highlights in specific wave combinations
+                if wave4 > 0.9 and wave1 > 0.8:
+                    g = int(g * 0.93)  # Slightly more copper tone
+                    b = int(b * 1.4)   # Warmer undertone
+                
+                # Smooth blending with existing pixels
+                current = img.getpixel((x, y))
+                blend_factor = 0.85
+                new_color = (
+                    min(255, current[0] + int(r * blend_factor)),
+                    min(255, current[1] + int(g * blend_factor)),
+                    min(255, current[2] + int(b * blend_factor * 0.8)),
+                    255
+                )
+                img.putpixel((x, y), new_color)
+        
+        return img
+
+    def _create_rainbow_border_background(self, width, height):
+        """Rainbow gradient background with shimmering effect"""
+        img = Image.new('RGBA', (width, height), (20, 20, 20, 255))  # Dark base
+        
+        # Create rainbow gradient effect
+        for y in range(height):
+            for x in range(width):
+                # Distance from edges for border effect
+                edge_distance = min(x, y, width - x - 1, height - y - 1)
+                edge_factor = min(1.0, edge_distance / 50.0)  # Fade from edges
+                
+                # Rainbow hue based on position and shimmer
+                hue = ((x + y) * 2 + time.time() * 50) % 360
+                
+                # Convert HSV to RGB for rainbow effect
+                import colorsys
+                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 0.8, 1.0)
+                r, g, b = int(r * 255), int(g * 255), int(b * 255)
+                
+                # Create shimmer effect - more transparent white shimmer
+                shimmer = math.sin(x * 0.1) * math.sin(y * 0.1) * math.sin(time.time() * 3)
+                base_intensity = 0.15  # Reduced from 0.3 for more transparency
+                shimmer_intensity = 0.1  # Reduced from 0.2 for more transparency
+                intensity = (base_intensity + shimmer_intensity * shimmer) * (1.0 - edge_factor * 0.5)
+
+                # Add white shimmer overlay
+                white_shimmer = abs(shimmer) * 0.05  # Very subtle white shimmer
+                
+                # Apply rainbow colors with intensity
+                current = img.getpixel((x, y))
+                new_color = (
+                    min(255, current[0] + int(r * intensity) + int(255 * white_shimmer)),  # Add white shimmer
+                    min(255, current[1] + int(g * intensity) + int(255 * white_shimmer)),  # Add white shimmer
+                    min(255, current[2] + int(b * intensity) + int(255 * white_shimmer)),  # Add white shimmer
+                    255
+                )
+                img.putpixel((x, y), new_color)
+        
+        return img
+
+    def _create_cosmic_background(self, width, height, color):
+        """Cosmic space effect with stars and galaxies"""
+        img = Image.new('RGBA', (width, height), (5, 0, 20, 255))
+        
+        # Add stars
+        for i in range(100):
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            size = random.randint(1, 3)
+            
+            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(overlay)
+            draw.ellipse([x-size, y-size, x+size, y+size], fill=(255, 255, 255, 200))
+            img = Image.alpha_composite(img, overlay)
+        
+        # Add galaxy spiral
+        center_x, center_y = width // 2, height // 2
+        for y in range(height):
+            for x in range(width):
+                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
+                angle = math.atan2(y - center_y, x - center_x)
+                
+                spiral = math.sin(angle * 2 + distance * 0.05) * math.exp(-distance * 0.01)
+                if spiral > 0:
+                    alpha = int(100 * spiral)
+                    current = img.getpixel((x, y))
+                    new_color = (
+                        min(255, current[0] + color[0] * alpha // 255),
+                        min(255, current[1] + color[1] * alpha // 255),
+                        min(255, current[2] + color[2] * alpha // 255),
+                        255
+                    )
+                    img.putpixel((x, y), new_color)
+        
+        return img
+
+    def _create_electric_background(self, width, height, color):
+        """Electric electric pulse effect"""
+        img = Image.new('RGBA', (width, height), (0, 5, 0, 255))
+        
+        # Create electric patterns
+        for i in range(20):
+            # Random lightning-like paths
+            start_x = random.randint(0, width)
+            start_y = 0
+            
+            x, y = start_x, start_y
+            while y < height:
+                overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+                draw = ImageDraw.Draw(overlay)
+                
+                next_x = x + random.randint(-20, 20)
+                next_y = y + random.randint(10, 30)
+                
+                draw.line([(x, y), (next_x, next_y)], fill=(*color, 150), width=3)
+                img = Image.alpha_composite(img, overlay)
+                
+                x, y = next_x, next_y
+        
+        return img
+
+    def _create_spectral_background(self, width, height, color):
+        """Ethereal ghostly spectral effect - restored original design"""
+        img = Image.new('RGBA', (width, height), (25, 15, 40, 255))  # Dark purple base
+        
+        # Ethereal wave patterns
+        for y in range(height):
+            for x in range(width):
+                # Ghostly flowing effect
+                wave1 = math.sin(x * 0.03 + y * 0.02) * 0.5 + 0.5
+                wave2 = math.sin(x * 0.02 - y * 0.03 + math.pi/4) * 0.3 + 0.7
+                wave3 = math.sin((x + y) * 0.015) * 0.2 + 0.8
+                
+                intensity = wave1 * wave2 * wave3 * 0.7
+                
+                if intensity > 0.3:
+                    alpha = int(120 * intensity)
+                    current = img.getpixel((x, y))
+                    new_color = (
+                        min(255, current[0] + 147 * alpha // 255),  # Purple spectral
+                        min(255, current[1] + 112 * alpha // 255),
+                        min(255, current[2] + 219 * alpha // 255),
+                        255
+                    )
+                    img.putpixel((x, y), new_color)
+        
+        return img
+
+    def _create_immortal_flame_background(self, width, height):
+        """Simplified immortal flame effect"""
+        img = Image.new('RGBA', (width, height), (40, 20, 0, 255))  # Dark background
+        
+        # Simple flame gradient from bottom
+        for y in range(height):
+            flame_intensity = (height - y) / height * 0.6
+            
+            for x in range(width):
+                # Gentle wave pattern
+                wave = math.sin(x * 0.05) * 0.2 + 0.8
+                intensity = flame_intensity * wave
+                
+                if intensity > 0.2:
+                    r = int(255 * intensity)
+                    g = int(100 * intensity)
+                    b = 0
+                    
+                    current = img.getpixel((x, y))
+                    new_color = (
+                        min(255, current[0] + r // 3),  # Reduced intensity
+                        min(255, current[1] + g // 3),
+                        current[2],
+                        255
+                    )
+                    img.putpixel((x, y), new_color)
+        
+        return img
+    
+    def _create_flashback_background(self, width, height):
+        """Create FIFA Icon-style background - golden border with silver/white shiny finish"""
+        img = Image.new('RGBA', (width, height), (255, 255, 255, 255))
+        
+        # Create silver/white metallic gradient background
+        center_x, center_y = width // 2, height // 2
+        max_distance = math.sqrt(center_x**2 + center_y**2)
+        
+        for y in range(height):
+            for x in range(width):
+                # Create radial gradient from center
+                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
+                normalized_distance = distance / max_distance
+                
+                # Silver to white gradient with metallic sheen
+                base_intensity = 0.85 + (0.15 * (1.0 - normalized_distance))
+                
+                # Add diagonal shine effect
+                shine_angle = math.atan2(y - center_y, x - center_x)
+                shine_intensity = 0.95 + 0.05 * math.sin(shine_angle * 4)
+                
+                final_intensity = base_intensity * shine_intensity
+                r = int(255 * final_intensity)
+                g = int(255 * final_intensity)
+                b = int(255 * final_intensity)
+                
+                img.putpixel((x, y), (r, g, b, 255))
+        
+        return img
+
+    def _create_rarity_background(self, width, height, color):
+        """Create rarity-based gradient background"""
+        # Convert integer color to RGB tuple
+        if isinstance(color, int):
+            r = (color >> 16) & 255
+            g = (color >> 8) & 255
+            b = color & 255
+        else:
+            r, g, b = color
+        
+        return self._create_gradient_background(width, height, (r, g, b))
+
+    def _create_gradient_background(self, width, height, color):
+        """Fallback gradient background"""
+        img = Image.new('RGBA', (width, height), (30, 30, 30, 255))
+        draw = ImageDraw.Draw(img)
+        
+        # Every pixel in a row gets the same color, so draw whole rows
+        for y in range(height):
+            alpha = int(100 * (1 - y / height))
+            new_color = (
+                min(255, 30 + color[0] * alpha // 255),
+                min(255, 30 + color[1] * alpha // 255),
+                min(255, 30 + color[2] * alpha // 255),
+                255
+            )
+            draw.line([(0, y), (width - 1, y)], fill=new_color)
+        
+        return img
+
+    def _apply_mutation_profile_effects(self, profile_img, mutation):
+        """Apply mutation effects to profile picture"""
+        effect = self.mutations[mutation]["effect"]
+        
+        if effect in ["gold_flame", "golden_glow"]:
+            return self._add_golden_glow(profile_img)
+        elif effect == "crystal_border":
+            return self._add_crystal_effect(profile_img)
+        elif effect == "shadow_aura":
+            return self._add_shadow_aura(profile_img)
+        elif effect == "immortal_flame":
+            return self._add_flame_effect(profile_img)
+        elif effect == "rainbow_border":
+            return self._add_rainbow_border_effect(profile_img)
+        elif effect == "prismatic_refraction":
+            return self._add_prismatic_effect(profile_img)
+        elif effect == "cosmic_swirl":
+            return self._add_cosmic_effect(profile_img)
+        elif effect == "electric_pulse":
+            return self._add_electric_effect(profile_img)
+        elif effect == "spectral_fade":
+            return self._add_spectral_effect(profile_img)
+        else:
+            return profile_img
+
+    def _add_golden_glow(self, profile_img):
+        """Simple golden ring border"""
+        border = Image.new('RGBA', (profile_img.width + 12, profile_img.height + 12), (0, 0, 0, 0))
+        
+        # Single golden ring
+        draw = ImageDraw.Draw(border)
+        draw.ellipse([0, 0, border.width-1, border.height-1], 
+                    outline=(255, 215, 0, 255), width=6)
+        
+        # Paste original image on top
+        border.paste(profile_img, (6, 6), profile_img)
+        return border.resize(profile_img.size)
+    
+    def _add_golden_border(self, img, width, height):
+        """Add thick golden border for flashback cards"""
+        draw = ImageDraw.Draw(img)
+        border_width = 25  # Thick golden border
+        
+        # Create golden gradient border
+        for i in range(border_width):
+            # Outer border is darker gold, inner is brighter
+            gold_intensity = 0.6 + (0.4 * (border_width - i) / border_width)
+            r = int(255 * gold_intensity)
+            g = int(215 * gold_intensity)
+            b = int(0 * gold_intensity)
+            
+            draw.rectangle([i, i, width-i-1, height-i-1], 
+                          outline=(r, g, b, 255), width=1)
+        
+        return img
+
+    def _add_prismatic_effect(self, profile_img):
+        """Add turquoise prismatic border"""
+        border = Image.new('RGBA', (profile_img.width + 10, profile_img.height + 10), (0, 0, 0, 0))
+        
+        # Prismatic geometric border
+        draw = ImageDraw.Draw(border)
+        for i in range(3):
+            draw.ellipse([i*2, i*2, border.width-1-i*2, border.height-1-i*2], 
+                        outline=(64, 224, 208, 180-i*40), width=2)
+        
+        border.paste(profile_img, (5, 5), profile_img)
+        return border.resize(profile_img.size)
+
+    def _add_crystal_effect(self, profile_img):
+        """Add crystalline effect"""
+        enhanced = profile_img.copy()
+        enhancer = ImageEnhance.Contrast(enhanced)
+        enhanced = enhancer.enhance(1.5)
+        
+        # Add crystal sparkles
+        overlay = Image.new('RGBA', profile_img.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        
+        for i in range(20):
+            x = random.randint(0, profile_img.width)
+            y = random.randint(0, profile_img.height)
+            draw.rectangle([x-1, y-1, x+1, y+1], fill=(0, 255, 255, 200))
+        
+        return Image.alpha_composite(enhanced, overlay)
+
+    def _add_shadow_aura(self, profile_img):
+        """Add dark shadow aura"""
+        shadow = Image.new('RGBA', (profile_img.width + 15, profile_img.height + 15), (0, 0, 0, 0))
+        
+        # Create shadow layers
+        for i in range(8):
+            shadow_layer = Image.new('RGBA', shadow.size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(shadow_layer)
+            draw.ellipse([i, i, shadow.width-1-i, shadow.height-1-i], 
+                        outline=(75, 0, 130, 80-i*10), width=2)
+            shadow = Image.alpha_composite(shadow, shadow_layer)
+        
+        shadow.paste(profile_img, (7, 7), profile_img)
+        return shadow.resize(profile_img.size)
+
+    def _add_flame_effect(self, profile_img):
+        """Add flame effect around profile"""
+        flame = Image.new('RGBA', (profile_img.width + 20, profile_img.height + 20), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(flame)
+        
+        # Create flame-like spikes around the image
+        center_x, center_y = flame.width // 2, flame.height // 2
+        radius = min(flame.width, flame.height) // 2 - 5
+        
+        for angle in range(0, 360, 10):
+            spike_length = random.randint(5, 15)
+            end_x = center_x + (radius + spike_length) * math.cos(math.radians(angle))
+            end_y = center_y + (radius + spike_length) * math.sin(math.radians(angle))
+            
+            draw.line([(center_x, center_y), (end_x, end_y)], 
+                     fill=(255, 100, 0, 150), width=3)
+        
+        flame.paste(profile_img, (10, 10), profile_img)
+        return flame.resize(profile_img.size)
+
+    def _add_rainbow_border_effect(self, profile_img):
+        """Add animated rainbow border effect"""
+        border = Image.new('RGBA', (profile_img.width + 15, profile_img.height + 15), (0, 0, 0, 0))
+        
+        # Create multiple rainbow rings
+        import colorsys
+        import time
+        
+        center_x, center_y = border.width // 2, border.height // 2
+        
+        for ring in range(5):
+            # Create rainbow border rings
+            overlay = Image.new('RGBA', border.size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(overlay)
+            
+            # Calculate ring position and thickness
+            ring_radius = (border.width // 2) - ring * 2
+            
+            # Draw rainbow ring segments
+            for angle in range(0, 360, 10):
+                # Rainbow hue that changes over time and position
+                hue = (angle + time.time() * 100 + ring * 60) % 360
+                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 1.0, 1.0)
+                r, g, b = int(r * 255), int(g * 255), int(b * 255)
+                
+                # Calculate segment coordinates
+                start_angle = math.radians(angle)
+                end_angle = math.radians(angle + 10)
+                
+                # Draw arc segment
+                bbox = [center_x - ring_radius, center_y - ring_radius, 
+                    center_x + ring_radius, center_y + ring_radius]
+                
+                draw.arc(bbox, angle, angle + 10, fill=(r, g, b, 200 - ring * 30), width=3)
+            
+            border = Image.alpha_composite(border, overlay)
+        
+        # Paste original image in center
+        border.paste(profile_img, (7, 7), profile_img)
+        return border.resize(profile_img.size)
+
+    def _add_cosmic_effect(self, profile_img):
+        """Add cosmic space effect"""
+        cosmic = profile_img.copy()
+        
+        # Add star sparkles
+        overlay = Image.new('RGBA', cosmic.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        
+        for i in range(30):
+            x = random.randint(0, cosmic.width)
+            y = random.randint(0, cosmic.height)
+            size = random.randint(1, 2)
+            draw.ellipse([x-size, y-size, x+size, y+size], fill=(255, 255, 255, 200))
+        
+        # Add nebula effect
+        enhancer = ImageEnhance.Color(cosmic)
+        cosmic = enhancer.enhance(1.3)
+        
+        return Image.alpha_composite(cosmic, overlay)
+
+    def _add_electric_effect(self, profile_img):
+        """Add yellow electric border effect"""
+        electric = profile_img.copy()
+        
+        # Enhance brightness
+        enhancer = ImageEnhance.Brightness(electric)
+        electric = enhancer.enhance(1.2)
+        
+        # Add yellow electric border
+        overlay = Image.new('RGBA', electric.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        
+        for i in range(3):
+            draw.ellipse([i, i, electric.width-1-i, electric.height-1-i], 
+                        outline=(255, 255, 0, 200-i*50), width=2)
+        
+        return Image.alpha_composite(electric, overlay)
+
+    def _add_spectral_effect(self, profile_img):
+        """Add ethereal spectral effect - restored original design"""
+        spectral = profile_img.copy()
+        
+        # Preserve the circular mask while adding ethereal transparency
+        original_alpha = spectral.getchannel('A')
+        
+        # Create ethereal transparency but preserve the circular shape
+        new_alpha = Image.new('L', spectral.size, 200)  # Slightly more transparent
+        # Multiply the new alpha with the original circular mask
+        final_alpha = Image.new('L', spectral.size)
+        for y in range(spectral.height):
+            for x in range(spectral.width):
+                orig_val = original_alpha.getpixel((x, y))
+                new_val = new_alpha.getpixel((x, y))
+                # Multiply the alpha values (keeping circular mask)
+                final_val = int((orig_val / 255) * (new_val / 255) * 255)
+                final_alpha.putpixel((x, y), final_val)
+        
+        spectral.putalpha(final_alpha)
+        
+        # Purple ethereal flowing border
+        glow = Image.new('RGBA', spectral.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(glow)
+        
+        for i in range(5):
+            alpha_val = 160 - i * 25
+            # Purple spectral glow
+            draw.ellipse([i*2, i*2, spectral.width-1-i*2, spectral.height-1-i*2], 
+                        outline=(147, 112, 219, alpha_val), width=2)
+        
+        return Image.alpha_composite(spectral, glow)
+
+    def _draw_custom_stars(self, draw, center_x, y, star_count, mutation=None):
+        """Draw enhanced stars with mutation effects"""
+        star_spacing = 35
+        start_x = center_x - (star_count - 1) * star_spacing // 2
+        
+        for i in range(star_count):
+            x = start_x + i * star_spacing
+            
+            if mutation:
+                self._draw_mutation_star(draw, x, y, 12, mutation)
+            else:
+                self._draw_star(draw, x, y, 12)
+
+    def _draw_mutation_star(self, draw, x, y, size, mutation):
+        """Draw star with mutation effects"""
+        color = self.mutations[mutation]["color"]
+        
+        # Convert hex to RGB
+        hex_color = color.lstrip('#')
+        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        
+        # Draw enhanced star
+        if mutation == "rainbow":
+            # Rainbow star
+            colors = [(255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (0, 0, 255), (128, 0, 128)]
+            color = random.choice(colors)
+        else:
+            color = (r, g, b)
+        
+        # Draw star with glow
+        for glow_size in range(size + 5, size - 1, -1):
+            alpha = max(50, 255 - (size + 5 - glow_size) * 50)
+            self._draw_star_shape(draw, x, y, glow_size, (*color, alpha))
+
+    def _draw_star_shape(self, draw, x, y, size, color):
+        """Draw a 5-pointed star shape"""
+        points = []
+        for i in range(10):
+            angle = math.radians(i * 36 - 90)
+            radius = size if i % 2 == 0 else size * 0.4
+            px = x + radius * math.cos(angle)
+            py = y + radius * math.sin(angle)
+            points.append((px, py))
+        
+        draw.polygon(points, fill=color)
+
+    def _draw_star(self, draw, x, y, size):
+        """Draw a 5-pointed star"""
+        import math
+        
+        # Calculate star points
+        points = []
+        for i in range(10):
+            angle = (i * math.pi) / 5
+            if i % 2 == 0:
+                # Outer points
+                px = x + size * math.cos(angle - math.pi/2)
+                py = y + size * math.sin(angle - math.pi/2)
+            else:
+                # Inner points
+                px = x + (size * 0.4) * math.cos(angle - math.pi/2)
+                py = y + (size * 0.4) * math.sin(angle - math.pi/2)
+            points.append((px, py))
+        
+        # Draw star with gold color and black outline
+        draw.polygon(points, fill='#FFD700', outline='black', width=2)
+
+    def _draw_text_with_shadow(self, draw, position, text, font, color, shadow_color='black'):
+        """Draw text with shadow for better visibility"""
+        x, y = position
+        
+        # Draw shadow (offset by 2 pixels)
+        draw.text((x-1, y-1), text, font=font, fill=shadow_color, anchor="mm")
+        draw.text((x+1, y+1), text, font=font, fill=shadow_color, anchor="mm")
+        
+        # Draw main text
+        draw.text((x, y), text, font=font, fill=color, anchor="mm")
+
+    def _draw_mutation_border(self, card, mutation, border_width):
+        """Draw mutation-specific border"""
+        draw = ImageDraw.Draw(card)
+        color = self.mutations[mutation]["color"]
+        
+        # Draw multiple border lines for glow effect
+        for i in range(border_width):
+            alpha = int(255 * (1 - i / border_width))
+            draw.rectangle([i, i, card.width-1-i, card.height-1-i], outline=color, width=1)
+
+    def _apply_mutation_overlay(self, card, mutation):
+        """Apply final mutation overlay effects"""
+        effect = self.mutations[mutation]["effect"]
+        
+        overlay = Image.new('RGBA', card.size, (0, 0, 0, 0))
+        
+        if effect == "cosmic_swirl":
+            # Cosmic sparkle effect
+            draw = ImageDraw.Draw(overlay)
+            for _ in range(100):
+                x = random.randint(0, card.width)
+                y = random.randint(0, card.height)
+                size = random.randint(1, 3)
+                alpha = random.randint(100, 200)
+                draw.ellipse([x-size, y-size, x+size, y+size], 
+                           fill=(255, 255, 255, alpha))
+                
+        elif effect == "rainbow_border":  # Changed from "rainbow_explosion"
+            # Rainbow sparkle effect
+            import colorsys
+            draw = ImageDraw.Draw(overlay)
+            for _ in range(50):
+                x = random.randint(0, card.width)
+                y = random.randint(0, card.height)
+                size = random.randint(1, 4)
+                
+                # Random rainbow color
+                hue = random.uniform(0, 360)
+                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 1.0, 1.0)
+                r, g, b = int(r * 255), int(g * 255), int(b * 255)
+                
+                draw.ellipse([x-size, y-size, x+size, y+size], 
+                        fill=(r, g, b, 150))
+        
+        elif effect == "immortal_flame":
+            # Minimal flame sparkles only
+            draw = ImageDraw.Draw(overlay)
+            for _ in range(15):  # Reduced from 100+
+                x = random.randint(0, card.width)
+                y = random.randint(card.height//2, card.height)  # Only bottom half
+                size = random.randint(2, 5)
+                draw.ellipse([x-size, y-size, x+size, y+size], 
+                        fill=(255, 100, 0, 120))
+                
+        elif effect == "flashback_icon":
+            # Golden sparkle effect for flashback cards
+            draw = ImageDraw.Draw(overlay)
+            for _ in range(30):
+                x = random.randint(0, card.width)
+                y = random.randint(0, card.height)
+                size = random.randint(1, 3)
+                alpha = random.randint(120, 200)
+                draw.ellipse([x-size, y-size, x+size, y+size], 
+                           fill=(255, 215, 0, alpha))  # Golden sparkles
+        
+        # Always ensure text is above effects by drawing text last
+        if overlay:
+            card = Image.alpha_composite(card, overlay)
+        
+        return card
+
+
+# Each worker process builds its own renderer (and font/background caches) on first use
+_worker_renderer = None
+
+
+def _get_worker_renderer() -> CardRenderer:
+    global _worker_renderer
+    if _worker_renderer is None:
+        _worker_renderer = CardRenderer()
+    return _worker_renderer
+
+
+def _worker_cache_info() -> Dict:
+    renderer = _get_worker_renderer()
+    return {
+        'pid': os.getpid(),
+        'fonts': renderer._font_cache.info(),
+        'backgrounds': renderer._background_cache.info(),
+    }
+
+
+def render_card_spec(spec: Dict):
+    """Worker entry point - spec is a plain dict so it pickles cheaply. Returns (png, cache info)"""
+    return _get_worker_renderer().render_card(spec), _worker_cache_info()
+
+
+def render_collage_pngs(card_pngs: List[bytes]):
+    """Worker entry point for showcase collages. Returns (png, cache info)"""
+    return _get_worker_renderer().render_collage(card_pngs), _worker_cache_info()
+
+
+class CardRenderService:
+    """
+    Runs render jobs on a process pool with a bounded queue.
+
+    At most `max_queue` jobs are admitted at once; further callers wait for a
+    slot (back-pressure). Once more jobs are admitted than there are workers,
+    new cards are rendered with the cheaper "fast" preset.
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None):
+        self.max_workers = max_workers or RENDER_CONFIG["max_workers"] or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_queue = max_queue or RENDER_CONFIG["max_queue"]
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._pending = 0
+        self.stats = {'rendered': 0, 'fast_renders': 0, 'waited': 0, 'failures': 0, 'pool_restarts': 0}
+        # latest font/background cache counters reported back by each worker process
+        self.worker_caches: Dict[int, Dict] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def is_saturated(self) -> bool:
+        return self._pending >= self.max_workers
+
+    def choose_preset(self) -> str:
+        return PRESET_FAST if self.is_saturated() else PRESET_FULL
+
+    async def _submit(self, func, arg):
+        if self._slots.locked():
+            self.stats['waited'] += 1
+        async with self._slots:
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                try:
+                    result, cache_info = await loop.run_in_executor(self._get_executor(), func, arg)
+                except BrokenProcessPool:
+                    # a worker died (OOM etc.) - start a fresh pool and retry once
+                    print("⚠️ Card render pool broke, restarting it")
+                    self.stats['pool_restarts'] += 1
+                    self._executor = None
+                    self.worker_caches.clear()
+                    result, cache_info = await loop.run_in_executor(self._get_executor(), func, arg)
+                self.worker_caches[cache_info['pid']] = cache_info
+                return result
+            except Exception as e:
+                self.stats['failures'] += 1
+                print(f"Error rendering card: {e}")
+                return None
+            finally:
+                self._pending -= 1
+
+    async def render_card(self, spec: Dict) -> Optional[bytes]:
+        """Render a card spec to PNG bytes, using the fast preset when the pool is saturated"""
+        if spec.get('preset') is None:
+            spec = dict(spec, preset=self.choose_preset())
+        if spec['preset'] == PRESET_FAST:
+            self.stats['fast_renders'] += 1
+        png = await self._submit(render_card_spec, spec)
+        if png:
+            self.stats['rendered'] += 1
+        return png
+
+    async def render_collage(self, card_pngs: List[bytes]) -> Optional[bytes]:
+        return await self._submit(render_collage_pngs, list(card_pngs))
+
+    def cache_info(self) -> Dict:
+        """Font/background cache counters summed over the worker processes"""
+        totals = {}
+        for info in self.worker_caches.values():
+            for name in ('fonts', 'backgrounds'):
+                bucket = totals.setdefault(name, {})
+                for stat, value in info[name].items():
+                    if stat != 'hit_rate':
+                        bucket[stat] = bucket.get(stat, 0) + value
+        for bucket in totals.values():
+            bucket['mb'] = round(bucket.get('mb', 0), 2)
+            lookups = bucket.get('hits', 0) + bucket.get('misses', 0)
+            bucket['hit_rate'] = round(bucket.get('hits', 0) / lookups * 100, 1) if lookups else 0.0
+        return totals
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,172 @@
+"""
+Vectorized Monte-Carlo crate simulator
+Draws rank ranges, ranks, mutations and star rarities for N crates in one shot with NumPy
+"""
+
+import numpy as np
+
+from .osugacha_config import CRATE_CONFIG, MUTATIONS, FLASHBACK_CARDS, RARITY_CONFIG, GAME_CONFIG
+
+MAX_SIM_RANK = 10000
+FLASHBACK_CRATES = ("rainbow", "diamond")
+
+
+class CrateSimulator:
+    """Batch simulator built from the same tables the live open_crate path uses"""
+
+    def __init__(self, gacha_system=None, seed=None):
+        self.gacha_system = gacha_system
+        self.crate_config = gacha_system.crate_config if gacha_system else CRATE_CONFIG
+        self.mutations = gacha_system.mutations if gacha_system else MUTATIONS
+        self.flashback_cards = gacha_system.flashback_cards if gacha_system else FLASHBACK_CARDS
+        self.rng = np.random.default_rng(seed)
+
+        self.star_lut = self._build_star_lut()
+        self.pp_lut = self._build_pp_lut()
+
+    # ---- lookup tables ----
+
+    def _build_star_lut(self):
+        """stars for every rank 0..MAX_SIM_RANK (index = rank)"""
+        lut = np.ones(MAX_SIM_RANK + 1, dtype=np.int8)
+        # reversed so the first matching range wins, like get_rarity_from_rank
+        for rank_range, rarity in reversed(list(RARITY_CONFIG.items())):
+            if isinstance(rank_range, tuple):
+                lo, hi = rank_range
+                lut[lo:min(hi, MAX_SIM_RANK) + 1] = rarity["stars"]
+        lut[1] = RARITY_CONFIG[1]["stars"]
+        return lut
+
+    def _build_pp_lut(self):
+        """pp for every rank from the live leaderboard cache, with the old fallback approximation"""
+        ranks = np.arange(MAX_SIM_RANK + 1)
+        lut = np.maximum(28000 - ranks * 2, 1000).astype(np.float64)
+        index = getattr(self.gacha_system, 'rank_index', None)
+        if index is not None:
+            for player in index.players:
+                rank = player.get('rank', 0)
+                if 0 < rank <= MAX_SIM_RANK:
+                    lut[rank] = player.get('pp', lut[rank])
+        return lut
+
+    def _mutation_table(self, crate_type):
+        names = [
+            name for name in self.mutations
+            if name != "flashback" or crate_type in FLASHBACK_CRATES
+        ]
+        weights = np.array([self.mutations[name]["rarity"] for name in names], dtype=np.float64)
+        multipliers = np.array([self.mutations[name]["multiplier"] for name in names], dtype=np.float64)
+        return names, np.cumsum(weights), multipliers
+
+    # ---- pricing ----
+
+    def _base_prices(self, ranks):
+        """Vectorized copy of OsuGachaSystem.calculate_card_price's rank tiers"""
+        # every tier is evaluated for every rank, out-of-tier ranks can hit negative fractional powers
+        r = ranks.astype(np.float64)
+        conditions = [
+            ranks >= 8001, ranks >= 6001, ranks >= 4001, ranks >= 2001, ranks >= 1001,
+            ranks >= 501, ranks >= 101, ranks >= 51, ranks >= 11,
+            ranks == 1, ranks == 2, ranks == 3, ranks == 4, ranks == 5,
+        ]
+        choices = [
+            200 + (600 - 200) * (10000 - r) / 2000,
+            600 + (1500 - 600) * (8000 - r) / 2000,
+            1500 + (4000 - 1500) * (6000 - r) / 2000,
+            4000 + (12000 - 4000) * (4000 - r) / 2000,
+            12000 + (50000 - 12000) * (2000 - r) / 1000,
+            50000 + (200000 - 50000) * (1000 - r) / 500,
+            200000 + (2000000 - 200000) * ((500 - r) / 400) ** 2,
+            2000000 + (20000000 - 2000000) * ((100 - r) / 50) ** 2.5,
+            20000000 + (200000000 - 20000000) * ((50 - r) / 40) ** 3,
+            np.full_like(r, 1500000000),
+            np.full_like(r, 1000000000),
+            np.full_like(r, 700000000),
+            np.full_like(r, 500000000),
+            np.full_like(r, 400000000),
+        ]
+        # Ranks 6-10
+        default = 200000000 + 200000000 * ((10 - r) / 4) ** 2
+        return np.select(conditions, choices, default=default)
+
+    def _prices(self, ranks, pp, stars, multipliers):
+        star_multiplier = 1 + (stars - 1) * 0.35
+        pp_factor = 1 + (pp / 25000) * 0.15
+        with np.errstate(invalid='ignore'):
+            base_prices = self._base_prices(ranks)
+        prices = np.floor(base_prices * star_multiplier * pp_factor)
+        prices = np.floor(prices * multipliers)
+        return np.maximum(100, prices).astype(np.int64)
+
+    # ---- simulation ----
+
+    def simulate(self, crate_type, amount):
+        """Simulate `amount` openings of one crate type, returns summary statistics"""
+        crate_info = self.crate_config[crate_type]
+        rng = self.rng
+
+        # Rank ranges - same float weights as the live roll (RangeTable)
+        rank_ranges = [r for r in crate_info["rank_ranges"] if r["weight"] > 0]
+        weights = np.array([r["weight"] for r in rank_ranges], dtype=np.float64)
+        mins = np.array([r["min"] for r in rank_ranges], dtype=np.int64)
+        maxs = np.array([r["max"] for r in rank_ranges], dtype=np.int64)
+        cumulative = np.cumsum(weights)
+        range_idx = np.minimum(np.searchsorted(cumulative, rng.random(amount) * cumulative[-1], side='right'),
+                               len(rank_ranges) - 1)
+        ranks = rng.integers(mins[range_idx], maxs[range_idx] + 1)
+        np.clip(ranks, 1, MAX_SIM_RANK, out=ranks)
+
+        stars = self.star_lut[ranks].astype(np.float64)
+        pp = self.pp_lut[ranks]
+
+        # Mutations - flat chance, then weighted pick among the crate's available mutations
+        names, mutation_cumulative, mutation_multipliers = self._mutation_table(crate_type)
+        mutation_idx = np.full(amount, -1, dtype=np.int64)
+        mutated = rng.random(amount) <= GAME_CONFIG.get("mutation_chance", 0.1)
+        n_mutated = int(mutated.sum())
+        if n_mutated and len(names):
+            rolls = rng.random(n_mutated) * mutation_cumulative[-1]
+            mutation_idx[mutated] = np.minimum(
+                np.searchsorted(mutation_cumulative, rolls, side='left'), len(names) - 1
+            )
+        multipliers = np.ones(amount, dtype=np.float64)
+        has_mutation = mutation_idx >= 0
+        multipliers[has_mutation] = mutation_multipliers[mutation_idx[has_mutation]]
+
+        # Flashback replaces the player with a fixed 6-star flashback card
+        if "flashback" in names and self.flashback_cards:
+            flashback = mutation_idx == names.index("flashback")
+            n_flashback = int(flashback.sum())
+            if n_flashback:
+                cards = list(self.flashback_cards.values())
+                picks = rng.integers(0, len(cards), n_flashback)
+                ranks[flashback] = [cards[i]["player_data"]["rank"] for i in picks]
+                pp[flashback] = [cards[i]["player_data"]["pp"] for i in picks]
+                stars[flashback] = 6
+
+        values = self._prices(ranks, pp, stars, multipliers)
+
+        mutation_counts = {"none": int((~has_mutation).sum())}
+        counts = np.bincount(mutation_idx[has_mutation], minlength=len(names))
+        for name, count in zip(names, counts):
+            if count:
+                mutation_counts[name] = int(count)
+
+        star_counts = np.bincount(stars.astype(np.int64), minlength=7)
+
+        # aggregates only, the per-package arrays are freed with this frame
+        return {
+            'mutations': mutation_counts,
+            'stars_count': {s: int(star_counts[s]) for s in range(1, 7)},
+            'rank_1_count': int((ranks == 1).sum()),
+            'top_10_count': int((ranks <= 10).sum()),
+            'top_50_count': int((ranks <= 50).sum()),
+            'top_100_count': int((ranks <= 100).sum()),
+            'avg_value': float(values.mean()),
+            'max_value': int(values.max()),
+            'min_value': int(values.min()),
+            'median_value': float(np.median(values)),
+            'value_percentiles': {p: float(v) for p, v in zip((10, 50, 90, 99), np.percentile(values, (10, 50, 90, 99)))},
+            'best_rank': int(ranks.min()),
+            'total_simulated': amount
+        }
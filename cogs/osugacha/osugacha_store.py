@@ -5,6 +5,7 @@ import time
 import asyncio
 import random
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
 
 # Import all the configuration and system
@@ -711,7 +712,7 @@ class OsuGachaStoreCog(commands.Cog, name="Osu Gacha Store"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -726,7 +727,7 @@ class OsuGachaStoreCog(commands.Cog, name="Osu Gacha Store"):
                     "bg_games_won": 0,
                     "bg_games_played": 0
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
 
         # Add confirmation setting to existing users who don't have it
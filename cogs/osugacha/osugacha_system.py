@@ -1,6 +1,5 @@
 import discord
 from discord.ext import commands
-import aiohttp
 import asyncio
 import random
 import math
@@ -8,15 +7,22 @@ import time
 import json
 from datetime import datetime, timezone, timedelta
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from utils.http_client import http_client
+from utils.storage import atomic_write_json
+from utils.bounded_cache import BoundedCache
 from io import BytesIO
 import os #os
 
 # Import all the configuration
 from .osugacha_config import *
+from .osugacha_rank_index import RankIndex, RangeTable, compile_range_tables
+from .osugacha_cache_builder import LeaderboardCacheBuilder, merge_top_pages
+from .osugacha_renderer import CardRenderer, CardRenderService, CARD_TEMPLATE_VERSION, PRESET_FULL
+from .osugacha_card_cache import RenderedCardCache, card_cache_key
 
-class OsuGachaSystem:
+class OsuGachaSystem(CardRenderer):
     """Core gacha system with all game logic and functionality"""
     
     def __init__(self, bot=None):
@@ -28,17 +34,33 @@ class OsuGachaSystem:
         
         self.access_token = None
         self.token_expires_at = 0
-        
-        # Enhanced caching for 10k players
-        self.leaderboard_cache = []
+        self._token_lock = asyncio.Lock()   # one token request at a time, the rest wait for its token
+
+        # osu! api goes through the shared pool - token bucket + bearer token injection
+        http_client.configure_host(
+            'osu.ppy.sh',
+            rate=API_CONFIG["rate_limit"],
+            burst=API_CONFIG["rate_limit_burst"],
+            token_provider=self.get_access_token_with_retry,
+            on_unauthorized=self.invalidate_access_token
+        )
+        
+        # Enhanced caching for 10k players - kept rank-sorted in rank_index for O(log n) sampling
+        self._leaderboard_cache = []
+        self.rank_index = RankIndex()
+        self.range_tables = compile_range_tables(CRATE_CONFIG)
         self.leaderboard_cache_time = 0
         self.leaderboard_cache_duration = GAME_CONFIG["cache_duration"]
-        self.player_cache = {}
-        self.player_cache_duration = GAME_CONFIG["cache_duration"]
 
         self.cache_file = FILE_PATHS["cache_file"]
         self._load_cache_from_disk()
         self._cache_building = False
+
+        # Pages are fetched concurrently and checkpointed; refreshes run in the background
+        # while the old cache keeps serving, then swap in with one assignment
+        self.cache_builder = LeaderboardCacheBuilder(FILE_PATHS["cache_checkpoint_file"])
+        self._refresh_task = None
+        self.top_refresh_time = self.leaderboard_cache_time
         
         # Load configurations from config file
         self.mutations = MUTATIONS
@@ -50,10 +72,14 @@ class OsuGachaSystem:
         self.rarity_config = RARITY_CONFIG
         self.achievement_definitions = ACHIEVEMENT_DEFINITIONS
 
-            # ADD: Image optimization
-        self._font_cache = {}
-        self._background_cache = {}
-        self._profile_cache = {}
+            # ADD: Image optimization - all caches are bounded LRUs with hit/miss counters
+        CardRenderer.__init__(self)
+        self._profile_cache = BoundedCache(
+            "avatars", max_items=RENDER_CONFIG["profile_cache_items"],
+            max_bytes=RENDER_CONFIG["profile_cache_mb"] * 1024 * 1024
+        )
+        self.render_service = CardRenderService()
+        self.card_cache = RenderedCardCache()
 
         # Cooldown system
         self.user_cooldowns = {}
@@ -64,6 +90,23 @@ class OsuGachaSystem:
         self._achievement_lock = asyncio.Lock()
         self._cooldown_lock = asyncio.Lock()
 
+    @property
+    def leaderboard_cache(self):
+        return self._leaderboard_cache
+
+    @leaderboard_cache.setter
+    def leaderboard_cache(self, players):
+        # Every assignment re-indexes once, so per-roll lookups never rescan the list
+        self.rank_index = RankIndex(players)
+        self._leaderboard_cache = self.rank_index.players
+
+    def _get_range_table(self, crate_type):
+        table = self.range_tables.get(crate_type)
+        if table is None:
+            table = RangeTable(self.crate_config[crate_type]["rank_ranges"])
+            self.range_tables[crate_type] = table
+        return table
+
     def _load_cache_from_disk(self):
         """Load leaderboard cache from disk"""
         try:
@@ -71,38 +114,56 @@ class OsuGachaSystem:
                 with open(self.cache_file, 'r') as f:
                     cache_data = json.load(f)
                     
-                # Check if cache is still valid
-                cache_age = time.time() - cache_data.get('timestamp', 0)
-                if cache_age < self.leaderboard_cache_duration:
-                    self.leaderboard_cache = cache_data.get('players', [])
-                    self.leaderboard_cache_time = cache_data.get('timestamp', 0)
-                    print(f"✅ Loaded {len(self.leaderboard_cache)} players from cache file")
+                # Expired caches are still loaded - they keep serving while a background refresh runs
+                self.leaderboard_cache = cache_data.get('players', [])
+                self.leaderboard_cache_time = cache_data.get('timestamp', 0)
+                if self.is_cache_stale():
+                    print(f"⚠️ Loaded {len(self.leaderboard_cache)} players from expired cache file, will refresh in background")
                 else:
-                    print("⚠️ Cache file expired, will rebuild on first use")
+                    print(f"✅ Loaded {len(self.leaderboard_cache)} players from cache file")
         except Exception as e:
             print(f"⚠️ Failed to load cache from disk: {e}")
 
-    def _save_cache_to_disk(self):
+    def _save_cache_to_disk(self, players=None, timestamp=None):
         """Save leaderboard cache to disk"""
         try:
             cache_data = {
-                'players': self.leaderboard_cache,
-                'timestamp': self.leaderboard_cache_time
+                'players': players if players is not None else self.leaderboard_cache,
+                'timestamp': timestamp if timestamp is not None else self.leaderboard_cache_time
             }
             
             os.makedirs('data', exist_ok=True)
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f)
+            atomic_write_json(self.cache_file, cache_data)
             print("💾 Saved leaderboard cache to disk")
         except Exception as e:
             print(f"⚠️ Failed to save cache to disk: {e}")
 
+    async def _save_cache_to_disk_async(self):
+        """Write the current cache off the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._save_cache_to_disk, self.leaderboard_cache, self.leaderboard_cache_time)
+
+    def is_cache_stale(self):
+        return (time.time() - self.leaderboard_cache_time) >= self.leaderboard_cache_duration
+
+    def _swap_leaderboard_cache(self, players, full=True):
+        """Atomically replace the cache - readers see either the old or the new list, never a partial one"""
+        self.leaderboard_cache = players
+        now = time.time()
+        if full:
+            self.leaderboard_cache_time = now
+        self.top_refresh_time = now
+
     async def get_access_token(self):
         """Get access token from osu! API v2"""
         if self.access_token and time.time() < self.token_expires_at:
             return self.access_token
         
-        async with aiohttp.ClientSession() as session:
+        async with self._token_lock:
+            # a caller that held the lock before us may have fetched one already
+            if self.access_token and time.time() < self.token_expires_at:
+                return self.access_token
+            
             data = {
                 'client_id': self.client_id,
                 'client_secret': self.client_secret,
@@ -110,14 +171,19 @@ class OsuGachaSystem:
                 'scope': 'public'
             }
             
-            async with session.post('https://osu.ppy.sh/oauth/token', data=data) as response:
-                if response.status != 200:
-                    raise Exception(f"Token request failed: {response.status}")
-                
-                token_data = await response.json()
-                self.access_token = token_data['access_token']
-                self.token_expires_at = time.time() + token_data['expires_in'] - API_CONFIG["token_buffer_seconds"]
-                return self.access_token
+            response = await http_client.post('https://osu.ppy.sh/oauth/token', data=data)
+            if response.status != 200:
+                raise Exception(f"Token request failed: {response.status}")
+            
+            token_data = response.json()
+            self.access_token = token_data['access_token']
+            self.token_expires_at = time.time() + token_data['expires_in'] - API_CONFIG["token_buffer_seconds"]
+            return self.access_token
+
+    def invalidate_access_token(self):
+        """Drop the cached token so the next request fetches a new one"""
+        self.access_token = None
+        self.token_expires_at = 0
 
     async def get_access_token_with_retry(self, retries=3):
         """Get access token with retry logic"""
@@ -130,76 +196,72 @@ class OsuGachaSystem:
                 await asyncio.sleep(API_CONFIG["retry_delays"][attempt])
         return None
 
-    async def build_leaderboard_cache(self):
-        """Build aggressive cache of top 10k players with race condition protection"""
+    async def build_leaderboard_cache(self, force=False):
+        """Build cache of the top players - pages fetched concurrently, resumable from checkpoint"""
         async with self._cache_lock:
-            if self.leaderboard_cache and (time.time() - self.leaderboard_cache_time) < self.leaderboard_cache_duration:
+            if not force and self.leaderboard_cache and not self.is_cache_stale():
                 return self.leaderboard_cache
             
             token = await self.get_access_token_with_retry()
             if not token:
                 raise Exception("API not responding, try again later")
-                
-            leaderboard = []
             
             print(f"🔄 Building cache for {API_CONFIG['max_pages']} pages (up to ~{API_CONFIG['max_pages'] * 50} players)")
             
             try:
-                headers = {'Authorization': f'Bearer {token}'}
-                
-                for page in range(1, API_CONFIG["max_pages"] + 1):
-                    # Log progress every 100 pages DURING the actual requests
-                    if page % 10 == 0:
-                        print(f"📊 Progress: {page}/{API_CONFIG['max_pages']} pages ({len(leaderboard)} players cached so far)")
-                    
-                    url = f'https://osu.ppy.sh/api/v2/rankings/osu/performance'
-                    params = {'page': page}
-                    
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, headers=headers, params=params) as response:
-                            if response.status == 200:
-                                data = await response.json()
-                                
-                                for user_data in data.get('ranking', []):
-                                    user_info = user_data.get('user', {})
-                                    
-                                    player = {
-                                        "user_id": str(user_info.get('id', 0)),
-                                        "username": user_info.get('username', 'Unknown'),
-                                        "rank": user_data.get('global_rank', 0),
-                                        "pp": round(float(user_data.get('pp', 0)), 2),
-                                        "accuracy": round(float(user_data.get('hit_accuracy', 0)), 2),
-                                        "play_count": int(user_data.get('play_count', 0)),
-                                        "country": user_info.get('country_code', 'XX'),
-                                        "level": round(float(user_data.get('level', {}).get('current', 0)), 2),
-                                        "profile_picture": user_info.get('avatar_url', f"https://a.ppy.sh/{user_info.get('id', 0)}")
-                                    }
-                                    leaderboard.append(player)
-                            else:
-                                print(f"❌ API error on page {page}: Status {response.status}")
-                                if response.status == 429:  # Rate limited
-                                    print("⚠️ Rate limited, waiting 5 seconds...")
-                                    await asyncio.sleep(5)
-                                    continue
-                                else:
-                                    raise Exception(f"API error: {response.status}")
-                    
-                    await asyncio.sleep(API_CONFIG["request_delay"])
-                    
+                leaderboard = await self.cache_builder.build(API_CONFIG["max_pages"])
             except Exception as e:
+                # Finished pages stay checkpointed, the next attempt resumes from there
                 print(f"❌ Cache build failed: {e}")
                 raise Exception("API not responding, try again later")
             
             print(f"✅ Cache build complete! Cached {len(leaderboard)} players")
             
-            self.leaderboard_cache = leaderboard
-            self.leaderboard_cache_time = time.time()
-            self._save_cache_to_disk()
+            self._swap_leaderboard_cache(leaderboard)
+            await self._save_cache_to_disk_async()
             return leaderboard
 
+    async def refresh_leaderboard_top(self):
+        """Refetch only the top pages and merge them into the current cache"""
+        async with self._cache_lock:
+            top_pages = API_CONFIG["top_refresh_pages"]
+            top_players = await self.cache_builder.fetch_top(top_pages)
+            
+            self._swap_leaderboard_cache(merge_top_pages(self.leaderboard_cache, top_players), full=False)
+            await self._save_cache_to_disk_async()
+            print(f"✅ Refreshed top {top_pages} leaderboard pages ({len(top_players)} players)")
+            return self.leaderboard_cache
+
+    async def rebuild_leaderboard_cache(self):
+        """Force a full rebuild, even if the cache is still fresh"""
+        return await self.build_leaderboard_cache(force=True)
+
+    def schedule_cache_refresh(self, top_only=False):
+        """Start a background refresh unless one is already running - callers keep using the current cache"""
+        if self._refresh_task and not self._refresh_task.done():
+            return self._refresh_task
+        self._refresh_task = asyncio.create_task(self._background_refresh(top_only))
+        return self._refresh_task
+
+    async def _background_refresh(self, top_only):
+        try:
+            if top_only:
+                await self.refresh_leaderboard_top()
+            else:
+                print(f"🔄 Cache expired ({(time.time() - self.leaderboard_cache_time)/3600:.1f}h old), refreshing in background...")
+                await self.build_leaderboard_cache()
+        except Exception as e:
+            print(f"❌ Background cache refresh error: {e}")
+
     async def build_leaderboard_cache_with_retry(self, retries=3, ctx=None):
         """Build leaderboard cache with retry logic and user notification"""
         
+        # A stale cache keeps serving - refresh it in the background instead of making the user wait
+        if self.leaderboard_cache and len(self.leaderboard_cache) >= 500:
+            if self.is_cache_stale():
+                self.schedule_cache_refresh()
+            return self.leaderboard_cache
+        
         # Check if cache is already being built
         if self._cache_building:
             print("🔄 Cache already building, waiting...")
@@ -313,42 +375,16 @@ class OsuGachaSystem:
             self._cache_building = False
         
     async def _ensure_cache_is_valid(self):
-        """Automatically rebuild cache if it's outdated (silent background rebuild)"""
+        """Kick off a background refresh if the cache (or just its top pages) is outdated"""
         try:
-            # Check if cache is expired
-            cache_age = time.time() - self.leaderboard_cache_time
-            
-            # If cache is outdated and not currently rebuilding
-            if cache_age >= self.leaderboard_cache_duration and not self._cache_building:
-                print(f"🔄 Cache expired ({cache_age/3600:.1f}h old), rebuilding automatically...")
-                
-                # Set flag to prevent concurrent rebuilds
-                self._cache_building = True
-                
-                try:
-                    # Silent rebuild without user messages
-                    leaderboard = await self.build_leaderboard_cache()
-                    
-                    if leaderboard and len(leaderboard) > 0:
-                        self.leaderboard_cache = leaderboard
-                        self.leaderboard_cache_time = time.time()
-                        self._save_cache_to_disk()
-                        print(f"✅ Auto-rebuild complete! Cached {len(leaderboard)} players")
-                    else:
-                        print("⚠️ Auto-rebuild failed - no data received")
-                        
-                except Exception as e:
-                    print(f"❌ Auto-rebuild error: {e}")
-                    
-                finally:
-                    self._cache_building = False
-                    
+            if not self.leaderboard_cache:
+                return
+            if self.is_cache_stale():
+                self.schedule_cache_refresh()
+            elif time.time() - self.top_refresh_time >= API_CONFIG["top_refresh_interval"]:
+                self.schedule_cache_refresh(top_only=True)
         except Exception as e:
             print(f"Error in cache validation: {e}")
-        
-        finally:
-            # Always reset the building flag
-            self._cache_building = False
 
     async def get_player_by_rank_with_retry(self, rank, retries=3):
         """Get player by rank with retry logic"""
@@ -398,10 +434,7 @@ class OsuGachaSystem:
         for attempt in range(max_attempts):
             try:
                 # Select rank range based on weights
-                selected_range = random.choices(
-                    crate_info["rank_ranges"],
-                    weights=[r["weight"] for r in crate_info["rank_ranges"]]
-                )[0]
+                selected_range = self._get_range_table(crate_type).pick()
                 
                 # Get player from range
                 player = await self.get_random_player_from_range(
@@ -450,32 +483,15 @@ class OsuGachaSystem:
         if not self.leaderboard_cache:
             await self.build_leaderboard_cache_with_retry()
         
-        # Filter players in range
-        valid_players = [
-            player for player in self.leaderboard_cache
-            if min_rank <= player['rank'] <= max_rank
-        ]
-        
-        if valid_players:
-            return random.choice(valid_players)
-        
-        return None
-    
-    def _build_rank_lookup(self):
-        """Build rank lookup index for faster searches"""
-        if not hasattr(self, '_rank_lookup') or not self._rank_lookup:
-            self._rank_lookup = {player['rank']: player for player in self.leaderboard_cache}
-            self._username_lookup = {player['username'].lower(): player for player in self.leaderboard_cache}
-        return self._rank_lookup, self._username_lookup
+        # Bisect into the rank-sorted index instead of filtering the whole cache
+        return self.rank_index.random_in_range(min_rank, max_rank)
     
     def get_player_from_cache_optimized(self, rank=None, username=None):
         """Get player from cache with optimized lookup"""
-        rank_lookup, username_lookup = self._build_rank_lookup()
-        
         if rank is not None:
-            return rank_lookup.get(rank)
+            return self.rank_index.by_rank(rank)
         elif username is not None:
-            return username_lookup.get(username.lower())
+            return self.rank_index.by_username(username)
         
         return None
 
@@ -489,20 +505,14 @@ class OsuGachaSystem:
         if user_id and guild_id:
             event_bonuses = self.check_event_bonuses(user_id, guild_id, crate_type)
         
-        crate_data = self.crate_config[crate_type]
-        rank_ranges = crate_data["rank_ranges"]
-        
-        # Create weighted list of rank ranges
-        weighted_ranges = []
-        for range_data in rank_ranges:
-            weight = int(range_data["weight"] * 100)  # Convert to integer weight
-            weighted_ranges.extend([range_data] * weight)
+        # Precompiled cumulative weights - no per-call list building
+        range_table = self._get_range_table(crate_type)
         
-        if not weighted_ranges:
+        if not range_table:
             raise Exception("No valid rank ranges found")
         
         # Select random range
-        selected_range = random.choice(weighted_ranges)
+        selected_range = range_table.pick()
         
         # Get random player from that range
         attempts = 0
@@ -581,7 +591,7 @@ class OsuGachaSystem:
                         card_data["flashback_year"] = flashback_year
                         card_data["rarity_name"] = flashback_year  # Override rarity name with year
                     
-                    return card_data
+                    return track(card_data)
                 
                 attempts += 1
                 await asyncio.sleep(0.1)  # Small delay between attempts
@@ -870,36 +880,12 @@ class OsuGachaSystem:
         for user_id in expired_users:
             del self.user_cooldowns[user_id]
 
-    def cleanup_caches(self):
-        """Clean up memory caches periodically"""
-        # Clean font cache if too large
-        if len(getattr(self, '_font_cache', {})) > 20:
-            self._font_cache.clear()
-        
-        # Clean background cache if too large  
-        if len(getattr(self, '_background_cache', {})) > 50:
-            # Keep only the 25 most recently used
-            items = list(self._background_cache.items())
-            self._background_cache = dict(items[-25:])
-        
-        # Clean profile cache if too large
-        if len(getattr(self, '_profile_cache', {})) > 100:
-            # Keep only the 50 most recently used
-            items = list(self._profile_cache.items())
-            self._profile_cache = dict(items[-50:])
-        
-       # print("🧹 Cleaned up image caches")
-
     def check_cooldown(self, user_id):
         """Check if user is on cooldown with automatic cleanup"""
         # Clean up old cooldowns periodically
         if random.random() < 0.1:  # 10% chance to clean up on each check
             self.cleanup_old_cooldowns()
 
-        # Clean up caches occasionally
-        if random.random() < 0.05:  # 5% chance to clean up caches
-            self.cleanup_caches()
-        
         if user_id not in self.user_cooldowns:
             return 0
         
@@ -991,7 +977,7 @@ class OsuGachaSystem:
             user_id_str = str(user_id)
             if user_id_str not in self.bot.osu_gacha_data:
                 from .osugacha_config import GAME_CONFIG
-                self.bot.osu_gacha_data[user_id_str] = {
+                self.bot.osu_gacha_data[user_id_str] = track({
                     "currency": GAME_CONFIG["default_starting_coins"],
                     "cards": {},
                     "crates": {},
@@ -999,7 +985,7 @@ class OsuGachaSystem:
                     "total_opens": 0,
                     "achievements": {},
                     "achievement_stats": {}
-                }
+                })
             return self.bot.osu_gacha_data[user_id_str]
         else:
             # Fallback for when bot reference isn't available
@@ -1170,9 +1156,9 @@ class OsuGachaSystem:
                 rank = int(search)
                 if 1 <= rank <= 10000:
                     # Find player by rank in cached data
-                    for player in self.leaderboard_cache:
-                        if player['rank'] == rank:
-                            return player
+                    player = self.rank_index.by_rank(rank)
+                    if player:
+                        return player
             
             # Search by username
             search_lower = search.lower()
@@ -1186,1106 +1172,62 @@ class OsuGachaSystem:
             print(f"Error searching player preview: {e}")
             return None
         
-    def _get_cached_font(self, font_name, size):
-        """Get cached font to avoid repeated loading with cross-platform support"""
-        cache_key = f"{font_name}_{size}"
-        if cache_key not in self._font_cache:
-            # Try multiple font options for cross-platform compatibility
-            font_options = []
-            
-            # Map Windows fonts to cross-platform alternatives
-            if font_name == "arialbd.ttf":  # Arial Bold
-                if os.name == 'nt':  # Windows
-                    font_options = [
-                        "arialbd.ttf",
-                        "arial-bold.ttf",
-                        "C:/Windows/Fonts/arialbd.ttf",
-                    ]
-                else:  # Linux/Unix
-                    font_options = [
-                        "DejaVuSans-Bold.ttf",
-                        "LiberationSans-Bold.ttf",
-                        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-                        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-                        "/System/Library/Fonts/Arial Bold.ttf",  # macOS
-                    ]
-            elif font_name == "arial.ttf":  # Arial Regular
-                if os.name == 'nt':  # Windows
-                    font_options = [
-                        "arial.ttf",
-                        "C:/Windows/Fonts/arial.ttf",
-                    ]
-                else:  # Linux/Unix
-                    font_options = [
-                        "DejaVuSans.ttf",
-                        "LiberationSans-Regular.ttf", 
-                        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                        "/System/Library/Fonts/Arial.ttf",  # macOS
-                    ]
-            else:
-                font_options = [font_name]
-            
-            # Try each font option until one works
-            font_loaded = False
-            for font_option in font_options:
-                try:
-                    self._font_cache[cache_key] = ImageFont.truetype(font_option, size)
-                    font_loaded = True
-                    break
-                except:
-                    continue
-            
-            # Fall back to default if no fonts work, but with a reasonable size
-            if not font_loaded:
-                try:
-                    # Try to get a default font that's closer to the requested size
-                    self._font_cache[cache_key] = ImageFont.load_default().font_variant(size=size)
-                except:
-                    self._font_cache[cache_key] = ImageFont.load_default()
-                    
-        return self._font_cache[cache_key]
-
-    def _get_fitted_font(self, text, font_name, max_size, max_width, min_size=12):
-        """Get a font that fits the text within the specified width"""
-        # Start with the maximum size and work down
-        for size in range(max_size, min_size - 1, -1):
-            font = self._get_cached_font(font_name, size)
-            # Get text bounding box
-            bbox = font.getbbox(text)
-            text_width = bbox[2] - bbox[0]
-            
-            if text_width <= max_width:
-                return font
-        
-        # If even minimum size doesn't fit, return minimum size font
-        return self._get_cached_font(font_name, min_size)
-
     async def create_card_image(self, player_data, stars, mutation=None, card_price=0, flashback_year=None):
-        """Create enhanced card image with FULL mutation effects - OPTIMIZED"""
+        """Create card image - served from the rendered card cache, otherwise drawn in the render process pool"""
         try:
-            # Card dimensions
-            width, height = 400, 600
-            
-            # Create base card
-            card = Image.new('RGBA', (width, height), (255, 255, 255, 0))
-            
-            # Get rarity info
-            rarity = self.get_rarity_from_rank(player_data['rank'])
-            
-            border_color = f"#{rarity['color']:06x}"
-            # Use cached backgrounds when possible
-            bg_cache_key = f"{mutation or 'rarity'}_{width}_{height}_{rarity['color']}"
-            if bg_cache_key in self._background_cache:
-                background = self._background_cache[bg_cache_key]
-            else:
-                # Create background based on mutation or rarity
-                if mutation and mutation in self.mutations:
-                    background = self._create_mutation_background(width, height, mutation)
-                    border_color = self.mutations[mutation]["color"]
-                else:
-                    background = self._create_rarity_background(width, height, rarity['color'])
-                
-                # Cache the background (limit cache size)
-                if len(self._background_cache) < 50:
-                    self._background_cache[bg_cache_key] = background
-            
-            # Paste background
-            card.paste(background, (0, 0))
-            
-            # Enhanced border for mutations
-            if mutation:
-                border_width = 15
-                self._draw_mutation_border(card, mutation, border_width)
-            else:
-                border_width = 12
-                draw = ImageDraw.Draw(card)
-                draw.rectangle([0, 0, width-1, height-1], outline=border_color, width=border_width)
-            
-            # Continue with rest of card creation
-            draw = ImageDraw.Draw(card)
-            
-            # Download and add profile picture with caching
-            profile_cache_key = player_data['user_id']
-            profile_img = None
-            
-            if profile_cache_key in self._profile_cache:
-                profile_img = self._profile_cache[profile_cache_key]
-            else:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(player_data['profile_picture']) as resp:
-                            if resp.status == 200:
-                                img_data = await resp.read()
-                                profile_img = Image.open(BytesIO(img_data)).convert('RGBA')
-                                profile_img = profile_img.resize((140, 140))
-                                
-                                # Add profile picture with circular crop
-                                mask = Image.new('L', (140, 140), 0)
-                                mask_draw = ImageDraw.Draw(mask)
-                                mask_draw.ellipse((0, 0, 140, 140), fill=255)
-                                profile_img.putalpha(mask)
-                                
-                                # Cache the profile image (limit cache size)
-                                if len(self._profile_cache) < 100:
-                                    self._profile_cache[profile_cache_key] = profile_img
-                except:
-                    pass
-            
-            if profile_img:
-                # Apply mutation effects to profile picture
-                if mutation:
-                    profile_img = self._apply_mutation_profile_effects(profile_img, mutation)
-                
-                # Paste profile picture
-                card.paste(profile_img, (130, 30), profile_img)
-            
-            # Use cached fonts
-            text_font = self._get_cached_font("arialbd.ttf", 20)
-            small_font = self._get_cached_font("arial.ttf", 16)
-            value_font = self._get_cached_font("arialbd.ttf", 22)
-            
-            # Player name with dynamic font sizing (no truncation)
-            name_text = player_data['username']
-            # Calculate max width for name (card width minus padding)
-            max_name_width = width - 40  # 20px padding on each side
-            title_font = self._get_fitted_font(name_text, "arialbd.ttf", 32, max_name_width, 16)
-            
-            self._draw_text_with_shadow(draw, (width//2, 190), name_text, title_font, 'white', 'black')
-            
-            # Custom stars with mutation effects
-            star_y = 225
-            self._draw_custom_stars(draw, width//2, star_y, stars, mutation)
-            
-            # Special handling for flashback cards
-            if mutation == "flashback":
-                # Add "ICON" text at top - with subtle shadow for visibility
-                icon_font = self._get_cached_font("arialbd.ttf", 24)
-                # Add subtle dark shadow for contrast
-                draw.text((width//2-1, 50-1), "ICON", font=icon_font, fill="black", anchor="mm")
-                draw.text((width//2, 50), "ICON", font=icon_font, fill="#FFD700", anchor="mm")
-                
-                # Use darker gold with subtle shadows for better visibility
-                text_color = "#B8860B"  # Darker gold for better contrast
-                shadow_color = "rgba(0,0,0,0.3)"  # Light shadow
-                
-                # Stats with subtle shadows
-                draw.text((width//2-1, 270-1), f"#{player_data['rank']:,}", font=text_font, fill="black", anchor="mm")
-                draw.text((width//2, 270), f"#{player_data['rank']:,}", font=text_font, fill=text_color, anchor="mm")
-                
-                draw.text((width//2-1, 305-1), f"{player_data['pp']:,} PP", font=text_font, fill="black", anchor="mm")
-                draw.text((width//2, 305), f"{player_data['pp']:,} PP", font=text_font, fill=text_color, anchor="mm")
-                
-                draw.text((width//2-1, 340-1), f"{player_data['accuracy']}% ACC", font=text_font, fill="black", anchor="mm")
-                draw.text((width//2, 340), f"{player_data['accuracy']}% ACC", font=text_font, fill=text_color, anchor="mm")
-                
-                # Country code with shadow
-                draw.text((width//2-1, 375-1), player_data['country'], font=small_font, fill="black", anchor="mm")
-                draw.text((width//2, 375), player_data['country'], font=small_font, fill=text_color, anchor="mm")
-                
-                # Level and plays with shadow
-                draw.text((width//2-1, 410-1), f"Level {player_data['level']} • {player_data['play_count']:,} plays", font=small_font, fill="black", anchor="mm")
-                draw.text((width//2, 410), f"Level {player_data['level']} • {player_data['play_count']:,} plays", font=small_font, fill=text_color, anchor="mm")
-                
-                # Mutation text with shadow
-                mutation_name = self.mutations[mutation]["name"]
-                mutation_text = f"{mutation_name}"
-                draw.text((width//2-1, 445-1), mutation_text, font=text_font, fill="black", anchor="mm")
-                draw.text((width//2, 445), mutation_text, font=text_font, fill="#DAA520", anchor="mm")  # Goldenrod for mutation
-                
-                # Price text with shadow
-                if card_price >= 1000000000:
-                    price_color = '#FF1493'
-                elif card_price >= 100000000:
-                    price_color = '#FF4500'
-                elif card_price >= 10000000:
-                    price_color = '#FFD700'
-                elif card_price >= 1000000:
-                    price_color = '#00FFFF'
-                else:
-                    price_color = '#00FF00'
-                
-                price_text = f"Value: {card_price:,} coins"
-                draw.text((width//2-1, 520-1), price_text, font=value_font, fill="black", anchor="mm")
-                draw.text((width//2, 520), price_text, font=value_font, fill=price_color, anchor="mm")
-                
-                # Year with shadow
-                if flashback_year:
-                    draw.text((width//2-1, 560-1), flashback_year, font=text_font, fill="black", anchor="mm")
-                    draw.text((width//2, 560), flashback_year, font=text_font, fill='#DAA520', anchor="mm")
-                
-                stars = 6  # Force 6 stars display
-            else:
-                # Stats with mutation coloring
-                text_color = self.mutations[mutation]["color"] if mutation else 'white'
-                
-                self._draw_text_with_shadow(draw, (width//2, 270), f"#{player_data['rank']:,}", text_font, text_color, 'black')
-                self._draw_text_with_shadow(draw, (width//2, 305), f"{player_data['pp']:,} PP", text_font, text_color, 'black')
-                self._draw_text_with_shadow(draw, (width//2, 340), f"{player_data['accuracy']}% ACC", text_font, text_color, 'black')
-                
-                # Country code
-                self._draw_text_with_shadow(draw, (width//2, 375), player_data['country'], small_font, text_color, 'black')
-                
-                # Level and plays
-                self._draw_text_with_shadow(draw, (width//2, 410), f"Level {player_data['level']} • {player_data['play_count']:,} plays", small_font, text_color, 'black')
-                
-                # Mutation text
-                if mutation:
-                    mutation_name = self.mutations[mutation]["name"]
-                    mutation_text = f"{mutation_name}"
-                    self._draw_text_with_shadow(draw, (width//2, 445), mutation_text, text_font, self.mutations[mutation]["color"], 'black')
-                
-                # Card value with tier-based colors
-                if mutation == "flashback":
-                    # Flashback cards have fixed color
-                    price_color = '#FFD700'
-                elif card_price >= 1000000000:
-                    price_color = '#FF1493'
-                elif card_price >= 100000000:
-                    price_color = '#FF4500'
-                elif card_price >= 10000000:
-                    price_color = '#FFD700'
-                elif card_price >= 1000000:
-                    price_color = '#00FFFF'
-                else:
-                    price_color = '#00FF00'
-                
-                price_text = f"Value: {card_price:,} coins"
-                self._draw_text_with_shadow(draw, (width//2, 520), price_text, value_font, price_color, 'black')
-                
-                # Rarity name
-                if flashback_year:
-                    self._draw_text_with_shadow(draw, (width//2, 560), flashback_year, text_font, '#FFD700', 'black')
-                else:
-                    self._draw_text_with_shadow(draw, (width//2, 560), rarity['name'], text_font, 'white', 'black')
-
-            # Player name - handle flashback separately
-            if mutation == "flashback":
-                # Darker gold with shadow for player name
-                draw.text((width//2-1, 190-1), name_text, font=title_font, fill="black", anchor="mm")
-                draw.text((width//2, 190), name_text, font=title_font, fill="#DAA520", anchor="mm")
-            else:
-                self._draw_text_with_shadow(draw, (width//2, 190), name_text, title_font, 'white', 'black')
-            
-            # Apply final mutation effects overlay
-            if mutation:
-                card = self._apply_mutation_overlay(card, mutation)
-            
-            # Save to BytesIO
-            img_buffer = BytesIO()
-            card.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            
-            return img_buffer
+            cache_key = card_cache_key(player_data, stars, mutation, card_price, flashback_year, CARD_TEMPLATE_VERSION)
+            cached = await self.card_cache.get(cache_key)
+            if cached:
+                return BytesIO(cached)
+            
+            spec = {
+                'player_data': dict(player_data),
+                'stars': stars,
+                'mutation': mutation,
+                'card_price': card_price,
+                'flashback_year': flashback_year,
+                'rarity': self.get_rarity_from_rank(player_data['rank']),
+                'profile_bytes': await self._get_profile_bytes(player_data),
+                'preset': self.render_service.choose_preset(),
+            }
+            png = await self.render_service.render_card(spec)
             
+            # Only full quality renders are cached - fast ones are a load fallback
+            # and the avatar has to have loaded, otherwise the card is missing its picture
+            if png and spec['preset'] == PRESET_FULL and spec['profile_bytes']:
+                await self.card_cache.put(cache_key, png)
+            return BytesIO(png) if png else None
         except Exception as e:
             print(f"Error creating card image: {e}")
             return None
 
-    # ENHANCED MUTATION EFFECT METHODS - FULL IMPLEMENTATIONS
-    def _create_mutation_background(self, width, height, mutation):
-        """Create mutation-specific background with dramatic effects"""
-        effect = self.mutations[mutation]["effect"]
-        color = self.mutations[mutation]["color"]
-        
-        # Convert hex to RGB
-        hex_color = color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        
-        if effect == "golden_glow":
-            return self._create_golden_glow_background(width, height, (r, g, b))
-        elif effect == "prismatic_refraction":
-            return self._create_prismatic_background(width, height, (r, g, b))  # Add color parameter
-        elif effect == "crystal_border":
-            return self._create_crystalline_background(width, height, (r, g, b))
-        elif effect == "shadow_aura":
-            return self._create_shadow_background(width, height, (r, g, b))
-        elif effect == "gold_flame":
-            return self._create_gold_flame_background(width, height)
-        elif effect == "rainbow_border":
-            return self._create_rainbow_border_background(width, height)
-        elif effect == "cosmic_swirl":
-            return self._create_cosmic_background(width, height, (r, g, b))
-        elif effect == "electric_pulse":
-            return self._create_electric_background(width, height, (r, g, b))
-        elif effect == "spectral_fade":
-            return self._create_spectral_background(width, height, (r, g, b))
-        elif effect == "immortal_flame":
-            return self._create_immortal_flame_background(width, height)
-        elif effect == "flashback_icon":
-            bg = self._create_flashback_background(width, height)
-            return self._add_golden_border(bg, width, height)
-        else:
-            return self._create_gradient_background(width, height, (r, g, b))
-
-    def _create_golden_glow_background(self, width, height, color):
-        """Enhanced golden shimmer effect - smooth and shiny"""
-        img = Image.new('RGBA', (width, height), (50, 45, 30, 255))  # Warm golden base
-        
-        # Create smooth golden waves
-        for y in range(height):
-            for x in range(width):
-                # Smooth sine wave pattern
-                wave1 = math.sin(x * 0.02) * 0.3 + 0.7
-                wave2 = math.sin(y * 0.015) * 0.2 + 0.8
-                wave3 = math.sin((x + y) * 0.01) * 0.1 + 0.9
-                
-                intensity = wave1 * wave2 * wave3
-                
-                # Golden gradient
-                r = int(255 * intensity)
-                g = int(215 * intensity * 0.9)
-                b = int(50 * intensity * 0.3)
-                alpha = int(120 * intensity)
-                
-                current = img.getpixel((x, y))
-                new_color = (
-                    min(255, current[0] + r),
-                    min(255, current[1] + g),
-                    min(255, current[2] + b),
-                    255
-                )
-                img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _create_prismatic_background(self, width, height, color):
-        """Geometric prismatic refraction effect"""
-        img = Image.new('RGBA', (width, height), (20, 40, 40, 255))
-        
-        # Create geometric patterns
-        for i in range(30):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            size = random.randint(20, 60)
-            
-            # Draw geometric shapes with the mutation color
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-            
-            # Triangle patterns using the mutation color
-            points = [
-                (x, y - size),
-                (x - size, y + size),
-                (x + size, y + size)
-            ]
-            draw.polygon(points, fill=(*color, 80))  # Use the color parameter
-            img = Image.alpha_composite(img, overlay)
-        
-        return img
-
-    def _create_crystalline_background(self, width, height, color):
-        """Crystal structure effect"""
-        img = Image.new('RGBA', (width, height), (10, 10, 30, 255))
-        
-        # Create crystal patterns
-        for i in range(50):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            size = random.randint(10, 30)
-            
-            # Draw crystal shapes
-            points = []
-            for j in range(6):
-                angle = j * 60
-                px = x + size * math.cos(math.radians(angle))
-                py = y + size * math.sin(math.radians(angle))
-                points.append((px, py))
-            
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-            draw.polygon(points, fill=(*color, 50))
-            img = Image.alpha_composite(img, overlay)
-        
-        return img
-
-    def _create_shadow_background(self, width, height, color):
-        """Dark smoky shadow effect"""
-        img = Image.new('RGBA', (width, height), (15, 15, 15, 255))
-        
-        # Dark smoke patterns
-        for y in range(height):
-            for x in range(width):
-                # Smoky swirl effect
-                smoke = math.sin(x * 0.03 + y * 0.02) * math.cos(x * 0.02 - y * 0.03)
-                intensity = abs(smoke) * 0.4
-                
-                if intensity > 0.1:
-                    alpha = int(80 * intensity)
-                    current = img.getpixel((x, y))
-                    new_color = (
-                        min(255, current[0] + 47 * alpha // 255),
-                        min(255, current[1] + 47 * alpha // 255),
-                        min(255, current[2] + 47 * alpha // 255),
-                        255
-                    )
-                    img.putpixel((x, y), new_color)
-        
-        return img
-    
-
-    def _create_gold_flame_background(self, width, height):
-        """Enhanced golden shimmer effect with more detail - like the golden glow but richer"""
-        img = Image.new('RGBA', (width, height), (50, 45, 30, 255))  # Warm golden base
-        
-        center_x, center_y = width // 2, height // 2
-        
-        # Create detailed golden waves
-        for y in range(height):
-            for x in range(width):
-                # Distance from center for radial effects
-                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                normalized_distance = distance / (max(width, height) / 2)
-                
-                # Multiple layered sine wave patterns for complexity
-                wave1 = math.sin(x * 0.02) * 0.3 + 0.7
-                wave2 = math.sin(y * 0.015) * 0.2 + 0.8
-                wave3 = math.sin((x + y) * 0.01) * 0.1 + 0.9
-                wave4 = math.sin(x * 0.025 + y * 0.018) * 0.15 + 0.85
-                wave5 = math.sin((x - y) * 0.012) * 0.12 + 0.88
-                
-                # Radial golden glow from center
-                radial_glow = math.exp(-normalized_distance * 1.2) * 0.4 + 0.6
-                
-                # Diagonal shimmer patterns
-                diagonal1 = math.sin((x + y) * 0.008 + distance * 0.005) * 0.1 + 0.9
-                diagonal2 = math.sin((x - y) * 0.006) * 0.08 + 0.92
-                
-                # Combine all wave effects
-                combined_intensity = wave1 * wave2 * wave3 * wave4 * wave5 * radial_glow * diagonal1 * diagonal2
-                
-                # Add golden hotspots for extra shimmer
-                hotspot1 = math.sin(x * 0.04) * math.sin(y * 0.03) * 0.08 + 0.92
-                hotspot2 = math.sin(x * 0.05 + math.pi/4) * math.sin(y * 0.04 + math.pi/6) * 0.06 + 0.94
-                
-                # Final intensity calculation
-                intensity = combined_intensity * hotspot1 * hotspot2
-                
-                # Smooth fade from edges
-                edge_fade = 1.0 - (normalized_distance * 0.3)
-                intensity *= max(0.5, edge_fade)
-                
-                # Rich golden gradient with variation
-                r = int(255 * intensity * (0.95 + wave1 * 0.05))
-                g = int(215 * intensity * 0.9 * (0.9 + wave2 * 0.1))
-                b = int(50 * intensity * 0.3 * (0.8 + wave3 * 0.2))
-                
-                # Add warm copper highlights in specific wave combinations
-                if wave4 > 0.9 and wave1 > 0.8:
-                    g = int(g * 0.93)  # Slightly more copper tone
-                    b = int(b * 1.4)   # Warmer undertone
-                
-                # Smooth blending with existing pixels
-                current = img.getpixel((x, y))
-                blend_factor = 0.85
-                new_color = (
-                    min(255, current[0] + int(r * blend_factor)),
-                    min(255, current[1] + int(g * blend_factor)),
-                    min(255, current[2] + int(b * blend_factor * 0.8)),
-                    255
-                )
-                img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _create_rainbow_border_background(self, width, height):
-        """Rainbow gradient background with shimmering effect"""
-        img = Image.new('RGBA', (width, height), (20, 20, 20, 255))  # Dark base
-        
-        # Create rainbow gradient effect
-        for y in range(height):
-            for x in range(width):
-                # Distance from edges for border effect
-                edge_distance = min(x, y, width - x - 1, height - y - 1)
-                edge_factor = min(1.0, edge_distance / 50.0)  # Fade from edges
-                
-                # Rainbow hue based on position and shimmer
-                hue = ((x + y) * 2 + time.time() * 50) % 360
-                
-                # Convert HSV to RGB for rainbow effect
-                import colorsys
-                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 0.8, 1.0)
-                r, g, b = int(r * 255), int(g * 255), int(b * 255)
-                
-                # Create shimmer effect - more transparent white shimmer
-                shimmer = math.sin(x * 0.1) * math.sin(y * 0.1) * math.sin(time.time() * 3)
-                base_intensity = 0.15  # Reduced from 0.3 for more transparency
-                shimmer_intensity = 0.1  # Reduced from 0.2 for more transparency
-                intensity = (base_intensity + shimmer_intensity * shimmer) * (1.0 - edge_factor * 0.5)
-
-                # Add white shimmer overlay
-                white_shimmer = abs(shimmer) * 0.05  # Very subtle white shimmer
-                
-                # Apply rainbow colors with intensity
-                current = img.getpixel((x, y))
-                new_color = (
-                    min(255, current[0] + int(r * intensity) + int(255 * white_shimmer)),  # Add white shimmer
-                    min(255, current[1] + int(g * intensity) + int(255 * white_shimmer)),  # Add white shimmer
-                    min(255, current[2] + int(b * intensity) + int(255 * white_shimmer)),  # Add white shimmer
-                    255
-                )
-                img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _create_cosmic_background(self, width, height, color):
-        """Cosmic space effect with stars and galaxies"""
-        img = Image.new('RGBA', (width, height), (5, 0, 20, 255))
-        
-        # Add stars
-        for i in range(100):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            size = random.randint(1, 3)
-            
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-            draw.ellipse([x-size, y-size, x+size, y+size], fill=(255, 255, 255, 200))
-            img = Image.alpha_composite(img, overlay)
-        
-        # Add galaxy spiral
-        center_x, center_y = width // 2, height // 2
-        for y in range(height):
-            for x in range(width):
-                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                angle = math.atan2(y - center_y, x - center_x)
-                
-                spiral = math.sin(angle * 2 + distance * 0.05) * math.exp(-distance * 0.01)
-                if spiral > 0:
-                    alpha = int(100 * spiral)
-                    current = img.getpixel((x, y))
-                    new_color = (
-                        min(255, current[0] + color[0] * alpha // 255),
-                        min(255, current[1] + color[1] * alpha // 255),
-                        min(255, current[2] + color[2] * alpha // 255),
-                        255
-                    )
-                    img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _create_electric_background(self, width, height, color):
-        """Electric electric pulse effect"""
-        img = Image.new('RGBA', (width, height), (0, 5, 0, 255))
-        
-        # Create electric patterns
-        for i in range(20):
-            # Random lightning-like paths
-            start_x = random.randint(0, width)
-            start_y = 0
-            
-            x, y = start_x, start_y
-            while y < height:
-                overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-                draw = ImageDraw.Draw(overlay)
-                
-                next_x = x + random.randint(-20, 20)
-                next_y = y + random.randint(10, 30)
-                
-                draw.line([(x, y), (next_x, next_y)], fill=(*color, 150), width=3)
-                img = Image.alpha_composite(img, overlay)
-                
-                x, y = next_x, next_y
-        
-        return img
-
-    def _create_spectral_background(self, width, height, color):
-        """Ethereal ghostly spectral effect - restored original design"""
-        img = Image.new('RGBA', (width, height), (25, 15, 40, 255))  # Dark purple base
-        
-        # Ethereal wave patterns
-        for y in range(height):
-            for x in range(width):
-                # Ghostly flowing effect
-                wave1 = math.sin(x * 0.03 + y * 0.02) * 0.5 + 0.5
-                wave2 = math.sin(x * 0.02 - y * 0.03 + math.pi/4) * 0.3 + 0.7
-                wave3 = math.sin((x + y) * 0.015) * 0.2 + 0.8
-                
-                intensity = wave1 * wave2 * wave3 * 0.7
-                
-                if intensity > 0.3:
-                    alpha = int(120 * intensity)
-                    current = img.getpixel((x, y))
-                    new_color = (
-                        min(255, current[0] + 147 * alpha // 255),  # Purple spectral
-                        min(255, current[1] + 112 * alpha // 255),
-                        min(255, current[2] + 219 * alpha // 255),
-                        255
-                    )
-                    img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _create_immortal_flame_background(self, width, height):
-        """Simplified immortal flame effect"""
-        img = Image.new('RGBA', (width, height), (40, 20, 0, 255))  # Dark background
-        
-        # Simple flame gradient from bottom
-        for y in range(height):
-            flame_intensity = (height - y) / height * 0.6
-            
-            for x in range(width):
-                # Gentle wave pattern
-                wave = math.sin(x * 0.05) * 0.2 + 0.8
-                intensity = flame_intensity * wave
-                
-                if intensity > 0.2:
-                    r = int(255 * intensity)
-                    g = int(100 * intensity)
-                    b = 0
-                    
-                    current = img.getpixel((x, y))
-                    new_color = (
-                        min(255, current[0] + r // 3),  # Reduced intensity
-                        min(255, current[1] + g // 3),
-                        current[2],
-                        255
-                    )
-                    img.putpixel((x, y), new_color)
-        
-        return img
-    
-    def _create_flashback_background(self, width, height):
-        """Create FIFA Icon-style background - golden border with silver/white shiny finish"""
-        img = Image.new('RGBA', (width, height), (255, 255, 255, 255))
-        
-        # Create silver/white metallic gradient background
-        center_x, center_y = width // 2, height // 2
-        max_distance = math.sqrt(center_x**2 + center_y**2)
-        
-        for y in range(height):
-            for x in range(width):
-                # Create radial gradient from center
-                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                normalized_distance = distance / max_distance
-                
-                # Silver to white gradient with metallic sheen
-                base_intensity = 0.85 + (0.15 * (1.0 - normalized_distance))
-                
-                # Add diagonal shine effect
-                shine_angle = math.atan2(y - center_y, x - center_x)
-                shine_intensity = 0.95 + 0.05 * math.sin(shine_angle * 4)
-                
-                final_intensity = base_intensity * shine_intensity
-                r = int(255 * final_intensity)
-                g = int(255 * final_intensity)
-                b = int(255 * final_intensity)
-                
-                img.putpixel((x, y), (r, g, b, 255))
-        
-        return img
-
-    def _create_rarity_background(self, width, height, color):
-        """Create rarity-based gradient background"""
-        # Convert integer color to RGB tuple
-        if isinstance(color, int):
-            r = (color >> 16) & 255
-            g = (color >> 8) & 255
-            b = color & 255
-        else:
-            r, g, b = color
-        
-        return self._create_gradient_background(width, height, (r, g, b))
-
-    def _create_gradient_background(self, width, height, color):
-        """Fallback gradient background"""
-        img = Image.new('RGBA', (width, height), (30, 30, 30, 255))
-        
-        for y in range(height):
-            alpha = int(100 * (1 - y / height))
-            for x in range(width):
-                current = img.getpixel((x, y))
-                new_color = (
-                    min(255, current[0] + color[0] * alpha // 255),
-                    min(255, current[1] + color[1] * alpha // 255),
-                    min(255, current[2] + color[2] * alpha // 255),
-                    255
-                )
-                img.putpixel((x, y), new_color)
-        
-        return img
-
-    def _apply_mutation_profile_effects(self, profile_img, mutation):
-        """Apply mutation effects to profile picture"""
-        effect = self.mutations[mutation]["effect"]
-        
-        if effect in ["gold_flame", "golden_glow"]:
-            return self._add_golden_glow(profile_img)
-        elif effect == "crystal_border":
-            return self._add_crystal_effect(profile_img)
-        elif effect == "shadow_aura":
-            return self._add_shadow_aura(profile_img)
-        elif effect == "immortal_flame":
-            return self._add_flame_effect(profile_img)
-        elif effect == "rainbow_border":
-            return self._add_rainbow_border_effect(profile_img)
-        elif effect == "prismatic_refraction":
-            return self._add_prismatic_effect(profile_img)
-        elif effect == "cosmic_swirl":
-            return self._add_cosmic_effect(profile_img)
-        elif effect == "electric_pulse":
-            return self._add_electric_effect(profile_img)
-        elif effect == "spectral_fade":
-            return self._add_spectral_effect(profile_img)
-        else:
-            return profile_img
-
-    def _add_golden_glow(self, profile_img):
-        """Simple golden ring border"""
-        border = Image.new('RGBA', (profile_img.width + 12, profile_img.height + 12), (0, 0, 0, 0))
-        
-        # Single golden ring
-        draw = ImageDraw.Draw(border)
-        draw.ellipse([0, 0, border.width-1, border.height-1], 
-                    outline=(255, 215, 0, 255), width=6)
-        
-        # Paste original image on top
-        border.paste(profile_img, (6, 6), profile_img)
-        return border.resize(profile_img.size)
-    
-    def _add_golden_border(self, img, width, height):
-        """Add thick golden border for flashback cards"""
-        draw = ImageDraw.Draw(img)
-        border_width = 25  # Thick golden border
-        
-        # Create golden gradient border
-        for i in range(border_width):
-            # Outer border is darker gold, inner is brighter
-            gold_intensity = 0.6 + (0.4 * (border_width - i) / border_width)
-            r = int(255 * gold_intensity)
-            g = int(215 * gold_intensity)
-            b = int(0 * gold_intensity)
-            
-            draw.rectangle([i, i, width-i-1, height-i-1], 
-                          outline=(r, g, b, 255), width=1)
-        
-        return img
-
-    def _add_prismatic_effect(self, profile_img):
-        """Add turquoise prismatic border"""
-        border = Image.new('RGBA', (profile_img.width + 10, profile_img.height + 10), (0, 0, 0, 0))
-        
-        # Prismatic geometric border
-        draw = ImageDraw.Draw(border)
-        for i in range(3):
-            draw.ellipse([i*2, i*2, border.width-1-i*2, border.height-1-i*2], 
-                        outline=(64, 224, 208, 180-i*40), width=2)
-        
-        border.paste(profile_img, (5, 5), profile_img)
-        return border.resize(profile_img.size)
-
-    def _add_crystal_effect(self, profile_img):
-        """Add crystalline effect"""
-        enhanced = profile_img.copy()
-        enhancer = ImageEnhance.Contrast(enhanced)
-        enhanced = enhancer.enhance(1.5)
-        
-        # Add crystal sparkles
-        overlay = Image.new('RGBA', profile_img.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        for i in range(20):
-            x = random.randint(0, profile_img.width)
-            y = random.randint(0, profile_img.height)
-            draw.rectangle([x-1, y-1, x+1, y+1], fill=(0, 255, 255, 200))
-        
-        return Image.alpha_composite(enhanced, overlay)
-
-    def _add_shadow_aura(self, profile_img):
-        """Add dark shadow aura"""
-        shadow = Image.new('RGBA', (profile_img.width + 15, profile_img.height + 15), (0, 0, 0, 0))
-        
-        # Create shadow layers
-        for i in range(8):
-            shadow_layer = Image.new('RGBA', shadow.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(shadow_layer)
-            draw.ellipse([i, i, shadow.width-1-i, shadow.height-1-i], 
-                        outline=(75, 0, 130, 80-i*10), width=2)
-            shadow = Image.alpha_composite(shadow, shadow_layer)
-        
-        shadow.paste(profile_img, (7, 7), profile_img)
-        return shadow.resize(profile_img.size)
-
-    def _add_flame_effect(self, profile_img):
-        """Add flame effect around profile"""
-        flame = Image.new('RGBA', (profile_img.width + 20, profile_img.height + 20), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(flame)
-        
-        # Create flame-like spikes around the image
-        center_x, center_y = flame.width // 2, flame.height // 2
-        radius = min(flame.width, flame.height) // 2 - 5
-        
-        for angle in range(0, 360, 10):
-            spike_length = random.randint(5, 15)
-            end_x = center_x + (radius + spike_length) * math.cos(math.radians(angle))
-            end_y = center_y + (radius + spike_length) * math.sin(math.radians(angle))
-            
-            draw.line([(center_x, center_y), (end_x, end_y)], 
-                     fill=(255, 100, 0, 150), width=3)
-        
-        flame.paste(profile_img, (10, 10), profile_img)
-        return flame.resize(profile_img.size)
-
-    def _add_rainbow_border_effect(self, profile_img):
-        """Add animated rainbow border effect"""
-        border = Image.new('RGBA', (profile_img.width + 15, profile_img.height + 15), (0, 0, 0, 0))
-        
-        # Create multiple rainbow rings
-        import colorsys
-        import time
-        
-        center_x, center_y = border.width // 2, border.height // 2
-        
-        for ring in range(5):
-            # Create rainbow border rings
-            overlay = Image.new('RGBA', border.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-            
-            # Calculate ring position and thickness
-            ring_radius = (border.width // 2) - ring * 2
-            
-            # Draw rainbow ring segments
-            for angle in range(0, 360, 10):
-                # Rainbow hue that changes over time and position
-                hue = (angle + time.time() * 100 + ring * 60) % 360
-                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 1.0, 1.0)
-                r, g, b = int(r * 255), int(g * 255), int(b * 255)
-                
-                # Calculate segment coordinates
-                start_angle = math.radians(angle)
-                end_angle = math.radians(angle + 10)
-                
-                # Draw arc segment
-                bbox = [center_x - ring_radius, center_y - ring_radius, 
-                    center_x + ring_radius, center_y + ring_radius]
-                
-                draw.arc(bbox, angle, angle + 10, fill=(r, g, b, 200 - ring * 30), width=3)
-            
-            border = Image.alpha_composite(border, overlay)
-        
-        # Paste original image in center
-        border.paste(profile_img, (7, 7), profile_img)
-        return border.resize(profile_img.size)
-
-    def _add_cosmic_effect(self, profile_img):
-        """Add cosmic space effect"""
-        cosmic = profile_img.copy()
-        
-        # Add star sparkles
-        overlay = Image.new('RGBA', cosmic.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        for i in range(30):
-            x = random.randint(0, cosmic.width)
-            y = random.randint(0, cosmic.height)
-            size = random.randint(1, 2)
-            draw.ellipse([x-size, y-size, x+size, y+size], fill=(255, 255, 255, 200))
-        
-        # Add nebula effect
-        enhancer = ImageEnhance.Color(cosmic)
-        cosmic = enhancer.enhance(1.3)
-        
-        return Image.alpha_composite(cosmic, overlay)
-
-    def _add_electric_effect(self, profile_img):
-        """Add yellow electric border effect"""
-        electric = profile_img.copy()
-        
-        # Enhance brightness
-        enhancer = ImageEnhance.Brightness(electric)
-        electric = enhancer.enhance(1.2)
-        
-        # Add yellow electric border
-        overlay = Image.new('RGBA', electric.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        for i in range(3):
-            draw.ellipse([i, i, electric.width-1-i, electric.height-1-i], 
-                        outline=(255, 255, 0, 200-i*50), width=2)
-        
-        return Image.alpha_composite(electric, overlay)
-
-    def _add_spectral_effect(self, profile_img):
-        """Add ethereal spectral effect - restored original design"""
-        spectral = profile_img.copy()
-        
-        # Preserve the circular mask while adding ethereal transparency
-        original_alpha = spectral.getchannel('A')
-        
-        # Create ethereal transparency but preserve the circular shape
-        new_alpha = Image.new('L', spectral.size, 200)  # Slightly more transparent
-        # Multiply the new alpha with the original circular mask
-        final_alpha = Image.new('L', spectral.size)
-        for y in range(spectral.height):
-            for x in range(spectral.width):
-                orig_val = original_alpha.getpixel((x, y))
-                new_val = new_alpha.getpixel((x, y))
-                # Multiply the alpha values (keeping circular mask)
-                final_val = int((orig_val / 255) * (new_val / 255) * 255)
-                final_alpha.putpixel((x, y), final_val)
-        
-        spectral.putalpha(final_alpha)
-        
-        # Purple ethereal flowing border
-        glow = Image.new('RGBA', spectral.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(glow)
-        
-        for i in range(5):
-            alpha_val = 160 - i * 25
-            # Purple spectral glow
-            draw.ellipse([i*2, i*2, spectral.width-1-i*2, spectral.height-1-i*2], 
-                        outline=(147, 112, 219, alpha_val), width=2)
-        
-        return Image.alpha_composite(spectral, glow)
-
-    def _draw_custom_stars(self, draw, center_x, y, star_count, mutation=None):
-        """Draw enhanced stars with mutation effects"""
-        star_spacing = 35
-        start_x = center_x - (star_count - 1) * star_spacing // 2
-        
-        for i in range(star_count):
-            x = start_x + i * star_spacing
-            
-            if mutation:
-                self._draw_mutation_star(draw, x, y, 12, mutation)
-            else:
-                self._draw_star(draw, x, y, 12)
-
-    def _draw_mutation_star(self, draw, x, y, size, mutation):
-        """Draw star with mutation effects"""
-        color = self.mutations[mutation]["color"]
-        
-        # Convert hex to RGB
-        hex_color = color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        
-        # Draw enhanced star
-        if mutation == "rainbow":
-            # Rainbow star
-            colors = [(255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (0, 0, 255), (128, 0, 128)]
-            color = random.choice(colors)
-        else:
-            color = (r, g, b)
-        
-        # Draw star with glow
-        for glow_size in range(size + 5, size - 1, -1):
-            alpha = max(50, 255 - (size + 5 - glow_size) * 50)
-            self._draw_star_shape(draw, x, y, glow_size, (*color, alpha))
-
-    def _draw_star_shape(self, draw, x, y, size, color):
-        """Draw a 5-pointed star shape"""
-        points = []
-        for i in range(10):
-            angle = math.radians(i * 36 - 90)
-            radius = size if i % 2 == 0 else size * 0.4
-            px = x + radius * math.cos(angle)
-            py = y + radius * math.sin(angle)
-            points.append((px, py))
-        
-        draw.polygon(points, fill=color)
-
-    def _draw_star(self, draw, x, y, size):
-        """Draw a 5-pointed star"""
-        import math
-        
-        # Calculate star points
-        points = []
-        for i in range(10):
-            angle = (i * math.pi) / 5
-            if i % 2 == 0:
-                # Outer points
-                px = x + size * math.cos(angle - math.pi/2)
-                py = y + size * math.sin(angle - math.pi/2)
-            else:
-                # Inner points
-                px = x + (size * 0.4) * math.cos(angle - math.pi/2)
-                py = y + (size * 0.4) * math.sin(angle - math.pi/2)
-            points.append((px, py))
-        
-        # Draw star with gold color and black outline
-        draw.polygon(points, fill='#FFD700', outline='black', width=2)
-
-    def _draw_text_with_shadow(self, draw, position, text, font, color, shadow_color='black'):
-        """Draw text with shadow for better visibility"""
-        x, y = position
-        
-        # Draw shadow (offset by 2 pixels)
-        draw.text((x-1, y-1), text, font=font, fill=shadow_color, anchor="mm")
-        draw.text((x+1, y+1), text, font=font, fill=shadow_color, anchor="mm")
-        
-        # Draw main text
-        draw.text((x, y), text, font=font, fill=color, anchor="mm")
+    async def _get_profile_bytes(self, player_data):
+        """Avatar bytes for a player, downloaded once and cached"""
+        profile_cache_key = player_data['user_id']
+        cached = self._profile_cache.get(profile_cache_key)
+        if cached is not None:
+            return cached
+        try:
+            resp = await http_client.get(player_data['profile_picture'])
+            if resp.status == 200:
+                self._profile_cache[profile_cache_key] = resp.body
+                return resp.body
+        except Exception:
+            pass
+        return None
 
-    def _draw_mutation_border(self, card, mutation, border_width):
-        """Draw mutation-specific border"""
-        draw = ImageDraw.Draw(card)
-        color = self.mutations[mutation]["color"]
-        
-        # Draw multiple border lines for glow effect
-        for i in range(border_width):
-            alpha = int(255 * (1 - i / border_width))
-            draw.rectangle([i, i, card.width-1-i, card.height-1-i], outline=color, width=1)
+    def cache_stats(self):
+        """Counters for every in-memory cache and the shared HTTP pool, for the admin stats command"""
+        return {
+            'avatars': self._profile_cache.info(),
+            'rendered_cards': self.card_cache.info(),
+            'render_workers': self.render_service.cache_info(),
+            'http': http_client.stats(),
+        }
 
-    def _apply_mutation_overlay(self, card, mutation):
-        """Apply final mutation overlay effects"""
-        effect = self.mutations[mutation]["effect"]
-        
-        overlay = Image.new('RGBA', card.size, (0, 0, 0, 0))
-        
-        if effect == "cosmic_swirl":
-            # Cosmic sparkle effect
-            draw = ImageDraw.Draw(overlay)
-            for _ in range(100):
-                x = random.randint(0, card.width)
-                y = random.randint(0, card.height)
-                size = random.randint(1, 3)
-                alpha = random.randint(100, 200)
-                draw.ellipse([x-size, y-size, x+size, y+size], 
-                           fill=(255, 255, 255, alpha))
-                
-        elif effect == "rainbow_border":  # Changed from "rainbow_explosion"
-            # Rainbow sparkle effect
-            import colorsys
-            draw = ImageDraw.Draw(overlay)
-            for _ in range(50):
-                x = random.randint(0, card.width)
-                y = random.randint(0, card.height)
-                size = random.randint(1, 4)
-                
-                # Random rainbow color
-                hue = random.uniform(0, 360)
-                r, g, b = colorsys.hsv_to_rgb(hue / 360.0, 1.0, 1.0)
-                r, g, b = int(r * 255), int(g * 255), int(b * 255)
-                
-                draw.ellipse([x-size, y-size, x+size, y+size], 
-                        fill=(r, g, b, 150))
-        
-        elif effect == "immortal_flame":
-            # Minimal flame sparkles only
-            draw = ImageDraw.Draw(overlay)
-            for _ in range(15):  # Reduced from 100+
-                x = random.randint(0, card.width)
-                y = random.randint(card.height//2, card.height)  # Only bottom half
-                size = random.randint(2, 5)
-                draw.ellipse([x-size, y-size, x+size, y+size], 
-                        fill=(255, 100, 0, 120))
-                
-        elif effect == "flashback_icon":
-            # Golden sparkle effect for flashback cards
-            draw = ImageDraw.Draw(overlay)
-            for _ in range(30):
-                x = random.randint(0, card.width)
-                y = random.randint(0, card.height)
-                size = random.randint(1, 3)
-                alpha = random.randint(120, 200)
-                draw.ellipse([x-size, y-size, x+size, y+size], 
-                           fill=(255, 215, 0, alpha))  # Golden sparkles
-        
-        # Always ensure text is above effects by drawing text last
-        if overlay:
-            card = Image.alpha_composite(card, overlay)
-        
-        return card
+    async def create_showcase_collage(self, card_pngs):
+        """Stitch rendered cards into the showcase layout off the event loop"""
+        return await self.render_service.render_collage(card_pngs)
 
     # ACHIEVEMENT SYSTEM
     def check_and_award_achievements(self, user_data, user_id):
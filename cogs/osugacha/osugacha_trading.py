@@ -4,6 +4,7 @@ from discord import app_commands
 import time
 import asyncio
 from utils.helpers import *
+from utils.tracked import track
 from utils.config import *
 
 # Import all the configuration and system
@@ -71,7 +72,7 @@ class OsuGachaTradingCog(commands.Cog, name="Osu Gacha Trading"):
         """Get user's gacha data"""
         user_id_str = str(user_id)
         if user_id_str not in self.bot.osu_gacha_data:
-            self.bot.osu_gacha_data[user_id_str] = {
+            self.bot.osu_gacha_data[user_id_str] = track({
                 "currency": GAME_CONFIG["default_starting_coins"],
                 "cards": {},
                 "crates": {},
@@ -86,7 +87,7 @@ class OsuGachaTradingCog(commands.Cog, name="Osu Gacha Trading"):
                     "bg_games_won": 0,
                     "bg_games_played": 0
                 }
-            }
+            })
             save_json(FILE_PATHS["gacha_data"], self.bot.osu_gacha_data)
 
         # Add confirmation setting to existing users who don't have it
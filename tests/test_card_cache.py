@@ -0,0 +1,48 @@
+"""Rendered card cache keys and writes"""
+
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from cogs.osugacha.osugacha_card_cache import RenderedCardCache, card_cache_key
+
+
+def test_concurrent_writes_of_one_card(tmp_path):
+    cache = RenderedCardCache(str(tmp_path), max_bytes=1024 * 1024, hot_max_bytes=1024 * 1024)
+    key = "ab" + "0" * 62
+    pngs = [bytes([i]) * 50000 for i in range(8)]
+    start = threading.Barrier(len(pngs))
+    errors = []
+
+    def write(png):
+        start.wait()
+        try:
+            for _ in range(20):
+                cache._write_file(key, png)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(png,)) for png in pngs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with open(cache._path(key), 'rb') as f:
+        assert f.read() in pngs
+    assert os.listdir(os.path.dirname(cache._path(key))) == [f"{key}.png"]
+
+
+def test_key_follows_the_drawn_stats():
+    player = {'user_id': 7562902, 'username': 'mrekk', 'rank': 1, 'pp': 30000, 'accuracy': 98.5,
+              'country': 'AU', 'level': 110.2, 'play_count': 200000, 'profile_picture': 'https://a.ppy.sh/7562902'}
+    key = card_cache_key(player, 5, None, 1000, None, 1)
+    assert card_cache_key(dict(player), 5, None, 1000, None, 1) == key
+    for field, value in (('username', 'mrekk2'), ('rank', 2), ('pp', 30100), ('accuracy', 98.6),
+                         ('country', 'US'), ('level', 110.3), ('play_count', 200001),
+                         ('profile_picture', 'https://a.ppy.sh/7562902?1')):
+        assert card_cache_key(dict(player, **{field: value}), 5, None, 1000, None, 1) != key, field
@@ -0,0 +1,22 @@
+"""Daily Gemini quotas reset at midnight Pacific, whether that's PST or PDT"""
+
+from datetime import datetime, timezone
+
+from cogs.ai.gemini_scheduler import next_quota_reset
+
+
+def _utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_reset_follows_daylight_saving():
+    # July (PDT, UTC-7): midnight Pacific is 07:00 UTC
+    assert next_quota_reset(_utc(2026, 7, 1, 6, 30)) == _utc(2026, 7, 1, 7)
+    assert next_quota_reset(_utc(2026, 7, 1, 7, 30)) == _utc(2026, 7, 2, 7)
+    # January (PST, UTC-8): midnight Pacific is 08:00 UTC
+    assert next_quota_reset(_utc(2026, 1, 15, 7, 30)) == _utc(2026, 1, 15, 8)
+
+
+def test_reset_on_the_day_clocks_change():
+    # 2026-03-08 springs forward at 02:00 local, the next midnight is already PDT
+    assert next_quota_reset(_utc(2026, 3, 8, 12)) == _utc(2026, 3, 9, 7)
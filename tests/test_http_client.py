@@ -0,0 +1,27 @@
+"""Shared HTTP client auth handling"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from utils.http_client import HttpClient
+
+
+def test_missing_token_is_not_sent_as_bearer_none():
+    client = HttpClient()
+
+    async def no_token():
+        return None
+
+    async def fetch():
+        try:
+            await client.get('https://osu.ppy.sh/api/v2/rankings/osu/performance', auth=True)
+        finally:
+            await client.close()
+
+    client.configure_host('osu.ppy.sh', token_provider=no_token)
+    with pytest.raises(RuntimeError):
+        asyncio.run(fetch())
+    assert client.stats()['osu.ppy.sh']['requests'] == 0
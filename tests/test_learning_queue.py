@@ -0,0 +1,47 @@
+"""Queued learning is applied on every shutdown path"""
+
+import asyncio
+
+from cogs.ai.learning_queue import LearningQueue
+
+
+class RecordingMemory:
+    def __init__(self):
+        self.learned = []
+
+    async def learn_from_batch(self, snapshots):
+        await asyncio.sleep(0)
+        self.learned.extend(snapshots)
+
+
+def _fill(queue, count):
+    for i in range(count):
+        queue.submit(i)
+
+
+def test_signal_handler_drain_applies_everything_queued():
+    memory = RecordingMemory()
+    queue = LearningQueue(memory, batch_size=16, flush_interval=60)
+
+    async def main():
+        _fill(queue, 10)
+        await asyncio.sleep(0)      # the worker takes a first item and waits for the batch to fill
+        # a signal handler runs on the loop's thread without giving it control back
+        queue.drain_sync()
+
+    asyncio.run(main())
+    assert sorted(memory.learned) == list(range(10))
+    assert queue.depth == 0
+
+
+def test_stop_applies_the_batch_the_worker_was_filling():
+    memory = RecordingMemory()
+    queue = LearningQueue(memory, batch_size=4, flush_interval=60)
+
+    async def main():
+        _fill(queue, 2)
+        await asyncio.sleep(0)
+        await queue.stop()
+
+    asyncio.run(main())
+    assert sorted(memory.learned) == [0, 1]
@@ -0,0 +1,31 @@
+"""The lyrics shingle index finds the same lines as the old linear scan"""
+
+import pytest
+
+pytest.importorskip("discord")
+
+from cogs.moderation.lyrics import LyricsIndex
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _index(*lines):
+    index = LyricsIndex()
+    index.rebuild([{'title': 'song', 'artist': 'artist', 'lyrics': list(lines)}], _normalize)
+    return index
+
+
+def test_message_shorter_than_a_shingle_finds_longer_lines():
+    index = _index("I love you", "and I always will")
+    assert [line for _, _, line in index.candidates("love you")] == ["i love you"]
+
+
+def test_short_runs_are_unindexed_with_the_song():
+    index = LyricsIndex()
+    song = {'title': 'song', 'artist': 'artist', 'lyrics': ["I love you"]}
+    index.add_song(song, _normalize)
+    index.remove_song(song)
+    assert index.candidates("love you") == []
+    assert not index._short_postings
@@ -0,0 +1,17 @@
+"""Cached media descriptions are kept per prompt"""
+
+import pytest
+
+pytest.importorskip("discord")
+
+from cogs.ai.media_cache import MediaCache, content_key, url_key
+
+
+def test_descriptions_are_kept_per_prompt(tmp_path):
+    cache = MediaCache(str(tmp_path / "media.json"))
+    cache.put(content_key("image", "abc", "Describe this image."), "a cat")
+    cache.link(url_key("https://tenor.com/cat.gif"), "abc")
+
+    assert cache.resolve(url_key("https://tenor.com/cat.gif"), "image", "Describe this image.") == "a cat"
+    assert cache.resolve(url_key("https://tenor.com/cat.gif"), "image", "Describe this GIF or meme.") is None
+
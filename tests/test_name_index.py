@@ -0,0 +1,38 @@
+"""Name index lookups"""
+
+from cogs.ai.name_index import NameIndex
+
+
+def _index():
+    index = NameIndex()
+    index.rebuild({
+        '1': {'basic_info': {'name': 'Mikasa', 'username': 'ackerman'}},
+        '2': {'basic_info': {'nickname': 'Kira'}},
+        '3': {'basic_info': {'display_name': 'Levi'}},
+    })
+    return index
+
+
+def test_short_query_matches_inside_names():
+    index = _index()
+    assert index.search('ik') == ['1']
+    assert index.search('K') == ['1', '2']
+    assert index.search('vi') == ['3']
+    assert index.search('zz') == []
+
+
+def test_short_query_follows_updates():
+    index = _index()
+    index.update('3', {'display_name': 'Erwin'})
+    index.update('4', {'name': 'Hange'})
+    assert index.search('vi') == []
+    assert index.search('wi') == ['3']
+    assert index.search('ng') == ['4']
+    index.remove('4')
+    assert index.search('ng') == []
+
+
+def test_long_query_matches_inside_names():
+    index = _index()
+    assert index.search('kerm') == ['1']
+    assert index.search('ira') == ['2']
@@ -0,0 +1,28 @@
+"""Flushing store sections through the persistence scheduler"""
+
+import asyncio
+
+from utils.persistence import PersistenceScheduler
+from utils.storage import SQLiteStore, StoreDict
+
+
+def test_plain_store_dict_flushes_through_scheduler(tmp_path):
+    store = SQLiteStore(str(tmp_path / "izumi.db"))
+    xp_data = StoreDict(store, "xp_data", tracked=True)
+    birthdays = StoreDict(store, "birthdays")
+    scheduler = PersistenceScheduler(coalesce_delay=0)
+    scheduler.register_store("xp_data", xp_data)
+    scheduler.register_store("birthdays", birthdays)
+
+    xp_data["123"] = {"456": {"xp": 10, "level": 1}}
+    birthdays["456"] = "2000-01-01"
+
+    written = asyncio.run(scheduler.flush())
+
+    assert written == 2
+    assert scheduler.stats["errors"] == 0
+    assert not scheduler.has_dirty()
+    assert store.get("xp_data", "123") == {"456": {"xp": 10, "level": 1}}
+    assert store.get("birthdays", "456") == "2000-01-01"
+    scheduler.shutdown()
+    store.close()
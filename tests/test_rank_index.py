@@ -0,0 +1,44 @@
+"""Crate range tables keep every configured rank range rollable"""
+
+import random
+
+import pytest
+
+from cogs.osugacha.osugacha_rank_index import RangeTable, compile_range_tables
+
+
+def _probabilities(table: RangeTable):
+    previous = 0.0
+    for range_data, cumulative in zip(table.ranges, table.cumulative):
+        yield range_data, (cumulative - previous) / table.total
+        previous = cumulative
+
+
+def test_tiny_weights_keep_their_share():
+    ranges = [{"min": 1001, "max": 10000, "weight": 99.9998}, {"min": 1, "max": 1, "weight": 0.0002}]
+    table = RangeTable(ranges)
+    assert table.ranges == ranges
+    probabilities = dict((r["min"], p) for r, p in _probabilities(table))
+    assert probabilities[1] == pytest.approx(0.0002 / 100)
+
+
+def test_pick_never_runs_past_the_table():
+    table = RangeTable([{"min": 1, "max": 1, "weight": 0.3}, {"min": 2, "max": 2, "weight": 0.7}])
+
+    class EdgeRandom:
+        def random(self):
+            return 1.0 - 2 ** -53
+
+    assert table.pick(EdgeRandom())["min"] == 2
+    assert table.pick(random.Random(0)) in table.ranges
+
+
+def test_every_configured_range_has_nonzero_probability():
+    pytest.importorskip("dotenv")  # osugacha_config loads the .env file
+    from cogs.osugacha.osugacha_config import CRATE_CONFIG
+
+    for crate_type, table in compile_range_tables(CRATE_CONFIG).items():
+        configured = [r for r in CRATE_CONFIG[crate_type].get("rank_ranges", []) if r["weight"] > 0]
+        assert table.ranges == configured, crate_type
+        for range_data, probability in _probabilities(table):
+            assert probability > 0, (crate_type, range_data)
@@ -0,0 +1,38 @@
+"""Streamed replies split like whole ones and never leak context blocks"""
+
+from cogs.ai.response_splitter import IncrementalSplitter, preprocess_for_splitting, split_naturally
+
+
+def _stream(chunks):
+    splitter = IncrementalSplitter()
+    parts = []
+    for chunk in chunks:
+        parts.extend(splitter.feed(chunk))
+    return splitter, parts
+
+
+def test_leaked_memory_block_is_held_until_it_ends():
+    splitter, parts = _stream([
+        "hey!\n[INTERNAL CONTEXT - USER MEMORIES]\n",
+        "likes cats, lives in Ohio\n",
+        "birthday march 3\n[END MEMORIES]\n",
+    ])
+    parts += splitter.split_tail(splitter.finish())
+    assert parts == ["hey!"]
+
+
+def test_lines_after_a_dropped_block_still_stream():
+    splitter, parts = _stream([
+        "hey!\n[INTERNAL CONTEXT - USER MEMORIES]\nlikes cats\n",
+        "[END MEMORIES]\nhow are you\n",
+        "doing today\n",
+    ])
+    assert parts == ["hey!", "how are you", "doing today"]
+    assert not any("cats" in part for part in parts + splitter.split_tail(splitter.finish()))
+
+
+def test_streamed_parts_match_the_whole_reply():
+    reply = "first line here\nsecond line\nthird one"
+    splitter, parts = _stream([reply[i:i + 4] for i in range(0, len(reply), 4)])
+    parts += splitter.split_tail(splitter.finish())
+    assert parts == split_naturally(preprocess_for_splitting(reply))
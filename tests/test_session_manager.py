@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from cogs.ai.session_manager import SessionManager, _text_content, content_text
+
+
+class FakeModel:
+    def start_chat(self, history=None):
+        return FakeChat(self, history)
+
+
+class FakeChat:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+
+class FakeUsage:
+    candidates_token_count = 30
+    prompt_token_count = 500
+
+
+class FakeResponse:
+    usage_metadata = FakeUsage()
+
+
+async def _no_summary(previous, transcript):
+    return None
+
+
+def _session_with_turns(manager, turns):
+    session = manager.new_session(FakeModel().start_chat())
+    for i in range(turns):
+        session["chat"].history += [_text_content("user", f"question {i}"), _text_content("model", f"answer {i}")]
+    manager.total_tokens(session)
+    return session
+
+
+def _send(chat, prompt, reply):
+    # what send_message_async leaves behind once the reply is in
+    chat.history += [_text_content("user", prompt), _text_content("model", reply)]
+
+
+def test_swapped_chat_gets_the_exchange_carried_over():
+    manager = SessionManager(_no_summary)
+    session = _session_with_turns(manager, 3)
+    sent_on, epoch = session["chat"], session["epoch"]
+
+    # a summary lands while the request is out
+    manager._install_summary(session, "they talked about questions")
+    _send(sent_on, "[context] question 3", "answer 3")
+    manager.record_turn(session, FakeResponse(), "question 3", chat=sent_on, epoch=epoch)
+
+    texts = [content_text(content) for content in session["chat"].history]
+    assert texts[-4:] == ["question 2", "answer 2", "question 3", "answer 3"]
+    ledger = session["turn_tokens"]
+    assert len(ledger) == len(texts)
+    assert ledger[-1] == FakeUsage.candidates_token_count
+    assert session["history_tokens"] == sum(ledger)
+
+
+def test_reset_during_request_drops_the_exchange():
+    manager = SessionManager(_no_summary)
+    session = _session_with_turns(manager, 2)
+    sent_on, epoch = session["chat"], session["epoch"]
+
+    manager.reset(session, FakeModel().start_chat())
+    _send(sent_on, "[context] question 2", "answer 2")
+    manager.record_turn(session, FakeResponse(), "question 2", chat=sent_on, epoch=epoch)
+
+    assert session["chat"].history == []
+    assert session["turn_tokens"] == []
@@ -0,0 +1,156 @@
+"""
+Bounded Cache for Izumi
+Dict-like LRU cache with optional TTL and byte-size limits, plus hit/miss/eviction counters
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Rough footprint used when we can't tell (fonts, small dicts, ...)
+DEFAULT_ENTRY_SIZE = 1024
+
+_MISSING = object()
+
+
+def estimate_size(value) -> int:
+    """Approximate in-memory size of a cached value in bytes"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    # Pillow images: decoded pixel buffer, not the compressed file size
+    size = getattr(value, 'size', None)
+    getbands = getattr(value, 'getbands', None)
+    if getbands is not None and isinstance(size, tuple) and len(size) == 2:
+        return size[0] * size[1] * len(getbands())
+    return DEFAULT_ENTRY_SIZE
+
+
+class BoundedCache:
+    """
+    Least-recently-used cache bounded by entry count and/or total bytes.
+
+    Entries older than `ttl` seconds are treated as missing and dropped on
+    access or by `expire()`. Sizes come from `sizeof` (estimate_size by default)
+    so Pillow images are charged for their pixel buffers. Supports the dict
+    operations the old plain-dict caches were used with.
+    """
+
+    def __init__(self, name: str, max_items: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, sizeof: Callable[[Any], int] = estimate_size):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self._data = OrderedDict()   # key -> (value, size, stored_at), oldest first
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _drop(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._data and (
+            (self.max_items is not None and len(self._data) > self.max_items) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.stats['evictions'] += 1
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return default
+        if self._expired(entry[2], time.time()):
+            self._drop(key)
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry[0]
+
+    def set(self, key, value, stored_at: Optional[float] = None):
+        """Store `value`; `stored_at` keeps the original age when reloading a saved cache"""
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # would evict everything else and still not fit
+            return
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (value, size, stored_at if stored_at is not None else time.time())
+        self._bytes += size
+        self._evict()
+
+    def pop(self, key, default=None):
+        if key not in self._data:
+            return default
+        value = self._data[key][0]
+        self._drop(key)
+        return value
+
+    def expire(self) -> int:
+        """Drop every entry past its TTL, returns how many were removed"""
+        if self.ttl is None:
+            return 0
+        now = time.time()
+        stale = [key for key, (_, _, stored_at) in self._data.items() if self._expired(stored_at, now)]
+        for key in stale:
+            self._drop(key)
+        self.stats['expirations'] += len(stale)
+        return len(stale)
+
+    def items(self):
+        """(key, value, stored_at) for live entries, least recently used first"""
+        now = time.time()
+        return [(key, value, stored_at) for key, (value, _, stored_at) in self._data.items()
+                if not self._expired(stored_at, now)]
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    def __contains__(self, key) -> bool:
+        # membership checks don't count as hits or refresh recency
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry[2], time.time())
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._drop(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def info(self) -> Dict:
+        """Sizes and counters for admin/debug output"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return dict(
+            self.stats,
+            entries=len(self._data),
+            mb=round(self._bytes / 1024 / 1024, 2),
+            hit_rate=round(self.stats['hits'] / lookups * 100, 1) if lookups else 0.0,
+        )
@@ -29,9 +29,139 @@ LEVEL_ROLES_FILE = os.path.join(DATA_FOLDER, "level_roles.json")
 REMINDERS_FILE = os.path.join(DATA_FOLDER, "reminders.json")
 IZUMI_MEMORIES_FILE = os.path.join(DATA_FOLDER, "izumi_memories.json")
 IZUMI_SELF_FILE = os.path.join(DATA_FOLDER, "izumi_self.json")
+OSU_GACHA_FILE = os.path.join(DATA_FOLDER, "osu_gacha.json")
+REACTION_ROLES_FILE = os.path.join(DATA_FOLDER, "reaction_roles.json")
+AUTO_ROLES_FILE = os.path.join(DATA_FOLDER, "auto_roles.json")
+
+# Embedded storage - bot data lives here as one record per guild/user.
+# The json files above are only read once to migrate into it.
+STORAGE_FILE = os.path.join(DATA_FOLDER, "izumi.db")
+STORAGE_SECTIONS = {
+    "xp_data": XP_DATA_FILE,
+    "birthdays": BIRTHDAYS_FILE,
+    "warnings": WARNINGS_FILE,
+    "birthday_notifications": BIRTHDAY_NOTIFICATIONS_FILE,
+    "level_roles": LEVEL_ROLES_FILE,
+    "reminders": REMINDERS_FILE,
+    "osu_gacha_data": OSU_GACHA_FILE,
+    "reaction_roles": REACTION_ROLES_FILE,
+    "auto_roles": AUTO_ROLES_FILE,
+}
 
 ITEMS_PER_PAGE = 10
 
+# Shared HTTP client (utils/http_client.py) - one connection pool for the whole bot
+HTTP_CONFIG = {
+    "pool_limit": 100,            # total open connections
+    "per_host_limit": 16,         # open connections per host
+    "keepalive_timeout": 60,      # seconds an idle connection is kept for reuse
+    "dns_cache_seconds": 300,
+    "timeout": 30,                # default total request timeout in seconds
+    "max_retries": 3,             # retries after a 429
+    "default_retry_after": 5,     # backoff when a 429 has no Retry-After header
+}
+
+# AI learning queue (cogs/ai/learning_queue.py) - message learning runs off the reply path
+LEARNING_QUEUE_CONFIG = {
+    "max_size": 5000,          # queued messages before new ones are dropped
+    "batch_size": 200,         # messages applied per micro-batch
+    "flush_interval": 0.5,     # seconds to wait for a batch to fill up
+    "sample_watermark": 2000,  # above this depth only a sample of messages is kept
+    "sample_rate": 0.25,       # fraction kept while above the watermark
+}
+
+# History training (cogs/ai/history_trainer.py) - !train / !trainall backfill learning from old messages
+HISTORY_TRAINING_CONFIG = {
+    "fetch_concurrency": 4,    # channels fetched at once, discord.py waits out each route's rate limit itself
+    "queue_size": 2000,        # fetched messages waiting to be learned before fetchers pause
+    "batch_size": 200,         # messages applied per learn_from_batch call
+    "checkpoint_batches": 5,   # batches between saving profiles and the channel checkpoints
+    "status_interval": 5.0,    # seconds between status message edits
+}
+
+# AI context section cache (cogs/ai/context_builder.py) - rendered profile sections reused until the profile changes
+CONTEXT_CACHE_CONFIG = {
+    "max_items": 2000,   # cached (user, section) fragments
+    "ttl": 600,          # seconds, also catches edits made outside the learning pipeline
+}
+
+# AI user profiles (cogs/ai/unified_memory.py) - one store record per user, only recently used ones kept in RAM
+PROFILE_STORE_CONFIG = {
+    "namespace": "ai_users",
+    "max_resident": 1000,           # profiles kept loaded before least recently used ones are evicted
+    "idle_seconds": 1800,           # unused this long = evicted on the next sweep
+    "min_resident_seconds": 120,    # never evict a profile used more recently than this, even over max_resident
+}
+
+# Top-k counters (cogs/ai/heavy_hitters.py) - Space-Saving summaries for vocabulary and server culture
+TOP_K_CONFIG = {
+    "capacity": {
+        "word_frequency": 50,       # per user
+        "emoji_usage": 20,          # per user
+        "common_phrases": 30,       # per guild
+        "recurring_topics": 50,     # per guild
+    },
+    "cached_sketches": 4000,        # heap indexes kept in memory, rebuilt from the stored dicts when evicted
+}
+
+# Gemini models, best first - calls fall back down this list
+GEMINI_MODEL_HIERARCHY = [
+    "gemini-2.5-flash",
+    "gemini-2.5-flash-lite",
+    "gemini-2.5-pro",
+    "gemini-2.0-flash",
+    "gemini-2.0-flash-lite",
+    "gemini-1.5-flash",
+    "gemini-1.5-flash-8b",
+]
+
+# Gemini request scheduler (cogs/ai/gemini_scheduler.py) - quotas are learned from 429 responses
+GEMINI_SCHEDULER_CONFIG = {
+    "max_concurrency": 4,           # Gemini calls in flight at once
+    "max_wait": {0: 15, 1: 5, 2: 120},  # seconds a call waits for a model, by priority (mention/conversation/background)
+    "rate_limit_cooldown": 60,      # model skipped this long after a 429 without a retry delay
+    "breaker_threshold": 3,         # consecutive errors before a model is skipped
+    "breaker_cooldown": 30,         # first skip period, doubles on each further failure
+    "breaker_max_cooldown": 600,
+    "daily_reset_timezone": "America/Los_Angeles",  # daily quotas reset at midnight Pacific (PST or PDT)
+}
+
+# Gemini chat sessions (cogs/ai/session_manager.py) - old turns are summarized instead of wiping the session
+GEMINI_SESSION_CONFIG = {
+    "summarize_at": 6000,               # history tokens before old turns are folded into the summary
+    "max_tokens": 10000,                # hard cap, the verbatim window shrinks below this if it has to
+    "keep_turns": 12,                   # newest history entries (6 exchanges) always kept verbatim
+    "summary_batch": 12,                # entries allowed past the window before they're summarized anyway
+    "transcript_turn_chars": 500,       # per-turn text sent to the summarizer
+    "summary_model": "gemini-2.5-flash-lite",
+    "summary_max_tokens": 300,          # output cap for one summary
+}
+
+# Media analysis (cogs/ai/media_analyzer.py) - attachments, embeds and YouTube, kept off the event loop
+MEDIA_ANALYSIS_CONFIG = {
+    "max_concurrency": 2,               # media jobs (download + analysis) running at once
+    "executor_workers": 2,              # threads for file reads and Gemini File API uploads
+    "job_timeout": 180,                 # seconds for one job, waiting for a slot included
+    "call_timeout": 90,                 # seconds for one Gemini request
+    "download_timeout": 60,
+    "chunk_size": 64 * 1024,            # download chunk streamed to the temp file
+    "inline_max_mb": 15,                # bigger files go through the File API (inline requests cap at 20MB)
+    "upload_poll_interval": 2,          # seconds between File API processing checks
+    "max_mb": {"image": 20, "video": 100, "audio": 50, "document": 20},
+    "text_chars": 10000,                # characters of a .txt/.md document sent for a summary
+}
+
+# Streamed replies (cogs/ai/response_splitter.py) - long answers start going out while the rest is generated
+RESPONSE_STREAMING_CONFIG = {
+    "enabled": True,                    # False = wait for the whole reply, then split and send it
+}
+
+# Media analysis cache (cogs/ai/media_cache.py) - reposted images/files/videos reuse the stored description
+MEDIA_CACHE_CONFIG = {
+    "max_items": 5000,                  # descriptions plus attachment/URL aliases, least recently used evicted
+    "ttl": 30 * 24 * 3600,              # seconds an analysis is reused (30 days)
+}
+
 # YouTube video analysis settings
 YOUTUBE_ANALYSIS_ENABLED = True  # Set to False to disable YouTube analysis
 YOUTUBE_DOWNLOAD_MODE = "audio"  # "audio" (default, faster/cheaper) or "video" (full analysis)
@@ -4,6 +4,8 @@ import os
 import math
 from datetime import datetime, timezone
 from utils.config import *
+from utils.storage import StoreDict, atomic_write_json
+from utils.tracked import track
 
 def load_json(file_path):
     """Loads JSON data from a file."""
@@ -22,11 +24,14 @@ def load_json(file_path):
 def save_json(filename, data):
     """Save data to JSON file with error handling"""
     try:
+        # Store-backed sections only write the records that changed, the path is legacy
+        if isinstance(data, StoreDict):
+            data.save()
+            return
+
         # Create a clean copy of the data to avoid circular references
         clean_data = deep_clean_data(data)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(clean_data, f, indent=2, ensure_ascii=False, default=str)
+        atomic_write_json(filename, clean_data, indent=2)
     except Exception as e:
         print(f"An unexpected error occurred while saving {filename}: {e}")
 
@@ -200,13 +205,13 @@ def is_birthday_today_extended(month, day, birth_year=None):
 def get_guild_xp_data(xp_data_dict, guild_id):
     guild_id_str = str(guild_id)
     if guild_id_str not in xp_data_dict:
-        xp_data_dict[guild_id_str] = {}
+        xp_data_dict[guild_id_str] = track({})
     return xp_data_dict[guild_id_str]
 
 def get_user_xp_entry(guild_xp_data, user_id):
     user_id_str = str(user_id)
     if user_id_str not in guild_xp_data:
-        guild_xp_data[user_id_str] = {"xp": 0, "level": 0, "last_message_timestamp": 0}
+        guild_xp_data[user_id_str] = track({"xp": 0, "level": 0, "last_message_timestamp": 0})
     return guild_xp_data[user_id_str]
 
 def calculate_level_info(xp):
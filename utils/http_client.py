@@ -0,0 +1,252 @@
+"""
+Shared HTTP Client for Izumi
+One pooled aiohttp session for the whole bot with per-host rate limits, bearer auth and metrics
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils.config import HTTP_CONFIG
+
+
+class HttpResponse:
+    """Fully read response, so callers never have to keep a connection checked out"""
+
+    __slots__ = ('status', 'headers', 'body', 'url')
+
+    def __init__(self, status: int, headers, body: bytes, url: str):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class TokenBucket:
+    """Token bucket limiter that can be paused when the server says we're going too fast"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, seconds: float):
+        """Stop handing out tokens for `seconds` and drain the burst (used on 429)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class HostMetrics:
+    """Request counters and latency for one host"""
+
+    __slots__ = ('requests', 'errors', 'rate_limited', 'total_latency', 'max_latency')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float, error: bool = False, rate_limited: bool = False):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if error:
+            self.errors += 1
+        if rate_limited:
+            self.rate_limited += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'rate_limited': self.rate_limited,
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else 0.0,
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+        }
+
+
+class HostConfig:
+    """Per-host rate limit and auth settings"""
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1,
+                 token_provider: Optional[Callable[[], Awaitable[str]]] = None,
+                 on_unauthorized: Optional[Callable[[], None]] = None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.token_provider = token_provider
+        self.on_unauthorized = on_unauthorized
+
+
+class HttpClient:
+    """Bot-wide pooled HTTP client"""
+
+    def __init__(self, config: Dict = None):
+        self.config = dict(HTTP_CONFIG, **(config or {}))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._hosts: Dict[str, HostConfig] = {}
+        self.metrics: Dict[str, HostMetrics] = {}
+
+    def configure_host(self, host: str, rate: Optional[float] = None, burst: int = 1,
+                       token_provider: Optional[Callable[[], Awaitable[str]]] = None,
+                       on_unauthorized: Optional[Callable[[], None]] = None):
+        """Set the rate limit and bearer token source for requests to `host`"""
+        self._hosts[host] = HostConfig(rate, burst, token_provider, on_unauthorized)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily so it binds to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config['pool_limit'],
+                limit_per_host=self.config['per_host_limit'],
+                keepalive_timeout=self.config['keepalive_timeout'],
+                ttl_dns_cache=self.config['dns_cache_seconds'],
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.config['timeout']),
+            )
+        return self._session
+
+    async def request(self, method: str, url: str, *, auth: bool = False, params=None, data=None,
+                      headers: Dict = None, timeout: Optional[float] = None) -> HttpResponse:
+        """
+        Send a request through the shared pool and return the fully read response.
+
+        With auth=True the host's token provider supplies the bearer token; a 401
+        invalidates it and the request is retried once. 429s pause the host's bucket
+        for Retry-After seconds and are retried up to `max_retries` times.
+        """
+        host = urlsplit(url).hostname or ''
+        host_config = self._hosts.get(host)
+        metrics = self.metrics.setdefault(host, HostMetrics())
+        session = self._get_session()
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+
+        auth_retried = False
+        attempt = 0
+        while True:
+            request_headers = dict(headers or {})
+            if auth and host_config and host_config.token_provider:
+                token = await host_config.token_provider()
+                if not token:
+                    raise RuntimeError(f"No access token available for {host}")
+                request_headers['Authorization'] = f'Bearer {token}'
+
+            if host_config and host_config.bucket:
+                await host_config.bucket.acquire()
+
+            start = time.monotonic()
+            try:
+                async with session.request(method, url, params=params, data=data,
+                                           headers=request_headers, timeout=request_timeout) as resp:
+                    body = await resp.read()
+                    response = HttpResponse(resp.status, resp.headers, body, str(resp.url))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                metrics.record(time.monotonic() - start, error=True)
+                raise
+
+            rate_limited = response.status == 429
+            metrics.record(time.monotonic() - start, error=response.status >= 400, rate_limited=rate_limited)
+
+            if rate_limited and attempt < self.config['max_retries']:
+                attempt += 1
+                retry_after = self._retry_after(response)
+                print(f"⚠️ Rate limited by {host}, backing off {retry_after:.1f}s")
+                if host_config and host_config.bucket:
+                    host_config.bucket.penalize(retry_after)
+                else:
+                    await asyncio.sleep(retry_after)
+                continue
+
+            if response.status == 401 and auth and not auth_retried and host_config and host_config.on_unauthorized:
+                auth_retried = True
+                host_config.on_unauthorized()
+                continue
+
+            return response
+
+    def _retry_after(self, response: HttpResponse) -> float:
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', '')))
+        except ValueError:
+            return self.config['default_retry_after']
+
+    @asynccontextmanager
+    async def stream(self, url: str, *, timeout: Optional[float] = None) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        GET `url` through the shared pool without reading the body, for downloads
+        the caller streams to disk. The host's rate limit applies; 429s are
+        returned as they are rather than retried.
+        """
+        host = urlsplit(url).hostname or ''
+        host_config = self._hosts.get(host)
+        metrics = self.metrics.setdefault(host, HostMetrics())
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+
+        if host_config and host_config.bucket:
+            await host_config.bucket.acquire()
+
+        start = time.monotonic()
+        recorded = False
+        try:
+            async with self._get_session().get(url, timeout=request_timeout) as resp:
+                # latency up to the headers, the body's pace is up to the caller
+                metrics.record(time.monotonic() - start, error=resp.status >= 400, rate_limited=resp.status == 429)
+                recorded = True
+                yield resp
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if not recorded:
+                metrics.record(time.monotonic() - start, error=True)
+            raise
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host metrics for admin/debug output"""
+        return {host: metrics.to_dict() for host, metrics in self.metrics.items()}
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Shared instance - every cog goes through this pool
+http_client = HttpClient()
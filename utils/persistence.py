@@ -0,0 +1,183 @@
+"""
+Persistence Scheduler for Izumi
+Snapshots dirty data sections on the event loop and writes them on a worker thread
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any, Union
+from utils.storage import StoreDict, LazyStoreDict, atomic_write_json
+
+
+class StoreSection:
+    """A section backed by a StoreDict or LazyStoreDict - dirty state comes from the dict itself"""
+
+    def __init__(self, name: str, data: Union[StoreDict, LazyStoreDict]):
+        self.name = name
+        self.data = data
+
+    def is_dirty(self) -> bool:
+        return self.data.is_dirty
+
+    def snapshot(self):
+        return self.data.snapshot()
+
+    def write(self, snapshot) -> int:
+        return self.data.write_snapshot(snapshot)
+
+    def retry(self, snapshot):
+        records, deleted = snapshot
+        self.data.requeue(records, deleted)
+
+
+class JsonSection:
+    """A section saved as a whole JSON file, marked dirty explicitly or through dirty_func"""
+
+    def __init__(self, name: str, path: str, snapshot_func: Callable[[], Any],
+                 dirty_func: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.path = path
+        self.snapshot_func = snapshot_func
+        self.dirty_func = dirty_func
+        self.marked = False
+
+    def is_dirty(self) -> bool:
+        return self.marked or bool(self.dirty_func and self.dirty_func())
+
+    def snapshot(self):
+        self.marked = False
+        return self.snapshot_func()
+
+    def write(self, snapshot) -> int:
+        atomic_write_json(self.path, snapshot)
+        return 1
+
+    def retry(self, snapshot):
+        self.marked = True
+
+
+class PersistenceScheduler:
+    """
+    Coalesces save requests into one flush per dirty section.
+
+    Snapshots are taken on the event loop (the only place data is mutated) and
+    only for dirty sections. Encoding and disk writes happen on a single worker
+    thread so the gateway heartbeat and interaction acks never wait on disk.
+    """
+
+    def __init__(self, coalesce_delay: float = 5.0):
+        self.coalesce_delay = coalesce_delay
+        self.sections: Dict[str, Any] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="izumi-persist")
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+        self.last_flush_time = 0
+        self._closed = False
+        self.stats = {"flushes": 0, "records_written": 0, "errors": 0, "last_flush_ms": 0.0}
+
+    # ---- registration ----
+
+    def register_store(self, name: str, data: Union[StoreDict, LazyStoreDict]):
+        """Track a StoreDict - save_json() calls on it become coalesced requests"""
+        self.sections[name] = StoreSection(name, data)
+        data.on_save = lambda _data: self.request_flush()
+
+    def register_json(self, name: str, path: str, snapshot_func: Callable[[], Any],
+                      dirty_func: Optional[Callable[[], bool]] = None):
+        self.sections[name] = JsonSection(name, path, snapshot_func, dirty_func)
+
+    # ---- dirty tracking ----
+
+    def mark_dirty(self, *names: str):
+        for name in names:
+            section = self.sections.get(name)
+            if isinstance(section, JsonSection):
+                section.marked = True
+        self.request_flush()
+
+    def dirty_sections(self) -> List[str]:
+        return [name for name, section in self.sections.items() if section.is_dirty()]
+
+    def has_dirty(self) -> bool:
+        return any(section.is_dirty() for section in self.sections.values())
+
+    def request_flush(self):
+        """Schedule a coalesced flush, falls back to a synchronous one with no running loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+
+        if self._pending_flush and not self._pending_flush.done():
+            return
+        self._pending_flush = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.coalesce_delay)
+        await self.flush()
+
+    # ---- flushing ----
+
+    def _take_snapshots(self, names=None) -> list:
+        snapshots = []
+        for name, section in self.sections.items():
+            if names is not None and name not in names:
+                continue
+            if section.is_dirty():
+                try:
+                    snapshots.append((section, section.snapshot()))
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"❌ Error snapshotting {name}: {e}")
+        return snapshots
+
+    def _write_snapshots(self, snapshots) -> int:
+        written = 0
+        for section, snapshot in snapshots:
+            try:
+                written += section.write(snapshot)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ Error saving {section.name}: {e}")
+                # make sure the section is retried on the next flush
+                section.retry(snapshot)
+        return written
+
+    async def flush(self, names=None) -> int:
+        """Snapshot dirty sections now and wait until they are on disk"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            snapshots = self._take_snapshots(names)
+            if not snapshots:
+                return 0
+            start = time.perf_counter()
+            if self._closed:
+                written = self._write_snapshots(snapshots)
+            else:
+                loop = asyncio.get_running_loop()
+                written = await loop.run_in_executor(self._executor, self._write_snapshots, snapshots)
+            self._record_flush(start, written)
+            return written
+
+    def flush_sync(self) -> int:
+        """Blocking flush for shutdown paths and code running outside the event loop"""
+        start = time.perf_counter()
+        written = self._write_snapshots(self._take_snapshots())
+        self._record_flush(start, written)
+        return written
+
+    def _record_flush(self, start: float, written: int):
+        self.stats["flushes"] += 1
+        self.stats["records_written"] += written
+        self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self.last_flush_time = time.time()
+
+    def shutdown(self):
+        """Finish queued writes, then flush whatever is still dirty"""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        self.flush_sync()
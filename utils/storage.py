@@ -0,0 +1,710 @@
+"""
+Embedded Storage Engine for Izumi
+Keeps bot data as one record per top-level key so saves only touch what changed
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, Tuple, Any, Optional
+from utils.tracked import TRANSIENT_KEYS, track, to_plain, adopt
+
+
+def encode_record(value) -> str:
+    """Serialize a single record compactly for storage"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def record_digest(encoded: str) -> str:
+    """Fingerprint an encoded record so unchanged records can be skipped"""
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def atomic_write_json(path: str, data, indent=None):
+    """Write JSON via temp file + fsync + rename so a crash never leaves a truncated file"""
+    folder = os.path.dirname(path) or '.'
+    tmp_path = os.path.join(folder, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if indent is None:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            else:
+                json.dump(data, f, indent=indent, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class Store:
+    """Key/value store API - one namespace per data section, one record per key"""
+
+    def load_namespace(self, namespace: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get(self, namespace: str, key: str, default=None):
+        raise NotImplementedError
+
+    def upsert_many(self, namespace: str, items: Iterable[Tuple[str, str]]):
+        """Write already-encoded records"""
+        raise NotImplementedError
+
+    def delete_many(self, namespace: str, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def get_meta(self, key: str, default=None):
+        raise NotImplementedError
+
+    def set_meta(self, key: str, value: str):
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> set:
+        return set(self.load_namespace(namespace))
+
+    def iter_namespace(self, namespace: str, batch_size: int = 200) -> Iterator[Tuple[str, Any]]:
+        """Yield (key, record) pairs without loading the whole namespace at once"""
+        yield from self.load_namespace(namespace).items()
+
+    def select(self, namespace: str, path: Tuple[str, ...]) -> Dict[str, Any]:
+        """{key: value at path} for every record where the path holds a value"""
+        result = {}
+        for key, record in self.iter_namespace(namespace):
+            value = _walk(record, path)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def close(self):
+        pass
+
+    def upsert(self, namespace: str, key: str, value):
+        """Insert or replace a single record"""
+        self.upsert_many(namespace, [(key, encode_record(value))])
+
+    def delete(self, namespace: str, key: str):
+        self.delete_many(namespace, [key])
+
+
+class SQLiteStore(Store):
+    """SQLite backend running in WAL mode so writes are small and crash-safe"""
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def load_namespace(self, namespace: str) -> Dict[str, Any]:
+        data = {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM records WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        for key, value in rows:
+            try:
+                data[key] = json.loads(value)
+            except json.JSONDecodeError as e:
+                print(f"❌ Skipping corrupt record {namespace}/{key}: {e}")
+        return data
+
+    def get(self, namespace: str, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM records WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def upsert_many(self, namespace: str, items: Iterable[Tuple[str, str]]):
+        rows = [(namespace, key, encoded) for key, encoded in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO records (namespace, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete_many(self, namespace: str, keys: Iterable[str]):
+        rows = [(namespace, key) for key in keys]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "DELETE FROM records WHERE namespace = ? AND key = ?", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def keys(self, namespace: str) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM records WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        return {key for key, in rows}
+
+    def iter_namespace(self, namespace: str, batch_size: int = 200) -> Iterator[Tuple[str, Any]]:
+        # keyset pagination, the lock is only held while a batch is read
+        last_key = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, value FROM records WHERE namespace = ? AND key > ? ORDER BY key LIMIT ?",
+                    (namespace, last_key, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for key, value in rows:
+                try:
+                    yield key, json.loads(value)
+                except json.JSONDecodeError as e:
+                    print(f"❌ Skipping corrupt record {namespace}/{key}: {e}")
+            last_key = rows[-1][0]
+
+    def select(self, namespace: str, path: Tuple[str, ...]) -> Dict[str, Any]:
+        # json_extract reads the field inside SQLite, records are never decoded in Python
+        json_path = "$." + ".".join(path)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, json_extract(value, ?), json_type(value, ?) FROM records "
+                "WHERE namespace = ? AND json_valid(value)",
+                (json_path, json_path, namespace)
+            ).fetchall()
+        result = {}
+        for key, value, value_type in rows:
+            if value is None:
+                continue
+            result[key] = json.loads(value) if value_type in ('object', 'array') else value
+        return result
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+            self._conn.close()
+
+
+class StoreDict(dict):
+    """
+    Dict facade over one store namespace.
+
+    Cogs keep using it like the old JSON dict and flush() upserts only records
+    whose serialized content actually changed since the last write.
+
+    With tracked=True records are held in TrackedDict/TrackedList containers and
+    only records that were actually mutated are considered on flush. Otherwise
+    any top-level key that is read, written or deleted is re-checked.
+    """
+
+    def __init__(self, store: Store, namespace: str, tracked: bool = False):
+        super().__init__()
+        self.store = store
+        self.namespace = namespace
+        self.tracked = tracked
+        self._touched = set()
+        self._deleted = set()
+        self._opaque = set()
+        self._all_touched = False
+        self._write_lock = threading.Lock()
+        self.on_save = None
+        self._digests = {}
+
+        for key, value in store.load_namespace(namespace).items():
+            self._digests[key] = record_digest(encode_record(value))
+            if tracked:
+                value = adopt(track(value), self, key)
+            dict.__setitem__(self, key, value)
+
+    # ---- change tracking ----
+
+    def _mark(self, key):
+        """Called by tracked containers when a record is mutated"""
+        self._touched.add(key)
+
+    def _mark_opaque(self, key):
+        """Record holds plain containers we can't observe - re-check it whenever it is read"""
+        self._opaque.add(key)
+        self._touched.add(key)
+
+    def _touch(self, key):
+        self._touched.add(key)
+        self._deleted.discard(key)
+
+    def _on_read(self, key):
+        if not self.tracked or key in self._opaque:
+            self._touched.add(key)
+
+    def _forget(self, key):
+        self._touched.discard(key)
+        self._opaque.discard(key)
+        self._deleted.add(key)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        self._on_read(key)
+        return value
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            self._on_read(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        if self.tracked:
+            self._opaque.discard(key)
+            value = adopt(value, self, key)
+        dict.__setitem__(self, key, value)
+        self._touch(key)
+
+    def setdefault(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self[key] = default
+        return self[key]
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._forget(key)
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            self._forget(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._forget(key)
+        return key, value
+
+    def clear(self):
+        self._deleted.update(dict.keys(self))
+        self._touched.clear()
+        self._opaque.clear()
+        dict.clear(self)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def values(self):
+        self._on_bulk_read()
+        return dict.values(self)
+
+    def items(self):
+        self._on_bulk_read()
+        return dict.items(self)
+
+    def _on_bulk_read(self):
+        # Values handed out in bulk may be mutated anywhere, re-check what we can't observe
+        if self.tracked:
+            self._touched.update(self._opaque)
+        else:
+            self._all_touched = True
+
+    # ---- persistence ----
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._all_touched or self._touched or self._deleted)
+
+    def snapshot(self) -> Tuple[Dict[str, Any], set]:
+        """
+        Copy touched records and reset tracking.
+
+        Must run on the thread that mutates the data (the event loop); the copy
+        can then be encoded and written from any thread via write_snapshot().
+        """
+        keys = dict.keys(self) if self._all_touched else self._touched
+        records = {}
+        for key in list(keys):
+            if not dict.__contains__(self, key):
+                continue
+            value = dict.__getitem__(self, key)
+            if self.tracked and key not in self._opaque:
+                # tracked containers already dropped transient fields when they were set
+                records[key] = to_plain(value)
+            else:
+                records[key] = strip_transient(value)
+
+        deleted = set(self._deleted)
+        self._touched = set()
+        self._deleted = set()
+        self._all_touched = False
+        return records, deleted
+
+    def write_snapshot(self, snapshot: Tuple[Dict[str, Any], set]) -> int:
+        """Encode a snapshot and write only the records whose content changed"""
+        records, deleted = snapshot
+        with self._write_lock:
+            changed = []
+            digests = {}
+            for key, value in records.items():
+                encoded = encode_record(value)
+                digest = record_digest(encoded)
+                if self._digests.get(key) != digest:
+                    changed.append((key, encoded))
+                    digests[key] = digest
+
+            if changed:
+                self.store.upsert_many(self.namespace, changed)
+            if deleted:
+                self.store.delete_many(self.namespace, deleted)
+
+            # only remember what actually reached the store
+            self._digests.update(digests)
+            for key in deleted:
+                self._digests.pop(key, None)
+        return len(changed) + len(deleted)
+
+    def requeue(self, keys: Iterable[str], deleted: Iterable[str] = ()):
+        """Re-queue records for the next flush, e.g. after a failed write"""
+        self._touched.update(keys)
+        self._deleted.update(deleted)
+
+    def flush(self) -> int:
+        """Write changed records to the store now, returns number of records written"""
+        return self.write_snapshot(self.snapshot())
+
+    def save(self):
+        """Request a save - deferred to the persistence scheduler when one is attached"""
+        if self.on_save:
+            self.on_save(self)
+        else:
+            self.flush()
+
+
+class LazyStoreDict(MutableMapping):
+    """
+    Mapping over one store namespace that only keeps recently used records in RAM.
+
+    All keys are known up front, records are read from the store on first
+    access and kept in an LRU of resident records. Like an untracked StoreDict,
+    every record handed out is re-checked on the next flush and only written if
+    its content changed. Records are evicted once they have been idle for
+    `idle_seconds`, or sooner when more than `max_resident` are loaded, but
+    never while a change is waiting to be written.
+
+    `indexes` names small fields ({name: path}) kept for every key in
+    `self.index`, so scans like "who was active lately" don't load records.
+    Iterating items()/values() loads everything - use scan() to read all
+    records without keeping them.
+    """
+
+    def __init__(self, store: Store, namespace: str, max_resident: int = 1000,
+                 idle_seconds: float = 1800, min_resident_seconds: float = 60,
+                 indexes: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.store = store
+        self.namespace = namespace
+        self.max_resident = max_resident
+        self.idle_seconds = idle_seconds
+        self.min_resident_seconds = min_resident_seconds
+        self.indexes = indexes or {}
+
+        self._keys = store.keys(namespace)
+        self._resident: "OrderedDict[str, Any]" = OrderedDict()   # least recently used first
+        self._accessed: Dict[str, float] = {}
+        self._digests: Dict[str, str] = {}      # resident records only
+        self._touched = set()
+        self._deleted = set()
+        self._in_flight = set()                 # snapshotted but not written yet, not evictable
+        self._stale = set()                     # handed out since the indexes were last refreshed
+        self._write_lock = threading.Lock()
+        self.on_save = None
+        self.stats = {'loads': 0, 'evictions': 0}
+
+        self._index: Dict[str, Dict[str, Any]] = {
+            name: store.select(namespace, path) for name, path in self.indexes.items()
+        }
+
+    # ---- mapping ----
+
+    def _hit(self, key: str):
+        self._resident.move_to_end(key)
+        self._accessed[key] = time.time()
+        self._touched.add(key)
+        self._stale.add(key)
+
+    def _load(self, key: str):
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        self.stats['loads'] += 1
+        self._digests[key] = record_digest(encode_record(value))
+        self._resident[key] = value
+        self._reindex(key, value)
+        return value
+
+    def __getitem__(self, key):
+        if key not in self._resident:
+            if key not in self._keys:
+                raise KeyError(key)
+            self._load(key)
+        self._hit(key)
+        return self._resident[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+    def __setitem__(self, key, value):
+        self._keys.add(key)
+        self._deleted.discard(key)
+        self._resident[key] = value
+        self._hit(key)
+        self._reindex(key, value)
+
+    def __delitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        self._keys.discard(key)
+        self._drop(key)
+        self._touched.discard(key)
+        self._deleted.add(key)
+        self._stale.discard(key)
+        for index in self._index.values():
+            index.pop(key, None)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def resident_keys(self) -> list:
+        return list(self._resident)
+
+    def scan(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Every (key, record) pair, streamed from the store. Records that aren't
+        resident are decoded for the caller only, so changes to them are lost -
+        look the key up again to modify it.
+        """
+        seen = set()
+        for key, value in self.store.iter_namespace(self.namespace):
+            if key not in self._keys:
+                continue                    # deleted, not flushed yet
+            seen.add(key)
+            yield key, self._resident.get(key, value)
+        for key in list(self._resident):
+            if key not in seen and key in self._keys:
+                yield key, self._resident[key]
+
+    def select(self, *path: str) -> Dict[str, Any]:
+        """{key: value at path} for all records, resident ones read from RAM"""
+        result = self.store.select(self.namespace, path)
+        for key in self._deleted:
+            result.pop(key, None)
+        for key, value in self._resident.items():
+            field = _walk(value, path)
+            if field is None:
+                result.pop(key, None)
+            else:
+                result[key] = field
+        return result
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        """{index name: {key: value}}, caught up with records handed out since the last read"""
+        self._refresh_index()
+        return self._index
+
+    def _refresh_index(self):
+        for key in self._stale:
+            value = self._resident.get(key)
+            if value is not None:
+                self._reindex(key, value)
+        self._stale = set()
+
+    def _reindex(self, key: str, value):
+        for name, path in self.indexes.items():
+            field = _walk(value, path)
+            if field:
+                self._index[name][key] = field
+            else:
+                self._index[name].pop(key, None)
+
+    # ---- residency ----
+
+    def _drop(self, key: str):
+        self._resident.pop(key, None)
+        self._accessed.pop(key, None)
+        self._digests.pop(key, None)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Unload idle records whose changes are already written, returns how many"""
+        now = now if now is not None else time.time()
+        evicted = 0
+        for key in list(self._resident):
+            idle = now - self._accessed.get(key, 0)
+            over = len(self._resident) > self.max_resident
+            if idle < self.idle_seconds and (not over or idle < self.min_resident_seconds):
+                break   # everything after this was used more recently
+            if key in self._touched or key in self._in_flight:
+                continue
+            self._drop(key)
+            evicted += 1
+        self.stats['evictions'] += evicted
+        return evicted
+
+    # ---- persistence ----
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._touched or self._deleted)
+
+    def snapshot(self) -> Tuple[Dict[str, Any], set]:
+        """Copy touched records and reset tracking (event loop), then evict what's idle"""
+        records = {}
+        for key in self._touched:
+            value = self._resident.get(key)
+            if value is None:
+                continue
+            records[key] = strip_transient(value)
+            self._reindex(key, value)
+        deleted = set(self._deleted)
+        self._touched = set()
+        self._deleted = set()
+        self._in_flight.update(records)
+        self._refresh_index()   # catch up before anything is evicted
+        self.evict()
+        return records, deleted
+
+    def write_snapshot(self, snapshot: Tuple[Dict[str, Any], set]) -> int:
+        """Encode a snapshot and write only the records whose content changed"""
+        records, deleted = snapshot
+        with self._write_lock:
+            changed = []
+            digests = {}
+            for key, value in records.items():
+                encoded = encode_record(value)
+                digest = record_digest(encoded)
+                if self._digests.get(key) != digest:
+                    changed.append((key, encoded))
+                    digests[key] = digest
+
+            if changed:
+                self.store.upsert_many(self.namespace, changed)
+            if deleted:
+                self.store.delete_many(self.namespace, deleted)
+
+            for key, digest in digests.items():
+                if key in self._resident:
+                    self._digests[key] = digest
+        self._in_flight.difference_update(records)
+        return len(changed) + len(deleted)
+
+    def requeue(self, keys: Iterable[str], deleted: Iterable[str] = ()):
+        """Re-queue records for the next flush, e.g. after a failed write"""
+        keys = list(keys)
+        # still resident - in-flight records are never evicted
+        self._touched.update(keys)
+        self._in_flight.difference_update(keys)
+        self._deleted.update(deleted)
+
+    def flush(self) -> int:
+        """Write changed records to the store now, returns number of records written"""
+        return self.write_snapshot(self.snapshot())
+
+    def info(self) -> Dict:
+        return dict(self.stats, keys=len(self._keys), resident=len(self._resident), dirty=len(self._touched))
+
+
+def migrate_json_files(store: Store, sources: Dict[str, str], load_func=None) -> Dict[str, int]:
+    """
+    One-shot migration of legacy data/*.json files into the store.
+
+    sources maps namespace -> json path. Each namespace is only imported once;
+    the original file is left in place as a backup.
+    """
+    results = {}
+    for namespace, path in sources.items():
+        marker = f"migrated:{namespace}"
+        if store.get_meta(marker):
+            continue
+
+        count = 0
+        if os.path.exists(path):
+            if load_func:
+                data = load_func(path)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+            if isinstance(data, dict) and data:
+                items = []
+                for key, value in data.items():
+                    items.append((str(key), encode_record(strip_transient(value))))
+                store.upsert_many(namespace, items)
+                count = len(items)
+                print(f"📦 Migrated {count} records from {path} into storage ({namespace})")
+
+        store.set_meta(marker, path)
+        results[namespace] = count
+    return results
+
+
+def _walk(record, path: Tuple[str, ...]):
+    """Value at `path` inside nested dicts, None if any step is missing"""
+    for step in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(step)
+    return record
+
+
+def strip_transient(obj):
+    """Drop display-only fields from a record before it is stored"""
+    if isinstance(obj, dict):
+        return {k: strip_transient(v) for k, v in obj.items() if k not in TRANSIENT_KEYS}
+    if isinstance(obj, list):
+        return [strip_transient(item) for item in obj]
+    return obj
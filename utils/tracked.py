@@ -0,0 +1,206 @@
+"""
+Dirty-Tracking Containers for Izumi
+dict/list subclasses that report which top-level record a mutation belongs to
+"""
+
+from typing import Any
+
+# Fields that only exist for display and must never be persisted
+TRANSIENT_KEYS = ('display_count', 'all_cards', 'total_group_value', 'latest_obtained')
+
+
+def adopt(value, root, key):
+    """
+    Attach a value to a record before it is stored in a tracked container.
+
+    Tracked containers are re-owned in place so references held by callers keep
+    working. Plain containers are stored as-is (a copy would silently drop later
+    mutations made through the caller's reference), which makes the record
+    "opaque": the root falls back to treating it as dirty whenever it is read.
+    """
+    if isinstance(value, (TrackedDict, TrackedList)):
+        value._reown(root, key)
+    elif isinstance(value, (dict, list)) and root is not None:
+        root._mark_opaque(key)
+    return value
+
+
+class TrackedDict(dict):
+    """dict that marks its owning record dirty on every mutation"""
+
+    __slots__ = ('_root', '_key')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._root = None
+        self._key = None
+        for k, v in dict(*args, **kwargs).items():
+            if k not in TRANSIENT_KEYS:
+                dict.__setitem__(self, k, track(v))
+
+    def _reown(self, root, key):
+        self._root = root
+        self._key = key
+        for value in dict.values(self):
+            adopt(value, root, key)
+
+    def _changed(self):
+        if self._root is not None:
+            self._root._mark(self._key)
+
+    def __setitem__(self, k, v):
+        # transient display fields are dropped here instead of being filtered on every save
+        if k in TRANSIENT_KEYS:
+            return
+        dict.__setitem__(self, k, adopt(v, self._root, self._key))
+        self._changed()
+
+    def __delitem__(self, k):
+        dict.__delitem__(self, k)
+        self._changed()
+
+    def setdefault(self, k, default=None):
+        if k in TRANSIENT_KEYS:
+            return default
+        if not dict.__contains__(self, k):
+            dict.__setitem__(self, k, adopt(default, self._root, self._key))
+            self._changed()
+        return dict.__getitem__(self, k)
+
+    def pop(self, k, *default):
+        existed = dict.__contains__(self, k)
+        value = dict.pop(self, k, *default)
+        if existed:
+            self._changed()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            if k not in TRANSIENT_KEYS:
+                dict.__setitem__(self, k, adopt(v, self._root, self._key))
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return (dict, (to_plain(self),))
+
+    def __deepcopy__(self, memo):
+        return to_plain(self)
+
+
+class TrackedList(list):
+    """list that marks its owning record dirty on every mutation"""
+
+    __slots__ = ('_root', '_key')
+
+    def __init__(self, iterable=()):
+        super().__init__(track(v) for v in iterable)
+        self._root = None
+        self._key = None
+
+    def _reown(self, root, key):
+        self._root = root
+        self._key = key
+        for value in list.__iter__(self):
+            adopt(value, root, key)
+
+    def _changed(self):
+        if self._root is not None:
+            self._root._mark(self._key)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [adopt(v, self._root, self._key) for v in value]
+        else:
+            value = adopt(value, self._root, self._key)
+        list.__setitem__(self, index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._changed()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._changed()
+        return self
+
+    def append(self, value):
+        list.append(self, adopt(value, self._root, self._key))
+        self._changed()
+
+    def extend(self, values):
+        list.extend(self, [adopt(v, self._root, self._key) for v in values])
+        self._changed()
+
+    def insert(self, index, value):
+        list.insert(self, index, adopt(value, self._root, self._key))
+        self._changed()
+
+    def pop(self, index=-1):
+        value = list.pop(self, index)
+        self._changed()
+        return value
+
+    def remove(self, value):
+        list.remove(self, value)
+        self._changed()
+
+    def clear(self):
+        list.clear(self)
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        list.reverse(self)
+        self._changed()
+
+    def __reduce__(self):
+        return (list, (to_plain(self),))
+
+    def __deepcopy__(self, memo):
+        return to_plain(self)
+
+
+def track(value):
+    """
+    Convert freshly built data into tracked containers.
+
+    Use it when creating a new record that is stored and then read back, e.g.
+    `data[user_id] = track({...})`, so the record keeps precise tracking.
+    """
+    if isinstance(value, (TrackedDict, TrackedList)):
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(value)
+    if isinstance(value, list):
+        return TrackedList(value)
+    return value
+
+
+def to_plain(value) -> Any:
+    """Deep copy tracked (or plain) containers into plain dicts/lists"""
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in dict.items(value)}
+    if isinstance(value, list):
+        return [to_plain(v) for v in list.__iter__(value)]
+    return value